@@ -0,0 +1,107 @@
+"""
+bench_analitica.py — Analítica de ventas: NumPy vectorizado vs. bucles de Python.
+
+Genera N líneas de factura sintéticas (popularidad de productos tipo Zipf,
+~4 líneas por factura) y mide:
+
+- decodificar: buffer COPY binario (lo que envía PostgreSQL) → columnas NumPy
+- numpy:       servicios.servicio_analitica.calcular() (ABC, ticket, canasta)
+- python:      el mismo cálculo con dicts y bucles por fila, como se haría
+               recorriendo las filas de asyncpg. Es tan lento que se mide
+               sobre una muestra (--muestra-python) y se extrapola a N.
+
+No necesita base de datos.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_analitica --lineas 10000000
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar servicios/
+
+from repositorios.analitica.repositorio_analitica_postgresql import _DTYPE_LINEA, decodificar_copy
+from servicios.servicio_analitica import calcular
+
+
+def generar_copy(lineas: int, productos: int) -> bytes:
+    """Buffer con el formato exacto de COPY ... TO STDOUT (FORMAT binary)."""
+    aleatorio = np.random.default_rng(42)
+    filas = np.zeros(lineas, dtype=_DTYPE_LINEA)
+    filas["campos"] = 4
+    filas["_l1"] = filas["_l2"] = filas["_l3"] = 4
+    filas["_l4"] = 8
+    filas["factura"] = np.sort(aleatorio.integers(1, lineas // 4 + 2, lineas))
+    filas["producto"] = np.minimum(aleatorio.zipf(1.3, lineas) - 1, productos - 1)
+    filas["cantidad"] = aleatorio.integers(1, 20, lineas)
+    filas["centavos"] = filas["cantidad"] * aleatorio.integers(1_000, 5_000_000, lineas)
+    encabezado = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+    return encabezado + filas.tobytes() + (-1).to_bytes(2, "big", signed=True)
+
+
+def calcular_python(productos, factura, producto, cantidad, centavos, umbral_a, umbral_b):
+    """Mismas métricas con bucles por fila (referencia)."""
+    ingresos, unidades, lineas = defaultdict(int), defaultdict(int), defaultdict(int)
+    ticket, canasta = defaultdict(int), defaultdict(int)
+    for f, p, c, v in zip(factura, producto, cantidad, centavos):
+        ingresos[p] += v
+        unidades[p] += c
+        lineas[p] += 1
+        ticket[f] += v
+        canasta[f] += 1
+    total = sum(ingresos.values())
+    acumulado, clases = 0, {}
+    for p in sorted(range(len(productos)), key=lambda i: -ingresos[i]):
+        clases[p] = "A" if acumulado < umbral_a * total else "B" if acumulado < umbral_b * total else "C"
+        acumulado += ingresos[p]
+    tickets = sorted(ticket.values())
+    return {"total": total / 100, "facturas": len(tickets),
+            "ticket_mediana": tickets[len(tickets) // 2] / 100 if tickets else 0, "clases": clases}
+
+
+def medir(funcion, repeticiones: int = 3):
+    """(mejor tiempo en segundos, resultado)."""
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lineas", type=int, default=10_000_000)
+    parser.add_argument("--productos", type=int, default=5_000)
+    parser.add_argument("--muestra-python", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    productos = [(f"PR{i:05d}", f"Producto {i}") for i in range(args.productos)]
+    buffer = generar_copy(args.lineas, args.productos)
+    print(f"{args.lineas:,} líneas, {args.productos:,} productos, COPY binario: {len(buffer) / 2**20:,.0f} MB")
+
+    t_decodificar, columnas = medir(lambda: decodificar_copy(buffer))
+    t_numpy, resultado = medir(lambda: calcular(productos, columnas, 0.8, 0.95))
+
+    muestra = min(args.muestra_python, args.lineas)
+    listas = [columnas[c][:muestra].tolist() for c in ("factura", "producto", "cantidad", "centavos")]
+    t_python, _ = medir(lambda: calcular_python(productos, *listas, 0.8, 0.95), repeticiones=1)
+    t_python_total = t_python * args.lineas / muestra
+
+    print(f"{'decodificar COPY':<22}{t_decodificar * 1000:>12.0f} ms")
+    print(f"{'numpy (vectorizado)':<22}{t_numpy * 1000:>12.0f} ms")
+    print(f"{'python (por fila)':<22}{t_python_total * 1000:>12.0f} ms"
+          + (f"  (medido en {muestra:,} líneas y extrapolado)" if muestra < args.lineas else ""))
+    print(f"numpy es {t_python_total / t_numpy:.0f}x más rápido que el bucle de Python")
+    print("resumen:", resultado["resumen"])
+    print("clases:", resultado["clases"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+bench_autorizacion.py — Costo por petición de la autorización por rol y ruta.
+
+Genera un sistema sintético (rutas de la API, filas de 'ruta', roles,
+usuarios y permisos) y mide, por petición:
+
+- compilar:    armar la matriz de bits (solo al arrancar o al cambiar permisos)
+- decidir:     MatrizPermisos.decidir() → árbol de rutas + AND de máscaras
+- middleware:  MiddlewareAutorizacion completo (headers ASGI, métricas) menos
+               la misma app sin middleware
+- ingenuo:     lo que haría cada petición sin compilar: recorrer las rutas
+               de la API con regex y luego rutarol × roles del usuario
+- --bd:        la consulta con JOINs que haría cada petición contra PostgreSQL
+               (necesita DB_POSTGRES y las tablas del esquema)
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_autorizacion --recursos 100 --usuarios 10000
+    python -m benchmarks.bench_autorizacion --bd
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar servicios/
+
+from middlewares.autorizacion import MiddlewareAutorizacion
+from servicios.servicio_autorizacion import ArbolRutas, MatrizPermisos, permisos_rutas
+
+METODOS = ("GET", "POST", "PUT", "DELETE")
+
+
+def generar(recursos: int, roles: int, usuarios: int, aleatorio: random.Random):
+    """(rutas de la API, datos como los devuelve el repositorio, peticiones de prueba)."""
+    rutas_api = []
+    for i in range(recursos):
+        rutas_api += [
+            ({"GET", "POST"}, f"/api/recurso{i}/"),
+            ({"GET", "PUT", "DELETE"}, f"/api/recurso{i}/{{id}}"),
+            ({"GET"}, f"/api/recurso{i}/{{id}}/detalle"),
+            ({"GET"}, f"/api/recurso{i}/buscar"),
+        ]
+    nombres_roles = [f"Rol{r}" for r in range(roles)]
+    filas_ruta, permisos = [], []
+    for i in range(recursos):
+        for ruta in (f"/api/recurso{i}", f"POST /api/recurso{i}", f"DELETE /api/recurso{i}"):
+            filas_ruta.append(ruta)
+            for rol in aleatorio.sample(nombres_roles, aleatorio.randint(1, max(1, roles // 4))):
+                permisos.append((ruta, rol))
+    emails = [f"usuario{u}@correo.com" for u in range(usuarios)]
+    usuarios_roles = [(email, rol) for email in emails
+                      for rol in aleatorio.sample(nombres_roles, aleatorio.randint(1, 3))]
+    datos = {"roles": nombres_roles, "usuarios": usuarios_roles, "rutas": filas_ruta, "permisos": permisos}
+
+    peticiones = []
+    for _ in range(20_000):
+        i = aleatorio.randrange(recursos)
+        metodo, ruta = aleatorio.choice([
+            ("GET", f"/api/recurso{i}/"), ("POST", f"/api/recurso{i}/"),
+            ("GET", f"/api/recurso{i}/PR{aleatorio.randint(1, 999):03d}"),
+            ("DELETE", f"/api/recurso{i}/PR{aleatorio.randint(1, 999):03d}"),
+            ("GET", f"/api/recurso{i}/PR001/detalle"), ("GET", f"/api/recurso{i}/buscar"),
+        ])
+        peticiones.append((metodo, ruta, aleatorio.choice(emails)))
+    return rutas_api, datos, peticiones
+
+
+class Ingenuo:
+    """Sin compilar: regex por ruta de la API y recorrido de rutarol en cada petición."""
+
+    def __init__(self, rutas_api, datos):
+        self.rutas = [(metodos, plantilla, re.compile(
+            "^" + re.sub(r"\{[^}]+\}", "[^/]+", plantilla) + "$")) for metodos, plantilla in rutas_api]
+        self.datos = datos
+
+    def decidir(self, metodo, ruta, usuario):
+        plantilla = next((p for metodos, p, regex in self.rutas
+                          if metodo in metodos and regex.match(ruta)), None)
+        if plantilla is None:
+            return "libre"
+        roles_usuario = {rol for email, rol in self.datos["usuarios"] if email == usuario}
+        mejor, permitidos = None, set()
+        for fila in self.datos["rutas"]:
+            metodo_fila, _, prefijo = fila.rpartition(" ")
+            if (not metodo_fila or metodo_fila == metodo) and (
+                    plantilla == prefijo or plantilla.startswith(prefijo + "/")):
+                if mejor is None or (len(prefijo), bool(metodo_fila)) > mejor[0]:
+                    mejor = ((len(prefijo), bool(metodo_fila)), fila)
+        if mejor is None:
+            return "libre"
+        permitidos = {rol for ruta, rol in self.datos["permisos"] if ruta == mejor[1]}
+        return "permitida" if roles_usuario & permitidos else "denegada"
+
+
+def medir(funcion, repeticiones: int = 5) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+async def medir_middleware(peticiones) -> tuple[float, float]:
+    """(µs por petición sin middleware, µs por petición con middleware)."""
+    async def app(scope, receive, send):               # App mínima: responde 200 vacío
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def enviar(mensaje):
+        pass
+
+    scopes = [{"type": "http", "method": m, "path": r,
+               "headers": [(b"host", b"bench"), (b"accept", b"*/*"), (b"x-usuario", u.encode())]}
+              for m, r, u in peticiones]
+    middleware = MiddlewareAutorizacion(app, rutas=[])
+
+    async def recorrer(destino):
+        inicio = time.perf_counter()
+        for scope in scopes:
+            await destino(scope, None, enviar)
+        return (time.perf_counter() - inicio) / len(scopes) * 1e6
+
+    base = min([await recorrer(app) for _ in range(5)])
+    con = min([await recorrer(middleware) for _ in range(5)])
+    return base, con
+
+
+async def medir_bd(peticiones, cantidad: int) -> float:
+    """µs por petición con la consulta de JOINs que se evita (sobre las tablas reales)."""
+    from sqlalchemy import text
+    from repositorios.autorizacion import RepositorioAutorizacionPostgreSQL
+    from servicios.conexion.proveedor_conexion import ProveedorConexion
+
+    sql = text("""
+        SELECT EXISTS (
+            SELECT 1 FROM rol_usuario ru
+            JOIN rol r ON r.id = ru.fkidrol
+            JOIN rutarol rr ON rr.rol = r.nombre
+            JOIN ruta t ON t.ruta = rr.ruta
+            WHERE ru.fkemail = :email AND :ruta LIKE t.ruta || '%'
+        )
+    """)
+    repo = RepositorioAutorizacionPostgreSQL(ProveedorConexion())
+    async with repo._conexion() as conn:
+        await conn.execute(sql, {"email": "admin@correo.com", "ruta": "/facturas"})  # Calienta
+        inicio = time.perf_counter()
+        for _, ruta, _ in peticiones[:cantidad]:
+            await conn.execute(sql, {"email": "admin@correo.com", "ruta": ruta})
+        return (time.perf_counter() - inicio) / cantidad * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recursos", type=int, default=100, help="Recursos (4 plantillas cada uno)")
+    parser.add_argument("--roles", type=int, default=32)
+    parser.add_argument("--usuarios", type=int, default=10_000)
+    parser.add_argument("--bd", action="store_true", help="Mide también la consulta por petición")
+    args = parser.parse_args()
+
+    aleatorio = random.Random(7)
+    rutas_api, datos, peticiones = generar(args.recursos, args.roles, args.usuarios, aleatorio)
+
+    arbol = ArbolRutas(rutas_api)
+    t_compilar = medir(lambda: MatrizPermisos(arbol, datos, "permitir"), 3)
+    matriz = MatrizPermisos(arbol, datos, "permitir")
+    permisos_rutas.fijar_rutas(rutas_api)
+    permisos_rutas.instalar(matriz)
+    print(f"{len(arbol.plantillas):,} rutas de la API, {len(datos['rutas']):,} filas de ruta, "
+          f"{args.roles} roles, {args.usuarios:,} usuarios")
+    print(f"{'compilar matriz':<26}{t_compilar * 1000:>10.1f} ms (solo al cambiar permisos)")
+
+    t_decidir = medir(lambda: [matriz.decidir(m, r, u) for m, r, u in peticiones])
+    print(f"{'decidir()':<26}{t_decidir / len(peticiones) * 1e6:>10.2f} µs/petición")
+
+    base, con = asyncio.run(medir_middleware(peticiones))
+    print(f"{'middleware completo':<26}{con - base:>10.2f} µs/petición (app sola {base:.2f} µs)")
+
+    ingenuo = Ingenuo(rutas_api, datos)
+    muestra = peticiones[:200]
+    t_ingenuo = medir(lambda: [ingenuo.decidir(m, r, u) for m, r, u in muestra], 1)
+    print(f"{'ingenuo (sin compilar)':<26}{t_ingenuo / len(muestra) * 1e6:>10.0f} µs/petición")
+
+    iguales = sum(matriz.decidir(*p) == ingenuo.decidir(*p) for p in muestra)
+    print(f"mismas decisiones que el ingenuo: {iguales}/{len(muestra)}")
+
+    if args.bd:
+        print(f"{'consulta con JOINs (BD)':<26}{asyncio.run(medir_bd(peticiones, 500)):>10.0f} µs/petición")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_factura.py — Factura completa: UNA consulta con json_agg vs. N+1 consultas por tabla.
+
+Sobre las facturas de la BD (DB_POSTGRES) mide, por factura:
+
+- n+1:      lo que haría un cliente con la API por tabla: factura, sus líneas,
+            el producto de cada línea, cliente, vendedor y las dos personas
+            (una consulta cada uno) y armar el dict en Python + json.dumps
+- una:      RepositorioFacturaPostgreSQL.obtener_completa() → bytes listos
+- página:   listar_completas() de a --limite facturas (por factura)
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_factura --facturas 200 --limite 50
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar servicios/
+
+from repositorios.factura import RepositorioFacturaPostgreSQL
+from servicios.conexion.proveedor_conexion import ProveedorConexion
+
+
+async def n_mas_uno(repo: RepositorioFacturaPostgreSQL, numero: int) -> tuple[bytes, int]:
+    """(documento, consultas): una consulta por tabla y por línea."""
+    uno = lambda tabla, clave, valor: repo._obtener_por_clave(tabla, clave, str(valor))
+    factura = (await uno("factura", "numero", numero))[0]
+    lineas = await uno("productosporfactura", "fknumfactura", numero)
+    for linea in lineas:
+        linea["nombre"] = (await uno("producto", "codigo", linea["fkcodproducto"]))[0]["nombre"]
+    cliente = (await uno("cliente", "id", factura["fkidcliente"]))[0]
+    vendedor = (await uno("vendedor", "id", factura["fkidvendedor"]))[0]
+    cliente["nombre"] = (await uno("persona", "codigo", cliente["fkcodpersona"]))[0]["nombre"]
+    vendedor["nombre"] = (await uno("persona", "codigo", vendedor["fkcodpersona"]))[0]["nombre"]
+    documento = {**factura, "cliente": cliente, "vendedor": vendedor, "lineas": lineas}
+    return json.dumps(documento).encode(), 6 + len(lineas)
+
+
+async def principal(facturas: int, limite: int) -> None:
+    repo = RepositorioFacturaPostgreSQL(ProveedorConexion())
+    pagina, total, _ = await repo.listar_completas(0, facturas)
+    numeros = [documento["numero"] for documento in json.loads(pagina)]
+    if not numeros:
+        sys.exit("No hay facturas en la BD.")
+    await n_mas_uno(repo, numeros[0])                  # Calienta pool, tipos y sentencias
+    await repo.obtener_completa(numeros[0])
+
+    inicio, consultas = time.perf_counter(), 0
+    for numero in numeros:
+        consultas += (await n_mas_uno(repo, numero))[1]
+    t_n1 = (time.perf_counter() - inicio) / len(numeros)
+
+    inicio = time.perf_counter()
+    for numero in numeros:
+        await repo.obtener_completa(numero)
+    t_una = (time.perf_counter() - inicio) / len(numeros)
+
+    inicio, despues, leidas = time.perf_counter(), 0, 0
+    while leidas < len(numeros):
+        _, cantidad, despues = await repo.listar_completas(despues, limite)
+        if not cantidad:
+            break
+        leidas += cantidad
+    t_pagina = (time.perf_counter() - inicio) / max(leidas, 1)
+
+    print(f"{len(numeros)} facturas, {consultas / len(numeros):.1f} consultas por factura con N+1")
+    print(f"{'n+1 (por tabla)':<24}{t_n1 * 1000:>9.2f} ms/factura")
+    print(f"{'una consulta':<24}{t_una * 1000:>9.2f} ms/factura  ({t_n1 / t_una:.1f}x)")
+    print(f"{f'página de {limite}':<24}{t_pagina * 1000:>9.2f} ms/factura  ({t_n1 / t_pagina:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--facturas", type=int, default=200, help="Facturas a medir (las primeras)")
+    parser.add_argument("--limite", type=int, default=50, help="Facturas por página")
+    args = parser.parse_args()
+    asyncio.run(principal(args.facturas, args.limite))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+bench_formatos.py — JSON vs. Arrow IPC vs. MessagePack para clientes de analítica.
+
+Mide, para un resultado sintético con la forma de productosporfactura
+(+ un timestamp de factura), lo que paga cada formato:
+
+- bytes en el cable (tamaño de la respuesta)
+- tiempo de codificación en el servidor
+- tiempo de decodificación en el cliente hasta tener COLUMNAS
+  (lo que necesita un dataframe), no solo el objeto parseado
+
+No necesita base de datos: usa los mismos codificadores que la API.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_formatos --filas 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar controllers/
+
+from controllers.formatos import codificar_arrow, codificar_msgpack, filas_a_json
+
+
+def generar_filas(cantidad: int) -> tuple[list[str], list[tuple]]:
+    """Filas con los tipos reales de la BD: int, varchar, int, numeric(14,2), timestamp."""
+    aleatorio = random.Random(42)
+    inicio = datetime(2025, 1, 1)
+    columnas = ["fknumfactura", "fkcodproducto", "cantidad", "subtotal", "fecha"]
+    filas = [
+        (
+            i // 4 + 1,
+            f"PR{aleatorio.randint(1, 500):03d}",
+            aleatorio.randint(1, 20),
+            Decimal(aleatorio.randint(1000, 5_000_000)) / 100,
+            inicio + timedelta(minutes=i),
+        )
+        for i in range(cantidad)
+    ]
+    return columnas, filas
+
+
+def medir(funcion, repeticiones: int = 3) -> float:
+    """Mejor tiempo (segundos) de varias repeticiones."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    columnas, filas = generar_filas(args.filas)
+    resultados = []
+
+    # ── JSON (lo que hace hoy la API: dict por fila + json) ──────────
+    def codificar_json():
+        return json.dumps({"tabla": "productosporfactura", "total": len(filas),
+                           "datos": filas_a_json(columnas, filas)}).encode()
+    cuerpo_json = codificar_json()
+
+    def decodificar_json():
+        datos = json.loads(cuerpo_json)["datos"]
+        return {col: [fila[col] for fila in datos] for col in columnas}  # Filas → columnas
+    resultados.append(("json", len(cuerpo_json), medir(codificar_json), medir(decodificar_json)))
+
+    # ── MessagePack (columnar) ───────────────────────────────────────
+    try:
+        import msgpack
+        cuerpo_msgpack = codificar_msgpack("productosporfactura", columnas, filas)
+
+        def decodificar_msgpack():
+            datos = msgpack.unpackb(cuerpo_msgpack)
+            return dict(zip(datos["columnas"], datos["datos"]))          # Ya viene por columnas
+        resultados.append((
+            "msgpack", len(cuerpo_msgpack),
+            medir(lambda: codificar_msgpack("productosporfactura", columnas, filas)),
+            medir(decodificar_msgpack),
+        ))
+    except ImportError:
+        print("msgpack no instalado: se omite.")
+
+    # ── Arrow IPC stream ─────────────────────────────────────────────
+    try:
+        import pyarrow as pa
+        cuerpo_arrow = codificar_arrow(columnas, filas)
+
+        def decodificar_arrow():
+            return pa.ipc.open_stream(cuerpo_arrow).read_all()          # Columnas tipadas, sin copia
+        resultados.append((
+            "arrow", len(cuerpo_arrow),
+            medir(lambda: codificar_arrow(columnas, filas)),
+            medir(decodificar_arrow),
+        ))
+    except ImportError:
+        print("pyarrow no instalado: se omite.")
+
+    print(f"\n{args.filas:,} filas")
+    print(f"{'formato':<10}{'bytes':>14}{'vs json':>10}{'codificar ms':>15}{'decodificar ms':>17}")
+    base = resultados[0][1]
+    for nombre, tamano, t_cod, t_dec in resultados:
+        print(f"{nombre:<10}{tamano:>14,}{tamano / base:>10.2f}{t_cod * 1000:>15.1f}{t_dec * 1000:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+bench_http.py — Costo de la pila HTTP completa de producto, sin (o con) PostgreSQL.
+
+Arranca main.app (ciclo de vida incluido) y la llama como lo haría uvicorn
+(scope/receive/send ASGI, sin sockets), con todos los middlewares, la
+validación de Pydantic, el controller, el servicio y la serialización JSON:
+
+- memoria:   DB_PROVIDER=memoria → el repositorio no hace I/O; lo medido es
+             el techo de la capa Python (cuántas peticiones por segundo
+             aguanta un worker aunque la BD respondiera en 0 ms)
+- postgres:  mismas peticiones contra DB_POSTGRES; la diferencia con memoria
+             es lo que cuesta la BD (red, pool, SQL)
+
+Peticiones: GET por código, GET listado (?limite=100), GET buscar por
+prefijo, y POST / PUT / DELETE de productos BENCH* que se crean y borran.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_http --productos 10000 --peticiones 5000
+    python -m benchmarks.bench_http --proveedor postgres --concurrencia 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar main
+
+
+async def llamar(app, metodo: str, ruta: str, cuerpo: bytes = b"") -> int:
+    """Una petición ASGI completa; retorna el código de estado."""
+    camino, _, consulta = ruta.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": metodo, "scheme": "http", "path": camino, "raw_path": camino.encode(),
+        "query_string": consulta.encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept", b"application/json"),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(cuerpo)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    entregado = False
+    estado = 0
+
+    async def recibir():
+        nonlocal entregado
+        if entregado:                                  # Nunca llega: el cliente no se desconecta
+            await asyncio.Event().wait()
+        entregado = True
+        return {"type": "http.request", "body": cuerpo, "more_body": False}
+
+    async def enviar(mensaje):
+        nonlocal estado
+        if mensaje["type"] == "http.response.start":
+            estado = mensaje["status"]
+
+    await app(scope, recibir, enviar)
+    return estado
+
+
+async def medir(app, peticiones: list[tuple[str, str, bytes]], concurrencia: int) -> tuple[float, set[int]]:
+    """(segundos totales, códigos de estado vistos) con `concurrencia` clientes a la vez."""
+    estados: set[int] = set()
+    siguiente = iter(peticiones)
+
+    async def cliente():
+        for metodo, ruta, cuerpo in siguiente:         # Iterador compartido: cada petición una vez
+            estados.add(await llamar(app, metodo, ruta, cuerpo))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concurrencia)))
+    return time.perf_counter() - inicio, estados
+
+
+def escenarios(productos: int, cantidad: int) -> dict[str, list[tuple[str, str, bytes]]]:
+    """Peticiones por escenario (las de escritura sobre códigos BENCH* propios)."""
+    codigo = lambda i: f"PR{i % max(productos, 1) + 1:08d}"
+    cuerpo = lambda i, stock: json.dumps({"codigo": f"BENCH{i:07d}", "nombre": f"Bench {i}",
+                                          "stock": stock, "valorunitario": 1234.5}).encode()
+    return {
+        "GET /{codigo}": [("GET", f"/api/producto/{codigo(i * 7919)}", b"") for i in range(cantidad)],
+        "GET /?limite=100": [("GET", "/api/producto/?limite=100", b"")] * max(cantidad // 10, 1),
+        "GET /buscar": [("GET", f"/api/producto/buscar?nombre=Producto%20{codigo(i * 7919)[2:-2]}&limite=20", b"")
+                        for i in range(cantidad)],            # Prefijo de 6 dígitos: hasta 100 nombres
+        "POST /": [("POST", "/api/producto/", cuerpo(i, 1)) for i in range(cantidad)],
+        "PUT /{codigo}": [("PUT", f"/api/producto/BENCH{i:07d}", cuerpo(i, 2)) for i in range(cantidad)],
+        "DELETE /{codigo}": [("DELETE", f"/api/producto/BENCH{i:07d}", b"") for i in range(cantidad)],
+    }
+
+
+async def principal(productos: int, cantidad: int, concurrencia: int) -> None:
+    import main                                        # Después de fijar DB_PROVIDER
+
+    async with main.app.router.lifespan_context(main.app):
+        for metodo, ruta, cuerpo in (("GET", "/api/producto/PR00000001", b""),
+                                     ("DELETE", "/api/producto/BENCH0000000", b"")):
+            await llamar(main.app, metodo, ruta, cuerpo)   # Calienta rutas, pool y almacén
+
+        print(f"proveedor {os.environ['DB_PROVIDER']}, {concurrencia} cliente(s) concurrente(s)")
+        for nombre, peticiones in escenarios(productos, cantidad).items():
+            segundos, estados = await medir(main.app, peticiones, concurrencia)
+            print(f"{nombre:<20}{segundos / len(peticiones) * 1e6:>9.0f} µs/petición"
+                  f"{len(peticiones) / segundos:>10.0f} pet/s   estados {sorted(estados)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--proveedor", default="memoria", choices=("memoria", "postgres"))
+    parser.add_argument("--productos", type=int, default=10_000,
+                        help="Productos sintéticos precargados (solo memoria)")
+    parser.add_argument("--peticiones", type=int, default=5_000, help="Peticiones por escenario")
+    parser.add_argument("--concurrencia", type=int, default=1, help="Clientes simultáneos")
+    args = parser.parse_args()
+
+    os.environ["DB_PROVIDER"] = args.proveedor         # Antes de importar main (get_settings() lo cachea)
+    os.environ["DB_MEMORIA_PRODUCTOS"] = str(args.productos)
+    if args.proveedor == "postgres":                   # Los códigos PR0000000n solo existen en memoria:
+        args.productos = 0                             # las lecturas por código medirán el 404
+    asyncio.run(principal(args.productos, args.peticiones, args.concurrencia))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+bench_inquilinos.py — Latencia y throughput con muchos inquilinos (esquemas).
+
+Crea N esquemas (por defecto 100) con una copia de la tabla producto,
+y lanza peticiones concurrentes a la app (en proceso, sin red) eligiendo
+un inquilino al azar en cada una con el header X-Tenant. Mide:
+
+- p50 / p95 / p99 de latencia y peticiones por segundo
+- aciertos de la caché de tipos de columnas (métricas de la API)
+
+Mezcla: 70 % GET por código, 20 % listado, 10 % PUT (conversión de tipos).
+
+Necesita PostgreSQL: lee DB_POSTGRES del entorno o del .env.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_inquilinos --inquilinos 100 --peticiones 5000
+    python -m benchmarks.bench_inquilinos --limpiar      # Borra los esquemas de prueba
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar main/
+
+import httpx
+from sqlalchemy import text
+
+from main import app
+from repositorios.producto.repositorio_producto_postgresql import RepositorioProductoPostgreSQL
+from servicios.conexion.proveedor_conexion import ProveedorConexion
+from servicios.metricas import metricas
+
+PREFIJO = "bench_inq_"
+# Los esquemas de prueba se llaman bench_inq_000, bench_inq_001, ...
+
+
+async def preparar(cantidad: int, repo: RepositorioProductoPostgreSQL) -> list[str]:
+    """Crea los esquemas que falten, cada uno con su tabla producto y 200 filas."""
+    esquemas = [f"{PREFIJO}{i:03d}" for i in range(cantidad)]
+    async with repo._conexion(transaccion=True) as conn:
+        for esquema in esquemas:
+            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{esquema}"'))
+            await conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{esquema}".producto '
+                f'(LIKE public.producto INCLUDING ALL)'
+            ))
+            await conn.execute(text(f'''
+                INSERT INTO "{esquema}".producto (codigo, nombre, stock, valorunitario)
+                SELECT 'PR' || lpad(n::text, 3, '0'), 'Producto ' || n, n % 50, n * 1000
+                FROM generate_series(1, 200) AS n
+                ON CONFLICT DO NOTHING
+            '''))
+    return esquemas
+
+
+async def limpiar(repo: RepositorioProductoPostgreSQL) -> None:
+    """Borra todos los esquemas bench_inq_*."""
+    async with repo._conexion(transaccion=True) as conn:
+        filas = (await conn.execute(text(
+            "SELECT nspname FROM pg_namespace WHERE nspname LIKE :patron"
+        ), {"patron": PREFIJO + "%"})).fetchall()
+        for (esquema,) in filas:
+            await conn.execute(text(f'DROP SCHEMA "{esquema}" CASCADE'))
+    print(f"{len(filas)} esquemas eliminados.")
+
+
+async def ejecutar(esquemas: list[str], peticiones: int, concurrencia: int) -> None:
+    aleatorio = random.Random(7)
+    latencias: list[float] = []
+    errores = 0
+    cola: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(peticiones):
+        cola.put_nowait(i)
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+
+        async def trabajador():
+            nonlocal errores
+            while not cola.empty():
+                cola.get_nowait()
+                cabeceras = {"X-Tenant": aleatorio.choice(esquemas)}
+                codigo = f"PR{aleatorio.randint(1, 200):03d}"
+                tirada = aleatorio.random()
+                inicio = time.perf_counter()
+                if tirada < 0.7:
+                    r = await cliente.get(f"/api/producto/{codigo}", headers=cabeceras)
+                elif tirada < 0.9:
+                    r = await cliente.get("/api/producto/?limite=50", headers=cabeceras)
+                else:
+                    r = await cliente.put(f"/api/producto/{codigo}", headers=cabeceras, json={
+                        "codigo": codigo, "nombre": f"Producto {codigo}",
+                        "stock": aleatorio.randint(0, 50), "valorunitario": 1000,
+                    })
+                latencias.append(time.perf_counter() - inicio)
+                if r.status_code >= 400:
+                    errores += 1
+
+        inicio_total = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        duracion = time.perf_counter() - inicio_total
+
+    latencias.sort()
+    percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000
+    print(f"\n{len(esquemas)} inquilinos, {peticiones:,} peticiones, concurrencia {concurrencia}")
+    print(f"throughput: {peticiones / duracion:,.0f} pet/s   errores: {errores}")
+    print(f"latencia ms  p50 {percentil(0.50):.2f}  p95 {percentil(0.95):.2f}  "
+          f"p99 {percentil(0.99):.2f}  media {statistics.mean(latencias) * 1000:.2f}")
+
+    aciertos = fallos = 0
+    for contador in metricas.instantanea()["contadores"]:
+        if contador["nombre"] == "inquilinos_cache_tipos_total":
+            if contador["etiquetas"].get("resultado") == "acierto":
+                aciertos += contador["valor"]
+            else:
+                fallos += contador["valor"]
+    if aciertos + fallos:
+        print(f"caché de tipos: {aciertos:,.0f} aciertos, {fallos:,.0f} fallos "
+              f"({aciertos / (aciertos + fallos):.1%} aciertos)")
+
+
+async def principal() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--inquilinos", type=int, default=100)
+    parser.add_argument("--peticiones", type=int, default=5000)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument("--limpiar", action="store_true", help="Borra los esquemas de prueba y sale")
+    args = parser.parse_args()
+
+    repo = RepositorioProductoPostgreSQL(ProveedorConexion())
+    if args.limpiar:
+        await limpiar(repo)
+        return
+    esquemas = await preparar(args.inquilinos, repo)
+    await ejecutar(esquemas, args.peticiones, args.concurrencia)
+
+
+if __name__ == "__main__":
+    asyncio.run(principal())
@@ -0,0 +1,114 @@
+"""
+bench_login.py — Latencia del event loop durante una avalancha de inicios de sesión.
+
+Una tarea "latido" duerme 5 ms en bucle y mide cuánto tarda de más en
+despertar (retraso del event loop = lo que espera CUALQUIER otra petición
+del worker). Se mide en tres situaciones:
+
+- reposo:     sin logins (referencia)
+- en el loop: N logins concurrentes con bcrypt.checkpw() directo en el event loop
+- pool:       los mismos N logins con VerificadorContrasenas (pool de procesos)
+
+Además: costo de verificar_token() con caché (hit) y sin caché (firma + JSON).
+
+Necesita bcrypt. Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_login --logins 32 --costo 12
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar servicios/
+
+from servicios import servicio_autenticacion
+from servicios.contrasenas import bcrypt, verificador_contrasenas
+
+_LATIDO = 0.005
+
+
+async def latido(retrasos: list[float], fin: asyncio.Event) -> None:
+    while not fin.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(_LATIDO)
+        retrasos.append(time.perf_counter() - inicio - _LATIDO)
+
+
+async def medir(carga) -> tuple[list[float], float]:
+    """(retrasos del event loop en segundos, duración total de la carga)."""
+    retrasos, fin = [], asyncio.Event()
+    tarea = asyncio.create_task(latido(retrasos, fin))
+    await asyncio.sleep(0.05)                          # El latido arranca antes que la carga
+    inicio = time.perf_counter()
+    await carga()
+    duracion = time.perf_counter() - inicio
+    fin.set()
+    await tarea
+    return retrasos, duracion
+
+
+def resumir(nombre: str, retrasos: list[float], duracion: float, logins: int) -> None:
+    ordenados = sorted(retrasos) or [0.0]
+    p99 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))]
+    print(f"{nombre:<14}{statistics.median(ordenados) * 1000:>9.2f}{p99 * 1000:>10.2f}"
+          f"{ordenados[-1] * 1000:>10.1f}{duracion:>10.2f}"
+          f"{logins / duracion if logins else 0:>12.1f}")
+
+
+async def principal(logins: int, costo: int) -> None:
+    contrasena = "clave-de-prueba"
+    hash_guardado = bcrypt.hashpw(contrasena.encode(), bcrypt.gensalt(costo)).decode()
+
+    async def reposo():
+        await asyncio.sleep(0.5)
+
+    async def en_el_loop():
+        async def uno():
+            await asyncio.sleep(0)
+            bcrypt.checkpw(contrasena.encode(), hash_guardado.encode())   # Bloquea el event loop
+        await asyncio.gather(*(uno() for _ in range(logins)))
+
+    async def en_pool():
+        resultados = await asyncio.gather(
+            *(verificador_contrasenas.verificar(contrasena, hash_guardado) for _ in range(logins))
+        )
+        assert all(resultados)
+
+    await verificador_contrasenas.verificar(contrasena, hash_guardado)  # Arranca los procesos del pool
+
+    print(f"{logins} logins concurrentes, bcrypt costo {costo}; retraso del event loop (latido de 5 ms)")
+    print(f"{'':<14}{'p50 ms':>9}{'p99 ms':>10}{'max ms':>10}{'total s':>10}{'logins/s':>12}")
+    resumir("reposo", *await medir(reposo), 0)
+    resumir("en el loop", *await medir(en_el_loop), logins)
+    resumir("pool", *await medir(en_pool), logins)
+    verificador_contrasenas.detener()
+
+    token, _ = servicio_autenticacion.emitir_token("bench@correo.com")
+    repeticiones = 100_000
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        servicio_autenticacion.verificar_token(token)
+    hit = (time.perf_counter() - inicio) / repeticiones * 1e6
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        servicio_autenticacion._VALIDADOS.clear()
+        servicio_autenticacion.verificar_token(token)
+    miss = (time.perf_counter() - inicio) / repeticiones * 1e6
+    print(f"verificar_token: {hit:.2f} µs con caché, {miss:.2f} µs sin caché (firma + JSON)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--costo", type=int, default=12, help="Costo bcrypt (12 = el del esquema)")
+    args = parser.parse_args()
+    if bcrypt is None:
+        sys.exit("bcrypt no está instalado (pip install bcrypt)")
+    asyncio.run(principal(args.logins, args.costo))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+bench_validacion.py — Validación de listas grandes de productos: por fila vs. TypeAdapter.
+
+Compara, para N productos en un cuerpo JSON (bytes, como llega a la API):
+
+- por fila:      json.loads() + un Producto por fila + model_dump() → dicts
+                 (lo que hace hoy POST /api/producto/, repetido N veces)
+- adapter+dict:  TypeAdapter(list[Producto]).validate_json() + model_dump()
+                 (mismo modelo, pero una sola llamada sobre los bytes)
+- masivo:        validar_productos() → TypedDict con las restricciones de la
+                 tabla → tuplas (lo que usa POST /api/producto/masivo)
+- masivo 1%:     lo mismo con el 1% de las filas inválidas (camino con errores)
+
+No necesita base de datos: mide solo la CPU de validar y dar forma a los datos.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_validacion --filas 10000 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar models/
+
+from models.producto import Producto
+from servicios.validacion_masiva import adaptador, validar_productos
+
+
+def generar_cuerpo(cantidad: int, invalidas: float = 0.0) -> bytes:
+    """Lista JSON de productos; una fracción 'invalidas' con stock no numérico."""
+    aleatorio = random.Random(42)
+    productos = []
+    for i in range(cantidad):
+        producto = {
+            "codigo": f"PR{i:07d}",
+            "nombre": f"Producto de prueba {i}",
+            "stock": aleatorio.randint(0, 500),
+            "valorunitario": aleatorio.randint(100, 5_000_000) / 100,
+        }
+        if invalidas and aleatorio.random() < invalidas:
+            producto["stock"] = "sin dato"
+        productos.append(producto)
+    return json.dumps(productos).encode()
+
+
+def medir(funcion, repeticiones: int = 3) -> float:
+    """Mejor tiempo (segundos) de varias repeticiones."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def por_fila(cuerpo: bytes) -> list[dict]:
+    return [Producto(**dato).model_dump() for dato in json.loads(cuerpo)]
+
+
+def adapter_dict(cuerpo: bytes) -> list[dict]:
+    return [p.model_dump() for p in adaptador(list[Producto]).validate_json(cuerpo)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    adaptador(list[Producto])                          # Compilar el validador fuera de la medición
+
+    print(f"{'filas':>10}{'camino':>14}{'ms':>10}{'filas/s':>14}{'vs por fila':>13}")
+    for cantidad in args.filas:
+        cuerpo = generar_cuerpo(cantidad)
+        cuerpo_con_errores = generar_cuerpo(cantidad, invalidas=0.01)
+        caminos = [
+            ("por fila", lambda: por_fila(cuerpo)),
+            ("adapter+dict", lambda: adapter_dict(cuerpo)),
+            ("masivo", lambda: validar_productos(cuerpo)),
+            ("masivo 1%", lambda: validar_productos(cuerpo_con_errores)),
+        ]
+        base = None
+        for nombre, funcion in caminos:
+            segundos = medir(funcion)
+            base = base or segundos
+            print(f"{cantidad:>10,}{nombre:>14}{segundos * 1000:>10.1f}"
+                  f"{cantidad / segundos:>14,.0f}{base / segundos:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+regresion_planes.py — Las consultas frecuentes de los repositorios no recorren tablas grandes.
+
+Crea un esquema de prueba con database/bdfacturas_postgres.sql, le carga
+datos sintéticos (por defecto 60.000 facturas, 180.000 líneas, 20.000
+productos, 2.000 clientes), crea los índices de la migración 007 y ANALYZE.
+Luego llama a los repositorios de verdad (producto, factura, analítica)
+sobre ese esquema, captura el SQL que ejecutan y corre EXPLAIN de cada
+sentencia con los mismos parámetros.
+
+Falla (código de salida 1) si algún plan tiene un Seq Scan sobre producto,
+factura o productosporfactura (o una partición con filas) que esa consulta
+no tenga permitido: un índice que falta, una condición que dejó de usarlo
+o un cambio de SQL que rompió la poda de particiones. Sirve en CI contra
+una BD de prueba, después de cada cambio de SQL o de migraciones.
+
+Con --particionada el esquema se particiona por mes como la migración 006
+(requiere particionar_facturas() en public). Con --sin-indices se salta la
+migración 007: muestra qué consultas recorren sin ella.
+
+Usa DB_POSTGRES (el .env). Deja la BD como estaba: el esquema se borra al
+final (--conservar para revisarlo a mano).
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.regresion_planes
+    python -m benchmarks.regresion_planes --particionada --facturas 100000
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import asyncpg
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar repositorios/
+
+from config import get_settings
+from repositorios.escucha_cambios import dsn_asyncpg
+from repositorios.migraciones import cargar_modulo, descubrir
+from repositorios.analitica.repositorio_analitica_postgresql import RepositorioAnaliticaPostgreSQL
+from repositorios.factura.repositorio_factura_postgresql import RepositorioFacturaPostgreSQL
+from repositorios.producto.repositorio_producto_postgresql import RepositorioProductoPostgreSQL
+from servicios.conexion.proveedor_conexion import ProveedorConexion
+
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+PROTEGIDAS = re.compile(r"^(producto|factura|productosporfactura)(_p\d{6})?$")
+# Tablas grandes (y sus particiones mensuales): un Seq Scan sobre ellas es regresión.
+
+_SQL_SEMBRAR = """
+    INSERT INTO persona (codigo, nombre, email, telefono)
+    SELECT 'RP' || g, 'Persona ' || g, 'rp' || g || '@plan.test', '555' || g
+    FROM generate_series(1, {clientes} + {vendedores}) g;
+
+    INSERT INTO cliente (credito, fkcodpersona)
+    SELECT 0, 'RP' || g FROM generate_series(1, {clientes}) g;
+
+    INSERT INTO vendedor (carnet, direccion, fkcodpersona)
+    SELECT g, 'Calle ' || g, 'RP' || ({clientes} + g) FROM generate_series(1, {vendedores}) g;
+
+    INSERT INTO producto (codigo, nombre, stock, valorunitario)
+    SELECT 'RP' || lpad(g::text, 6, '0'), md5(g::text), 1000000, 1 + g % 500
+    FROM generate_series(1, {productos}) g;
+
+    WITH c AS (SELECT array_agg(id) AS ids FROM cliente WHERE fkcodpersona LIKE 'RP%'),
+         v AS (SELECT array_agg(id) AS ids FROM vendedor WHERE fkcodpersona LIKE 'RP%')
+    INSERT INTO factura (fecha, total, fkidcliente, fkidvendedor)
+    SELECT localtimestamp - interval '{dias} days' * (1 - g::float8 / {facturas}), 0,
+           c.ids[1 + g::bigint * 7919 % cardinality(c.ids)], v.ids[1 + g::bigint * 104729 % cardinality(v.ids)]
+    FROM generate_series(1, {facturas}) g, c, v;
+
+    INSERT INTO productosporfactura (fknumfactura, fkcodproducto, cantidad, subtotal{fecha_columna})
+    SELECT f.numero, 'RP' || lpad((1 + (f.numero * 7 + k * 1237) % {productos})::text, 6, '0'),
+           1 + k, 10{fecha_valor}
+    FROM factura f, generate_series(0, 2) k
+    WHERE f.numero > {ultimo};
+"""
+# Fechas crecientes con el número (como en la realidad) a lo largo de {dias} días;
+# tres productos distintos por factura; clientes y vendedores repartidos en todas.
+
+
+async def sembrar(conexion, esquema: str, argumentos) -> dict:
+    """Crea el esquema con la BD base, lo llena y lo analiza. Retorna valores para las consultas."""
+    await conexion.execute(f'DROP SCHEMA IF EXISTS "{esquema}" CASCADE')
+    await conexion.execute(f'CREATE SCHEMA "{esquema}"')
+    await conexion.execute(f'SET search_path TO "{esquema}", public')
+    # CREATE sin esquema va al primero del search_path; public aporta las funciones de las migraciones.
+    await conexion.execute((RAIZ / "database" / "bdfacturas_postgres.sql").read_text(encoding="utf-8"))
+
+    if argumentos.particionada:
+        await conexion.execute("SELECT public.particionar_facturas($1, 3)", esquema)
+        await conexion.execute(f"""
+            SELECT public.particion_mensual_crear($1, m::date)
+            FROM generate_series(date_trunc('month', localtimestamp - interval '{argumentos.dias} days'),
+                                 date_trunc('month', localtimestamp), interval '1 month') m
+        """, esquema)                                  # Los meses de los datos sintéticos
+
+    tablas = ("producto", "factura", "productosporfactura")
+    for tabla in tablas:                               # Triggers de stock/totales/conteo: fila a fila
+        await conexion.execute(f'ALTER TABLE "{esquema}"."{tabla}" DISABLE TRIGGER USER')
+    await conexion.execute(_SQL_SEMBRAR.format(
+        clientes=argumentos.clientes, vendedores=argumentos.vendedores, productos=argumentos.productos,
+        facturas=argumentos.facturas, dias=argumentos.dias,
+        ultimo=await conexion.fetchval("SELECT coalesce(max(numero), 0) FROM factura"),
+        fecha_columna=", fechafactura" if argumentos.particionada else "",
+        fecha_valor=", f.fecha" if argumentos.particionada else "",
+    ))
+    for tabla in tablas:
+        await conexion.execute(f'ALTER TABLE "{esquema}"."{tabla}" ENABLE TRIGGER USER')
+
+    if not argumentos.sin_indices:
+        indices = next((m for m in descubrir() if m.version == 7), None)
+        if indices is None:
+            raise SystemExit("No se encontró la migración 007 en database/migraciones.")
+        await cargar_modulo(indices).crear_indices(conexion, esquema)
+    for tabla in tablas + ("cliente", "vendedor", "persona"):
+        await conexion.execute(f'ANALYZE "{esquema}"."{tabla}"')
+
+    vacias = {fila["relname"] for fila in await conexion.fetch("""
+        SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = $1 AND c.relkind = 'r' AND c.relpages = 0
+    """, esquema)}                                     # Meses futuros (particionada): sin filas todavía
+
+    fila = await conexion.fetchrow("""
+        SELECT (SELECT numero FROM factura ORDER BY numero OFFSET $1 LIMIT 1) AS medio,
+               (SELECT max(numero) FROM factura) AS ultimo,
+               (SELECT min(id) FROM cliente WHERE fkcodpersona LIKE 'RP%') AS cliente,
+               (SELECT min(id) FROM vendedor WHERE fkcodpersona LIKE 'RP%') AS vendedor,
+               (SELECT left(nombre, 3) FROM producto WHERE codigo = 'RP000123') AS prefijo
+    """, argumentos.facturas // 2)
+    return {**fila, "vacias": vacias}
+
+
+def consultas(repos: dict, esquema: str, valores: dict) -> list[tuple]:
+    """(nombre, llamada al repositorio, tablas que SÍ puede recorrer)."""
+    hace_un_mes = date.today() - timedelta(days=30)
+    producto, factura, analitica = repos["producto"], repos["factura"], repos["analitica"]
+    return [
+        ("producto por código",
+         lambda: producto.obtener_por_codigo("RP000123", esquema), set()),
+        ("producto por prefijo del nombre",
+         lambda: producto.buscar_por_nombre(valores["prefijo"], esquema), set()),
+        ("factura completa",
+         lambda: factura.obtener_completa(valores["medio"], esquema), set()),
+        ("página de facturas completas",
+         lambda: factura.listar_completas(valores["medio"], 50, esquema), set()),
+        ("líneas de un producto (FK, borrar producto)",
+         lambda: producto._obtener_por_clave("productosporfactura", "fkcodproducto", "RP000123", esquema),
+         set()),
+        ("facturas de un cliente (FK)",
+         lambda: producto._obtener_por_clave("factura", "fkidcliente", str(valores["cliente"]), esquema),
+         set()),
+        ("facturas de un vendedor (FK)",
+         lambda: producto._obtener_por_clave("factura", "fkidvendedor", str(valores["vendedor"]), esquema),
+         set()),
+        ("reposición: novedades",
+         lambda: analitica.obtener_novedades(esquema, valores["ultimo"] - 100, hace_un_mes), set()),
+        ("reposición: demanda de dos días",
+         lambda: analitica.obtener_demanda_diaria(esquema, [hace_un_mes, hace_un_mes + timedelta(days=1)]),
+         {"producto"}),                                # El catálogo completo se lee a propósito
+    ]
+
+
+def recorridos(plan: dict) -> list[tuple[str, str]]:
+    """(tipo de nodo, relación) de todos los nodos que leen una tabla o índice."""
+    nodos = []
+    if "Relation Name" in plan:
+        nodos.append((plan["Node Type"], plan["Relation Name"]))
+    for hijo in plan.get("Plans", []):
+        nodos.extend(recorridos(hijo))
+    return nodos
+
+
+async def verificar(conexion, esquema: str, valores: dict) -> int:
+    """Corre cada consulta, explica su SQL y muestra el resultado. Retorna las regresiones."""
+    proveedor = ProveedorConexion(get_settings())
+    repos = {"producto": RepositorioProductoPostgreSQL(proveedor),
+             "factura": RepositorioFacturaPostgreSQL(proveedor),
+             "analitica": RepositorioAnaliticaPostgreSQL(proveedor)}
+
+    capturadas: list[tuple[str, tuple]] = []
+
+    def capturar(conn, cursor, sql, parametros, contexto, varias):
+        if f'"{esquema}".' in sql:                     # Solo el SQL de las tablas (no set_config, etc.)
+            capturadas.append((sql, tuple(parametros or ())))
+
+    engine = await repos["producto"]._obtener_engine()  # Compartido por los tres repositorios
+    event.listen(engine.sync_engine, "before_cursor_execute", capturar)
+
+    regresiones = 0
+    try:
+        for nombre, llamada, permitidas in consultas(repos, esquema, valores):
+            capturadas.clear()
+            await llamada()
+            if not capturadas:
+                print(f"?? {nombre}: no ejecutó SQL")
+                regresiones += 1
+                continue
+            for sql, parametros in capturadas:
+                plan = json.loads(await conexion.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *parametros))
+                nodos = recorridos(plan[0]["Plan"])
+                malos = sorted({relacion for tipo, relacion in nodos
+                                if tipo == "Seq Scan" and PROTEGIDAS.match(relacion)
+                                and PROTEGIDAS.match(relacion).group(1) not in permitidas
+                                and relacion not in valores["vacias"]})
+                # Un Seq Scan de una tabla vacía no lee nada: no es regresión.
+                resumen = ", ".join(sorted({f"{tipo} {relacion}" for tipo, relacion in nodos}))
+                if malos:
+                    regresiones += 1
+                    print(f"FALLA  {nombre}: Seq Scan sobre {', '.join(malos)}")
+                    print(f"       {' '.join(sql.split())[:300]}")
+                else:
+                    print(f"ok     {nombre}")
+                print(f"       {resumen}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capturar)
+        await engine.dispose()
+    return regresiones
+
+
+async def ejecutar(argumentos) -> int:
+    cadena = ProveedorConexion(get_settings()).obtener_cadena_conexion()
+    conexion = await asyncpg.connect(dsn_asyncpg(cadena))
+    esquema = argumentos.esquema
+    try:
+        print(f"Sembrando '{esquema}' ({argumentos.facturas:,} facturas"
+              f"{', particionada' if argumentos.particionada else ''}"
+              f"{', sin índices 007' if argumentos.sin_indices else ''})...")
+        valores = await sembrar(conexion, esquema, argumentos)
+        regresiones = await verificar(conexion, esquema, valores)
+    finally:
+        if not argumentos.conservar:
+            await conexion.execute(f'DROP SCHEMA IF EXISTS "{esquema}" CASCADE')
+            if await conexion.fetchval("SELECT to_regclass('public.conteo_filas') IS NOT NULL"):
+                await conexion.execute("DELETE FROM public.conteo_filas WHERE esquema = $1", esquema)
+        await conexion.close()
+    print(f"\n{regresiones} regresión(es)." if regresiones else "\nSin recorridos secuenciales inesperados.")
+    return 1 if regresiones else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--esquema", default="regresion_planes")
+    parser.add_argument("--facturas", type=int, default=60_000)
+    parser.add_argument("--productos", type=int, default=20_000)
+    parser.add_argument("--clientes", type=int, default=2_000)
+    parser.add_argument("--vendedores", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=730, help="Días de historia de las facturas")
+    parser.add_argument("--particionada", action="store_true", help="Particionar como la migración 006")
+    parser.add_argument("--sin-indices", action="store_true", help="No crear los índices de la 007")
+    parser.add_argument("--conservar", action="store_true", help="No borrar el esquema al terminar")
+    sys.exit(asyncio.run(ejecutar(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
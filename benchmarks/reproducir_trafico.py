@@ -0,0 +1,264 @@
+"""
+reproducir_trafico.py — Reproduce tráfico capturado y compara dos versiones de la API.
+
+Los benchmarks sintéticos no tienen la mezcla real de inquilinos, búsquedas
+y escrituras; la captura (CAPTURA_HABILITADO=True) sí. Tres pasos:
+
+- sembrar:     crea (o recrea) una BD local con database/bdfacturas_postgres.sql,
+               los .sql extra que se indiquen y las migraciones. Cada versión
+               debe arrancar de la misma BD: las escrituras capturadas la cambian.
+- reproducir:  envía las peticiones de los archivos captura-*.ndjson.gz a la URL,
+               respetando los tiempos originales (--velocidad 1), acelerados
+               (--velocidad 10) o lo más rápido posible (--velocidad 0), y guarda
+               estado y latencia de cada una en un JSON.
+- comparar:    dos resultados (versión A y versión B): percentiles de latencia por
+               ruta y peticiones cuyo estado cambió. Código de salida 1 si B tiene
+               errores 5xx nuevos o un p95 más lento que --umbral × el de A.
+
+Ejecutar desde la raíz del proyecto (la API de cada versión en otra consola):
+    python -m benchmarks.reproducir_trafico sembrar --bd facturas_reproduccion
+    DB_POSTGRES=... uvicorn main:app --port 8000            # versión A
+    python -m benchmarks.reproducir_trafico reproducir capturas/ --salida a.json
+    python -m benchmarks.reproducir_trafico sembrar --bd facturas_reproduccion
+    DB_POSTGRES=... uvicorn main:app --port 8000            # versión B
+    python -m benchmarks.reproducir_trafico reproducir capturas/ --salida b.json
+    python -m benchmarks.reproducir_trafico comparar a.json b.json
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Permite importar repositorios/
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+# ─── Sembrar ─────────────────────────────────────────────────────────
+
+async def sembrar(argumentos) -> None:
+    """DROP/CREATE de la BD, script base, .sql extra y migraciones."""
+    import asyncpg
+    from sqlalchemy.engine import make_url
+
+    from config import get_settings
+    from repositorios.escucha_cambios import dsn_asyncpg
+    from repositorios.migraciones import aplicar_pendientes
+    from servicios.conexion.proveedor_conexion import ProveedorConexion
+
+    url = make_url(ProveedorConexion(get_settings()).obtener_cadena_conexion())
+    destino = url.set(database=argumentos.bd).render_as_string(hide_password=False)
+    admin = await asyncpg.connect(dsn_asyncpg(url.set(database="postgres").render_as_string(hide_password=False)))
+    try:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{argumentos.bd}" WITH (FORCE)')
+        await admin.execute(f'CREATE DATABASE "{argumentos.bd}"')
+    finally:
+        await admin.close()
+
+    conexion = await asyncpg.connect(dsn_asyncpg(destino))
+    try:
+        for script in [RAIZ / "database" / "bdfacturas_postgres.sql", *map(Path, argumentos.extra)]:
+            print(f"Ejecutando {script}...")
+            await conexion.execute(script.read_text(encoding="utf-8"))
+    finally:
+        await conexion.close()
+    if not argumentos.sin_migraciones:
+        for nombre in await aplicar_pendientes(destino):
+            print(f"Migración {nombre} aplicada.")
+    print(f"\nBD lista. Arranque la versión a medir con:\n  DB_POSTGRES='{destino}'")
+
+
+# ─── Reproducir ──────────────────────────────────────────────────────
+
+def leer_capturas(rutas: list[str]) -> list[dict]:
+    """Registros de los archivos (o carpetas con captura-*.ndjson.gz), ordenados por tiempo."""
+    archivos: list[Path] = []
+    for ruta in map(Path, rutas):
+        archivos.extend(sorted(ruta.glob("captura-*.ndjson*")) if ruta.is_dir() else [ruta])
+    registros = []
+    for archivo in archivos:
+        abrir = gzip.open if archivo.suffix == ".gz" else open
+        with abrir(archivo, "rt", encoding="utf-8") as entrada:
+            registros.extend(json.loads(linea) for linea in entrada if linea.strip())
+    registros.sort(key=lambda r: r["t"])               # Varios workers: se intercalan por tiempo
+    return registros
+
+
+def clave(registro: dict) -> str:
+    """Grupo para los percentiles: método + plantilla de la ruta (o la ruta si no hay)."""
+    return f"{registro['m']} {registro.get('r') or registro['p']}"
+
+
+async def reproducir(argumentos) -> None:
+    registros = leer_capturas(argumentos.capturas)
+    omitidas = sum(1 for r in registros if "nb" in r)  # Cuerpo no guardado (grande o no JSON)
+    registros = [r for r in registros if "nb" not in r][:argumentos.limite or None]
+    if not registros:
+        raise SystemExit("No hay peticiones para reproducir.")
+    extra = dict(h.split(":", 1) for h in argumentos.header)
+    extra = {k.strip(): v.strip() for k, v in extra.items()}
+
+    resultados: list[list] = [None] * len(registros)
+    cupos = asyncio.Semaphore(argumentos.concurrencia)
+    atraso_maximo = 0.0
+
+    async def enviar(cliente: httpx.AsyncClient, indice: int, registro: dict) -> None:
+        headers = {**registro.get("h", {}), **extra}
+        if registro.get("i"):
+            headers[argumentos.header_inquilino] = registro["i"]
+        ruta = registro["p"] + (f"?{registro['q']}" if registro.get("q") else "")
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.request(registro["m"], ruta, headers=headers,
+                                              content=registro.get("b", "").encode("utf-8") or None)
+            await respuesta.aread()
+            estado = respuesta.status_code
+        except httpx.HTTPError:
+            estado = 0                                 # Sin respuesta (conexión, timeout)
+        finally:
+            cupos.release()
+        resultados[indice] = [indice, clave(registro), estado,
+                              round((time.perf_counter() - inicio) * 1000, 3), registro.get("e")]
+
+    limites = httpx.Limits(max_connections=argumentos.concurrencia,
+                           max_keepalive_connections=argumentos.concurrencia)
+    async with httpx.AsyncClient(base_url=argumentos.url, timeout=argumentos.timeout,
+                                 limits=limites) as cliente:
+        t0_captura, t0 = registros[0]["t"], time.perf_counter()
+        tareas = []
+        for indice, registro in enumerate(registros):
+            if argumentos.velocidad > 0:               # Tiempos originales, escalados
+                objetivo = t0 + (registro["t"] - t0_captura) / argumentos.velocidad
+                espera = objetivo - time.perf_counter()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                else:
+                    atraso_maximo = max(atraso_maximo, -espera)
+            await cupos.acquire()                      # Nunca más de --concurrencia en vuelo
+            tareas.append(asyncio.create_task(enviar(cliente, indice, registro)))
+        await asyncio.gather(*tareas)
+        duracion = time.perf_counter() - t0
+
+    salida = {"url": argumentos.url, "velocidad": argumentos.velocidad, "duracion_s": round(duracion, 3),
+              "omitidas": omitidas, "atraso_maximo_s": round(atraso_maximo, 3), "resultados": resultados}
+    Path(argumentos.salida).write_text(json.dumps(salida, separators=(",", ":")), encoding="utf-8")
+    print(f"{len(resultados):,} peticiones en {duracion:.1f} s ({len(resultados) / duracion:,.0f}/s); "
+          f"{omitidas} omitidas (cuerpo no guardado). Atraso máximo del reloj: {atraso_maximo:.3f} s.")
+    if atraso_maximo > 1:
+        print("  El cliente no alcanzó la velocidad pedida: suba --concurrencia o baje --velocidad.")
+    imprimir_resumen(resultados)
+    print(f"\nResultados en {argumentos.salida}")
+
+
+# ─── Informes ────────────────────────────────────────────────────────
+
+def percentil(ordenados: list[float], p: float) -> float:
+    """Percentil por rango más cercano (lista ya ordenada)."""
+    return ordenados[min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))]
+
+
+def _por_clave(resultados: list[list]) -> dict[str, list[float]]:
+    grupos: dict[str, list[float]] = defaultdict(list)
+    for _, grupo, _, ms, _ in resultados:
+        grupos[grupo].append(ms)
+    return {k: sorted(v) for k, v in grupos.items()}
+
+
+def imprimir_resumen(resultados: list[list]) -> None:
+    errores = Counter(grupo for _, grupo, estado, _, _ in resultados if estado == 0 or estado >= 500)
+    distintos = sum(1 for _, _, estado, _, original in resultados if original and estado != original)
+    print(f"\n{'ruta':<48} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9} {'5xx':>5}")
+    for grupo, tiempos in sorted(_por_clave(resultados).items(), key=lambda g: -len(g[1])):
+        print(f"{grupo[:48]:<48} {len(tiempos):>7} {percentil(tiempos, 50):>9.2f} "
+              f"{percentil(tiempos, 95):>9.2f} {percentil(tiempos, 99):>9.2f} {tiempos[-1]:>9.2f} "
+              f"{errores.get(grupo, 0):>5}")
+    print(f"\nEstados distintos a los capturados: {distintos} (esperable si la BD no es la de producción).")
+
+
+def comparar(argumentos) -> int:
+    a = json.loads(Path(argumentos.a).read_text(encoding="utf-8"))
+    b = json.loads(Path(argumentos.b).read_text(encoding="utf-8"))
+    grupos_a, grupos_b = _por_clave(a["resultados"]), _por_clave(b["resultados"])
+    fallas = 0
+
+    print(f"{'ruta':<44} {'n':>6} {'p50 A':>8} {'p50 B':>8} {'p95 A':>8} {'p95 B':>8} "
+          f"{'p99 A':>8} {'p99 B':>8} {'Δp95':>7}")
+    for grupo in sorted(set(grupos_a) | set(grupos_b), key=lambda g: -len(grupos_a.get(g, []))):
+        ta, tb = grupos_a.get(grupo), grupos_b.get(grupo)
+        if not ta or not tb:
+            print(f"{grupo[:44]:<44} solo en {'A' if ta else 'B'}")
+            continue
+        p95a, p95b = percentil(ta, 95), percentil(tb, 95)
+        cambio = p95b / p95a - 1 if p95a else 0.0
+        marca = ""
+        if min(len(ta), len(tb)) >= argumentos.minimo and p95b > p95a * argumentos.umbral:
+            marca = "  ← más lento"
+            fallas += 1
+        print(f"{grupo[:44]:<44} {len(tb):>6} {percentil(ta, 50):>8.2f} {percentil(tb, 50):>8.2f} "
+              f"{p95a:>8.2f} {p95b:>8.2f} {percentil(ta, 99):>8.2f} {percentil(tb, 99):>8.2f} "
+              f"{cambio:>+7.0%}{marca}")
+
+    cambios: Counter = Counter()
+    ejemplos: dict[tuple, int] = {}
+    for fila_a, fila_b in zip(a["resultados"], b["resultados"]):   # Mismo índice = misma petición
+        if fila_a[2] != fila_b[2]:
+            llave = (fila_a[1], fila_a[2], fila_b[2])
+            cambios[llave] += 1
+            ejemplos.setdefault(llave, fila_a[0])
+    nuevos_5xx = sum(n for (_, ea, eb), n in cambios.items()
+                     if (eb == 0 or eb >= 500) and not (ea == 0 or ea >= 500))
+    print(f"\nPeticiones con estado distinto entre A y B: {sum(cambios.values())}")
+    for (grupo, ea, eb), n in cambios.most_common(20):
+        print(f"  {n:>6}  {grupo[:50]:<50} {ea} → {eb}  (ej: petición #{ejemplos[(grupo, ea, eb)]})")
+    if nuevos_5xx:
+        print(f"\nB tiene {nuevos_5xx} error(es) 5xx (o sin respuesta) que A no tuvo.")
+        fallas += 1
+    return 1 if fallas else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    acciones = parser.add_subparsers(dest="accion", required=True)
+
+    p_sembrar = acciones.add_parser("sembrar", help="Crea la BD local desde bdfacturas_postgres.sql")
+    p_sembrar.add_argument("--bd", default="facturas_reproduccion", help="Nombre de la BD (se recrea)")
+    p_sembrar.add_argument("--extra", action="append", default=[], help="Otro .sql a ejecutar después")
+    p_sembrar.add_argument("--sin-migraciones", action="store_true")
+
+    p_reproducir = acciones.add_parser("reproducir", help="Envía las peticiones capturadas")
+    p_reproducir.add_argument("capturas", nargs="+", help="Archivos o carpetas captura-*.ndjson.gz")
+    p_reproducir.add_argument("--url", default="http://127.0.0.1:8000")
+    p_reproducir.add_argument("--velocidad", type=float, default=1.0,
+                              help="1 = tiempos originales, 10 = diez veces más rápido, 0 = sin esperas")
+    p_reproducir.add_argument("--concurrencia", type=int, default=64, help="Peticiones en vuelo como máximo")
+    p_reproducir.add_argument("--limite", type=int, default=0, help="Solo las primeras N peticiones")
+    p_reproducir.add_argument("--timeout", type=float, default=30.0)
+    p_reproducir.add_argument("--header", action="append", default=[],
+                              help="Header extra, ej: 'Authorization: Bearer ...' (no se capturan)")
+    p_reproducir.add_argument("--header-inquilino", default="X-Tenant")
+    p_reproducir.add_argument("--salida", default="reproduccion.json")
+
+    p_comparar = acciones.add_parser("comparar", help="Compara dos resultados (A = base, B = candidata)")
+    p_comparar.add_argument("a")
+    p_comparar.add_argument("b")
+    p_comparar.add_argument("--umbral", type=float, default=1.25, help="p95 de B > umbral × p95 de A: falla")
+    p_comparar.add_argument("--minimo", type=int, default=20, help="Peticiones mínimas por ruta para juzgar")
+
+    argumentos = parser.parse_args()
+    if argumentos.accion == "sembrar":
+        asyncio.run(sembrar(argumentos))
+    elif argumentos.accion == "reproducir":
+        asyncio.run(reproducir(argumentos))
+    else:
+        sys.exit(comparar(argumentos))
+
+
+if __name__ == "__main__":
+    main()
@@ -93,12 +93,797 @@ class DatabaseSettings(BaseSettings):
 
     # Proveedor activo — determina qué repositorio y cadena de conexión usar.
     # Lee DB_PROVIDER del .env. Si no existe, usa "postgres" por defecto.
+    # "memoria": producto en memoria del proceso, sin BD (benchmarks y pruebas rápidas).
     provider: str = Field(default='postgres')
 
     # Cadena de conexión para PostgreSQL.
     # Lee DB_POSTGRES del .env. Si no existe, usa string vacío.
     postgres: str = Field(default='')
 
+    # Tamaño del pool de conexiones (conexiones abiertas permanentemente).
+    # Lee DB_POOL_SIZE del .env.
+    pool_size: int = Field(default=10)
+
+    # Conexiones extra que el pool puede abrir en picos de carga.
+    # Lee DB_MAX_OVERFLOW del .env.
+    max_overflow: int = Field(default=5)
+
+    # Segundos MÁXIMOS que una petición espera por una conexión libre.
+    # Si se agota, la petición se rechaza con 503 en vez de quedarse en cola.
+    # Lee DB_POOL_TIMEOUT del .env.
+    pool_timeout: float = Field(default=2.0)
+
+    # Sentencias preparadas que asyncpg recuerda por conexión.
+    # Con muchos inquilinos (esquemas) hay más SQL distinto: conviene subirlo.
+    # Lee DB_CACHE_SENTENCIAS del .env.
+    cache_sentencias: int = Field(default=500)
+
+    # Segundos MÁXIMOS para abrir una conexión nueva con PostgreSQL.
+    # asyncpg espera 60 s por defecto: durante un failover cada petición
+    # se quedaría ese tiempo colgada. Lee DB_TIMEOUT_CONEXION del .env.
+    timeout_conexion: float = Field(default=3.0)
+
+    # Solo con DB_PROVIDER=memoria (repositorio de producto en memoria, sin BD):
+    # productos sintéticos (PR00000001...) precargados en el esquema public al
+    # primer uso. 0 = empieza vacío. Lee DB_MEMORIA_PRODUCTOS del .env.
+    memoria_productos: int = Field(default=0)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE CONTROL DE ADMISIÓN
+# ═════════════════════════════════════════════════════════════
+
+class AdmisionSettings(BaseSettings):
+    """
+    Límites de concurrencia por ruta (control de admisión).
+
+    Cuando una ruta ya tiene 'limite_por_ruta' peticiones en curso,
+    las nuevas esperan como máximo 'espera_maxima' segundos por un cupo.
+    Si no lo obtienen, se rechazan de inmediato con 503 + Retry-After
+    (load shedding) en vez de acumularse hasta que todo expire.
+
+    Ejemplo: ADMISION_LIMITE_POR_RUTA=20 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='ADMISION_',         # ADMISION_HABILITADA, ADMISION_LIMITE_POR_RUTA, ...
+        extra='ignore'
+    )
+
+    # Activa o desactiva el control de admisión.
+    habilitada: bool = Field(default=True)
+
+    # Peticiones simultáneas permitidas por ruta (método + plantilla de ruta).
+    limite_por_ruta: int = Field(default=20)
+
+    # Límites específicos por ruta. Formato JSON en el .env:
+    # ADMISION_LIMITES='{"GET /api/producto/": 50, "POST /api/producto/": 5}'
+    limites: dict[str, int] = Field(default_factory=dict)
+
+    # Segundos que una petición puede esperar por un cupo antes de ser rechazada.
+    espera_maxima: float = Field(default=0.05)
+
+    # Valor del header Retry-After (segundos) en las respuestas 503.
+    retry_after: int = Field(default=1)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE PLAZOS (DEADLINES) POR PETICIÓN
+# ═════════════════════════════════════════════════════════════
+
+class PlazosSettings(BaseSettings):
+    """
+    Tiempo máximo que puede durar cada petición.
+
+    El plazo se traslada a PostgreSQL como statement_timeout y, si se
+    agota (o el cliente se desconecta), la consulta en curso se cancela
+    y la API responde 504 Gateway Timeout.
+
+    Ejemplo: PLAZO_POR_DEFECTO=10 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='PLAZO_',            # PLAZO_HABILITADO, PLAZO_POR_DEFECTO, ...
+        extra='ignore'
+    )
+
+    # Activa o desactiva los plazos por petición.
+    habilitado: bool = Field(default=True)
+
+    # Segundos permitidos por petición si la ruta no define otro valor.
+    por_defecto: float = Field(default=10.0)
+
+    # Plazos específicos por ruta (segundos). Formato JSON en el .env:
+    # PLAZO_POR_RUTA='{"GET /api/producto/": 5}'
+    por_ruta: dict[str, float] = Field(default_factory=dict)
+
+    # Header con el que el cliente puede pedir un plazo menor (milisegundos).
+    header: str = Field(default='X-Request-Timeout-Ms')
+
+    # Tope para el plazo pedido por header: el cliente no puede pedir más que esto.
+    maximo: float = Field(default=30.0)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN MULTI-INQUILINO (un esquema de BD por inquilino)
+# ═════════════════════════════════════════════════════════════
+
+class InquilinosSettings(BaseSettings):
+    """
+    Enrutamiento de inquilinos (tenants) a esquemas de PostgreSQL.
+
+    El inquilino se toma del header INQUILINO_HEADER (ej: X-Tenant: tienda_norte)
+    o de un prefijo de ruta (ej: /t/tienda_norte/api/producto/). El parámetro
+    ?esquema= sigue funcionando y tiene prioridad.
+
+    Ejemplo: INQUILINO_LIMITE_CONEXIONES=3 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='INQUILINO_',        # INQUILINO_HEADER, INQUILINO_VALIDAR_ESQUEMA, ...
+        extra='ignore'
+    )
+
+    # Header HTTP que identifica al inquilino.
+    header: str = Field(default='X-Tenant')
+
+    # Prefijo de ruta para identificar al inquilino en la URL: /t/{inquilino}/...
+    # Vacío = desactivado.
+    prefijo_ruta: str = Field(default='/t')
+
+    # Verifica que el esquema exista (lista de esquemas cacheada) antes de consultar.
+    validar_esquema: bool = Field(default=True)
+
+    # Segundos que se reutiliza la lista de esquemas y los metadatos de columnas.
+    ttl_cache: float = Field(default=60.0)
+
+    # Conexiones simultáneas máximas por inquilino (0 = sin límite).
+    # Evita que un inquilino ruidoso acapare todo el pool.
+    limite_conexiones: int = Field(default=0)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE CAMBIOS EN VIVO (LISTEN/NOTIFY)
+# ═════════════════════════════════════════════════════════════
+
+class CambiosSettings(BaseSettings):
+    """
+    Conexión LISTEN compartida y stream de cambios de producto (SSE/WebSocket).
+
+    Cada worker abre UNA conexión dedicada que escucha el NOTIFY del trigger
+    de producto (database/migraciones/). La usan el catálogo en memoria y el
+    stream GET /api/cambios/producto, que empuja los cambios de stock y
+    precio a las terminales en vez de que consulten el listado en bucle.
+
+    Ejemplo: CAMBIOS_HABILITADO=True en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='CAMBIOS_',          # CAMBIOS_HABILITADO, CAMBIOS_DESFASE_MAXIMO, ...
+        extra='ignore'
+    )
+
+    # Activa el stream de cambios (SSE y WebSocket). Desactivado por defecto.
+    habilitado: bool = Field(default=False)
+
+    # Canal de NOTIFY que publica el trigger de producto.
+    canal: str = Field(default='producto_cambios')
+
+    # Desfase máximo tolerado (segundos): si la conexión de LISTEN no se confirma
+    # viva en este tiempo, el catálogo en memoria deja de responder.
+    desfase_maximo: float = Field(default=2.0)
+
+    # Segundos entre intentos de reconexión del LISTEN.
+    reintento: float = Field(default=1.0)
+
+    # Eventos recientes que se guardan para reanudar desde una secuencia (Last-Event-ID).
+    historial: int = Field(default=10000)
+
+    # Suscriptores simultáneos por worker (más → 503).
+    max_suscriptores: int = Field(default=5000)
+
+    # Segundos entre latidos (comentario SSE / ping WebSocket) sin cambios.
+    latido: float = Field(default=15.0)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DEL CATÁLOGO DE PRODUCTOS EN MEMORIA
+# ═════════════════════════════════════════════════════════════
+
+class CatalogoSettings(BaseSettings):
+    """
+    Réplica en memoria de la tabla producto (opcional).
+
+    Cada worker carga el catálogo completo al iniciar y lo mantiene al día
+    con la conexión LISTEN compartida (variables CAMBIOS_CANAL,
+    CAMBIOS_DESFASE_MAXIMO...). Requiere database/migraciones/001_notificar_cambios_producto.sql.
+    Las lecturas de producto del esquema public se sirven desde memoria
+    mientras la réplica esté confirmada; si no, van a PostgreSQL como siempre.
+
+    Ejemplo: CATALOGO_HABILITADO=True en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='CATALOGO_',         # CATALOGO_HABILITADO
+        extra='ignore'
+    )
+
+    # Activa la réplica en memoria (desactivada por defecto).
+    habilitado: bool = Field(default=False)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE IMPORTACIÓN MASIVA
+# ═════════════════════════════════════════════════════════════
+
+class ImportacionSettings(BaseSettings):
+    """
+    Importación de catálogos de proveedores (CSV o NDJSON de cientos de MB).
+
+    El archivo se lee en streaming, se valida por lotes, se carga con COPY
+    en una tabla temporal y se fusiona en producto al final. Las filas
+    inválidas van a un archivo de rechazos en 'directorio'.
+
+    Ejemplo: IMPORTACION_FILAS_POR_LOTE=5000 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='IMPORTACION_',      # IMPORTACION_DIRECTORIO, IMPORTACION_FILAS_POR_LOTE, ...
+        extra='ignore'
+    )
+
+    # Carpeta donde se guardan el estado (.json) y los rechazos (.rechazos.ndjson).
+    directorio: str = Field(default='importaciones')
+
+    # Filas validadas por lote: cada lote se envía con un solo COPY.
+    # Es lo único que se mantiene en memoria (memoria acotada sin importar el tamaño del archivo).
+    filas_por_lote: int = Field(default=5000)
+
+    # Si se superan estos rechazos, la importación se aborta (archivo equivocado).
+    max_rechazos: int = Field(default=100000)
+
+    # Tamaño máximo del archivo (MB). Más → 413.
+    tamano_maximo_mb: int = Field(default=2048)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE EXPORTACIÓN SÍNCRONA
+# ═════════════════════════════════════════════════════════════
+
+class ExportacionSettings(BaseSettings):
+    """
+    Tope de GET /api/exportar/{tabla}.
+
+    La respuesta se arma completa en memoria (y Arrow/MessagePack la pasan a
+    columnas): una tabla de millones de filas tomaría cientos de MB por
+    petición. Más filas que el tope → 400 indicando el trabajo "exportacion"
+    (POST /api/trabajos), que lee con un cursor de a un lote.
+
+    Ejemplo: EXPORTACION_MAX_FILAS=100000 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='EXPORTACION_',      # EXPORTACION_MAX_FILAS
+        extra='ignore'
+    )
+
+    # Filas máximas de una exportación síncrona (0 = sin tope).
+    max_filas: int = Field(default=100000)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE TRABAJOS EN SEGUNDO PLANO
+# ═════════════════════════════════════════════════════════════
+
+class TrabajosSettings(BaseSettings):
+    """
+    Cola de trabajos pesados (exportaciones, importaciones, reportes).
+
+    Los trabajos se guardan en la tabla 'trabajo' (migración 003) y los
+    ejecutan tareas asyncio dentro de cada worker de la API. Los límites
+    evitan que el trabajo de fondo acapare el pool de conexiones que
+    atiende las peticiones: 'trabajadores' debe ser menor que DB_POOL_SIZE.
+
+    Ejemplo: TRABAJOS_HABILITADO=True en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='TRABAJOS_',         # TRABAJOS_HABILITADO, TRABAJOS_TRABAJADORES, ...
+        extra='ignore'
+    )
+
+    # Activa los endpoints /api/trabajos (requiere la migración 003).
+    habilitado: bool = Field(default=False)
+
+    # Trabajos simultáneos en ESTE worker. 0 = solo encola (otro worker los ejecuta).
+    trabajadores: int = Field(default=2)
+
+    # Trabajos simultáneos por tipo en este worker. Formato JSON en el .env:
+    # TRABAJOS_LIMITES='{"exportacion": 2, "importacion": 1}'
+    limites: dict[str, int] = Field(default_factory=dict)
+
+    # Límite para los tipos que no aparecen en 'limites'.
+    limite_por_tipo: int = Field(default=1)
+
+    # Segundos entre consultas a la cola cuando no hay trabajo.
+    intervalo_sondeo: float = Field(default=2.0)
+
+    # Segundos entre latidos de un trabajo en curso (progreso + pedido de cancelación).
+    # Sin latido durante 3 intervalos, otro worker lo da por huérfano y lo reencola.
+    latido: float = Field(default=5.0)
+
+    # Intentos máximos de un trabajo cuyo worker muere a mitad de camino.
+    max_intentos: int = Field(default=3)
+
+    # Carpeta de resultados (archivos exportados) y de archivos subidos para importar.
+    directorio: str = Field(default='trabajos')
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DEL PERFILADO POR PETICIÓN
+# ═════════════════════════════════════════════════════════════
+
+class PerfiladoSettings(BaseSettings):
+    """
+    Perfilado bajo demanda de UNA petición (flame graph en formato speedscope).
+
+    Solo se perfila la petición que trae el header 'header' con el valor
+    'secreto'. Con habilitado=False el middleware ni siquiera se registra
+    (costo cero); sin 'secreto' tampoco se activa.
+
+    Ejemplo: PERFILADO_HABILITADO=True y PERFILADO_SECRETO=... en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='PERFILADO_',        # PERFILADO_HABILITADO, PERFILADO_SECRETO, ...
+        extra='ignore'
+    )
+
+    # Registra el middleware de perfilado (requiere reiniciar la API).
+    habilitado: bool = Field(default=False)
+
+    # Valor que debe traer el header. Vacío = perfilado desactivado.
+    secreto: str = Field(default='')
+
+    # Header que activa el perfilado de la petición.
+    header: str = Field(default='X-Perfilar')
+
+    # Carpeta donde se escriben los archivos .speedscope.json.
+    directorio: str = Field(default='perfiles')
+
+    # Milisegundos entre muestras de la pila.
+    intervalo_ms: float = Field(default=1.0)
+
+    # Peticiones perfiladas a la vez por worker (el resto se atiende sin perfilar).
+    max_simultaneos: int = Field(default=1)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE TRAZAS (SPANS COMPATIBLES CON OPENTELEMETRY)
+# ═════════════════════════════════════════════════════════════
+
+class TrazasSettings(BaseSettings):
+    """
+    Trazas por capa (controller → servicio → repositorio → SQL).
+
+    Se respeta el header W3C traceparent del llamador. Sin padre, se
+    muestrea la fracción 'muestreo' de las peticiones. Los spans se
+    exportan en formato OTLP/JSON a un archivo y/o a un colector HTTP.
+
+    Ejemplo: TRAZAS_HABILITADO=True y TRAZAS_MUESTREO=0.05 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='TRAZAS_',           # TRAZAS_HABILITADO, TRAZAS_MUESTREO, ...
+        extra='ignore'
+    )
+
+    # Registra el middleware y la instrumentación (requiere reiniciar la API).
+    habilitado: bool = Field(default=False)
+
+    # Fracción de peticiones (sin traceparent) que se trazan: 0.0 a 1.0.
+    muestreo: float = Field(default=0.1)
+
+    # True: si el llamador envía traceparent, se respeta su flag 'sampled'.
+    respetar_padre: bool = Field(default=True)
+
+    # service.name de los spans.
+    servicio: str = Field(default='apifacturas')
+
+    # Archivo OTLP/JSON (una línea por lote). Vacío = no escribir archivo.
+    archivo: str = Field(default='trazas/trazas.otlp.jsonl')
+
+    # URL OTLP/HTTP con JSON, ej: http://localhost:4318/v1/traces. Vacío = no enviar.
+    colector: str = Field(default='')
+
+    # Spans por lote exportado y segundos máximos entre exportaciones.
+    lote: int = Field(default=512)
+    intervalo: float = Field(default=2.0)
+
+    # Spans en cola como máximo; si el exportador se atrasa, se descartan (y se cuentan).
+    max_cola: int = Field(default=20000)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE ANALÍTICA DE VENTAS
+# ═════════════════════════════════════════════════════════════
+
+class AnaliticaSettings(BaseSettings):
+    """
+    Clasificación ABC y métricas de ventas (/api/analitica).
+
+    El cálculo lee todas las líneas de factura del rango pedido, así que
+    el resultado se guarda 'ttl' segundos y se reutiliza entre peticiones.
+
+    Ejemplo: ANALITICA_TTL=600 y ANALITICA_UMBRAL_A=0.7 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='ANALITICA_',        # ANALITICA_TTL, ANALITICA_UMBRAL_A, ...
+        extra='ignore'
+    )
+
+    # Segundos que un resultado calculado se reutiliza (0 = no guardar).
+    ttl: float = Field(default=300.0)
+
+    # Resultados guardados como máximo (combinaciones de inquilino y rango de fechas).
+    max_entradas: int = Field(default=32)
+
+    # Participación acumulada de ingresos que cierra la clase A y la clase B (Pareto).
+    umbral_a: float = Field(default=0.80)
+    umbral_b: float = Field(default=0.95)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE REPOSICIÓN DE STOCK (PRONÓSTICO DE DEMANDA)
+# ═════════════════════════════════════════════════════════════
+
+class ReposicionSettings(BaseSettings):
+    """
+    Pronóstico de demanda y punto de reorden (GET /api/producto/reposicion).
+
+    La demanda diaria de cada producto se guarda en memoria y se actualiza
+    de forma incremental: solo se recalculan los días con facturas nuevas.
+
+    Ejemplo: REPOSICION_PLAZO_ENTREGA_DIAS=10 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='REPOSICION_',       # REPOSICION_DIAS_HISTORIA, REPOSICION_ALFA, ...
+        extra='ignore'
+    )
+
+    # Días de historia que se guardan por producto (incluido hoy).
+    dias_historia: int = Field(default=90)
+
+    # Días de la media móvil y de la desviación de la demanda.
+    ventana_media: int = Field(default=28)
+
+    # Factor de suavizado exponencial (0 a 1): más alto = reacciona más rápido.
+    alfa: float = Field(default=0.3)
+
+    # Días que tarda el proveedor en entregar y días entre revisiones de pedido.
+    plazo_entrega_dias: float = Field(default=7.0)
+    ciclo_revision_dias: float = Field(default=7.0)
+
+    # Probabilidad de no quedarse sin stock durante el plazo de entrega (stock de seguridad).
+    nivel_servicio: float = Field(default=0.95)
+
+    # Segundos entre actualizaciones incrementales (antes se responde con lo calculado).
+    intervalo: float = Field(default=30.0)
+
+    # Segundos entre reconstrucciones completas (cubre líneas borradas o agregadas a facturas viejas).
+    reconstruccion: float = Field(default=3600.0)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE AUTORIZACIÓN POR RUTA (ROLES)
+# ═════════════════════════════════════════════════════════════
+
+class AutorizacionSettings(BaseSettings):
+    """
+    Autorización por ruta con las tablas rol, rol_usuario, ruta y rutarol.
+
+    Los permisos se compilan en memoria (una máscara de bits de roles por
+    ruta de la API) y se recompilan con el NOTIFY de la migración 004.
+
+    Ejemplo: AUTORIZACION_HABILITADO=True en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='AUTORIZACION_',     # AUTORIZACION_HABILITADO, AUTORIZACION_POR_DEFECTO, ...
+        extra='ignore'
+    )
+
+    # Activa el middleware (desactivado por defecto: la API queda abierta como antes).
+    habilitado: bool = Field(default=False)
+
+    # Header con el email del usuario puesto por un gateway que ya autenticó ('' = no se acepta).
+    # Sin gateway, el usuario sale del token de POST /api/auth/login (Authorization: Bearer).
+    header_usuario: str = Field(default='')
+
+    # Rutas siempre abiertas, aunque una fila de 'ruta' las cubra o POR_DEFECTO=denegar.
+    rutas_publicas: list[str] = Field(default=['POST /api/auth/login'])
+
+    # Rutas de la API que ninguna fila de 'ruta' cubre: 'permitir' o 'denegar'.
+    por_defecto: str = Field(default='permitir')
+
+    # Canal del NOTIFY de la migración 004 (comparte la conexión LISTEN de CAMBIOS_*).
+    canal: str = Field(default='permisos_cambios')
+
+    # Sin LISTEN confirmado, segundos máximos antes de releer los permisos de la BD.
+    recarga: float = Field(default=60.0)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE AUTENTICACIÓN (LOGIN Y TOKENS)
+# ═════════════════════════════════════════════════════════════
+
+class AutenticacionSettings(BaseSettings):
+    """
+    Inicio de sesión (POST /api/auth/login) y tokens de acceso.
+
+    La contraseña se verifica con BCrypt en un pool de procesos acotado;
+    los tokens van firmados con HMAC-SHA256 y los ya validados se recuerdan
+    en memoria (LRU).
+
+    Ejemplo: AUTENTICACION_SECRETO=<64 caracteres aleatorios> en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='AUTENTICACION_',    # AUTENTICACION_SECRETO, AUTENTICACION_VIGENCIA, ...
+        extra='ignore'
+    )
+
+    # Clave de firma de los tokens. Vacía: una aleatoria por proceso (los tokens
+    # no sirven en otro worker ni tras reiniciar). En producción, SIEMPRE definirla.
+    secreto: str = Field(default='')
+
+    # Segundos de validez de un token.
+    vigencia: int = Field(default=3600)
+
+    # Procesos dedicados a BCrypt y verificaciones que pueden esperar uno (más → 503).
+    procesos: int = Field(default=2)
+    max_en_espera: int = Field(default=64)
+
+    # Tokens ya validados que se recuerdan (LRU): el resto se verifica con HMAC.
+    cache_tokens: int = Field(default=10000)
+
+    # Acepta las contraseñas heredadas en texto plano (datos de ejemplo de
+    # bdfacturas_postgres.sql) y las reemplaza por su hash bcrypt en el primer
+    # inicio de sesión correcto. False: esas cuentas no pueden iniciar sesión.
+    texto_plano: bool = Field(default=False)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE CONTEO DE FILAS (TOTALES DE LOS LISTADOS)
+# ═════════════════════════════════════════════════════════════
+
+class ConteoSettings(BaseSettings):
+    """
+    Totales de filas para paginar sin COUNT(*) en cada petición.
+
+    Modos: exacto (COUNT(*)), estimado (estadísticas del planificador) y
+    mantenido (contadores por trigger, migración 005). El resultado se
+    guarda unos segundos por (inquilino, tabla, modo, filtro).
+
+    Ejemplo: CONTEO_TTL=5 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='CONTEO_',           # CONTEO_TTL, CONTEO_MODO_POR_DEFECTO, ...
+        extra='ignore'
+    )
+
+    # Segundos que se reutiliza un total (0 = no guardar).
+    ttl: float = Field(default=5.0)
+
+    # Totales guardados como máximo (LRU).
+    max_entradas: int = Field(default=1024)
+
+    # Modo de GET /api/conteo/{tabla} cuando no se pide ?modo=.
+    modo_por_defecto: str = Field(default='estimado')
+
+    # Deltas acumulados en conteo_filas a partir de los cuales se compactan al leer.
+    compactar_desde: int = Field(default=1000)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE PARTICIONES MENSUALES DE FACTURAS
+# ═════════════════════════════════════════════════════════════
+
+class ParticionesSettings(BaseSettings):
+    """
+    Mantenimiento de las particiones por mes de factura y productosporfactura.
+
+    El trabajo "particiones" crea los meses que vienen y archiva los viejos:
+    DETACH y traslado al esquema de archivo. Requiere la migración 006.
+    Con TRABAJOS_HABILITADO=True la API lo encola sola cada 'programar_cada'
+    horas (también se puede pedir con POST /api/trabajos).
+
+    Ejemplo: PARTICIONES_MESES_RETENCION=36 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='PARTICIONES_',      # PARTICIONES_MESES_ADELANTE, PARTICIONES_ESQUEMA_ARCHIVO, ...
+        extra='ignore'
+    )
+
+    # Meses futuros que deben existir (además del actual): las facturas nuevas siempre tienen partición.
+    meses_adelante: int = Field(default=3)
+
+    # Meses anteriores al actual que se conservan; los más viejos se archivan (0 = nunca archivar).
+    meses_retencion: int = Field(default=24)
+
+    # Esquema al que se mueven las particiones archivadas (se crea si no existe).
+    esquema_archivo: str = Field(default='archivo')
+
+    # Segundos máximos esperando el bloqueo del DETACH; si no alcanza, ese mes queda para la próxima vez.
+    espera_bloqueo: float = Field(default=5.0)
+
+    # Horas entre ejecuciones automáticas del trabajo (0 = solo a mano). Sin él, pasados
+    # 'meses_adelante' meses no hay partición para las facturas nuevas y el INSERT falla.
+    programar_cada: float = Field(default=24.0)
+
+    # Esquemas particionados a mantener. Formato JSON en el .env:
+    # PARTICIONES_ESQUEMAS='["public", "tienda_norte"]'
+    esquemas: list[str] = Field(default_factory=lambda: ["public"])
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE MIGRACIONES VERSIONADAS
+# ═════════════════════════════════════════════════════════════
+
+class MigracionesSettings(BaseSettings):
+    """
+    Migraciones versionadas (database/migraciones/NNN_*.sql|.py).
+
+    Se aplican desde la consola (python -m repositorios.migraciones aplicar)
+    o al arrancar la app; cada una queda registrada en public.migracion y
+    no se vuelve a ejecutar.
+
+    Ejemplo: MIGRACIONES_AL_INICIAR=True en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='MIGRACIONES_',      # MIGRACIONES_AL_INICIAR, MIGRACIONES_DIRECTORIO
+        extra='ignore'
+    )
+
+    # Aplicar las pendientes al arrancar, antes de atender peticiones (False = solo desde la consola).
+    al_iniciar: bool = Field(default=False)
+
+    # Directorio de los archivos (vacío = database/migraciones del proyecto).
+    directorio: str = Field(default='')
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE CAPTURA DE TRÁFICO (PARA REPRODUCIRLO)
+# ═════════════════════════════════════════════════════════════
+
+class CapturaSettings(BaseSettings):
+    """
+    Captura de una muestra de las peticiones reales para reproducirlas después.
+
+    Por cada petición muestreada se guarda método, ruta, query, inquilino,
+    algunos headers, el cuerpo (JSON/NDJSON, con los campos sensibles
+    redactados), el estado y la duración, en archivos NDJSON comprimidos
+    con gzip. benchmarks/reproducir_trafico.py los vuelve a enviar a otra
+    versión de la API y compara latencias y errores.
+
+    Ejemplo: CAPTURA_HABILITADO=True y CAPTURA_MUESTREO=0.05 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='CAPTURA_',          # CAPTURA_HABILITADO, CAPTURA_MUESTREO, ...
+        extra='ignore'
+    )
+
+    # Registra el middleware de captura (requiere reiniciar la API).
+    habilitado: bool = Field(default=False)
+
+    # Fracción de peticiones que se capturan: 0.0 a 1.0.
+    muestreo: float = Field(default=0.01)
+
+    # Carpeta de los archivos captura-*.ndjson.gz (uno por worker, rotados por tamaño).
+    directorio: str = Field(default='capturas')
+
+    # Megabytes comprimidos por archivo antes de empezar otro.
+    max_mb: int = Field(default=64)
+
+    # Cuerpos de más bytes no se guardan (la petición se registra, pero no se reproduce).
+    max_cuerpo: int = Field(default=65536)
+
+    # Campos (JSON o query) cuyo valor se reemplaza por "***", separados por comas.
+    redactar: str = Field(default='contrasena,password,token,secreto,clave,authorization')
+
+    # Headers que se guardan (nunca Authorization ni Cookie), separados por comas.
+    headers: str = Field(default='content-type,accept,prefer')
+
+    # Prefijos de ruta que no se capturan (streams, métricas, documentación).
+    excluir: str = Field(default='/api/cambios,/api/metricas,/docs,/redoc,/openapi.json')
+
+    # Peticiones en cola como máximo; si el disco se atrasa, se descartan (y se cuentan).
+    max_cola: int = Field(default=10000)
+
+
+# ═════════════════════════════════════════════════════════════
+# CONFIGURACIÓN DE RESILIENCIA (REINTENTOS Y CIRCUITO)
+# ═════════════════════════════════════════════════════════════
+
+class ResilienciaSettings(BaseSettings):
+    """
+    Reintentos de errores transitorios de la BD y circuito (circuit breaker).
+
+    Un error transitorio (conexión caída, failover, BD reiniciando, conflicto
+    de serialización o deadlock) se reintenta con espera exponencial y jitter;
+    las escrituras solo si es seguro (nada llegó al servidor o la transacción
+    se abortó completa). Tras varios fallos de conexión seguidos el circuito
+    se abre: las peticiones fallan de inmediato (503) y, pasada la espera,
+    una sola petición de prueba decide si se cierra.
+
+    Ejemplo: RESILIENCIA_INTENTOS=3 en el .env.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=get_env_file(),
+        env_file_encoding='utf-8',
+        env_prefix='RESILIENCIA_',      # RESILIENCIA_INTENTOS, RESILIENCIA_UMBRAL_FALLOS, ...
+        extra='ignore'
+    )
+
+    # Intentos por operación, contando el primero (1 = sin reintentos).
+    intentos: int = Field(default=3)
+
+    # Espera entre intentos (segundos): aleatoria entre 0 y base * 2^(intento-1),
+    # nunca más de espera_maxima ni más allá del plazo de la petición.
+    espera_base: float = Field(default=0.05)
+    espera_maxima: float = Field(default=1.0)
+
+    # Fallos de conexión seguidos que abren el circuito (0 = sin circuito).
+    umbral_fallos: int = Field(default=5)
+
+    # Segundos que el circuito queda abierto; se duplica en cada reapertura
+    # seguida hasta apertura_maxima.
+    apertura: float = Field(default=2.0)
+    apertura_maxima: float = Field(default=30.0)
+
 
 # ═════════════════════════════════════════════════════════════
 # CONFIGURACIÓN PRINCIPAL
@@ -133,6 +918,63 @@ class Settings(BaseSettings):
     # Esto lee automáticamente todas las variables DB_* del .env.
     database: DatabaseSettings = Field(default_factory=DatabaseSettings)
 
+    # Campo admision: límites de concurrencia por ruta (variables ADMISION_*).
+    admision: AdmisionSettings = Field(default_factory=AdmisionSettings)
+
+    # Campo plazos: tiempo máximo por petición (variables PLAZO_*).
+    plazos: PlazosSettings = Field(default_factory=PlazosSettings)
+
+    # Campo inquilinos: enrutamiento de inquilinos a esquemas (variables INQUILINO_*).
+    inquilinos: InquilinosSettings = Field(default_factory=InquilinosSettings)
+
+    # Campo cambios: conexión LISTEN compartida y stream de cambios (variables CAMBIOS_*).
+    cambios: CambiosSettings = Field(default_factory=CambiosSettings)
+
+    # Campo catalogo: réplica en memoria de producto (variables CATALOGO_*).
+    catalogo: CatalogoSettings = Field(default_factory=CatalogoSettings)
+
+    # Campo importacion: importación masiva de productos (variables IMPORTACION_*).
+    importacion: ImportacionSettings = Field(default_factory=ImportacionSettings)
+
+    # Campo exportacion: tope de la exportación síncrona (variables EXPORTACION_*).
+    exportacion: ExportacionSettings = Field(default_factory=ExportacionSettings)
+
+    # Campo trabajos: cola de trabajos en segundo plano (variables TRABAJOS_*).
+    trabajos: TrabajosSettings = Field(default_factory=TrabajosSettings)
+
+    # Campo perfilado: perfilado por petición con header secreto (variables PERFILADO_*).
+    perfilado: PerfiladoSettings = Field(default_factory=PerfiladoSettings)
+
+    # Campo trazas: spans por capa en formato OTLP (variables TRAZAS_*).
+    trazas: TrazasSettings = Field(default_factory=TrazasSettings)
+
+    # Campo analitica: ABC y métricas de ventas, con caché (variables ANALITICA_*).
+    analitica: AnaliticaSettings = Field(default_factory=AnaliticaSettings)
+
+    # Campo reposicion: pronóstico de demanda y punto de reorden (variables REPOSICION_*).
+    reposicion: ReposicionSettings = Field(default_factory=ReposicionSettings)
+
+    # Campo autorizacion: permisos por rol y ruta (variables AUTORIZACION_*).
+    autorizacion: AutorizacionSettings = Field(default_factory=AutorizacionSettings)
+
+    # Campo autenticacion: login con BCrypt y tokens (variables AUTENTICACION_*).
+    autenticacion: AutenticacionSettings = Field(default_factory=AutenticacionSettings)
+
+    # Campo resiliencia: reintentos y circuito ante fallos de la BD (variables RESILIENCIA_*).
+    resiliencia: ResilienciaSettings = Field(default_factory=ResilienciaSettings)
+
+    # Campo conteo: totales exactos, estimados o mantenidos (variables CONTEO_*).
+    conteo: ConteoSettings = Field(default_factory=ConteoSettings)
+
+    # Campo particiones: creación y archivo de meses de facturas (variables PARTICIONES_*).
+    particiones: ParticionesSettings = Field(default_factory=ParticionesSettings)
+
+    # Campo migraciones: ejecutor de migraciones versionadas (variables MIGRACIONES_*).
+    migraciones: MigracionesSettings = Field(default_factory=MigracionesSettings)
+
+    # Campo captura: muestra de peticiones reales para reproducirlas (variables CAPTURA_*).
+    captura: CapturaSettings = Field(default_factory=CapturaSettings)
+
 
 # ═════════════════════════════════════════════════════════════
 # SINGLETON (se crea una sola vez y se reutiliza)
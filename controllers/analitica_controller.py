@@ -0,0 +1,94 @@
+"""
+analitica_controller.py — Analítica de ventas sobre las líneas de factura.
+
+Endpoints:
+- GET /api/analitica/resumen   → Ingresos, facturas, ticket promedio/mediana/p90, tamaño de canasta
+- GET /api/analitica/abc       → Clasificación ABC (Pareto) y participación de cada producto
+
+Parámetros comunes: ?desde=2025-01-01&hasta=2025-03-31 (días incluidos, por factura.fecha)
+y ?esquema=. /abc acepta además ?clase=A y ?limite=50.
+
+Ambos endpoints salen del MISMO cálculo, guardado ANALITICA_TTL segundos por
+inquilino y rango: la segunda petición (a cualquiera de los dos) no toca la BD.
+Requiere numpy (opcional en requirements.txt); sin él responde 501.
+"""
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from servicios.fabrica_repositorios import crear_servicio_analitica
+from servicios.servicio_analitica import CLASES, numpy_disponible
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+
+
+def _verificar_numpy() -> None:
+    if not numpy_disponible():
+        raise HTTPException(status_code=501, detail={
+            "estado": 501, "mensaje": "Analítica no disponible: instale numpy en el servidor."
+        })
+
+
+router = APIRouter(
+    prefix="/api/analitica", tags=["Analitica"],
+    dependencies=[Depends(_verificar_numpy), Depends(admitir)]
+)
+# Sin plazo (aplicar_plazo): con el caché vacío y millones de líneas, el cálculo
+# puede pasar del plazo por defecto; la admisión limita cuántos corren a la vez.
+
+
+async def _analizar(esquema: str | None, desde: date | None, hasta: date | None,
+                    response: Response) -> dict:
+    try:
+        resultado = await crear_servicio_analitica().analizar(esquema, desde, hasta)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+    response.headers["Cache-Control"] = f"private, max-age={int(resultado['vigencia_s'])}"
+    # Los clientes/proxies también pueden reutilizarlo mientras el servidor lo tenga guardado.
+    return resultado
+
+
+def _encabezado(resultado: dict) -> dict:
+    return {clave: resultado[clave] for clave in ("desde", "hasta", "generado", "duracion_ms")}
+
+
+@router.get("/resumen")
+async def resumen_ventas(
+    response: Response,
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    esquema: str | None = Query(default=None)
+):
+    """Totales del periodo: ingresos, facturas, ticket promedio y tamaño de canasta."""
+    resultado = await _analizar(esquema, desde, hasta, response)
+    return {**_encabezado(resultado), "resumen": resultado["resumen"], "clases": resultado["clases"]}
+
+
+@router.get("/abc")
+async def clasificacion_abc(
+    response: Response,
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    clase: str | None = Query(default=None, description="A, B o C"),
+    limite: int | None = Query(default=None, ge=1),
+    esquema: str | None = Query(default=None)
+):
+    """Productos ordenados por ingresos con su clase ABC, participación y acumulado."""
+    clase_norm = clase.strip().upper() if clase and clase.strip() else None
+    if clase_norm is not None and clase_norm not in CLASES:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": f"Clase '{clase}' inválida. Opciones: {list(CLASES)}"
+        })
+    resultado = await _analizar(esquema, desde, hasta, response)
+    productos = resultado["productos"]
+    if clase_norm is not None:
+        productos = [p for p in productos if p["clase"] == clase_norm]
+    if limite is not None:
+        productos = productos[:limite]
+    return {**_encabezado(resultado), "clases": resultado["clases"],
+            "total": len(productos), "datos": productos}
@@ -0,0 +1,65 @@
+"""
+autenticacion_controller.py — Inicio de sesión y tokens de acceso.
+
+Endpoints:
+- POST /api/auth/login   → {"email", "contrasena"} → token Bearer (AUTENTICACION_VIGENCIA segundos)
+- GET  /api/auth/sesion  → Usuario y expiración del token enviado en "Authorization: Bearer ..."
+
+La contraseña se verifica con bcrypt en un pool de procesos: el event loop
+sigue atendiendo las demás peticiones mientras se hashea. Pool y cola llenos
+→ 503 con Retry-After. Requiere bcrypt (opcional en requirements.txt); sin
+él, el login responde 501.
+
+El token lo valida el middleware de autorización en cada petición
+(AUTORIZACION_HABILITADO=true). POST /api/auth/login está en
+AUTORIZACION_RUTAS_PUBLICAS: nunca exige identidad.
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from models import Credenciales
+from servicios.contrasenas import bcrypt_disponible
+from servicios.fabrica_repositorios import crear_servicio_autenticacion
+from servicios.servicio_autenticacion import CredencialesInvalidas, verificar_token
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+
+
+router = APIRouter(prefix="/api/auth", tags=["Autenticacion"], dependencies=[Depends(admitir)])
+
+_NO_AUTENTICADO = {"WWW-Authenticate": "Bearer"}
+
+
+@router.post("/login")
+async def iniciar_sesion(credenciales: Credenciales):
+    """Verifica email y contraseña y devuelve un token de acceso."""
+    if not bcrypt_disponible():
+        raise HTTPException(status_code=501, detail={
+            "estado": 501, "mensaje": "Inicio de sesión no disponible: instale bcrypt en el servidor."
+        })
+    try:
+        return await crear_servicio_autenticacion().iniciar_sesion(
+            credenciales.email, credenciales.contrasena
+        )
+    except CredencialesInvalidas as ex:                # Mismo mensaje si falla el email o la contraseña
+        raise HTTPException(status_code=401, detail={
+            "estado": 401, "mensaje": str(ex)
+        }, headers=_NO_AUTENTICADO)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Credenciales inválidas.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+
+
+@router.get("/sesion")
+async def sesion_actual(authorization: str | None = Header(default=None)):
+    """Usuario del token Bearer (401 si falta, es inválido o expiró)."""
+    esquema, _, token = (authorization or "").partition(" ")
+    usuario = verificar_token(token.strip()) if esquema.lower() == "bearer" else None
+    if usuario is None:
+        raise HTTPException(status_code=401, detail={
+            "estado": 401, "mensaje": "Token inválido, expirado o ausente."
+        }, headers=_NO_AUTENTICADO)
+    return {"usuario": usuario}
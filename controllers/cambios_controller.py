@@ -0,0 +1,138 @@
+"""
+cambios_controller.py — Stream de cambios de stock y precio de producto.
+
+Endpoints:
+- GET       /api/cambios/producto     → Server-Sent Events (text/event-stream)
+- WEBSOCKET /api/cambios/producto/ws  → Mismos eventos por WebSocket (JSON)
+
+Parámetros (ambos):
+- ?codigos=PR001,PR002   → solo esos productos (por defecto, todos)
+- ?desde=123             → reanudar después del evento 123
+                           (en SSE también sirve el header Last-Event-ID,
+                           que EventSource envía solo al reconectar)
+
+Cada cambio: {"seq", "op", "codigo", "stock", "stockAnterior",
+"valorunitario", "valorunitarioAnterior"}. Un evento "reinicio" indica
+que el cliente debe recargar GET /api/producto/ (el stream continúa).
+
+Requiere CAMBIOS_HABILITADO=True y las migraciones 001 y 002.
+"""
+
+import json
+
+from fastapi import APIRouter, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from config import get_settings
+from controllers.errores_http import error_interno
+from servicios.difusion_cambios import difusion_cambios
+from servicios.excepciones import ErrorServicioSaturado
+
+
+router = APIRouter(prefix="/api/cambios", tags=["Cambios"])
+# Sin control de admisión ni plazo: son conexiones largas por diseño.
+# Su límite propio es CAMBIOS_MAX_SUSCRIPTORES.
+
+
+def _codigos(texto: str | None) -> set[str] | None:
+    """"PR001, PR002" → {"PR001", "PR002"}; vacío → None (todos)."""
+    if not texto:
+        return None
+    return {codigo.strip() for codigo in texto.split(",") if codigo.strip()} or None
+
+
+def _desde(desde: int | None, last_event_id: str | None) -> int | None:
+    """?desde= tiene prioridad; si no, Last-Event-ID (reconexión automática de EventSource)."""
+    if desde is not None:
+        return desde
+    if last_event_id and last_event_id.strip().isdigit():
+        return int(last_event_id)
+    return None
+
+
+def _verificar_habilitado() -> None:
+    if not get_settings().cambios.habilitado:
+        raise HTTPException(status_code=404, detail={
+            "estado": 404, "mensaje": "Stream de cambios desactivado (CAMBIOS_HABILITADO=False)."
+        })
+
+
+# =========================================================================
+# GET /api/cambios/producto — Server-Sent Events
+# =========================================================================
+
+@router.get("/producto")
+async def stream_cambios_sse(
+    codigos: str | None = Query(default=None),
+    desde: int | None = Query(default=None),
+    last_event_id: str | None = Header(default=None)
+):
+    """Empuja los cambios de stock/precio como Server-Sent Events."""
+    _verificar_habilitado()
+    try:
+        suscripcion = difusion_cambios.suscribir(_desde(desde, last_event_id), _codigos(codigos))
+    except ErrorServicioSaturado as ex:
+        raise error_interno(ex)                    # 503 + Retry-After
+    latido = get_settings().cambios.latido
+
+    async def generar():
+        try:
+            yield "retry: 2000\n\n"                # EventSource reintenta a los 2 s si se corta
+            while True:
+                eventos = await suscripcion.siguientes(latido)
+                if suscripcion.reinicio is not None:
+                    yield f"event: reinicio\ndata: {json.dumps({'motivo': suscripcion.reinicio})}\n\n"
+                    suscripcion.reinicio = None
+                if not eventos:
+                    yield ": latido\n\n"           # Comentario SSE: mantiene vivos proxies y balanceadores
+                    continue
+                yield "".join(                     # Un solo write por tanda de eventos
+                    f"id: {e['seq']}\nevent: producto\ndata: {json.dumps(e)}\n\n" for e in eventos
+                )
+                # Si el cliente es lento, este yield espera; mientras tanto los cambios
+                # del mismo producto se fusionan en la suscripción (memoria acotada).
+        finally:
+            difusion_cambios.cancelar(suscripcion) # El cliente se fue (o el servidor se apaga)
+
+    return StreamingResponse(generar(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",                 # nginx: no acumular el stream en buffer
+    })
+
+
+# =========================================================================
+# WEBSOCKET /api/cambios/producto/ws
+# =========================================================================
+
+@router.websocket("/producto/ws")
+async def stream_cambios_ws(
+    websocket: WebSocket,
+    codigos: str | None = Query(default=None),
+    desde: int | None = Query(default=None)
+):
+    """Mismos eventos que el SSE, como mensajes JSON: {"tipo": "cambios" | "reinicio" | "latido"}."""
+    if not get_settings().cambios.habilitado:
+        await websocket.close(code=1008, reason="Stream de cambios desactivado")
+        return
+    try:
+        suscripcion = difusion_cambios.suscribir(desde, _codigos(codigos))
+    except ErrorServicioSaturado:
+        await websocket.close(code=1013, reason="Límite de suscriptores alcanzado")  # 1013 = Try Again Later
+        return
+    latido = get_settings().cambios.latido
+
+    try:
+        await websocket.accept()
+        while True:
+            eventos = await suscripcion.siguientes(latido)
+            if suscripcion.reinicio is not None:
+                await websocket.send_json({"tipo": "reinicio", "motivo": suscripcion.reinicio})
+                suscripcion.reinicio = None
+            if eventos:
+                await websocket.send_json({"tipo": "cambios", "eventos": eventos})
+            else:
+                await websocket.send_json({"tipo": "latido"})
+    except WebSocketDisconnect:
+        pass                                       # El cliente cerró: nada que hacer
+    finally:
+        difusion_cambios.cancelar(suscripcion)
@@ -0,0 +1,49 @@
+"""
+conteo_controller.py — Total de filas de una tabla, exacto o aproximado.
+
+Endpoints:
+- GET /api/conteo/{tabla}   → {tabla, modo, filas, exacto, vigencia_s}
+
+?modo= elige cómo se obtiene (por defecto CONTEO_MODO_POR_DEFECTO):
+- exacto:    SELECT count(*). Recorre la tabla: caro con millones de filas.
+- estimado:  estadísticas del planificador (pg_class.reltuples). No lee filas.
+- mantenido: contador de la migración 005 (triggers). Exacto y sin recorrer la tabla.
+
+El resultado se guarda CONTEO_TTL segundos por inquilino, tabla y modo.
+Los listados aceptan el mismo ?conteo=<modo> (GET /api/producto/, /buscar y /api/factura/).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from servicios.fabrica_repositorios import crear_servicio_conteo
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+from middlewares.plazos import aplicar_plazo
+
+
+router = APIRouter(
+    prefix="/api/conteo", tags=["Conteo"],
+    dependencies=[Depends(admitir), Depends(aplicar_plazo)]
+)
+# Con plazo: un count(*) exacto sobre una tabla enorme termina en 504, no ocupa el pool sin fin.
+
+
+@router.get("/{tabla}")
+async def contar_filas(
+    tabla: str,
+    response: Response,
+    modo: str | None = Query(default=None, description="exacto | estimado | mantenido"),
+    esquema: str | None = Query(default=None)
+):
+    """Total de filas de la tabla según el modo pedido."""
+    try:
+        resultado = await crear_servicio_conteo().contar(tabla, modo, esquema)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+    response.headers["X-Total-Count"] = str(resultado["filas"])
+    response.headers["Cache-Control"] = f"private, max-age={int(resultado['vigencia_s'])}"
+    return resultado
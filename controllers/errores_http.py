@@ -0,0 +1,41 @@
+"""
+errores_http.py — Traducción de excepciones a respuestas HTTP.
+
+Todos los controllers terminan su try/except con:
+
+    except Exception as ex:
+        raise error_interno(ex)
+
+error_interno() distingue los errores de DISPONIBILIDAD (BD saturada,
+plazo agotado...), que el cliente puede reintentar, de los errores
+reales del servidor (500). Un esquema (inquilino) inexistente es 400.
+Una funcionalidad que el proveedor configurado no implementa es 501.
+"""
+
+from fastapi import HTTPException
+
+from servicios.excepciones import ErrorDisponibilidad, ErrorEsquemaInexistente, ErrorNoSoportado
+
+
+def error_interno(ex: Exception) -> HTTPException:
+    """Convierte una excepción no controlada en la HTTPException adecuada."""
+    if isinstance(ex, ErrorDisponibilidad):            # 503/504: temporal, se puede reintentar
+        headers = None
+        if ex.retry_after is not None:
+            headers = {"Retry-After": str(ex.retry_after)}
+        return HTTPException(status_code=ex.estado_http, detail={
+            "estado": ex.estado_http, "mensaje": ex.mensaje_http,
+            "detalle": str(ex)
+        }, headers=headers)
+    if isinstance(ex, ErrorEsquemaInexistente):        # Inquilino desconocido: error del cliente
+        return HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": str(ex)
+        })
+    if isinstance(ex, ErrorNoSoportado):               # DB_PROVIDER sin esa entidad (ej: memoria)
+        return HTTPException(status_code=501, detail={
+            "estado": 501, "mensaje": "No disponible con el proveedor de datos configurado.",
+            "detalle": str(ex)
+        })
+    return HTTPException(status_code=500, detail={     # Cualquier otro error: 500 de siempre
+        "estado": 500, "mensaje": "Error interno del servidor.", "detalle": str(ex)
+    })
@@ -0,0 +1,58 @@
+"""
+exportacion_controller.py — Exportación de tablas completas para analítica.
+
+Endpoints:
+- GET /api/exportar/{tabla}   → Tabla completa en JSON, Arrow IPC o MessagePack
+
+Tablas permitidas: producto, productosporfactura, factura.
+Hasta EXPORTACION_MAX_FILAS filas; más → 400 (usar el trabajo "exportacion").
+El formato se elige con el header Accept (ver controllers/formatos.py).
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+
+from servicios.fabrica_repositorios import crear_servicio_exportacion
+from controllers.errores_http import error_interno
+from controllers.formatos import (
+    FORMATO_JSON, RutaNegociada, filas_a_json, negociar_formato, respuesta_columnar
+)
+from middlewares.admision import admitir
+from middlewares.plazos import aplicar_plazo
+
+
+router = APIRouter(
+    prefix="/api/exportar", tags=["Exportacion"],
+    dependencies=[Depends(admitir), Depends(aplicar_plazo)],
+    route_class=RutaNegociada                      # Todas las rutas negocian el formato: Vary: Accept
+)
+
+
+@router.get("/{tabla}")
+async def exportar_tabla(
+    tabla: str,                                    # producto, productosporfactura, factura
+    esquema: str | None = Query(default=None),
+    limite: int | None = Query(default=None),     # Sin límite: tabla completa (hasta EXPORTACION_MAX_FILAS)
+    accept: str | None = Header(default=None)
+):
+    """Exporta una tabla completa en el formato pedido por Accept."""
+    try:
+        formato = negociar_formato(accept)
+        servicio = crear_servicio_exportacion()
+        columnas, filas = await servicio.exportar(tabla, esquema, limite)
+
+        if len(filas) == 0:
+            return Response(status_code=204)
+
+        if formato != FORMATO_JSON:
+            return respuesta_columnar(tabla, columnas, filas, formato)
+
+        return {"tabla": tabla, "total": len(filas), "datos": filas_a_json(columnas, filas)}
+
+    except HTTPException:
+        raise
+    except ValueError as ex:                       # Tabla fuera de la lista blanca o más filas que el tope
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
@@ -0,0 +1,94 @@
+"""
+factura_controller.py — Facturas completas (documento desnormalizado).
+
+Endpoints:
+- GET /api/factura/                  → Página de facturas completas (?despues=<numero>&limite=50)
+                                       ?conteo=exacto|estimado|mantenido agrega el total de facturas
+- GET /api/factura/{numero}/completa → Factura con cliente, vendedor y líneas (con nombre del producto)
+
+Cada respuesta sale de UNA consulta: PostgreSQL arma el JSON (json_agg) y lo
+envía como bytes, que se responden sin decodificar. Antes: 1 consulta por
+factura + 1 por sus líneas + 1 por cada producto, cliente y vendedor (N+1).
+
+Paginación por clave: la respuesta trae "siguiente" (y el header Link) con el
+valor de ?despues= para pedir la página siguiente; null en la última.
+"""
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from servicios.fabrica_repositorios import crear_servicio_factura
+from servicios.fabrica_repositorios import crear_servicio_conteo
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+from middlewares.plazos import aplicar_plazo
+
+
+router = APIRouter(
+    prefix="/api/factura", tags=["Factura"],
+    dependencies=[Depends(admitir), Depends(aplicar_plazo)]
+)
+
+
+@router.get("/")
+async def listar_facturas_completas(
+    request: Request,
+    despues: int | None = Query(default=None, ge=0, description="Número de la última factura recibida"),
+    limite: int | None = Query(default=None, ge=1),
+    conteo: str | None = Query(default=None, description="exacto | estimado | mantenido"),
+    esquema: str | None = Query(default=None)
+):
+    """Facturas completas en orden de número, una página por petición."""
+    try:
+        pagina = await crear_servicio_factura().listar_completas(despues, limite, esquema)
+        total = None
+        if conteo is not None:
+            total = await crear_servicio_conteo().contar("factura", conteo, esquema)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+
+    siguiente = pagina["siguiente"]
+    cuerpo = b"".join((
+        b'{"tabla":"factura","total":', str(pagina["total"]).encode(),
+        b',"limite":', str(pagina["limite"]).encode(),
+        b',"siguiente":', b"null" if siguiente is None else str(siguiente).encode(),
+        b"" if total is None else b',"conteo":' + json.dumps(total).encode(),
+        b',"datos":', pagina["datos"], b"}",
+    ))
+    # El arreglo de facturas (lo pesado) se inserta tal como llegó de PostgreSQL;
+    # solo el sobre de tres números (y el conteo, si se pidió) se escribe aquí.
+    headers = {}
+    if total is not None:
+        headers["X-Total-Count"] = str(total["filas"])
+    if siguiente is not None:
+        url = request.url.include_query_params(despues=siguiente, limite=pagina["limite"])
+        headers["Link"] = f'<{url}>; rel="next"'
+    return Response(content=cuerpo, media_type="application/json", headers=headers)
+
+
+@router.get("/{numero}/completa")
+async def obtener_factura_completa(
+    numero: int,
+    esquema: str | None = Query(default=None)
+):
+    """Factura con cliente, vendedor y líneas, lista para mostrar o imprimir."""
+    try:
+        documento = await crear_servicio_factura().obtener_completa(numero, esquema)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+
+    if documento is None:
+        raise HTTPException(status_code=404, detail={
+            "estado": 404, "mensaje": f"No se encontró factura con numero = {numero}"
+        })
+    return Response(content=documento, media_type="application/json")
+    # Response (no JSONResponse): los bytes van directo al cliente, sin json.dumps.
@@ -0,0 +1,166 @@
+"""
+formatos.py — Negociación de contenido y formatos columnares.
+
+Los clientes de analítica (BI, dataframes) no necesitan JSON: convertir
+cada fila a dict, luego a texto y luego volver a armar columnas cuesta
+más que la consulta. Según el header Accept, los endpoints de listado y
+exportación responden:
+
+- application/json                     → JSON de siempre (filas como objetos)
+- application/vnd.apache.arrow.stream  → Arrow IPC: record batches por columnas
+- application/msgpack                  → MessagePack binario, también por columnas
+
+pyarrow y msgpack son OPCIONALES: si no están instalados y el cliente
+los pide explícitamente, la API responde 406 Not Acceptable.
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, Response
+from fastapi.routing import APIRoute
+
+try:                                   # Dependencias opcionales
+    import pyarrow as pa
+except ImportError:                    # Sin pyarrow: Arrow responde 406
+    pa = None
+
+try:
+    import msgpack
+except ImportError:                    # Sin msgpack: MessagePack responde 406
+    msgpack = None
+
+
+FORMATO_JSON = "application/json"
+FORMATO_ARROW = "application/vnd.apache.arrow.stream"
+FORMATO_MSGPACK = "application/msgpack"
+
+_ALIAS = {
+    "application/json": FORMATO_JSON,
+    "*/*": FORMATO_JSON,
+    "application/*": FORMATO_JSON,
+    "application/vnd.apache.arrow.stream": FORMATO_ARROW,
+    "application/msgpack": FORMATO_MSGPACK,
+    "application/x-msgpack": FORMATO_MSGPACK,
+}
+# Media types aceptados → formato que se genera.
+
+FILAS_POR_LOTE = 65_536
+# Filas por record batch de Arrow: el cliente puede ir procesando lote a lote.
+
+
+class RutaNegociada(APIRoute):
+    """Ruta cuyo formato depende de Accept: TODAS sus respuestas llevan Vary: Accept."""
+    # JSON, 204, Arrow, 406, 400 o 5xx: un caché compartido (CDN, proxy) no debe
+    # entregarle a un cliente JSON la respuesta Arrow guardada para otro, ni al revés.
+    # Va en la ruta y no en cada return: ningún camino de salida se queda sin el header.
+
+    def get_route_handler(self):
+        manejador = super().get_route_handler()
+
+        async def con_vary(request):
+            try:
+                respuesta = await manejador(request)
+            except HTTPException as ex:                # Errores: el header viaja en la excepción
+                ex.headers = {**(ex.headers or {}), "Vary": "Accept"}
+                raise
+            respuesta.headers.add_vary_header("Accept")  # Suma a un Vary previo, no lo pisa
+            return respuesta
+
+        return con_vary
+
+
+def negociar_formato(accept: str | None) -> str:
+    """Elige el formato de respuesta según el header Accept (con valores q)."""
+    if not accept:
+        return FORMATO_JSON
+
+    candidatos = []
+    for posicion, parte in enumerate(accept.split(",")):
+        media, *parametros = [p.strip() for p in parte.split(";")]
+        calidad = 1.0
+        for parametro in parametros:
+            if parametro.startswith("q="):
+                try:
+                    calidad = float(parametro[2:])
+                except ValueError:
+                    calidad = 0.0
+        formato = _ALIAS.get(media.lower())
+        if formato is not None and calidad > 0:
+            candidatos.append((-calidad, posicion, formato))
+    # Orden: mayor q primero; a igual q, el que el cliente escribió primero.
+
+    if not candidatos:
+        return FORMATO_JSON                            # Nada reconocible: JSON de siempre
+    formato = min(candidatos)[2]
+
+    if formato == FORMATO_ARROW and pa is None:
+        raise HTTPException(status_code=406, detail={
+            "estado": 406, "mensaje": "Formato Arrow no disponible: instale pyarrow en el servidor."
+        })
+    if formato == FORMATO_MSGPACK and msgpack is None:
+        raise HTTPException(status_code=406, detail={
+            "estado": 406, "mensaje": "Formato MessagePack no disponible: instale msgpack en el servidor."
+        })
+    return formato
+
+
+def _valor_simple(valor: Any) -> Any:
+    """Convierte tipos sin equivalente en MessagePack (mismas reglas que el JSON de la API)."""
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, UUID):
+        return str(valor)
+    raise TypeError(f"Tipo no serializable en MessagePack: {type(valor).__name__}")
+
+
+def filas_a_json(columnas: list[str], filas: list[tuple]) -> list[dict[str, Any]]:
+    """Convierte (columnas, filas) al formato JSON de siempre: una lista de dicts."""
+    def valor_json(valor):
+        if isinstance(valor, (datetime, date, time, Decimal, UUID)):
+            return _valor_simple(valor)
+        return valor                                   # str, int, float, bool, None: sin cambio
+    return [
+        {col: valor_json(fila[i]) for i, col in enumerate(columnas)}
+        for fila in filas
+    ]
+
+
+def codificar_arrow(columnas: list[str], filas: list[tuple]) -> bytes:
+    """Arma una tabla Arrow columna por columna y la escribe como stream IPC."""
+    valores = list(zip(*filas)) if filas else [() for _ in columnas]
+    # zip(*filas) transpone: [(a1, b1), (a2, b2)] → [(a1, a2), (b1, b2)]
+    tabla = pa.Table.from_arrays(
+        [pa.array(list(columna)) for columna in valores], names=list(columnas)
+    )
+    # pa.array infiere el tipo de la columna completa (Decimal → decimal128, datetime → timestamp).
+
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabla.schema) as escritor:
+        for lote in tabla.to_batches(max_chunksize=FILAS_POR_LOTE):
+            escritor.write_batch(lote)
+    return destino.getvalue().to_pybytes()
+
+
+def codificar_msgpack(tabla: str, columnas: list[str], filas: list[tuple]) -> bytes:
+    """Codifica el resultado en MessagePack orientado a columnas."""
+    valores = [list(columna) for columna in zip(*filas)] if filas else [[] for _ in columnas]
+    return msgpack.packb({
+        "tabla": tabla,
+        "total": len(filas),
+        "columnas": list(columnas),
+        "datos": valores,                              # Una lista por columna, no un dict por fila
+    }, default=_valor_simple, use_bin_type=True)
+
+
+def respuesta_columnar(tabla: str, columnas: list[str], filas: list[tuple], formato: str) -> Response:
+    """Construye la Response binaria en el formato negociado (Arrow o MessagePack)."""
+    if formato == FORMATO_ARROW:
+        contenido = codificar_arrow(columnas, filas)
+    else:
+        contenido = codificar_msgpack(tabla, columnas, filas)
+    return Response(content=contenido, media_type=formato)  # Vary: Accept lo pone RutaNegociada
@@ -0,0 +1,106 @@
+"""
+importacion_controller.py — Importación masiva de productos (archivos de proveedores).
+
+Endpoints:
+- POST /api/importar/producto          → Sube un CSV o NDJSON (cuerpo en streaming)
+- GET  /api/importar/{id}              → Estado/progreso de una importación
+- GET  /api/importar/{id}/rechazos     → Filas rechazadas (NDJSON: linea, error, registro)
+
+Formato: header Content-Type (text/csv o application/x-ndjson) o ?formato=csv|ndjson.
+CSV con encabezado: codigo,nombre,stock,valorunitario (en cualquier orden).
+Parámetro opcional ?id= para consultar el progreso mientras se sube el archivo.
+
+El cuerpo NO se carga en memoria: se lee por trozos, se valida fila por fila
+y se envía a PostgreSQL con COPY en lotes. Las filas válidas se fusionan en
+producto en UNA transacción (todo o nada); las inválidas van al archivo de
+rechazos y no detienen la importación.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+
+from config import get_settings
+from servicios.fabrica_repositorios import crear_servicio_importacion
+from servicios.servicio_importacion import (
+    FORMATO_CSV, FORMATO_NDJSON, obtener_estado, ruta_rechazos
+)
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+
+
+router = APIRouter(
+    prefix="/api/importar", tags=["Importacion"],
+    dependencies=[Depends(admitir)]
+)
+# Sin plazo (aplicar_plazo): subir cientos de MB tarda minutos por diseño.
+# La admisión sí aplica: limita cuántas importaciones ocupan conexión a la vez.
+
+
+def _formato(formato: str | None, content_type: str | None) -> str:
+    """?formato= tiene prioridad; si no, el Content-Type."""
+    if formato:
+        return formato.strip().lower()
+    tipo = (content_type or "").split(";")[0].strip().lower()
+    if tipo in ("text/csv", "application/csv"):
+        return FORMATO_CSV
+    if tipo in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return FORMATO_NDJSON
+    return tipo or "desconocido"               # El servicio lo rechaza con 400
+
+
+def _no_encontrada(id_importacion: str) -> HTTPException:
+    return HTTPException(status_code=404, detail={
+        "estado": 404, "mensaje": f"Importación '{id_importacion}' no encontrada."
+    })
+
+
+@router.post("/producto")
+async def importar_productos(
+    request: Request,
+    formato: str | None = Query(default=None),     # csv | ndjson (si no, Content-Type)
+    esquema: str | None = Query(default=None),
+    id: str | None = Query(default=None)           # Id propio para seguir el progreso
+):
+    """Importa un catálogo completo: COPY a staging + merge en producto."""
+    limite = get_settings().importacion.tamano_maximo_mb * 2**20
+    longitud = request.headers.get("content-length")
+    if longitud and longitud.isdigit() and int(longitud) > limite:
+        raise HTTPException(status_code=413, detail={   # Antes de leer un solo byte
+            "estado": 413, "mensaje": f"El archivo supera el máximo de {limite // 2**20} MB."
+        })
+    try:
+        servicio = crear_servicio_importacion()
+        resultado = await servicio.importar(
+            request.stream(), _formato(formato, request.headers.get("content-type")), esquema, id
+        )
+        return {"estado": 200, "mensaje": "Importación completada.", **resultado}
+
+    except ValueError as ex:                       # Formato, encabezado, tamaño o demasiados rechazos
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Importación rechazada.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+
+
+@router.get("/{id_importacion}")
+async def estado_importacion(id_importacion: str):
+    """Progreso (bytes y filas leídas, rechazos) o resultado final."""
+    estado = obtener_estado(id_importacion)
+    if estado is None:
+        raise _no_encontrada(id_importacion)
+    return estado
+
+
+@router.get("/{id_importacion}/rechazos")
+async def rechazos_importacion(id_importacion: str):
+    """Descarga el archivo de filas rechazadas."""
+    if obtener_estado(id_importacion) is None:
+        raise _no_encontrada(id_importacion)
+    ruta = ruta_rechazos(id_importacion)
+    if ruta is None:                               # Importación sin rechazos
+        raise HTTPException(status_code=404, detail={
+            "estado": 404, "mensaje": "La importación no tiene filas rechazadas."
+        })
+    return FileResponse(ruta, media_type="application/x-ndjson",
+                        filename=f"{id_importacion}.rechazos.ndjson")
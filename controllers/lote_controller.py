@@ -0,0 +1,84 @@
+"""
+lote_controller.py — Operaciones de producto en lote.
+
+Endpoints:
+- POST /api/batch   → Ejecuta crear/actualizar/eliminar en UNA transacción
+
+Un cierre de caja hace decenas de operaciones sobre productos. Enviadas una
+por una cuestan N peticiones HTTP, N conexiones y N COMMIT. En lote:
+1 petición, 1 conexión, 1 COMMIT.
+
+Body:
+    {
+      "todo_o_nada": true,
+      "operaciones": [
+        {"operacion": "crear", "producto": {"codigo": "PR100", "nombre": "Cable", "stock": 5, "valorunitario": 9000}},
+        {"operacion": "actualizar", "codigo": "PR001", "producto": {"codigo": "PR001", "nombre": "Laptop", "stock": 18, "valorunitario": 2500000}},
+        {"operacion": "eliminar", "codigo": "PR008"}
+      ]
+    }
+
+- todo_o_nada=true  → si una falla, se revierte todo y se responde 409.
+- todo_o_nada=false → cada operación se confirma o revierte por separado (SAVEPOINT).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from models.lote import OperacionLote, SolicitudLote
+from servicios.fabrica_repositorios import crear_servicio_producto
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+from middlewares.plazos import aplicar_plazo
+
+
+router = APIRouter(
+    prefix="/api/batch", tags=["Lote"],
+    dependencies=[Depends(admitir), Depends(aplicar_plazo)]
+)
+
+
+def _a_diccionario(operacion: OperacionLote) -> dict:
+    """Convierte la operación validada al formato que espera el servicio."""
+    if operacion.operacion == "crear":
+        return {"operacion": "crear", "codigo": operacion.producto.codigo,
+                "datos": operacion.producto.model_dump()}
+    if operacion.operacion == "actualizar":
+        return {"operacion": "actualizar", "codigo": operacion.codigo,
+                "datos": operacion.producto.model_dump(exclude={"codigo"})}  # Igual que PUT
+    return {"operacion": "eliminar", "codigo": operacion.codigo}
+
+
+@router.post("")
+async def ejecutar_lote(
+    solicitud: SolicitudLote,                      # Body validado por Pydantic
+    esquema: str | None = Query(default=None)
+):
+    """Ejecuta las operaciones en orden, en una sola transacción."""
+    try:
+        servicio = crear_servicio_producto()
+        resultado = await servicio.ejecutar_lote(
+            [_a_diccionario(op) for op in solicitud.operaciones],
+            esquema, solicitud.todo_o_nada
+        )
+
+        if not resultado["confirmado"]:            # todo_o_nada y una operación falló
+            raise HTTPException(status_code=409, detail={
+                "estado": 409,
+                "mensaje": "El lote se revirtió completo: una operación falló.",
+                **resultado
+            })
+
+        return {
+            "estado": 200,
+            "mensaje": "Lote ejecutado.",
+            **resultado                            # confirmado, exitosas, fallidas, resultados
+        }
+
+    except HTTPException:
+        raise
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Lote inválido.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
@@ -0,0 +1,107 @@
+"""
+maestro_detalle_controller.py — Operaciones maestro-detalle con los procedimientos del esquema.
+
+Endpoints ({relacion}: persona-cliente, persona-vendedor, empresa-cliente,
+factura-productos, usuario-roles):
+- POST   /api/maestro-detalle/{relacion}          → Crea el maestro y sus detalles
+- GET    /api/maestro-detalle/{relacion}/{clave}  → Maestro con sus detalles
+- PUT    /api/maestro-detalle/{relacion}/{clave}  → Actualiza el maestro y REEMPLAZA los detalles
+- DELETE /api/maestro-detalle/{relacion}/{clave}  → Elimina el maestro y sus detalles
+
+Body de POST y PUT:
+    {"maestro": {"codigo": "P100", "nombre": "Diana", ...},
+     "detalles": [{"id": 100, "credito": 300000, "fkcodempresa": "E001"}]}
+
+Cada operación es UN CALL al procedimiento sp_<operacion>_<relacion>: una
+petición HTTP, una sentencia SQL, todo o nada. Si el procedimiento responde
+exito=false: 404 (maestro inexistente), 409 (clave duplicada) o 400.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from models import SolicitudMaestroDetalle
+from servicios.excepciones import ErrorProcedimiento
+from servicios.fabrica_repositorios import crear_servicio_maestro_detalle
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+from middlewares.plazos import aplicar_plazo
+
+
+router = APIRouter(
+    prefix="/api/maestro-detalle", tags=["MaestroDetalle"],
+    dependencies=[Depends(admitir), Depends(aplicar_plazo)]
+)
+
+
+def _error_http(ex: Exception) -> HTTPException:
+    """ErrorProcedimiento → su código; ValueError → 400; el resto → error_interno."""
+    if isinstance(ex, ErrorProcedimiento):
+        return HTTPException(status_code=ex.estado_http, detail={
+            "estado": ex.estado_http, "mensaje": "El procedimiento no se completó.", "detalle": str(ex)
+        })
+    if isinstance(ex, ValueError):
+        return HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Datos inválidos.", "detalle": str(ex)
+        })
+    return error_interno(ex)
+
+
+@router.post("/{relacion}", status_code=201)
+async def crear_maestro_detalle(
+    relacion: str,
+    solicitud: SolicitudMaestroDetalle,
+    esquema: str | None = Query(default=None)
+):
+    """Crea el maestro y todos sus detalles en una sola llamada."""
+    try:
+        resultado = await crear_servicio_maestro_detalle().crear(
+            relacion, solicitud.maestro, solicitud.detalles, esquema
+        )
+    except Exception as ex:
+        raise _error_http(ex)
+    return {"estado": 201, "mensaje": "Registro creado exitosamente.", **resultado}
+
+
+@router.get("/{relacion}/{clave}")
+async def obtener_maestro_detalle(
+    relacion: str,
+    clave: str,
+    esquema: str | None = Query(default=None)
+):
+    """Maestro y detalles (p_resultado del procedimiento)."""
+    try:
+        resultado = await crear_servicio_maestro_detalle().obtener(relacion, clave, esquema)
+    except Exception as ex:
+        raise _error_http(ex)
+    return {"relacion": relacion, "maestro": resultado["maestro"], "detalles": resultado["detalles"]}
+
+
+@router.put("/{relacion}/{clave}")
+async def actualizar_maestro_detalle(
+    relacion: str,
+    clave: str,
+    solicitud: SolicitudMaestroDetalle,
+    esquema: str | None = Query(default=None)
+):
+    """Actualiza el maestro y reemplaza sus detalles por los enviados."""
+    try:
+        resultado = await crear_servicio_maestro_detalle().actualizar(
+            relacion, clave, solicitud.maestro, solicitud.detalles, esquema
+        )
+    except Exception as ex:
+        raise _error_http(ex)
+    return {"estado": 200, **resultado}
+
+
+@router.delete("/{relacion}/{clave}")
+async def eliminar_maestro_detalle(
+    relacion: str,
+    clave: str,
+    esquema: str | None = Query(default=None)
+):
+    """Elimina los detalles y el maestro."""
+    try:
+        resultado = await crear_servicio_maestro_detalle().eliminar(relacion, clave, esquema)
+    except Exception as ex:
+        raise _error_http(ex)
+    return {"estado": 200, **resultado}
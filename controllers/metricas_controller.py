@@ -0,0 +1,21 @@
+"""
+metricas_controller.py — Exposición de métricas de la aplicación.
+
+Endpoints:
+- GET /api/metricas/   → Instantánea de contadores, medidores y estado de los pools
+"""
+
+from fastapi import APIRouter
+
+from servicios.metricas import metricas   # Registro único del proceso
+
+
+router = APIRouter(prefix="/api/metricas", tags=["Metricas"])
+# Sin control de admisión: las métricas deben responder justo cuando hay sobrecarga.
+
+
+@router.get("/")
+async def obtener_metricas():
+    """Retorna las métricas del worker que atiende la petición."""
+    return metricas.instantanea()
+    # Ej: admision_atendidas_total vs. admision_rechazadas_total por ruta.
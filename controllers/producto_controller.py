@@ -2,60 +2,187 @@
 producto_controller.py — Controller específico para la tabla producto.
 
 Endpoints:
-- GET    /api/producto/              → Listar productos
+- GET    /api/producto/              → Listar productos (?conteo=exacto|estimado|mantenido: total de la tabla)
+- GET    /api/producto/buscar        → Buscar productos por prefijo del nombre (?conteo=exacto|estimado)
+- GET    /api/producto/reposicion    → Pronóstico de demanda y productos por reponer
 - GET    /api/producto/{codigo}      → Obtener producto por código
 - POST   /api/producto/              → Crear producto
+- POST   /api/producto/masivo        → Crear muchos productos (lista JSON, errores por fila)
 - PUT    /api/producto/{codigo}      → Actualizar producto
+- PATCH  /api/producto/{codigo}      → Actualizar solo los campos enviados (?retornar=true: la fila final)
 - DELETE /api/producto/{codigo}      → Eliminar producto
 """
 
-from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 # APIRouter: crea grupo de rutas con prefijo común (mini app).
+# Depends: engancha dependencias que se ejecutan antes de cada handler.
+# Header: lee un header HTTP como parámetro (ej: Accept).
 # HTTPException: lanza errores HTTP (404, 500, etc.).
 # Query: define parámetros de query string (?esquema=public&limite=10).
+# Request: acceso al cuerpo crudo (bytes) sin que FastAPI lo valide.
 # Response: respuestas HTTP personalizadas (ej: 204 sin body).
 
 from models.producto import Producto   # Modelo Pydantic: valida el body de POST y PUT
+from models.producto import ProductoParcial  # Body de PATCH: todos los campos opcionales
 from servicios.fabrica_repositorios import crear_servicio_producto  # Factory: crea el servicio
-
-
-router = APIRouter(prefix="/api/producto", tags=["Producto"])
+from servicios.fabrica_repositorios import crear_servicio_reposicion
+from servicios.fabrica_repositorios import crear_servicio_conteo   # ?conteo=: total de filas
+from servicios.servicio_reposicion import numpy_disponible
+from servicios.excepciones import ErrorCargaExcesiva  # Más filas de las permitidas: 413
+from controllers.errores_http import error_interno  # Traduce excepciones a 500/503/504
+from controllers.formatos import (                 # Negociación JSON / Arrow / MessagePack
+    FORMATO_JSON, RutaNegociada, negociar_formato, respuesta_columnar
+)
+from middlewares.admision import admitir  # Límite de concurrencia por ruta (503 si está llena)
+from middlewares.plazos import aplicar_plazo  # Plazo por petición (504 si se agota)
+
+
+router = APIRouter(
+    prefix="/api/producto", tags=["Producto"],
+    dependencies=[Depends(admitir), Depends(aplicar_plazo)]
+)
 # prefix: todas las rutas empiezan con /api/producto
 # tags: agrupa endpoints bajo "Producto" en Swagger UI
+# dependencies: control de admisión y plazo en TODAS las rutas del router
+
+_MAX_BYTES_MASIVO = 64 * 2**20
+# Tamaño máximo del cuerpo de POST /masivo: se valida completo en memoria.
 
 
 # =========================================================================
 # GET /api/producto/ — Listar todos los productos
 # =========================================================================
 
-@router.get("/")                       # Registra esta función como handler de GET /api/producto/
 async def listar_productos(
+    response: Response,                           # Para agregar X-Total-Count sin perder la serialización
     esquema: str | None = Query(default=None),   # Query string opcional: ?esquema=public
-    limite: int | None = Query(default=None)      # Query string opcional: ?limite=10
+    limite: int | None = Query(default=None),     # Query string opcional: ?limite=10
+    conteo: str | None = Query(default=None, description="exacto | estimado | mantenido"),
+    accept: str | None = Header(default=None)     # Header Accept: JSON, Arrow o MessagePack
 ):
-    """Lista todos los productos."""
+    """Lista todos los productos. Responde JSON, Arrow IPC o MessagePack según Accept."""
     try:
+        formato = negociar_formato(accept)        # 406 si piden un formato no instalado
         servicio = crear_servicio_producto()      # Factory: crea todo el stack (repo + servicio)
+
+        if formato != FORMATO_JSON:               # Clientes de analítica: columnas, no dicts
+            columnas, filas_crudas = await servicio.listar_columnas(esquema, limite)
+            if len(filas_crudas) == 0:
+                return Response(status_code=204)
+            respuesta = respuesta_columnar("producto", columnas, filas_crudas, formato)
+            if conteo is not None:                # Formato binario: el total va solo en el header
+                total = await crear_servicio_conteo().contar("producto", conteo, esquema)
+                respuesta.headers["X-Total-Count"] = str(total["filas"])
+            return respuesta
+
         filas = await servicio.listar(esquema, limite)  # Delega al servicio → repo → SQL
 
         if len(filas) == 0:
             return Response(status_code=204)       # 204 No Content: sin productos
         # 204 = "petición exitosa pero no hay contenido que devolver"
 
-        return {                                   # FastAPI convierte dict a JSON automáticamente
+        cuerpo = {                                 # FastAPI convierte dict a JSON automáticamente
             "tabla": "producto",
-            "total": len(filas),
+            "total": len(filas),                   # Filas de ESTA respuesta (no cambia con ?conteo=)
             "datos": filas
         }
+        if conteo is None:
+            return cuerpo
+        total = await crear_servicio_conteo().contar("producto", conteo, esquema)
+        # Total de la TABLA: {modo, filas, exacto, vigencia_s}. Cacheado unos segundos.
+        response.headers["X-Total-Count"] = str(total["filas"])
+        return {**cuerpo, "conteo": total}
 
+    except HTTPException:
+        raise                                      # 406 de la negociación de formato
     except ValueError as ex:                       # ValueError: validación del servicio
         raise HTTPException(status_code=400, detail={
             "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
         })
     except Exception as ex:                        # Cualquier otro error (BD, conexión, etc.)
-        raise HTTPException(status_code=500, detail={
-            "estado": 500, "mensaje": "Error interno del servidor.", "detalle": str(ex)
+        raise error_interno(ex)                    # 500, 503 (BD saturada) o 504 (plazo agotado)
+
+
+router.add_api_route("/", listar_productos, methods=["GET"], route_class_override=RutaNegociada)
+# Registra listar_productos como handler de GET /api/producto/. Igual que @router.get("/"),
+# pero con RutaNegociada: la respuesta depende de Accept y lo declara con Vary: Accept.
+
+
+# =========================================================================
+# GET /api/producto/buscar — Buscar por prefijo del nombre
+# =========================================================================
+# Se registra ANTES de /{codigo}: si no, "buscar" se tomaría como un código.
+
+@router.get("/buscar")
+async def buscar_productos(
+    response: Response,
+    nombre: str = Query(..., min_length=1),       # Prefijo: ?nombre=lap
+    esquema: str | None = Query(default=None),
+    limite: int | None = Query(default=None),
+    conteo: str | None = Query(default=None, description="exacto | estimado")
+):
+    """Busca productos cuyo nombre empieza por el prefijo dado."""
+    try:
+        servicio = crear_servicio_producto()
+        filas = await servicio.buscar_por_nombre(nombre, esquema, limite)
+        if len(filas) == 0:
+            return Response(status_code=204)
+        cuerpo = {"tabla": "producto", "total": len(filas), "datos": filas}
+        if conteo is None:
+            return cuerpo
+        total = await crear_servicio_conteo().contar_productos_por_prefijo(nombre, conteo, esquema)
+        # Cuántos nombres empiezan por el prefijo (no solo los de esta página).
+        response.headers["X-Total-Count"] = str(total["filas"])
+        return {**cuerpo, "conteo": total}
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+
+
+# =========================================================================
+# GET /api/producto/reposicion — Pronóstico de demanda y punto de reorden
+# =========================================================================
+# También ANTES de /{codigo}. Por defecto solo lista lo que hay que reponer
+# (stock <= punto de reorden); ?todos=true devuelve el catálogo completo.
+
+@router.get("/reposicion")
+async def reposicion_productos(
+    response: Response,
+    todos: bool = Query(default=False),           # ?todos=true: también los que no hay que reponer
+    limite: int | None = Query(default=None, ge=1),
+    esquema: str | None = Query(default=None)
+):
+    """Productos por reponer: demanda pronosticada, punto de reorden y cantidad sugerida."""
+    if not numpy_disponible():
+        raise HTTPException(status_code=501, detail={
+            "estado": 501, "mensaje": "Reposición no disponible: instale numpy en el servidor."
         })
+    try:
+        resultado = await crear_servicio_reposicion().pronosticar(esquema)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Parámetros inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
+
+    datos = resultado["productos"] if todos else [p for p in resultado["productos"] if p["reponer"]]
+    if limite is not None:
+        datos = datos[:limite]
+    if len(datos) == 0:
+        return Response(status_code=204)           # Nada que reponer
+    response.headers["Cache-Control"] = f"private, max-age={int(resultado['calculo']['vigencia_s'])}"
+    return {
+        "tabla": "producto",
+        "total": len(datos),
+        "por_reponer": resultado["por_reponer"],
+        "calculo": resultado["calculo"],
+        "parametros": resultado["parametros"],
+        "datos": datos
+    }
 
 
 # =========================================================================
@@ -89,9 +216,7 @@ async def obtener_producto(
         raise                                      # Re-lanza 404 sin convertirla en 500
     # Sin este bloque, except Exception capturaría el 404 y lo haría 500.
     except Exception as ex:
-        raise HTTPException(status_code=500, detail={
-            "estado": 500, "mensaje": "Error interno del servidor.", "detalle": str(ex)
-        })
+        raise error_interno(ex)
 
 
 # =========================================================================
@@ -130,9 +255,43 @@ async def crear_producto(
             "estado": 400, "mensaje": "Datos inválidos.", "detalle": str(ex)
         })
     except Exception as ex:
-        raise HTTPException(status_code=500, detail={
-            "estado": 500, "mensaje": "Error interno del servidor.", "detalle": str(ex)
+        raise error_interno(ex)
+
+
+# =========================================================================
+# POST /api/producto/masivo — Crear muchos productos
+# =========================================================================
+
+@router.post("/masivo")
+async def crear_productos_masivo(
+    request: Request,                  # Cuerpo crudo: [{"codigo": ..., "nombre": ...}, ...]
+    esquema: str | None = Query(default=None)
+):
+    """Crea miles de productos en una sentencia. Las filas inválidas se reportan sin abortar."""
+    # No se declara list[Producto] como parámetro: FastAPI haría json.loads() y un
+    # modelo por fila, y un solo error rechazaría TODO con 422. Aquí los bytes van
+    # directo al TypeAdapter cacheado (servicios/validacion_masiva.py).
+    longitud = request.headers.get("content-length")
+    if longitud and longitud.isdigit() and int(longitud) > _MAX_BYTES_MASIVO:
+        raise HTTPException(status_code=413, detail={
+            "estado": 413, "mensaje": f"El cuerpo supera el máximo de {_MAX_BYTES_MASIVO // 2**20} MB."
+        })
+    try:
+        servicio = crear_servicio_producto()
+        resultado = await servicio.crear_masivo(await request.body(), esquema)
+        return {"estado": 200, "mensaje": "Carga masiva procesada.", **resultado}
+        # {"recibidas": 1000, "insertadas": 990, "existentes": [...], "rechazadas": 10, "errores": [...]}
+
+    except ErrorCargaExcesiva as ex:               # La validación se cortó al pasar MAX_FILAS_MASIVO
+        raise HTTPException(status_code=413, detail={
+            "estado": 413, "mensaje": str(ex)
         })
+    except ValueError as ex:                       # Cuerpo vacío o que no es una lista JSON
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Datos inválidos.", "detalle": str(ex)
+        })
+    except Exception as ex:
+        raise error_interno(ex)
 
 
 # =========================================================================
@@ -175,9 +334,59 @@ async def actualizar_producto(
             "estado": 400, "mensaje": "Datos inválidos.", "detalle": str(ex)
         })
     except Exception as ex:
-        raise HTTPException(status_code=500, detail={
-            "estado": 500, "mensaje": "Error interno del servidor.", "detalle": str(ex)
+        raise error_interno(ex)
+
+
+# =========================================================================
+# PATCH /api/producto/{codigo} — Actualizar solo los campos enviados
+# =========================================================================
+
+@router.patch("/{codigo}")
+async def actualizar_producto_parcial(
+    codigo: str,                       # De la URL: PATCH /api/producto/PR001
+    producto: ProductoParcial,         # Body JSON: {"stock": 15} (los omitidos no se tocan)
+    response: Response,
+    esquema: str | None = Query(default=None),
+    retornar: bool = Query(default=False, description="Incluir el producto final en la respuesta"),
+    prefer: str | None = Header(default=None)     # Prefer: return=representation (RFC 7240)
+):
+    """Actualiza solo los campos enviados. Si ninguno cambia, no escribe nada."""
+    try:
+        datos = producto.model_dump(exclude_unset=True)
+        # exclude_unset: {"stock": 15} → solo stock (PUT escribiría nombre y
+        # valorunitario también, con None si no se enviaron).
+        representacion = "return=representation" in (prefer or "").replace(" ", "").lower()
+        if representacion:
+            response.headers["Preference-Applied"] = "return=representation"
+
+        servicio = crear_servicio_producto()
+        resultado = await servicio.actualizar_parcial(codigo, datos, esquema, retornar or representacion)
+        # UPDATE producto SET stock = 15 WHERE codigo = 'PR001' AND stock IS DISTINCT FROM 15
+
+        if resultado is None:
+            raise HTTPException(status_code=404, detail={
+                "estado": 404,
+                "mensaje": f"No existe producto con codigo = {codigo}"
+            })
+        respuesta = {
+            "estado": 200,
+            "mensaje": ("Producto actualizado exitosamente." if resultado["filasAfectadas"]
+                        else "Sin cambios: el producto ya tenía esos valores."),
+            "filtro": f"codigo = {codigo}",
+            "filasAfectadas": resultado["filasAfectadas"]
+        }
+        if resultado["fila"] is not None:           # La fila tal como quedó: sin GET adicional
+            respuesta["datos"] = [resultado["fila"]]
+        return respuesta
+
+    except HTTPException:
+        raise
+    except ValueError as ex:                       # {} o null en una columna NOT NULL
+        raise HTTPException(status_code=400, detail={
+            "estado": 400, "mensaje": "Datos inválidos.", "detalle": str(ex)
         })
+    except Exception as ex:
+        raise error_interno(ex)
 
 
 # =========================================================================
@@ -212,6 +421,4 @@ async def eliminar_producto(
     except HTTPException:
         raise                                      # Re-lanza 404
     except Exception as ex:
-        raise HTTPException(status_code=500, detail={
-            "estado": 500, "mensaje": "Error interno del servidor.", "detalle": str(ex)
-        })
+        raise error_interno(ex)
@@ -0,0 +1,157 @@
+"""
+trabajos_controller.py — Cola de trabajos en segundo plano.
+
+Endpoints:
+- POST   /api/trabajos                 → Encola un trabajo (202 + id)
+- POST   /api/trabajos/importacion     → Sube un CSV/NDJSON y encola su importación (202 + id)
+- GET    /api/trabajos/{id}            → Estado y progreso
+- GET    /api/trabajos/{id}/resultado  → Resultado (archivo o JSON) cuando está completado
+- DELETE /api/trabajos/{id}            → Cancela (pendiente: de inmediato; en curso: en el próximo latido)
+
+Body de POST /api/trabajos:
+    {"tipo": "exportacion", "parametros": {"tabla": "factura"}}
+
+Estados: pendiente → ejecutando → completado | fallido | cancelado.
+Requiere TRABAJOS_HABILITADO=True y la migración 003.
+"""
+
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse
+
+from config import get_settings
+from models.trabajo import SolicitudTrabajo
+from servicios.fabrica_repositorios import crear_servicio_trabajos
+from servicios.ejecutor_trabajos import ruta_trabajo
+from servicios.servicio_trabajos import ESTADOS_FINALES
+from servicios import tareas_trabajos  # noqa: F401  Registra los tipos de trabajo
+from controllers.errores_http import error_interno
+from middlewares.admision import admitir
+from middlewares.plazos import aplicar_plazo
+
+
+def _verificar_habilitado() -> None:
+    if not get_settings().trabajos.habilitado:
+        raise HTTPException(status_code=404, detail={
+            "estado": 404, "mensaje": "Cola de trabajos desactivada (TRABAJOS_HABILITADO=False)."
+        })
+
+
+router = APIRouter(
+    prefix="/api/trabajos", tags=["Trabajos"],
+    dependencies=[Depends(_verificar_habilitado), Depends(admitir)]
+)
+# El plazo se aplica por ruta: todas son consultas cortas salvo la subida del archivo.
+
+
+def _aceptado(trabajo: dict) -> JSONResponse:
+    """202 Accepted + Location: el cliente consulta el estado ahí."""
+    return JSONResponse(status_code=202, headers={"Location": f"/api/trabajos/{trabajo['id']}"},
+                        content={"estado": 202, "mensaje": "Trabajo encolado.", "trabajo": trabajo})
+
+
+def _no_encontrado(id_trabajo: str) -> HTTPException:
+    return HTTPException(status_code=404, detail={
+        "estado": 404, "mensaje": f"Trabajo '{id_trabajo}' no encontrado."
+    })
+
+
+def _parametros_invalidos(ex: ValueError) -> HTTPException:
+    return HTTPException(status_code=400, detail={
+        "estado": 400, "mensaje": "Trabajo inválido.", "detalle": str(ex)
+    })
+
+
+@router.post("", dependencies=[Depends(aplicar_plazo)])
+async def enviar_trabajo(solicitud: SolicitudTrabajo):
+    """Encola un trabajo; responde de inmediato con su id."""
+    try:
+        trabajo = await crear_servicio_trabajos().enviar(solicitud.tipo, solicitud.parametros)
+        return _aceptado(trabajo)
+    except ValueError as ex:
+        raise _parametros_invalidos(ex)
+    except Exception as ex:
+        raise error_interno(ex)
+
+
+@router.post("/importacion")
+async def enviar_importacion(
+    request: Request,
+    formato: str = Query(..., description="csv o ndjson"),
+    esquema: str | None = Query(default=None)
+):
+    """Guarda el archivo en disco (streaming) y encola su importación."""
+    try:
+        trabajo = await crear_servicio_trabajos().enviar_con_archivo(
+            "importacion", request.stream(), {"formato": formato, "esquema": esquema}
+        )
+        return _aceptado(trabajo)
+    except ValueError as ex:
+        raise _parametros_invalidos(ex)
+    except Exception as ex:
+        raise error_interno(ex)
+
+
+@router.get("/{id_trabajo}", dependencies=[Depends(aplicar_plazo)])
+async def estado_trabajo(id_trabajo: str):
+    """Estado, intentos, progreso y error (si falló)."""
+    try:
+        trabajo = await crear_servicio_trabajos().obtener(id_trabajo)
+    except Exception as ex:
+        raise error_interno(ex)
+    if trabajo is None:
+        raise _no_encontrado(id_trabajo)
+    return trabajo
+
+
+@router.get("/{id_trabajo}/resultado", dependencies=[Depends(aplicar_plazo)])
+async def resultado_trabajo(id_trabajo: str):
+    """Descarga el archivo generado o retorna el resultado en JSON."""
+    try:
+        trabajo = await crear_servicio_trabajos().obtener(id_trabajo)
+    except Exception as ex:
+        raise error_interno(ex)
+    if trabajo is None:
+        raise _no_encontrado(id_trabajo)
+    if trabajo["estado"] != "completado":
+        raise HTTPException(status_code=409, detail={
+            "estado": 409, "mensaje": f"El trabajo está '{trabajo['estado']}': no hay resultado.",
+            "error": trabajo["error"]
+        })
+
+    resultado = trabajo["resultado"] or {}
+    archivo = resultado.get("archivo")
+    if archivo:
+        ruta = ruta_trabajo(id_trabajo, Path(archivo).suffix)  # Siempre dentro de TRABAJOS_DIRECTORIO
+        if not ruta.exists():
+            raise HTTPException(status_code=410, detail={
+                "estado": 410, "mensaje": "El archivo del resultado ya no está disponible."
+            })
+        return FileResponse(ruta, media_type=resultado.get("tipoContenido"), filename=archivo)
+    return resultado
+
+
+@router.delete("/{id_trabajo}", dependencies=[Depends(aplicar_plazo)])
+async def cancelar_trabajo(id_trabajo: str):
+    """Cancela un trabajo que no ha terminado."""
+    try:
+        servicio = crear_servicio_trabajos()
+        trabajo = await servicio.cancelar(id_trabajo)
+        if trabajo is None:
+            actual = await servicio.obtener(id_trabajo)
+            if actual is None:
+                raise _no_encontrado(id_trabajo)
+            raise HTTPException(status_code=409, detail={
+                "estado": 409, "mensaje": f"El trabajo ya terminó ('{actual['estado']}')."
+            })
+    except HTTPException:
+        raise
+    except Exception as ex:
+        raise error_interno(ex)
+
+    if trabajo["estado"] in ESTADOS_FINALES:          # Estaba pendiente: cancelado ya
+        return {"estado": 200, "mensaje": "Trabajo cancelado.", "trabajo": trabajo}
+    return JSONResponse(status_code=202, content={    # En curso: lo corta su worker
+        "estado": 202, "mensaje": "Cancelación solicitada.", "trabajo": trabajo
+    })
@@ -0,0 +1,53 @@
+-- ============================================================================
+-- Migración 001: NOTIFY en cada cambio de producto
+-- Motor: PostgreSQL 12+
+-- Descripción: Publica cada INSERT/UPDATE/DELETE de producto en el canal
+--              'producto_cambios'. Los workers con el catálogo en memoria
+--              (CATALOGO_HABILITADO=True) escuchan el canal con LISTEN y
+--              aplican el cambio sin volver a leer la tabla.
+--
+-- Ejecutar una vez:
+--   psql -d bdfacturas_postgres_local -f database/migraciones/001_notificar_cambios_producto.sql
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION notificar_cambio_producto()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN                 -- Sin filas: el worker recarga todo
+        PERFORM pg_notify('producto_cambios', json_build_object('op', TG_OP)::text);
+        RETURN NULL;
+    END IF;
+
+    -- Payload JSON: {"op": "UPDATE", "codigo": "PR001", "fila": {...}}
+    -- En DELETE no hay fila nueva: solo viaja el código.
+    -- pg_notify se entrega al hacer COMMIT (nunca se ven cambios revertidos).
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('producto_cambios', json_build_object(
+            'op', TG_OP, 'codigo', OLD.codigo
+        )::text);
+        RETURN OLD;
+    END IF;
+
+    PERFORM pg_notify('producto_cambios', json_build_object(
+        'op', TG_OP, 'codigo', NEW.codigo, 'anterior', OLD.codigo, 'fila', row_to_json(NEW)
+    )::text);
+    -- 'anterior': si un UPDATE cambia el código, el worker debe borrar la clave vieja.
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_notificar_cambio_producto ON producto;
+
+CREATE TRIGGER trigger_notificar_cambio_producto
+    AFTER INSERT OR UPDATE OR DELETE ON producto
+    FOR EACH ROW
+    EXECUTE FUNCTION notificar_cambio_producto();
+
+DROP TRIGGER IF EXISTS trigger_notificar_truncate_producto ON producto;
+
+CREATE TRIGGER trigger_notificar_truncate_producto
+    AFTER TRUNCATE ON producto
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notificar_cambio_producto();
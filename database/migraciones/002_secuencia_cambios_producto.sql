@@ -0,0 +1,48 @@
+-- ============================================================================
+-- Migración 002: secuencia global y valores anteriores en el NOTIFY de producto
+-- Motor: PostgreSQL 12+
+-- Descripción: Cada evento de 'producto_cambios' lleva ahora:
+--              - 'seq': número de una SECUENCIA de la BD, igual en todos los
+--                workers → el cliente del stream puede reconectarse a
+--                cualquier worker y reanudar desde el último 'seq' recibido.
+--              - 'previa': stock y valorunitario ANTES del cambio, para que
+--                el stream envíe deltas (ej: stock 18 → 17).
+--              Reemplaza la función de la migración 001; los triggers no cambian.
+--
+-- Ejecutar una vez (después de la 001):
+--   psql -d bdfacturas_postgres_local -f database/migraciones/002_secuencia_cambios_producto.sql
+-- ============================================================================
+
+CREATE SEQUENCE IF NOT EXISTS producto_cambios_seq;
+
+CREATE OR REPLACE FUNCTION notificar_cambio_producto()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN                 -- Sin filas: los workers recargan todo
+        PERFORM pg_notify('producto_cambios', json_build_object(
+            'seq', nextval('producto_cambios_seq'), 'op', TG_OP
+        )::text);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('producto_cambios', json_build_object(
+            'seq', nextval('producto_cambios_seq'), 'op', TG_OP, 'codigo', OLD.codigo,
+            'previa', json_build_object('stock', OLD.stock, 'valorunitario', OLD.valorunitario)
+        )::text);
+        RETURN OLD;
+    END IF;
+
+    PERFORM pg_notify('producto_cambios', json_build_object(
+        'seq', nextval('producto_cambios_seq'), 'op', TG_OP,
+        'codigo', NEW.codigo, 'anterior', OLD.codigo, 'fila', row_to_json(NEW),
+        'previa', CASE WHEN TG_OP = 'UPDATE'
+                       THEN json_build_object('stock', OLD.stock, 'valorunitario', OLD.valorunitario)
+                  END
+    )::text);
+    -- En INSERT, OLD es NULL: 'anterior' y 'previa' viajan como null.
+    RETURN NEW;
+END;
+$$;
@@ -0,0 +1,40 @@
+-- ============================================================================
+-- Migración 003: cola de trabajos en segundo plano
+-- Motor: PostgreSQL 12+
+-- Descripción: Tabla 'trabajo' con el estado de las operaciones pesadas
+--              (exportaciones, importaciones, reportes) que se ejecutan fuera
+--              de la petición HTTP. Al estar en la BD, un reinicio de la API
+--              no pierde trabajos: los pendientes siguen en cola y los que
+--              quedaron a medias (sin latido) se vuelven a encolar.
+--              Siempre en el esquema public; el inquilino va en una columna.
+--
+-- Ejecutar una vez:
+--   psql -d bdfacturas_postgres_local -f database/migraciones/003_trabajos.sql
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.trabajo (
+    id           VARCHAR(64)   PRIMARY KEY,
+    tipo         VARCHAR(50)   NOT NULL,                  -- exportacion, importacion, ...
+    parametros   JSONB         NOT NULL DEFAULT '{}',
+    inquilino    VARCHAR(63),                             -- Esquema del inquilino que lo pidió
+    estado       VARCHAR(20)   NOT NULL DEFAULT 'pendiente'
+                 CHECK (estado IN ('pendiente', 'ejecutando', 'completado', 'fallido', 'cancelado')),
+    progreso     JSONB,
+    resultado    JSONB,
+    error        TEXT,
+    intentos     INTEGER       NOT NULL DEFAULT 0,
+    cancelar     BOOLEAN       NOT NULL DEFAULT FALSE,    -- Pedido de cancelación de un trabajo en curso
+    propietario  VARCHAR(100),                            -- Worker (host:pid) que lo ejecuta
+    creado       TIMESTAMPTZ   NOT NULL DEFAULT now(),
+    iniciado     TIMESTAMPTZ,
+    latido       TIMESTAMPTZ,                             -- Última señal de vida del worker
+    finalizado   TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_trabajo_pendiente
+    ON public.trabajo (creado) WHERE estado = 'pendiente';
+-- Índice parcial: la cola solo mira los pendientes (pocos), no el historial.
+
+CREATE INDEX IF NOT EXISTS idx_trabajo_ejecutando
+    ON public.trabajo (latido) WHERE estado = 'ejecutando';
+-- Para encontrar trabajos huérfanos (worker caído) sin recorrer la tabla.
@@ -0,0 +1,45 @@
+-- ============================================================================
+-- Migración 004: NOTIFY cuando cambian los permisos por ruta
+-- Motor: PostgreSQL 12+
+-- Descripción: Publica en el canal 'permisos_cambios' cada sentencia que
+--              modifique usuario, rol, rol_usuario, ruta o rutarol. Los
+--              workers con AUTORIZACION_HABILITADO=True tienen la matriz
+--              rol → ruta compilada en memoria y la recompilan al recibirlo.
+--              Trigger POR SENTENCIA (no por fila): asignar 100 permisos en
+--              un INSERT produce una sola notificación y una sola recarga.
+--              El payload solo dice qué tabla cambió: el worker relee todo
+--              (son tablas pequeñas).
+--
+-- Ejecutar una vez (después de la 001: usa la misma conexión LISTEN):
+--   psql -d bdfacturas_postgres_local -f database/migraciones/004_notificar_cambios_permisos.sql
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION notificar_cambio_permisos()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- pg_notify se entrega al hacer COMMIT; notificaciones iguales dentro de
+    -- la misma transacción se fusionan en una sola.
+    PERFORM pg_notify('permisos_cambios', json_build_object(
+        'op', TG_OP, 'tabla', TG_TABLE_NAME
+    )::text);
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_tabla TEXT;
+BEGIN
+    FOREACH v_tabla IN ARRAY ARRAY['usuario', 'rol', 'rol_usuario', 'ruta', 'rutarol']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trigger_notificar_permisos ON %I', v_tabla);
+        EXECUTE format(
+            'CREATE TRIGGER trigger_notificar_permisos
+                 AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                 FOR EACH STATEMENT
+                 EXECUTE FUNCTION notificar_cambio_permisos()', v_tabla);
+    END LOOP;
+END;
+$$;
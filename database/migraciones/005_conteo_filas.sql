@@ -0,0 +1,84 @@
+-- ============================================================================
+-- Migración 005: conteo de filas mantenido por triggers
+-- Motor: PostgreSQL 12+
+-- Descripción: Cada INSERT/DELETE sobre las tablas contadas agrega UNA fila
+--              con su delta (+n / -n) a public.conteo_filas; el total es
+--              sum(delta), sin recorrer la tabla (?conteo=mantenido).
+--              Trigger POR SENTENCIA con tabla de transición: cargar 10.000
+--              líneas en un INSERT suma un solo delta.
+--              Solo se AGREGAN filas (nunca UPDATE de un contador único):
+--              las transacciones que insertan facturas a la vez no se
+--              bloquean entre sí. La API compacta los deltas al leer.
+--
+-- Ejecutar una vez:
+--   psql -d bdfacturas_postgres_local -f database/migraciones/005_conteo_filas.sql
+--
+-- Para las tablas de otro esquema (inquilino):
+--   SELECT conteo_filas_instalar('inquilino_x', 'factura');
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.conteo_filas (
+    esquema  VARCHAR(63)  NOT NULL,
+    tabla    VARCHAR(63)  NOT NULL,
+    delta    BIGINT       NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_conteo_filas_tabla
+    ON public.conteo_filas (esquema, tabla);
+
+CREATE OR REPLACE FUNCTION conteo_filas_sumar()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- TG_TABLE_SCHEMA/TG_TABLE_NAME: la misma función sirve a todas las tablas.
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.conteo_filas (esquema, tabla, delta)
+        SELECT TG_TABLE_SCHEMA, TG_TABLE_NAME, count(*) FROM nuevas HAVING count(*) > 0;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO public.conteo_filas (esquema, tabla, delta)
+        SELECT TG_TABLE_SCHEMA, TG_TABLE_NAME, -count(*) FROM viejas HAVING count(*) > 0;
+    ELSE                                        -- TRUNCATE: sin tabla de transición
+        DELETE FROM public.conteo_filas
+        WHERE esquema = TG_TABLE_SCHEMA AND tabla = TG_TABLE_NAME;
+        INSERT INTO public.conteo_filas (esquema, tabla, delta)
+        VALUES (TG_TABLE_SCHEMA, TG_TABLE_NAME, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION conteo_filas_instalar(p_esquema TEXT, p_tabla TEXT)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_filas BIGINT;
+BEGIN
+    EXECUTE format('DROP TRIGGER IF EXISTS trigger_conteo_insertar ON %I.%I', p_esquema, p_tabla);
+    EXECUTE format('DROP TRIGGER IF EXISTS trigger_conteo_eliminar ON %I.%I', p_esquema, p_tabla);
+    EXECUTE format('DROP TRIGGER IF EXISTS trigger_conteo_vaciar ON %I.%I', p_esquema, p_tabla);
+    -- Un trigger por evento: una tabla de transición no admite varios eventos.
+    EXECUTE format(
+        'CREATE TRIGGER trigger_conteo_insertar AFTER INSERT ON %I.%I
+             REFERENCING NEW TABLE AS nuevas
+             FOR EACH STATEMENT EXECUTE FUNCTION conteo_filas_sumar()', p_esquema, p_tabla);
+    EXECUTE format(
+        'CREATE TRIGGER trigger_conteo_eliminar AFTER DELETE ON %I.%I
+             REFERENCING OLD TABLE AS viejas
+             FOR EACH STATEMENT EXECUTE FUNCTION conteo_filas_sumar()', p_esquema, p_tabla);
+    EXECUTE format(
+        'CREATE TRIGGER trigger_conteo_vaciar AFTER TRUNCATE ON %I.%I
+             FOR EACH STATEMENT EXECUTE FUNCTION conteo_filas_sumar()', p_esquema, p_tabla);
+
+    -- CREATE TRIGGER tomó un bloqueo SHARE ROW EXCLUSIVE hasta el COMMIT: nadie
+    -- escribe en la tabla mientras se cuenta, así que el punto de partida es exacto.
+    DELETE FROM public.conteo_filas WHERE esquema = p_esquema AND tabla = p_tabla;
+    EXECUTE format('SELECT count(*) FROM %I.%I', p_esquema, p_tabla) INTO v_filas;
+    INSERT INTO public.conteo_filas (esquema, tabla, delta) VALUES (p_esquema, p_tabla, v_filas);
+    RETURN v_filas;
+END;
+$$;
+
+SELECT conteo_filas_instalar('public', tabla)
+FROM unnest(ARRAY['producto', 'factura', 'productosporfactura']) AS tabla;
@@ -0,0 +1,380 @@
+-- ============================================================================
+-- Migración 006: factura y productosporfactura particionadas por mes
+-- Motor: PostgreSQL 13+
+-- Descripción: factura queda particionada por RANGE (fecha), una partición
+--              por mes (factura_p202601, ...). productosporfactura se
+--              co-particiona: nueva columna fechafactura (copia de la fecha
+--              de su factura) y las mismas fronteras (productosporfactura_p202601).
+--              - VACUUM, índices y autovacuum trabajan por partición: los
+--                meses viejos ya no se tocan.
+--              - Las consultas con rango de fecha leen solo sus meses
+--                (partition pruning); la suma del trigger lee UNA partición.
+--              - Archivar un mes es un DETACH (instantáneo), no un DELETE
+--                de millones de filas.
+--
+--              Cambios visibles:
+--              - PK de factura: (numero, fecha). numero sigue saliendo de la
+--                misma secuencia; PostgreSQL no permite un UNIQUE (numero)
+--                solo en una tabla particionada por fecha.
+--              - PK de productosporfactura: (fknumfactura, fkcodproducto,
+--                fechafactura); FK (fknumfactura, fechafactura) → factura.
+--              - Sin partición DEFAULT: una factura con fecha fuera de los
+--                meses creados falla. El trabajo "particiones" crea los meses
+--                siguientes (PARTICIONES_MESES_ADELANTE).
+--
+-- Ejecutar una vez (bloquea factura y productosporfactura mientras copia):
+--   psql -d bdfacturas_postgres_local -f database/migraciones/006_particionar_facturas.sql
+--
+-- Para las tablas de otro esquema (inquilino):
+--   SELECT particionar_facturas('inquilino_x');
+--
+-- Las tablas originales quedan como factura_sin_particionar y
+-- productosporfactura_sin_particionar. Una vez verificados los datos:
+--   DROP TABLE productosporfactura_sin_particionar, factura_sin_particionar;
+-- ============================================================================
+
+
+-- ── Partición de UN mes (las dos tablas) ──────────────────────────────
+
+CREATE OR REPLACE FUNCTION particion_mensual_crear(p_esquema TEXT, p_mes DATE)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_desde  DATE := date_trunc('month', p_mes)::DATE;
+    v_hasta  DATE := (date_trunc('month', p_mes) + INTERVAL '1 month')::DATE;
+    v_sufijo TEXT := to_char(p_mes, '"p"YYYYMM');
+BEGIN
+    IF to_regclass(format('%I.%I', p_esquema, 'factura_' || v_sufijo)) IS NOT NULL THEN
+        RETURN false;                           -- Ya existe: el trabajo se puede repetir
+    END IF;
+    EXECUTE format('CREATE TABLE %I.%I PARTITION OF %I.factura FOR VALUES FROM (%L) TO (%L)',
+                   p_esquema, 'factura_' || v_sufijo, p_esquema, v_desde, v_hasta);
+    EXECUTE format('CREATE TABLE %I.%I PARTITION OF %I.productosporfactura FOR VALUES FROM (%L) TO (%L)',
+                   p_esquema, 'productosporfactura_' || v_sufijo, p_esquema, v_desde, v_hasta);
+    -- Índices, PK, CHECK, FK y triggers se heredan de la tabla padre.
+    RETURN true;
+END;
+$$;
+
+
+-- ── Archivar UN mes: DETACH + mover al esquema de archivo ─────────────
+
+CREATE OR REPLACE FUNCTION particion_mensual_archivar(p_esquema TEXT, p_mes DATE, p_archivo TEXT)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_sufijo    TEXT := to_char(p_mes, '"p"YYYYMM');
+    v_factura   TEXT := 'factura_' || v_sufijo;
+    v_detalle   TEXT := 'productosporfactura_' || v_sufijo;
+    v_facturas  BIGINT;
+    v_lineas    BIGINT;
+    v_fk        TEXT;
+BEGIN
+    IF to_regclass(format('%I.%I', p_esquema, v_factura)) IS NULL THEN
+        RETURN NULL;                            -- No existe (o ya se archivó)
+    END IF;
+    EXECUTE format('SELECT count(*) FROM %I.%I', p_esquema, v_factura) INTO v_facturas;
+    EXECUTE format('SELECT count(*) FROM %I.%I', p_esquema, v_detalle) INTO v_lineas;
+
+    -- Primero el detalle: mientras sus filas estén en la tabla padre, la FK
+    -- impide separar la partición de factura a la que apuntan.
+    EXECUTE format('ALTER TABLE %I.productosporfactura DETACH PARTITION %I.%I',
+                   p_esquema, p_esquema, v_detalle);
+    FOR v_fk IN
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = format('%I.%I', p_esquema, v_detalle)::regclass
+          AND contype = 'f'
+          AND confrelid = format('%I.factura', p_esquema)::regclass
+    LOOP                                        -- La FK heredada queda en la tabla separada
+        EXECUTE format('ALTER TABLE %I.%I DROP CONSTRAINT %I', p_esquema, v_detalle, v_fk);
+    END LOOP;
+    EXECUTE format('ALTER TABLE %I.factura DETACH PARTITION %I.%I',
+                   p_esquema, p_esquema, v_factura);
+
+    EXECUTE format('CREATE SCHEMA IF NOT EXISTS %I', p_archivo);
+    EXECUTE format('ALTER TABLE %I.%I SET SCHEMA %I', p_esquema, v_detalle, p_archivo);
+    EXECUTE format('ALTER TABLE %I.%I SET SCHEMA %I', p_esquema, v_factura, p_archivo);
+    EXECUTE format('ALTER TABLE %I.%I RENAME TO %I', p_archivo, v_detalle, p_esquema || '_' || v_detalle);
+    EXECUTE format('ALTER TABLE %I.%I RENAME TO %I', p_archivo, v_factura, p_esquema || '_' || v_factura);
+    -- El nombre lleva el esquema de origen: varios inquilinos comparten el archivo.
+
+    -- DETACH no dispara triggers: el contador mantenido (migración 005) se corrige aquí.
+    IF to_regclass('public.conteo_filas') IS NOT NULL THEN
+        INSERT INTO public.conteo_filas (esquema, tabla, delta)
+        VALUES (p_esquema, 'factura', -v_facturas), (p_esquema, 'productosporfactura', -v_lineas);
+    END IF;
+    RETURN v_facturas;
+END;
+$$;
+
+
+-- ── Trigger de totales y stock, con la fecha de la factura ────────────
+-- Igual que actualizar_totales_y_stock() (que siguen usando los esquemas sin
+-- particionar), pero cada búsqueda lleva fechafactura: lee UNA partición.
+
+CREATE OR REPLACE FUNCTION actualizar_totales_y_stock_particionada()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        NEW.subtotal := NEW.cantidad * (SELECT valorunitario FROM producto WHERE codigo = NEW.fkcodproducto);
+        UPDATE producto SET stock = stock - NEW.cantidad WHERE codigo = NEW.fkcodproducto;
+        UPDATE factura
+        SET total = (SELECT COALESCE(SUM(subtotal), 0) FROM productosporfactura
+                     WHERE fknumfactura = NEW.fknumfactura AND fechafactura = NEW.fechafactura) + NEW.subtotal
+        WHERE numero = NEW.fknumfactura AND fecha = NEW.fechafactura;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        NEW.subtotal := NEW.cantidad * (SELECT valorunitario FROM producto WHERE codigo = NEW.fkcodproducto);
+        UPDATE producto SET stock = stock + OLD.cantidad - NEW.cantidad WHERE codigo = NEW.fkcodproducto;
+        UPDATE factura
+        SET total = (SELECT COALESCE(SUM(subtotal), 0) FROM productosporfactura
+                     WHERE fknumfactura = NEW.fknumfactura AND fechafactura = NEW.fechafactura
+                       AND fkcodproducto != NEW.fkcodproducto) + NEW.subtotal
+        WHERE numero = NEW.fknumfactura AND fecha = NEW.fechafactura;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        UPDATE producto SET stock = stock + OLD.cantidad WHERE codigo = OLD.fkcodproducto;
+        UPDATE factura
+        SET total = (SELECT COALESCE(SUM(subtotal), 0) FROM productosporfactura
+                     WHERE fknumfactura = OLD.fknumfactura AND fechafactura = OLD.fechafactura
+                       AND fkcodproducto != OLD.fkcodproducto)
+        WHERE numero = OLD.fknumfactura AND fecha = OLD.fechafactura;
+        RETURN OLD;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+
+-- ── Conversión de un esquema ──────────────────────────────────────────
+
+CREATE OR REPLACE FUNCTION particionar_facturas(p_esquema TEXT, p_meses_adelante INTEGER DEFAULT 3)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_secuencia TEXT;
+    v_mes       DATE;
+    v_ultimo    DATE;
+    v_facturas  BIGINT;
+    v_lineas    BIGINT;
+    v_tabla     TEXT;
+    v_nombre    TEXT;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass(format('%I.factura', p_esquema))) = 'p' THEN
+        RETURN format('%s: ya estaba particionada', p_esquema);
+    END IF;
+    EXECUTE format('LOCK TABLE %I.factura, %I.productosporfactura IN ACCESS EXCLUSIVE MODE',
+                   p_esquema, p_esquema);
+
+    -- 1. Las tablas actuales pasan a *_sin_particionar (con sus índices y restricciones)
+    FOREACH v_tabla IN ARRAY ARRAY['factura', 'productosporfactura'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trigger_actualizar_totales_y_stock ON %I.%I', p_esquema, v_tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS trigger_conteo_insertar ON %I.%I', p_esquema, v_tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS trigger_conteo_eliminar ON %I.%I', p_esquema, v_tabla);
+        EXECUTE format('DROP TRIGGER IF EXISTS trigger_conteo_vaciar ON %I.%I', p_esquema, v_tabla);
+        FOR v_nombre IN                         -- Índices (incluye los de PK/UNIQUE)
+            SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = format('%I.%I', p_esquema, v_tabla)::regclass
+              AND i.relname ~ ('^' || v_tabla)
+        LOOP
+            EXECUTE format('ALTER INDEX %I.%I RENAME TO %I', p_esquema, v_nombre,
+                           regexp_replace(v_nombre, '^' || v_tabla, v_tabla || '_sin_particionar'));
+        END LOOP;
+        FOR v_nombre IN                         -- CHECK y FK (las de índice ya se renombraron)
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = format('%I.%I', p_esquema, v_tabla)::regclass AND contype IN ('c', 'f')
+              AND conname ~ ('^' || v_tabla)
+        LOOP
+            EXECUTE format('ALTER TABLE %I.%I RENAME CONSTRAINT %I TO %I', p_esquema, v_tabla, v_nombre,
+                           regexp_replace(v_nombre, '^' || v_tabla, v_tabla || '_sin_particionar'));
+        END LOOP;
+        EXECUTE format('ALTER TABLE %I.%I RENAME TO %I', p_esquema, v_tabla, v_tabla || '_sin_particionar');
+    END LOOP;
+    -- Los nombres quedan libres para las tablas nuevas (factura_pkey, ...).
+
+    v_secuencia := pg_get_serial_sequence(format('%I.factura_sin_particionar', p_esquema), 'numero');
+
+    -- 2. Tablas particionadas (mismas columnas + fechafactura en el detalle)
+    EXECUTE format($sql$
+        CREATE TABLE %1$I.factura (
+            numero          INTEGER         NOT NULL DEFAULT nextval(%2$L::regclass),
+            fecha           TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            total           NUMERIC(14,2)   NOT NULL DEFAULT 0,
+            fkidcliente     INTEGER         NOT NULL,
+            fkidvendedor    INTEGER         NOT NULL,
+            CONSTRAINT factura_pkey           PRIMARY KEY (numero, fecha),
+            CONSTRAINT factura_total_check    CHECK (total >= 0),
+            CONSTRAINT factura_fkidcliente_fkey  FOREIGN KEY (fkidcliente)  REFERENCES %1$I.cliente(id),
+            CONSTRAINT factura_fkidvendedor_fkey FOREIGN KEY (fkidvendedor) REFERENCES %1$I.vendedor(id)
+        ) PARTITION BY RANGE (fecha)
+    $sql$, p_esquema, v_secuencia);
+    EXECUTE format($sql$
+        CREATE TABLE %1$I.productosporfactura (
+            fknumfactura    INTEGER        NOT NULL,
+            fkcodproducto   VARCHAR(30)    NOT NULL,
+            cantidad        INTEGER        NOT NULL,
+            subtotal        NUMERIC(14,2)  NOT NULL DEFAULT 0,
+            fechafactura    TIMESTAMP      NOT NULL,
+            CONSTRAINT productosporfactura_pkey          PRIMARY KEY (fknumfactura, fkcodproducto, fechafactura),
+            CONSTRAINT productosporfactura_cantidad_check CHECK (cantidad > 0),
+            CONSTRAINT productosporfactura_subtotal_check CHECK (subtotal >= 0),
+            CONSTRAINT productosporfactura_fknumfactura_fkey  FOREIGN KEY (fknumfactura, fechafactura)
+                REFERENCES %1$I.factura(numero, fecha) ON DELETE CASCADE,
+            CONSTRAINT productosporfactura_fkcodproducto_fkey FOREIGN KEY (fkcodproducto)
+                REFERENCES %1$I.producto(codigo)
+        ) PARTITION BY RANGE (fechafactura)
+    $sql$, p_esquema);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.factura.numero', v_secuencia, p_esquema);
+    -- Si no, borrar factura_sin_particionar borraría también la secuencia.
+
+    -- 3. Un mes por partición: desde la factura más vieja hasta hoy + p_meses_adelante
+    EXECUTE format('SELECT date_trunc(''month'', min(fecha))::date, date_trunc(''month'', max(fecha))::date
+                    FROM %I.factura_sin_particionar', p_esquema) INTO v_mes, v_ultimo;
+    v_mes := COALESCE(v_mes, date_trunc('month', current_date)::date);
+    v_ultimo := greatest(v_ultimo, (date_trunc('month', current_date) + make_interval(months => p_meses_adelante))::date);
+    WHILE v_mes <= v_ultimo LOOP
+        PERFORM particion_mensual_crear(p_esquema, v_mes);
+        v_mes := (v_mes + INTERVAL '1 month')::date;
+    END LOOP;
+
+    -- 4. Copia de los datos ANTES de crear el trigger: los subtotales y el
+    --    stock ya están calculados y no se deben volver a aplicar.
+    EXECUTE format('INSERT INTO %1$I.factura (numero, fecha, total, fkidcliente, fkidvendedor)
+                    SELECT numero, fecha, total, fkidcliente, fkidvendedor FROM %1$I.factura_sin_particionar',
+                   p_esquema);
+    GET DIAGNOSTICS v_facturas = ROW_COUNT;
+    EXECUTE format('INSERT INTO %1$I.productosporfactura (fknumfactura, fkcodproducto, cantidad, subtotal, fechafactura)
+                    SELECT d.fknumfactura, d.fkcodproducto, d.cantidad, d.subtotal, f.fecha
+                    FROM %1$I.productosporfactura_sin_particionar d
+                    JOIN %1$I.factura_sin_particionar f ON f.numero = d.fknumfactura',
+                   p_esquema);
+    GET DIAGNOSTICS v_lineas = ROW_COUNT;
+
+    -- 5. Triggers en las tablas nuevas (se heredan a cada partición)
+    EXECUTE format('CREATE TRIGGER trigger_actualizar_totales_y_stock
+                        BEFORE INSERT OR UPDATE OR DELETE ON %I.productosporfactura
+                        FOR EACH ROW EXECUTE FUNCTION actualizar_totales_y_stock_particionada()',
+                   p_esquema);
+    IF to_regprocedure('conteo_filas_instalar(text, text)') IS NOT NULL THEN
+        PERFORM conteo_filas_instalar(p_esquema, 'factura');
+        PERFORM conteo_filas_instalar(p_esquema, 'productosporfactura');
+    END IF;
+
+    -- autovacuum analiza las particiones pero nunca la tabla padre: sin esto el
+    -- planificador (y ?conteo=estimado) no tiene estadísticas de la tabla completa.
+    EXECUTE format('ANALYZE %I.factura', p_esquema);
+    EXECUTE format('ANALYZE %I.productosporfactura', p_esquema);
+
+    RETURN format('%s: %s facturas y %s líneas copiadas', p_esquema, v_facturas, v_lineas);
+END;
+$$;
+
+
+-- ── Procedimientos maestro-detalle ────────────────────────────────────
+-- json_populate_record(NULL::productosporfactura, ...) arma la fila con las
+-- columnas de la tabla del esquema activo: fechafactura se llena en los
+-- esquemas particionados y se ignora en los que no. Un solo procedimiento
+-- sirve a ambos.
+
+CREATE OR REPLACE PROCEDURE sp_crear_factura_con_productosporfactura(
+    IN  p_maestro   JSON,
+    IN  p_detalles  JSON,
+    INOUT p_resultado JSON DEFAULT NULL
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_numero_nuevo INTEGER;
+    v_fecha TIMESTAMP;
+    v_detalle JSON;
+    v_cantidad_detalles INTEGER := 0;
+BEGIN
+    INSERT INTO factura (fecha, total, fkidcliente, fkidvendedor)
+    VALUES (
+        COALESCE((p_maestro->>'fecha')::TIMESTAMP, CURRENT_TIMESTAMP),
+        COALESCE((p_maestro->>'total')::NUMERIC, 0),
+        (p_maestro->>'fkidcliente')::INTEGER,
+        (p_maestro->>'fkidvendedor')::INTEGER
+    )
+    RETURNING numero, fecha INTO v_numero_nuevo, v_fecha;
+
+    FOR v_detalle IN SELECT * FROM json_array_elements(p_detalles)
+    LOOP
+        INSERT INTO productosporfactura
+        SELECT * FROM json_populate_record(NULL::productosporfactura, json_build_object(
+            'fknumfactura', v_numero_nuevo,
+            'fkcodproducto', (v_detalle->>'fkcodproducto')::VARCHAR,
+            'cantidad', (v_detalle->>'cantidad')::INTEGER,
+            'subtotal', COALESCE((v_detalle->>'subtotal')::NUMERIC, 0),
+            'fechafactura', v_fecha
+        ));
+        v_cantidad_detalles := v_cantidad_detalles + 1;
+    END LOOP;
+
+    p_resultado := json_build_object('exito', true, 'numero_maestro', v_numero_nuevo, 'cantidad_detalles', v_cantidad_detalles);
+EXCEPTION WHEN OTHERS THEN
+    p_resultado := json_build_object('exito', false, 'error', SQLERRM);
+END;
+$$;
+
+
+CREATE OR REPLACE PROCEDURE sp_actualizar_factura_con_productosporfactura(
+    IN  p_numero    INTEGER,
+    IN  p_maestro   JSON,
+    IN  p_detalles  JSON,
+    INOUT p_resultado JSON DEFAULT NULL
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_fecha TIMESTAMP := (p_maestro->>'fecha')::TIMESTAMP;
+    v_detalle JSON;
+    v_cantidad_detalles INTEGER := 0;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM factura WHERE numero = p_numero) THEN
+        p_resultado := json_build_object('exito', false, 'error', 'Registro maestro no encontrado');
+        RETURN;
+    END IF;
+
+    -- Primero los detalles: con particiones, cambiar la fecha mueve la factura
+    -- de partición y la FK (numero, fecha) no puede quedar apuntando a la vieja.
+    DELETE FROM productosporfactura WHERE fknumfactura = p_numero;
+
+    UPDATE factura SET
+        fecha        = v_fecha,
+        total        = (p_maestro->>'total')::NUMERIC,
+        fkidcliente  = (p_maestro->>'fkidcliente')::INTEGER,
+        fkidvendedor = (p_maestro->>'fkidvendedor')::INTEGER
+    WHERE numero = p_numero;
+
+    FOR v_detalle IN SELECT * FROM json_array_elements(p_detalles)
+    LOOP
+        INSERT INTO productosporfactura
+        SELECT * FROM json_populate_record(NULL::productosporfactura, json_build_object(
+            'fknumfactura', p_numero,
+            'fkcodproducto', (v_detalle->>'fkcodproducto')::VARCHAR,
+            'cantidad', (v_detalle->>'cantidad')::INTEGER,
+            'subtotal', (v_detalle->>'subtotal')::NUMERIC,
+            'fechafactura', v_fecha
+        ));
+        v_cantidad_detalles := v_cantidad_detalles + 1;
+    END LOOP;
+
+    p_resultado := json_build_object('exito', true, 'mensaje', 'Actualización exitosa', 'cantidad_detalles', v_cantidad_detalles);
+EXCEPTION WHEN OTHERS THEN
+    p_resultado := json_build_object('exito', false, 'error', SQLERRM);
+END;
+$$;
+
+
+SELECT particionar_facturas('public');
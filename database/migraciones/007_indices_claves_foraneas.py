@@ -0,0 +1,115 @@
+"""
+Migración 007: índices de las claves foráneas y de las búsquedas frecuentes.
+
+PostgreSQL indexa solas las PK y los UNIQUE, NO las columnas de una FK:
+- productosporfactura.fkcodproducto: borrar (o cambiar el código de) un
+  producto revisa que ninguna línea lo use → sin índice, recorre TODAS las
+  líneas; igual "las ventas de un producto".
+- factura.fkidcliente / factura.fkidvendedor: las facturas de un cliente o
+  de un vendedor, y el mismo chequeo al borrar uno de ellos.
+- factura.fecha: rangos de fechas (reposición, analítica por periodo).
+- lower(producto.nombre) text_pattern_ops: GET /api/producto/buscar
+  (LIKE 'prefijo%' sin distinguir mayúsculas).
+
+CREATE INDEX CONCURRENTLY: no bloquea las escrituras mientras se construye
+(por eso es .py: no puede ir dentro de una transacción). Si se corta a mitad
+deja un índice INVALID con ese nombre: se borra y se vuelve a crear.
+
+Con la migración 006 (tablas particionadas) CONCURRENTLY no existe sobre la
+tabla padre: se crea el índice en el padre SOLO (ON ONLY, queda inválido),
+cada partición construye el suyo con CONCURRENTLY y se adjunta (ATTACH
+PARTITION). Con todas adjuntas el del padre queda válido, y los meses que
+se creen después lo heredan solos.
+
+Se aplica en todos los esquemas que tengan las tablas (inquilinos incluidos).
+Un esquema creado después necesita crear_indices(conexion, 'inquilino_x')
+(benchmarks/regresion_planes.py lo hace con su esquema de prueba).
+"""
+
+INDICES = (
+    # (tabla, nombre del índice, columnas)
+    ("productosporfactura", "idx_productosporfactura_fkcodproducto", "(fkcodproducto)"),
+    ("factura", "idx_factura_fkidcliente", "(fkidcliente)"),
+    ("factura", "idx_factura_fkidvendedor", "(fkidvendedor)"),
+    ("factura", "idx_factura_fecha", "(fecha)"),
+    ("producto", "idx_producto_nombre_prefijo", "(lower(nombre) text_pattern_ops)"),
+)
+
+_SQL_ESQUEMAS = """
+    SELECT DISTINCT n.nspname
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relname = ANY($1::text[]) AND c.relkind IN ('r', 'p')
+      AND n.nspname NOT LIKE 'pg\\_%' AND n.nspname <> 'information_schema'
+    ORDER BY 1
+"""
+
+_SQL_TABLA = """
+    SELECT c.relkind
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = $1 AND c.relname = $2 AND c.relkind IN ('r', 'p')
+"""
+
+_SQL_INDICE = """
+    SELECT x.indisvalid
+    FROM pg_class i
+    JOIN pg_namespace n ON n.oid = i.relnamespace
+    JOIN pg_index x ON x.indexrelid = i.oid
+    WHERE n.nspname = $1 AND i.relname = $2
+"""
+# NULL (sin fila): no existe. false: quedó a medias de un CONCURRENTLY fallido.
+
+_SQL_SIN_INDICE = """
+    SELECT t.relname
+    FROM pg_inherits h JOIN pg_class t ON t.oid = h.inhrelid
+    WHERE h.inhparent = $1::regclass
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_inherits hi JOIN pg_index x ON x.indexrelid = hi.inhrelid
+          WHERE hi.inhparent = $2::regclass AND x.indrelid = t.oid)
+    ORDER BY 1
+"""
+# Particiones que todavía no tienen su índice adjunto al del padre.
+
+
+async def _indice_concurrente(conexion, esquema: str, tabla: str, nombre: str, columnas: str) -> None:
+    """CREATE INDEX CONCURRENTLY en una tabla normal (o partición), sin dejar uno INVALID."""
+    if await conexion.fetchval(_SQL_INDICE, esquema, nombre) is False:
+        await conexion.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{esquema}"."{nombre}"')
+    await conexion.execute(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{nombre}" ON "{esquema}"."{tabla}" {columnas}'
+    )
+
+
+async def crear_indices(conexion, esquema: str) -> list[str]:
+    """Crea los índices que falten en las tablas del esquema. Retorna los nombres creados."""
+    creados = []
+    for tabla, nombre, columnas in INDICES:
+        tipo = await conexion.fetchval(_SQL_TABLA, esquema, tabla)
+        if tipo is None:
+            continue                                   # Esquema sin esa tabla
+        if await conexion.fetchval(_SQL_INDICE, esquema, nombre):
+            continue                                   # Ya existe y es válido
+        if tipo == "r":
+            await _indice_concurrente(conexion, esquema, tabla, nombre, columnas)
+        else:
+            await conexion.execute(
+                f'CREATE INDEX IF NOT EXISTS "{nombre}" ON ONLY "{esquema}"."{tabla}" {columnas}'
+            )                                          # Solo catálogo: instantáneo
+            for particion in await conexion.fetch(
+                _SQL_SIN_INDICE, f'"{esquema}"."{tabla}"', f'"{esquema}"."{nombre}"'
+            ):
+                particion = particion["relname"]
+                nombre_particion = f"{nombre}_{particion.rsplit('_', 1)[-1]}"
+                # idx_factura_fecha + factura_p202601 → idx_factura_fecha_p202601
+                await _indice_concurrente(conexion, esquema, particion, nombre_particion, columnas)
+                await conexion.execute(
+                    f'ALTER INDEX "{esquema}"."{nombre}" ATTACH PARTITION "{esquema}"."{nombre_particion}"'
+                )
+        creados.append(f"{esquema}.{nombre}")
+    return creados
+
+
+async def aplicar(conexion) -> None:
+    """Punto de entrada del ejecutor de migraciones (autocommit)."""
+    tablas = sorted({tabla for tabla, _, _ in INDICES})
+    for fila in await conexion.fetch(_SQL_ESQUEMAS, tablas):
+        await crear_indices(conexion, fila["nspname"])
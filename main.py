@@ -16,6 +16,8 @@ solo registramos 1 router: el de producto.
 
 # ─── Imports ─────────────────────────────────────────────────────────
 
+from contextlib import asynccontextmanager  # Para el ciclo de vida (arranque/apagado) de la app.
+
 from fastapi import FastAPI          # FastAPI: clase principal del framework.
                                      # Crear una instancia de FastAPI() es crear
                                      # la aplicación web completa. Esta instancia:
@@ -33,6 +35,106 @@ from controllers.producto_controller import router as producto_router
 #   PUT    /api/producto/{codigo} → Actualizar
 #   DELETE /api/producto/{codigo} → Eliminar
 
+from controllers.metricas_controller import router as metricas_router
+# Router de métricas: GET /api/metricas/ (peticiones atendidas vs. rechazadas, pools).
+
+from controllers.exportacion_controller import router as exportacion_router
+# Router de exportación: GET /api/exportar/{tabla} en JSON, Arrow IPC o MessagePack.
+
+from controllers.lote_controller import router as lote_router
+# Router de lotes: POST /api/batch (varias operaciones en una transacción).
+
+from middlewares.inquilinos import MiddlewareInquilinos
+# Middleware multi-inquilino: X-Tenant o /t/{inquilino}/... → esquema de la BD.
+
+from middlewares.perfilado import MiddlewarePerfilado
+# Middleware de perfilado bajo demanda (header secreto → flame graph speedscope).
+
+from middlewares.autorizacion import MiddlewareAutorizacion, registrar_rutas
+from servicios.servicio_autorizacion import permisos_rutas
+# Autorización por rol y ruta (matriz de permisos en memoria, recompilada con NOTIFY).
+
+from middlewares.trazas import MiddlewareTrazas, instrumentar_capas
+from servicios.trazas import exportador as exportador_trazas
+# Trazas por capa (traceparent W3C → spans OTLP en archivo o colector).
+
+from middlewares.captura import MiddlewareCaptura
+from servicios.captura import grabador_captura
+# Captura de una muestra de peticiones reales (NDJSON gzip) para reproducirlas.
+
+from controllers.cambios_controller import router as cambios_router
+# Router del stream de cambios: GET /api/cambios/producto (SSE) y WebSocket /api/cambios/producto/ws.
+
+from controllers.importacion_controller import router as importacion_router
+# Router de importación: POST /api/importar/producto (CSV/NDJSON en streaming) y su progreso.
+
+from controllers.trabajos_controller import router as trabajos_router
+# Router de la cola de trabajos: POST /api/trabajos, estado, resultado y cancelación.
+
+from controllers.analitica_controller import router as analitica_router
+# Router de analítica de ventas: GET /api/analitica/resumen y /api/analitica/abc (con caché).
+
+from controllers.autenticacion_controller import router as autenticacion_router
+# Router de inicio de sesión: POST /api/auth/login (bcrypt en pool de procesos) y GET /api/auth/sesion.
+from servicios.contrasenas import verificador_contrasenas
+
+from controllers.maestro_detalle_controller import router as maestro_detalle_router
+# Router maestro-detalle: /api/maestro-detalle/{relacion} (un CALL a los procedimientos sp_* por operación).
+
+from controllers.factura_controller import router as factura_router
+# Router de facturas completas: GET /api/factura/{numero}/completa y su listado paginado (JSON armado en la BD).
+
+from controllers.conteo_controller import router as conteo_router
+# Router de conteo: GET /api/conteo/{tabla}?modo=exacto|estimado|mantenido (total de filas, cacheado).
+
+from config import get_settings
+from repositorios.escucha_cambios import escucha_cambios
+from repositorios.producto.catalogo_producto import catalogo_producto
+from servicios.difusion_cambios import difusion_cambios
+from servicios.conexion.proveedor_conexion import ProveedorConexion
+# Conexión LISTEN compartida y sus consumidores: se arrancan en el ciclo de vida.
+
+from servicios.ejecutor_trabajos import ejecutor_trabajos
+from servicios.fabrica_repositorios import crear_servicio_trabajos
+# Ejecutor de la cola de trabajos (tareas asyncio dentro de este worker).
+
+from repositorios.migraciones import aplicar_pendientes as aplicar_migraciones
+# Migraciones versionadas pendientes (MIGRACIONES_AL_INICIAR=True), antes que todo lo demás.
+
+
+# ─── Ciclo de vida (arranque y apagado) ─────────────────────────────
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """Tareas de fondo que viven lo mismo que la aplicación."""
+    config = get_settings()
+    if config.migraciones.al_iniciar:    # MIGRACIONES_AL_INICIAR=True: esquema al día antes de arrancar
+        await aplicar_migraciones(ProveedorConexion(config).obtener_cadena_conexion(),
+                                  config.migraciones.directorio or None)
+    if config.catalogo.habilitado:       # CATALOGO_HABILITADO=True: réplica de producto en memoria
+        escucha_cambios.registrar(catalogo_producto)
+    if config.cambios.habilitado:        # CAMBIOS_HABILITADO=True: stream SSE/WebSocket
+        escucha_cambios.registrar(difusion_cambios)
+    if config.autorizacion.habilitado:   # AUTORIZACION_HABILITADO=True: permisos por rol y ruta
+        registrar_rutas(app.routes)      # Árbol de rutas antes del LISTEN: la sincronización ya compila
+        escucha_cambios.registrar(permisos_rutas)
+    if config.catalogo.habilitado or config.cambios.habilitado or config.autorizacion.habilitado:
+        await escucha_cambios.iniciar(   # UNA conexión LISTEN por worker, compartida por todos
+            ProveedorConexion(config).obtener_cadena_conexion(), config.cambios
+        )
+    if config.trazas.habilitado:         # TRAZAS_HABILITADO=True: hilo que exporta los spans
+        exportador_trazas.iniciar()
+    if config.captura.habilitado:        # CAPTURA_HABILITADO=True: hilo que escribe la muestra
+        grabador_captura.iniciar()
+    if config.trabajos.habilitado:       # TRABAJOS_HABILITADO=True: cola de trabajos de fondo
+        await ejecutor_trabajos.iniciar(crear_servicio_trabajos())
+    yield                                # ← Aquí la app atiende peticiones
+    await ejecutor_trabajos.detener()    # Devuelve a la cola los trabajos a medias
+    await escucha_cambios.detener()      # Cierra la conexión de LISTEN
+    exportador_trazas.detener()          # Exporta los spans pendientes
+    grabador_captura.detener()           # Escribe las peticiones capturadas pendientes
+    verificador_contrasenas.detener()    # Cierra el pool de procesos de bcrypt (si se creó)
+
 
 # ─── Crear la aplicación FastAPI ─────────────────────────────────────
 
@@ -42,6 +144,7 @@ app = FastAPI(                       # Crea la instancia principal de la aplicac
     description="API REST CRUD para la tabla producto. Tutorial con arquitectura de 3 capas.",
                                      # description: texto descriptivo en la documentación.
     version="1.0.0",                 # version: versión de la API mostrada en /docs.
+    lifespan=ciclo_de_vida,          # lifespan: código de arranque/apagado (tareas de fondo).
 )
 # app es el objeto que uvicorn busca: "uvicorn main:app"
 #   main  → archivo main.py
@@ -50,7 +153,24 @@ app = FastAPI(                       # Crea la instancia principal de la aplicac
 
 # ─── Registrar controladores ────────────────────────────────────────
 
+if get_settings().trazas.habilitado:     # Spans en handlers, servicios, repositorios y SQL
+    instrumentar_capas(producto_router, metricas_router, exportacion_router, lote_router,
+                       cambios_router, importacion_router, trabajos_router, analitica_router,
+                       autenticacion_router, maestro_detalle_router, factura_router, conteo_router)
+    # Antes de include_router(): FastAPI copia los handlers al incluir el router.
+
 app.include_router(producto_router)  # Registra TODAS las rutas del router de producto.
+app.include_router(metricas_router)  # Registra GET /api/metricas/.
+app.include_router(exportacion_router)  # Registra GET /api/exportar/{tabla}.
+app.include_router(lote_router)      # Registra POST /api/batch.
+app.include_router(cambios_router)   # Registra el stream /api/cambios/producto (SSE y WebSocket).
+app.include_router(importacion_router)  # Registra /api/importar/producto y /api/importar/{id}.
+app.include_router(trabajos_router)  # Registra /api/trabajos (cola de trabajos en segundo plano).
+app.include_router(analitica_router) # Registra /api/analitica (ABC, ticket y canasta).
+app.include_router(autenticacion_router)  # Registra /api/auth (login y sesión).
+app.include_router(maestro_detalle_router)  # Registra /api/maestro-detalle (procedimientos sp_*).
+app.include_router(factura_router)   # Registra /api/factura (facturas completas en una consulta).
+app.include_router(conteo_router)    # Registra /api/conteo/{tabla} (total exacto, estimado o mantenido).
 # include_router() toma el APIRouter del controller y lo "monta" en la app.
 # Después de esta línea, la app conoce los 5 endpoints de /api/producto/.
 # El prefix="/api/producto" y tags=["Producto"] vienen del controller.
@@ -59,6 +179,26 @@ app.include_router(producto_router)  # Registra TODAS las rutas del router de pr
 # una por cada controller. En este tutorial, solo necesitamos una.
 
 
+# ─── Middlewares ────────────────────────────────────────────────────
+
+if get_settings().trazas.habilitado:     # TRAZAS_HABILITADO=False: ni middleware ni instrumentación
+    app.add_middleware(MiddlewareTrazas) # Dentro de inquilinos: ve la ruta ya reescrita
+
+if get_settings().autorizacion.habilitado:  # 401/403 antes de llegar al controller
+    app.add_middleware(MiddlewareAutorizacion, rutas=app.routes)
+    # Dentro de inquilinos: decide sobre la ruta ya sin el prefijo /t/{inquilino}/.
+
+if get_settings().captura.habilitado:    # CAPTURA_HABILITADO=False: ni se registra (costo cero)
+    app.add_middleware(MiddlewareCaptura)   # Dentro de inquilinos: ruta reescrita e inquilino resuelto
+
+app.add_middleware(MiddlewareInquilinos)  # Resuelve el inquilino ANTES del enrutamiento
+# Con el prefijo /t/{inquilino}/ la ruta se reescribe aquí; por eso debe ser
+# middleware y no dependencia del router (las dependencias corren después).
+
+if get_settings().perfilado.habilitado:  # PERFILADO_HABILITADO=False: ni se registra (costo cero)
+    app.add_middleware(MiddlewarePerfilado)  # El último agregado es el más externo: mide todo
+
+
 # ─── Endpoint raíz ──────────────────────────────────────────────────
 
 @app.get("/", tags=["Root"])         # Registra un GET en la raíz (/).
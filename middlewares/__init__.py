@@ -0,0 +1,8 @@
+"""
+Paquete de middlewares y dependencias transversales.
+
+Aquí viven las piezas que aplican a MUCHAS rutas a la vez y que no
+pertenecen a ninguna entidad en particular: control de admisión,
+plazos, trazas, etc. Los controllers las enganchan con Depends()
+o main.py las registra con app.add_middleware().
+"""
@@ -0,0 +1,108 @@
+"""
+admision.py — Control de admisión (límite de concurrencia por ruta).
+
+Cuando PostgreSQL se pone lento, las peticiones se acumulan esperando
+conexión y el servidor sigue aceptando más hasta que todas expiran a la
+vez. El control de admisión corta eso en la entrada:
+
+- Cada ruta (método + plantilla, ej: "GET /api/producto/{codigo}") tiene
+  un número máximo de peticiones en curso.
+- Si la ruta está llena, la petición espera como máximo ADMISION_ESPERA_MAXIMA
+  segundos por un cupo. Si no lo obtiene → 503 + Retry-After inmediato.
+- Cada decisión queda registrada en las métricas (atendidas vs. rechazadas).
+
+Uso en un controller:
+    router = APIRouter(prefix="/api/producto", dependencies=[Depends(admitir)])
+"""
+
+import asyncio                        # asyncio.Semaphore: cupos de concurrencia.
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request
+
+from config import get_settings
+from servicios.metricas import metricas
+
+
+class ControlAdmision:
+    """Semáforos por ruta con espera acotada."""
+
+    def __init__(self, limite_por_defecto: int, limites: dict[str, int], espera_maxima: float):
+        self._limite_por_defecto = limite_por_defecto
+        self._limites = limites                        # Límites específicos por ruta
+        self._espera_maxima = espera_maxima
+        self._semaforos: dict[str, asyncio.Semaphore] = {}
+    # Los semáforos se crean lazy: la primera petición a cada ruta crea el suyo.
+
+    def _semaforo(self, ruta: str) -> asyncio.Semaphore:
+        semaforo = self._semaforos.get(ruta)
+        if semaforo is None:
+            limite = self._limites.get(ruta, self._limite_por_defecto)
+            semaforo = self._semaforos[ruta] = asyncio.Semaphore(limite)
+        return semaforo
+
+    async def intentar_entrar(self, ruta: str) -> bool:
+        """Intenta tomar un cupo de la ruta. Retorna False si no lo obtuvo a tiempo."""
+        semaforo = self._semaforo(ruta)
+        if not semaforo.locked():                      # Hay cupo libre: entra sin esperar
+            await semaforo.acquire()
+            return True
+        try:                                           # Ruta llena: espera ACOTADA
+            await asyncio.wait_for(semaforo.acquire(), timeout=self._espera_maxima)
+            return True
+        except asyncio.TimeoutError:
+            return False                               # Load shedding: se rechaza la petición
+
+    def salir(self, ruta: str) -> None:
+        """Libera el cupo tomado por intentar_entrar()."""
+        self._semaforos[ruta].release()
+
+
+_control: ControlAdmision | None = None
+
+
+def _obtener_control() -> ControlAdmision:
+    """Crea el control de admisión la primera vez (singleton del proceso)."""
+    global _control
+    if _control is None:
+        config = get_settings().admision
+        _control = ControlAdmision(config.limite_por_ruta, config.limites, config.espera_maxima)
+    return _control
+
+
+def nombre_ruta(request: Request) -> str:
+    """Identificador estable de la ruta: "GET /api/producto/{codigo}"."""
+    ruta = request.scope.get("route")
+    plantilla = getattr(ruta, "path", request.url.path)  # Plantilla, no la URL concreta
+    return f"{request.method} {plantilla}"
+# Se usa la plantilla para que /api/producto/PR001 y /api/producto/PR002
+# compartan el mismo límite.
+
+
+async def admitir(request: Request) -> AsyncIterator[None]:
+    """Dependencia FastAPI: toma un cupo antes del handler y lo libera al terminar."""
+    config = get_settings().admision
+    if not config.habilitada:
+        yield
+        return
+
+    ruta = nombre_ruta(request)
+    control = _obtener_control()
+    if not await control.intentar_entrar(ruta):
+        metricas.incrementar("admision_rechazadas_total", ruta=ruta)
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "estado": 503,
+                "mensaje": "Servicio saturado. Intente nuevamente en unos segundos."
+            },
+            headers={"Retry-After": str(config.retry_after)}
+        )
+
+    metricas.incrementar("admision_atendidas_total", ruta=ruta)
+    metricas.sumar_medidor("admision_en_curso", 1, ruta=ruta)
+    try:
+        yield                                          # Aquí se ejecuta el handler
+    finally:
+        metricas.sumar_medidor("admision_en_curso", -1, ruta=ruta)
+        control.salir(ruta)
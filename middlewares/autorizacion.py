@@ -0,0 +1,144 @@
+"""
+autorizacion.py — Middleware de autorización por rol y ruta.
+
+Aplica los permisos de las tablas rol, rol_usuario, ruta y rutarol SIN
+consultar la BD en cada petición. Los permisos se compilan en memoria
+(servicios/servicio_autorizacion.py) y por petición solo se hace:
+
+1. Buscar la plantilla de la ruta (ej: "GET /api/producto/{codigo}") en un
+   árbol por segmentos, armado una vez con las rutas de la app.
+2. Un AND entre la máscara de roles del usuario y la de la ruta.
+
+Respuestas:
+- Ruta sin fila en 'ruta' que la cubra → pasa (o 403 con AUTORIZACION_POR_DEFECTO=denegar).
+- Ruta protegida sin usuario → 401. Usuario sin un rol permitido → 403.
+- Permisos sin cargar y BD caída → 503 (nunca se deja pasar sin saber).
+- WebSocket: se decide como un GET a la misma ruta (el stream de
+  /api/cambios/producto/ws queda protegido igual que su gemelo SSE) y un
+  rechazo cierra el handshake con el código 1008 (policy violation).
+
+El usuario sale del token de POST /api/auth/login ("Authorization: Bearer
+<token>", verificado con caché en servicios/servicio_autenticacion.py) o,
+detrás de un gateway que ya autenticó, del header AUTORIZACION_HEADER_USUARIO
+(vacío = deshabilitado). Queda en request.state.usuario. Token inválido o
+expirado en una ruta protegida → 401.
+
+Los permisos se recompilan con el NOTIFY de la migración 004 (conexión
+LISTEN compartida); sin LISTEN, cada AUTORIZACION_RECARGA segundos.
+
+Registro en main.py (después de include_router: necesita las rutas):
+    app.add_middleware(MiddlewareAutorizacion, rutas=app.routes)
+"""
+
+import json
+import logging
+
+from fastapi.routing import APIRoute, APIWebSocketRoute, iter_route_contexts
+
+from config import get_settings
+from servicios.metricas import metricas
+from servicios.servicio_autenticacion import verificar_token
+from servicios.servicio_autorizacion import DENEGADA, LIBRE, SIN_IDENTIDAD, permisos_rutas
+
+
+_log = logging.getLogger(__name__)
+
+_AUTHORIZATION = b"authorization"
+_BEARER = "bearer "
+
+
+def _cuerpo(estado: int, mensaje: str) -> bytes:
+    """Error con el mismo formato que los controllers."""
+    return json.dumps({"detail": {"estado": estado, "mensaje": mensaje}}).encode()
+
+
+_SIN_IDENTIDAD = _cuerpo(401, "Ruta protegida: falta el usuario autenticado.")
+_DENEGADA = _cuerpo(403, "Ninguno de los roles del usuario permite esta ruta.")
+_TOKEN_INVALIDO = _cuerpo(401, "Token inválido o expirado.")
+_NO_DISPONIBLE = _cuerpo(503, "Autorización no disponible: no se pudieron leer los permisos.")
+# Codificados una sola vez: un rechazo no serializa JSON por petición.
+
+_WS_POLITICA = 1008
+# Código de cierre WebSocket "policy violation": 401, 403 y 503 antes del accept.
+
+
+class MiddlewareAutorizacion:
+    """Rechaza con 401/403 las peticiones a rutas que los roles del usuario no permiten."""
+
+    def __init__(self, app, rutas: list):
+        self.app = app
+        self._rutas = rutas                            # app.routes: se leen en la primera petición
+        header = get_settings().autorizacion.header_usuario
+        self._header = header.lower().encode("latin-1") if header else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):  # lifespan: sin autorización
+            await self.app(scope, receive, send)
+            return
+        websocket = scope["type"] == "websocket"
+
+        try:
+            matriz = await self._matriz()
+        except Exception:
+            _log.exception("Permisos no disponibles")
+            await _responder(send, 503, _NO_DISPONIBLE, websocket)
+            return
+
+        usuario, token, token_invalido = None, None, False
+        for nombre, valor in scope["headers"]:         # Headers ASGI: lista de (bytes, bytes)
+            if nombre == _AUTHORIZATION:
+                credencial = valor.decode("latin-1").strip()
+                if credencial[:7].lower() == _BEARER:
+                    token = credencial[7:].strip()
+            elif nombre == self._header:
+                usuario = valor.decode("latin-1").strip() or None
+        if token is not None:                          # El token manda sobre el header del gateway
+            usuario = verificar_token(token)
+            token_invalido = usuario is None
+
+        metodo = "GET" if websocket else scope["method"]   # El handshake WebSocket es un GET
+        resultado = matriz.decidir(metodo, scope["path"], usuario)
+        if resultado != LIBRE:
+            metricas.incrementar("autorizacion_total", resultado=resultado)
+        if resultado == SIN_IDENTIDAD:
+            await _responder(send, 401, _TOKEN_INVALIDO if token_invalido else _SIN_IDENTIDAD, websocket)
+            return
+        if resultado == DENEGADA:
+            await _responder(send, 403, _DENEGADA, websocket)
+            return
+
+        if usuario is not None:
+            scope.setdefault("state", {})["usuario"] = usuario
+        await self.app(scope, receive, send)
+
+    async def _matriz(self):
+        if not permisos_rutas.tiene_rutas():           # Sin ciclo de vida (ej: pruebas): se arma aquí
+            registrar_rutas(self._rutas)
+        return await permisos_rutas.matriz()
+
+
+def registrar_rutas(rutas: list) -> None:
+    """Compila el árbol con las rutas de la API (ciclo de vida o primera petición)."""
+    permisos_rutas.fijar_rutas(
+        (contexto.methods if isinstance(contexto.original_route, APIRoute) else {"GET"}, contexto.path)
+        for contexto in iter_route_contexts(rutas)
+        if isinstance(contexto.original_route, (APIRoute, APIWebSocketRoute))
+    )
+    # iter_route_contexts: aplana los routers incluidos (ruta con su prefijo completo).
+    # Solo rutas de la API: /docs y /openapi.json no tienen permisos.
+    # Las WebSocket no tienen métodos: se registran como GET (así las decide __call__).
+
+
+async def _responder(send, estado: int, cuerpo: bytes, websocket: bool = False) -> None:
+    if websocket:                                      # Antes del accept: el servidor responde 403 al handshake
+        await send({"type": "websocket.close", "code": _WS_POLITICA,
+                    "reason": json.loads(cuerpo)["detail"]["mensaje"]})
+        return
+    await send({
+        "type": "http.response.start", "status": estado,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(cuerpo)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
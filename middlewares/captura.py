@@ -0,0 +1,87 @@
+"""
+captura.py — Middleware que guarda una muestra de las peticiones reales.
+
+Con CAPTURA_HABILITADO=True, la fracción CAPTURA_MUESTREO de las peticiones
+(salvo las rutas de CAPTURA_EXCLUIR) deja un registro con método, ruta,
+query, inquilino, algunos headers, cuerpo, estado y duración. Lo escribe
+servicios/captura.py (redactado y comprimido, en un hilo aparte) y lo
+reproduce benchmarks/reproducir_trafico.py contra otra versión de la API.
+
+Las peticiones no muestreadas pasan directo: un random() y nada más.
+Con CAPTURA_HABILITADO=False el middleware ni se registra (main.py).
+
+Va DENTRO del middleware de inquilinos: ve la ruta ya sin /t/{inquilino}/
+y el inquilino resuelto (se reproduce con el header X-Tenant).
+"""
+
+import random
+import time
+
+from config import get_settings
+from servicios.captura import grabador_captura
+from servicios.inquilinos import inquilino_actual
+
+
+class MiddlewareCaptura:
+    """Registra las peticiones muestreadas en el grabador de captura."""
+
+    def __init__(self, app):
+        self.app = app
+        config = get_settings().captura
+        self._muestreo = config.muestreo
+        self._excluir = tuple(p.strip() for p in config.excluir.split(",") if p.strip())
+        self._headers = {h.strip().lower().encode("latin-1")
+                         for h in config.headers.split(",") if h.strip()} - {b"authorization", b"cookie"}
+        self._max_cuerpo = config.max_cuerpo
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or random.random() >= self._muestreo
+                or scope["path"].startswith(self._excluir)):
+            await self.app(scope, receive, send)
+            return
+
+        registro = {"t": round(time.time(), 3), "m": scope["method"], "p": scope["path"]}
+        if scope.get("query_string"):
+            registro["q"] = scope["query_string"].decode("latin-1")
+        if inquilino_actual():
+            registro["i"] = inquilino_actual()
+        headers = {n.decode("latin-1"): v.decode("latin-1")
+                   for n, v in scope["headers"] if n in self._headers}
+        if headers:
+            registro["h"] = headers
+        trozos: list[bytes] = []
+        tamano = 0
+        respuesta = 0
+
+        async def recibir():
+            nonlocal tamano
+            mensaje = await receive()
+            if mensaje["type"] == "http.request" and mensaje.get("body"):
+                tamano += len(mensaje["body"])
+                if tamano <= self._max_cuerpo:         # Más grande: solo se cuenta, no se guarda
+                    trozos.append(mensaje["body"])
+            return mensaje
+
+        async def enviar(mensaje):
+            nonlocal respuesta
+            if mensaje["type"] == "http.response.start":
+                registro["e"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                respuesta += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, recibir, enviar)
+        finally:
+            registro["d"] = round((time.perf_counter() - inicio) * 1000, 3)
+            registro["n"] = respuesta
+            ruta = scope.get("route")                  # Plantilla (tras el enrutamiento): agrupa al comparar
+            if ruta is not None and hasattr(ruta, "path"):
+                registro["r"] = ruta.path
+            if tamano > self._max_cuerpo:
+                registro["nb"] = tamano
+            elif trozos:                               # Se redacta en el hilo del grabador
+                registro["_cuerpo"] = b"".join(trozos)
+                registro["_tipo"] = headers.get("content-type", "").lower()
+            grabador_captura.encolar(registro)
@@ -0,0 +1,79 @@
+"""
+inquilinos.py — Middleware que resuelve el inquilino (tenant) de cada petición.
+
+Un inquilino = un esquema de PostgreSQL con las mismas tablas (producto,
+factura...). El inquilino se toma, en este orden, de:
+
+1. El prefijo de ruta: /t/tienda_norte/api/producto/ → "tienda_norte".
+   La ruta se reescribe a /api/producto/ antes de llegar a FastAPI, así
+   los controllers no cambian.
+2. El header X-Tenant: tienda_norte.
+
+Si el nombre no es un identificador válido se responde 400 sin tocar la
+BD. Que el esquema EXISTA lo verifica el repositorio (lista cacheada).
+
+Es un middleware ASGI "puro" (no BaseHTTPMiddleware): reescribir la ruta
+solo es posible antes del enrutamiento, y así no se agrega una tarea
+extra por petición.
+
+Registro en main.py:
+    app.add_middleware(MiddlewareInquilinos)
+"""
+
+import json
+
+from config import get_settings
+from servicios.inquilinos import es_nombre_valido, fijar_inquilino
+
+
+class MiddlewareInquilinos:
+    """Publica el inquilino de la petición con fijar_inquilino()."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":                    # lifespan, websocket: sin inquilino
+            await self.app(scope, receive, send)
+            return
+
+        config = get_settings().inquilinos
+        inquilino = None
+
+        prefijo = config.prefijo_ruta.rstrip("/")
+        ruta: str = scope["path"]
+        if prefijo and ruta.startswith(prefijo + "/"):
+            # /t/tienda_norte/api/producto/ → ("tienda_norte", "/api/producto/")
+            inquilino, _, resto = ruta[len(prefijo) + 1:].partition("/")
+            scope = dict(scope)                        # El scope original no se modifica
+            scope["path"] = "/" + resto
+            scope["raw_path"] = scope["path"].encode()
+        else:
+            nombre_header = config.header.lower().encode("latin-1")
+            for nombre, valor in scope["headers"]:     # Headers ASGI: lista de (bytes, bytes)
+                if nombre == nombre_header:
+                    inquilino = valor.decode("latin-1").strip()
+                    break
+
+        if inquilino is not None and not es_nombre_valido(inquilino):
+            await _responder_400(send, f"Inquilino inválido: '{inquilino}'")
+            return
+
+        fijar_inquilino(inquilino or None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            fijar_inquilino(None)
+
+
+async def _responder_400(send, mensaje: str) -> None:
+    """Respuesta 400 con el mismo formato de error que los controllers."""
+    cuerpo = json.dumps({"detail": {"estado": 400, "mensaje": mensaje}}).encode()
+    await send({
+        "type": "http.response.start", "status": 400,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(cuerpo)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
@@ -0,0 +1,75 @@
+"""
+perfilado.py — Middleware que perfila UNA petición bajo demanda.
+
+Uso (con PERFILADO_HABILITADO=True y PERFILADO_SECRETO=s3cr3t):
+
+    curl -H "X-Perfilar: s3cr3t" http://localhost:8000/api/producto/PR001
+
+La respuesta trae el header X-Perfil con el archivo generado en
+PERFILADO_DIRECTORIO (formato speedscope, con las consultas SQL y su
+duración). Las peticiones sin el header (o con otro valor) pasan directo:
+una comparación de header y nada más.
+
+Con PERFILADO_HABILITADO=False el middleware no se registra (main.py).
+Es ASGI puro, como MiddlewareInquilinos: la petición corre en la MISMA
+tarea asyncio que el middleware, que es la tarea que se muestrea.
+"""
+
+import asyncio
+import hmac
+import time
+import uuid
+
+from config import get_settings
+from servicios.metricas import metricas
+from servicios.perfilador import Perfil, fijar_perfil
+
+
+class MiddlewarePerfilado:
+    """Activa el perfilador si la petición trae el header con el secreto correcto."""
+
+    def __init__(self, app):
+        self.app = app
+        config = get_settings().perfilado
+        self._header = config.header.lower().encode("latin-1")
+        self._secreto = config.secreto.encode("latin-1")
+        self._cupos = asyncio.Semaphore(max(config.max_simultaneos, 1))
+
+    def _solicitado(self, scope) -> bool:
+        if not self._secreto:                          # Sin secreto configurado: nunca
+            return False
+        for nombre, valor in scope["headers"]:
+            if nombre == self._header:
+                return hmac.compare_digest(valor, self._secreto)  # Tiempo constante
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._solicitado(scope):
+            await self.app(scope, receive, send)
+            return
+        if self._cupos.locked():                       # Ya hay otra petición perfilándose
+            metricas.incrementar("perfilado_omitidos_total")
+            await self.app(scope, receive, send)
+            return
+
+        config = get_settings().perfilado
+        nombre = f"{scope['method']} {scope['path']}"
+        archivo = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.speedscope.json"
+        perfil = Perfil(nombre, config.intervalo_ms / 1000)
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":   # El nombre del archivo viaja en la respuesta
+                mensaje = {**mensaje, "headers": [*mensaje.get("headers", []),
+                                                  (b"x-perfil", archivo.encode())]}
+            await send(mensaje)
+
+        async with self._cupos:
+            fijar_perfil(perfil)
+            perfil.iniciar()
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                perfil.detener()
+                fijar_perfil(None)
+                await asyncio.to_thread(perfil.guardar, config.directorio, archivo)  # JSON fuera del loop
+                metricas.incrementar("perfilado_peticiones_total")
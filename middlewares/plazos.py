@@ -0,0 +1,76 @@
+"""
+plazos.py — Dependencia que fija el plazo (deadline) de cada petición.
+
+Sin plazos, un cliente que se rinde a los 2 s deja su consulta corriendo
+en PostgreSQL; los escaneos lentos siguen consumiendo CPU de la BD para
+peticiones que ya nadie espera. Esta dependencia:
+
+1. Calcula el plazo: PLAZO_POR_RUTA > PLAZO_POR_DEFECTO, reducido si el
+   cliente envía el header X-Request-Timeout-Ms (nunca mayor a PLAZO_MAXIMO).
+2. Lo publica con fijar_plazo(); el repositorio lo convierte en
+   statement_timeout y cancela la consulta si vence.
+3. En peticiones sin body (GET, HEAD, DELETE) vigila la desconexión
+   del cliente y cancela la consulta si se va.
+
+Uso en un controller:
+    router = APIRouter(..., dependencies=[Depends(admitir), Depends(aplicar_plazo)])
+"""
+
+import asyncio
+from contextlib import suppress
+from typing import AsyncIterator
+
+from fastapi import Request
+
+from config import get_settings
+from middlewares.admision import nombre_ruta   # "GET /api/producto/{codigo}"
+from servicios.plazos import Plazo, fijar_plazo
+
+
+_METODOS_SIN_BODY = {"GET", "HEAD", "DELETE"}
+# Solo en estos métodos es seguro escuchar receive(): no hay body que robarle al handler.
+
+
+def calcular_segundos(request: Request) -> float:
+    """Plazo en segundos para la petición según configuración y header del cliente."""
+    config = get_settings().plazos
+    segundos = config.por_ruta.get(nombre_ruta(request), config.por_defecto)
+
+    pedido = request.headers.get(config.header)        # Ej: X-Request-Timeout-Ms: 2000
+    if pedido:
+        try:
+            segundos = min(segundos, float(pedido) / 1000, config.maximo)
+        except ValueError:
+            pass                                       # Header mal formado: se ignora
+    return max(segundos, 0.001)
+
+
+async def _vigilar_desconexion(request: Request, plazo: Plazo) -> None:
+    """Espera el mensaje http.disconnect y cancela el plazo cuando llega."""
+    while True:
+        mensaje = await request.receive()
+        if mensaje["type"] == "http.disconnect":
+            plazo.cancelar("el cliente cerró la conexión")
+            return
+
+
+async def aplicar_plazo(request: Request) -> AsyncIterator[None]:
+    """Dependencia FastAPI: fija el plazo antes del handler y lo limpia al terminar."""
+    if not get_settings().plazos.habilitado:
+        yield
+        return
+
+    plazo = Plazo(calcular_segundos(request))
+    fijar_plazo(plazo)
+
+    vigia = None
+    if request.method in _METODOS_SIN_BODY:
+        vigia = asyncio.create_task(_vigilar_desconexion(request, plazo))
+    try:
+        yield                                          # Aquí se ejecuta el handler
+    finally:
+        if vigia is not None:
+            vigia.cancel()
+            with suppress(asyncio.CancelledError):
+                await vigia
+        fijar_plazo(None)
@@ -0,0 +1,125 @@
+"""
+trazas.py — Middleware de trazas + instrumentación de las tres capas.
+
+Por cada petición muestreada se genera:
+
+    GET /api/producto/{codigo}            (servidor: validación + serialización incluidas)
+    └── controller obtener_producto       (handler del router)
+        └── servicio ServicioProducto.obtener_por_codigo
+            └── repositorio RepositorioProductoPostgreSQL.obtener_por_codigo
+                ├── repositorio BaseRepositorioPostgreSQL._resolver_esquema
+                ├── SQL SELECT  (db.statement, db.rows)
+                └── ...
+
+El contexto entra por el header W3C 'traceparent' y la respuesta trae
+'traceresponse' con el trace_id (para buscar la traza en el backend).
+
+Con TRAZAS_HABILITADO=False nada de esto se registra (main.py).
+"""
+
+import inspect
+
+from fastapi.routing import APIRoute
+
+from servicios.trazas import (
+    fijar_span, iniciar_traza, instrumentar_clase, trazar
+)
+
+
+class MiddlewareTrazas:
+    """Abre el span raíz (kind SERVER) de cada petición HTTP muestreada."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for nombre, valor in scope["headers"]:
+            if nombre == b"traceparent":
+                traceparent = valor.decode("latin-1")
+                break
+        raiz = iniciar_traza(f"{scope['method']} {scope['path']}", traceparent)
+        if raiz is None:                               # No muestreada: sin costo adicional
+            await self.app(scope, receive, send)
+            return
+
+        raiz.atributos.update({"http.request.method": scope["method"], "url.path": scope["path"]})
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                raiz.atributo("http.response.status_code", mensaje["status"])
+                if mensaje["status"] >= 500:
+                    raiz.error = f"HTTP {mensaje['status']}"
+                mensaje = {**mensaje, "headers": [*mensaje.get("headers", []),
+                                                  (b"traceresponse", raiz.traceparent().encode())]}
+            await send(mensaje)
+
+        fijar_span(raiz)
+        try:
+            await self.app(scope, receive, enviar)
+        except BaseException as ex:
+            raiz.error = f"{type(ex).__name__}: {ex}"[:500]
+            raise
+        finally:
+            ruta = scope.get("route")                  # Plantilla de la ruta (tras el enrutamiento)
+            if ruta is not None and getattr(ruta, "path", None):
+                raiz.nombre = f"{scope['method']} {ruta.path}"
+                raiz.atributo("http.route", ruta.path)
+            fijar_span(None)
+            raiz.cerrar()
+
+
+def instrumentar_capas(*routers) -> None:
+    """Agrega spans a los handlers, servicios y repositorios (una sola vez, al arrancar)."""
+    # Los routers se instrumentan ANTES de app.include_router(): FastAPI arma la ruta
+    # final a partir de route.endpoint, y la envoltura conserva la firma (functools.wraps),
+    # así que la validación de parámetros no cambia. El span del controller empieza
+    # después de validar: validación = span raíz - span del controller.
+    for router in routers:
+        for ruta in router.routes:
+            if isinstance(ruta, APIRoute) and inspect.iscoroutinefunction(ruta.endpoint):
+                ruta.endpoint = trazar("controller", f"controller {ruta.endpoint.__name__}")(ruta.endpoint)
+
+    from repositorios.analitica import RepositorioAnaliticaPostgreSQL
+    from repositorios.autorizacion import RepositorioAutorizacionPostgreSQL
+    from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+    from repositorios.conteo import RepositorioConteoPostgreSQL
+    from repositorios.exportacion import RepositorioExportacionPostgreSQL
+    from repositorios.factura import RepositorioFacturaPostgreSQL
+    from repositorios.importacion import RepositorioImportacionPostgreSQL
+    from repositorios.maestro_detalle import RepositorioMaestroDetallePostgreSQL
+    from repositorios.particiones import RepositorioParticionesPostgreSQL
+    from repositorios.producto import RepositorioProductoMemoria, RepositorioProductoPostgreSQL
+    from repositorios.trabajos import RepositorioTrabajosPostgreSQL
+    from servicios.servicio_analitica import ServicioAnalitica
+    from servicios.servicio_autenticacion import ServicioAutenticacion
+    from servicios.servicio_autorizacion import ServicioAutorizacion
+    from servicios.servicio_conteo import ServicioConteo
+    from servicios.servicio_exportacion import ServicioExportacion
+    from servicios.servicio_factura import ServicioFactura
+    from servicios.servicio_importacion import ServicioImportacion
+    from servicios.servicio_maestro_detalle import ServicioMaestroDetalle
+    from servicios.servicio_particiones import ServicioParticiones
+    from servicios.servicio_producto import ServicioProducto
+    from servicios.servicio_reposicion import ServicioReposicion
+    from servicios.servicio_trabajos import ServicioTrabajos
+
+    for clase in (ServicioProducto, ServicioExportacion, ServicioImportacion, ServicioTrabajos,
+                  ServicioAnalitica, ServicioReposicion, ServicioAutorizacion, ServicioAutenticacion,
+                  ServicioMaestroDetalle, ServicioFactura, ServicioConteo,
+                  ServicioParticiones):
+        instrumentar_clase(clase, "servicio")
+    for clase in (RepositorioProductoPostgreSQL, RepositorioExportacionPostgreSQL,
+                  RepositorioImportacionPostgreSQL, RepositorioTrabajosPostgreSQL,
+                  RepositorioAnaliticaPostgreSQL, RepositorioAutorizacionPostgreSQL,
+                  RepositorioMaestroDetallePostgreSQL, RepositorioFacturaPostgreSQL,
+                  RepositorioProductoMemoria, RepositorioConteoPostgreSQL,
+                  RepositorioParticionesPostgreSQL):
+        instrumentar_clase(clase, "repositorio")
+    instrumentar_clase(BaseRepositorioPostgreSQL, "repositorio",
+                       ["_resolver_esquema", "_tipos_columnas", "_detectar_tipo_columna"])
+    # Resolución de esquema y detección de tipos: las partes "invisibles" del repositorio.
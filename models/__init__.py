@@ -22,7 +22,20 @@ Paquete de modelos Pydantic.
     Es como crear un "atajo" para que no tengan que escribir la ruta completa.
 """
 
-from .producto import Producto
+from .producto import Producto, FilaProducto
 # from .producto       → desde producto.py (en esta misma carpeta models/)
 # import Producto      → trae la clase Producto
 # Resultado: quien importe desde 'models' puede acceder a Producto directamente.
+# FilaProducto: forma validada de cada fila en las cargas masivas (POST /api/producto/masivo).
+
+from .lote import OperacionLote, SolicitudLote
+# Modelos del endpoint POST /api/batch (operaciones en lote).
+
+from .trabajo import SolicitudTrabajo
+# Body de POST /api/trabajos (cola de trabajos en segundo plano).
+
+from .credenciales import Credenciales
+# Body de POST /api/auth/login (inicio de sesión).
+
+from .maestro_detalle import SolicitudMaestroDetalle
+# Body de /api/maestro-detalle/{relacion} (procedimientos almacenados maestro-detalle).
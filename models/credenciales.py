@@ -0,0 +1,10 @@
+"""Modelo Pydantic del inicio de sesión."""
+
+from pydantic import BaseModel, Field
+
+
+class Credenciales(BaseModel):
+    """Body de POST /api/auth/login."""
+
+    email: str = Field(min_length=3, max_length=100)       # usuario.email es varchar(100)
+    contrasena: str = Field(min_length=1, max_length=200)  # Tope: no se hashean cuerpos enormes
@@ -0,0 +1,34 @@
+"""Modelos Pydantic para el endpoint de operaciones en lote."""
+
+from typing import Literal            # Literal: solo acepta los valores listados.
+
+from pydantic import BaseModel, model_validator
+
+from .producto import Producto
+
+
+class OperacionLote(BaseModel):
+    """Una operación del lote: crear, actualizar o eliminar un producto."""
+
+    operacion: Literal["crear", "actualizar", "eliminar"]
+    codigo: str | None = None          # Obligatorio para actualizar y eliminar
+    producto: Producto | None = None   # Obligatorio para crear y actualizar
+
+    @model_validator(mode="after")
+    def validar_campos(self):
+        """Verifica que cada tipo de operación traiga lo que necesita."""
+        if self.operacion == "crear" and self.producto is None:
+            raise ValueError("'crear' requiere el campo 'producto'.")
+        if self.operacion in ("actualizar", "eliminar") and not self.codigo:
+            raise ValueError(f"'{self.operacion}' requiere el campo 'codigo'.")
+        if self.operacion == "actualizar" and self.producto is None:
+            raise ValueError("'actualizar' requiere el campo 'producto'.")
+        return self
+    # Si falla, FastAPI responde 422 con el índice de la operación inválida.
+
+
+class SolicitudLote(BaseModel):
+    """Body de POST /api/batch."""
+
+    operaciones: list[OperacionLote]   # En orden; el servicio valida cantidad mínima y máxima
+    todo_o_nada: bool = True           # True: un error revierte el lote completo
@@ -0,0 +1,13 @@
+"""Modelo Pydantic de las operaciones maestro-detalle."""
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class SolicitudMaestroDetalle(BaseModel):
+    """Body de POST y PUT /api/maestro-detalle/{relacion}."""
+
+    maestro: dict[str, Any]                                    # Columnas del registro maestro
+    detalles: list[dict[str, Any]] = Field(default_factory=list)  # PUT: REEMPLAZA todos los detalles
+    # Las columnas las valida el procedimiento (errores → 400/409 con su mensaje).
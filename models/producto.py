@@ -1,10 +1,14 @@
-"""Modelo Pydantic para la tabla producto."""
+"""Modelos Pydantic para la tabla producto."""
+
+from typing import Annotated          # Annotated: tipo + restricciones (ej: max_length)
 
 from pydantic import BaseModel        # BaseModel: clase base de Pydantic para validación.
                                        # Toda clase que hereda obtiene:
                                        # - Validación automática de tipos al crear instancia
                                        # - model_dump() para convertir a diccionario
                                        # - Documentación automática en Swagger UI
+from pydantic import Field, StringConstraints
+from typing_extensions import TypedDict  # Pydantic exige esta versión de TypedDict en Python < 3.12
 
 
 class Producto(BaseModel):
@@ -23,3 +27,35 @@ class Producto(BaseModel):
     valorunitario: float | None = None # Opcional. Corresponde a: NUMERIC(14,2) NOT NULL
     # float | None → acepta decimal o None.
     # Usamos float (no Decimal) porque JSON no tiene tipo Decimal.
+
+
+class ProductoParcial(BaseModel):
+    """Cambios de PATCH: solo los campos enviados se actualizan."""
+    # Todos opcionales y sin codigo (la PK va en la URL). El controller usa
+    # model_dump(exclude_unset=True): un campo omitido NO aparece en el SET,
+    # a diferencia de PUT (Producto), donde un omitido se escribe como None.
+
+    nombre: str | None = None          # VARCHAR(100) NOT NULL: enviarlo como null es un error (400)
+    stock: int | None = None           # INTEGER NOT NULL
+    valorunitario: float | None = None # NUMERIC(14,2) NOT NULL
+
+    model_config = {"extra": "forbid"}
+    # Un campo desconocido (o "codigo") responde 422 en vez de ignorarse en silencio.
+
+
+class FilaProducto(TypedDict):
+    """Producto listo para la tabla (cargas masivas): mismos campos + restricciones de la BD."""
+    # TypedDict, no BaseModel: validar a dict es ~2x más rápido que crear una
+    # instancia por fila, y las restricciones se revisan dentro de pydantic-core
+    # (Rust), no en un bucle de Python. Lo usa servicios/validacion_masiva.py.
+
+    codigo: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=30,
+                                             pattern=r"^[^\x00]*$")]
+    nombre: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=100,
+                                             pattern=r"^[^\x00]*$")]
+    # VARCHAR(30) / VARCHAR(100) NOT NULL: sin espacios sobrantes, ni vacío ni más largo.
+    # Sin NUL (\x00): PostgreSQL no lo admite en un texto y el INSERT/COPY completo fallaría.
+    stock: Annotated[int, Field(ge=0, le=2**31 - 1)]
+    # INTEGER NOT NULL: obligatorio (aquí no hay default None) y no negativo.
+    valorunitario: Annotated[float, Field(ge=0, lt=999_999_999_999.995, allow_inf_nan=False)]
+    # NUMERIC(14,2) NOT NULL: el máximo que no se desborda al redondear a 2 decimales.
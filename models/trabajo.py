@@ -0,0 +1,12 @@
+"""Modelos Pydantic para la cola de trabajos en segundo plano."""
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class SolicitudTrabajo(BaseModel):
+    """Body de POST /api/trabajos."""
+
+    tipo: str                                              # exportacion, importacion, ...
+    parametros: dict[str, Any] = Field(default_factory=dict)  # Los valida el tipo de trabajo
@@ -0,0 +1,34 @@
+"""Contrato del repositorio de analítica de ventas."""
+
+from datetime import date, datetime
+from typing import Any, Optional, Protocol
+
+
+class IRepositorioAnalitica(Protocol):
+    """Contrato para leer las líneas de factura en forma de columnas."""
+
+    async def obtener_lineas(
+        self,
+        esquema: Optional[str] = None,
+        desde: Optional[datetime] = None,          # factura.fecha >= desde
+        hasta: Optional[datetime] = None           # factura.fecha < hasta
+    ) -> tuple[list[tuple[str, str]], dict[str, Any]]:
+        """(productos [(codigo, nombre)], columnas {factura, producto, cantidad, centavos} en NumPy)."""
+        ...
+
+    async def obtener_novedades(
+        self,
+        esquema: Optional[str] = None,
+        desde_numero: int = 0,                     # Último número de factura ya procesado
+        desde_dia: Optional[date] = None           # Días anteriores no interesan (fuera de la historia)
+    ) -> tuple[date, int, list[date]]:
+        """(hoy según la BD, último número de factura, días con facturas nuevas)."""
+        ...
+
+    async def obtener_demanda_diaria(
+        self,
+        esquema: Optional[str] = None,
+        dias: Optional[list[date]] = None          # Días a recalcular (None o [] → solo catálogo)
+    ) -> tuple[list[tuple], list[tuple]]:
+        """(catálogo [(codigo, nombre, stock)], demanda [(codigo, dia, unidades)])."""
+        ...
@@ -0,0 +1,19 @@
+"""Contrato del repositorio de permisos por ruta."""
+
+from typing import Protocol
+
+
+class IRepositorioAutorizacion(Protocol):
+    """Contrato para leer las tablas de seguridad (usuario, rol, rol_usuario, ruta, rutarol)."""
+
+    async def obtener_permisos(self) -> dict[str, list]:
+        """{"roles": [nombre], "usuarios": [(email, rol)], "rutas": [ruta], "permisos": [(ruta, rol)]}."""
+        ...
+
+    async def obtener_credenciales(self, email: str) -> tuple[str, list[str]] | None:
+        """(hash de la contraseña, [roles]) del usuario, o None si no existe."""
+        ...
+
+    async def reemplazar_contrasena(self, email: str, anterior: str, nuevo: str) -> bool:
+        """Cambia la contraseña solo si sigue siendo 'anterior'. True si se cambió."""
+        ...
@@ -0,0 +1,26 @@
+"""Contrato del repositorio de conteo de filas."""
+
+from typing import Any, Optional, Protocol
+
+
+class IRepositorioConteo(Protocol):
+    """Contrato para obtener el total de filas de una tabla."""
+
+    async def contar_exacto(
+        self, tabla: str, esquema: Optional[str] = None,
+        filtro: Optional[str] = None,              # Clave de FILTROS (None = tabla completa)
+        parametros: Optional[dict[str, Any]] = None
+    ) -> int:                                      # SELECT count(*)
+        ...
+
+    async def estimar(
+        self, tabla: str, esquema: Optional[str] = None,
+        filtro: Optional[str] = None,
+        parametros: Optional[dict[str, Any]] = None
+    ) -> int:                                      # Estadísticas del planificador
+        ...
+
+    async def contar_mantenido(
+        self, tabla: str, esquema: Optional[str] = None
+    ) -> Optional[int]:                            # None: la tabla no tiene contador
+        ...
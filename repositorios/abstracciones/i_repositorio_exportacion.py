@@ -0,0 +1,26 @@
+"""Contrato del repositorio de exportación de tablas."""
+
+from typing import AsyncIterator, Protocol, Optional
+
+
+class IRepositorioExportacion(Protocol):
+    """Contrato para leer tablas completas en forma de columnas."""
+
+    async def obtener_columnas(
+        self,
+        tabla: str,                        # Nombre de la tabla (ya validado por el servicio)
+        esquema: Optional[str] = None,
+        limite: Optional[int] = None       # None = todas las filas
+    ) -> tuple[list[str], list[tuple]]:    # (nombres de columnas, filas como tuplas)
+        """Obtiene las filas de la tabla sin convertirlas a dict."""
+        ...
+
+    def obtener_por_lotes(
+        self,
+        tabla: str,
+        esquema: Optional[str] = None,
+        limite: Optional[int] = None,
+        filas_por_lote: int = 5000
+    ) -> AsyncIterator[tuple[list[str], list[tuple]]]:   # (columnas, lote) hasta agotar la tabla
+        """Lee la tabla por lotes sin cargarla completa en memoria."""
+        ...
@@ -0,0 +1,16 @@
+"""Contrato del repositorio de facturas completas."""
+
+from typing import Protocol
+
+
+class IRepositorioFactura(Protocol):
+    """Contrato para leer facturas completas ya serializadas (bytes JSON UTF-8)."""
+
+    async def obtener_completa(self, numero: int, esquema: str | None = None) -> bytes | None:
+        """Documento JSON de la factura, o None si no existe."""
+        ...
+
+    async def listar_completas(self, despues: int, limite: int,
+                               esquema: str | None = None) -> tuple[bytes, int, int | None]:
+        """(arreglo JSON en bytes, cantidad, último número) de las facturas con numero > despues."""
+        ...
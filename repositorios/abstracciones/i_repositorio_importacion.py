@@ -0,0 +1,16 @@
+"""Contrato del repositorio de importación masiva de productos."""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Protocol
+
+
+class IRepositorioImportacion(Protocol):
+    """Contrato para cargar lotes de productos ya validados y fusionarlos en la tabla."""
+
+    async def importar_productos(
+        self,
+        lotes: AsyncIterator[list[tuple]],         # Lotes de (linea, codigo, nombre, stock, valorunitario)
+        esquema: Optional[str] = None,
+        al_cargar: Optional[Callable[[int], Awaitable[None]]] = None  # Avisa filas cargadas (progreso)
+    ) -> dict[str, Any]:                           # {"insertadas", "actualizadas", "sin_cambios"}
+        """Carga todos los lotes en staging y los fusiona en producto en UNA transacción."""
+        ...
@@ -0,0 +1,23 @@
+"""Contrato del repositorio de operaciones maestro-detalle."""
+
+from typing import Any, Protocol
+
+
+class IRepositorioMaestroDetalle(Protocol):
+    """Contrato para los procedimientos sp_<operacion>_<relacion>. Retornan p_resultado tal cual."""
+
+    async def crear(self, relacion: str, maestro: dict[str, Any],
+                    detalles: list[dict[str, Any]], esquema: str | None = None) -> dict[str, Any]:
+        ...
+
+    async def obtener(self, relacion: str, clave: str | int,
+                      esquema: str | None = None) -> dict[str, Any]:
+        ...
+
+    async def actualizar(self, relacion: str, clave: str | int, maestro: dict[str, Any],
+                         detalles: list[dict[str, Any]], esquema: str | None = None) -> dict[str, Any]:
+        ...
+
+    async def eliminar(self, relacion: str, clave: str | int,
+                       esquema: str | None = None) -> dict[str, Any]:
+        ...
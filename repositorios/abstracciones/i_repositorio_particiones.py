@@ -0,0 +1,26 @@
+"""Contrato del repositorio de particiones mensuales de facturas."""
+
+from datetime import date
+from typing import Optional, Protocol
+
+
+class IRepositorioParticiones(Protocol):
+    """Contrato para listar, crear y archivar los meses particionados."""
+
+    async def listar_meses(
+        self, esquema: Optional[str] = None
+    ) -> Optional[list[date]]:                     # None: factura no está particionada
+        ...
+
+    async def crear_mes(
+        self, mes: date, esquema: Optional[str] = None
+    ) -> bool:                                     # False: el mes ya existía
+        ...
+
+    async def archivar_mes(
+        self, mes: date,
+        archivo: str,                              # Esquema destino de las particiones separadas
+        espera_bloqueo: float,                     # lock_timeout del DETACH (segundos)
+        esquema: Optional[str] = None
+    ) -> Optional[int]:                            # Facturas archivadas (None: el mes no existía)
+        ...
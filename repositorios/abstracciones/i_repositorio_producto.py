@@ -20,6 +20,16 @@ class IRepositorioProducto(Protocol):
         ...
     # Ejemplo retorno: [{"codigo": "PR001", "nombre": "Laptop", "stock": 20, ...}]
 
+    # ── OPERACIÓN 1b: LISTAR EN COLUMNAS ─────────────────────────────
+    async def obtener_columnas(
+        self,
+        esquema: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> tuple[list[str], list[tuple]]:    # (nombres de columnas, filas como tuplas)
+        """Obtiene los productos sin convertir cada fila a dict."""
+        ...
+    # Ejemplo retorno: (["codigo", "nombre", ...], [("PR001", "Laptop", 20, Decimal("2500000.00"))])
+
     # ── OPERACIÓN 2: BUSCAR POR CÓDIGO ───────────────────────────────
     async def obtener_por_codigo(
         self,
@@ -30,6 +40,16 @@ class IRepositorioProducto(Protocol):
         ...
     # Si encuentra: [{"codigo": "PR001", ...}]. Si no: [].
 
+    # ── OPERACIÓN 2b: BUSCAR POR PREFIJO DEL NOMBRE ──────────────────
+    async def buscar_por_nombre(
+        self,
+        prefijo: str,                      # Inicio del nombre (ej: "lap")
+        esquema: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Obtiene los productos cuyo nombre empieza por el prefijo."""
+        ...
+
     # ── OPERACIÓN 3: CREAR (INSERT) ──────────────────────────────────
     async def crear(
         self,
@@ -49,6 +69,18 @@ class IRepositorioProducto(Protocol):
         """Actualiza un producto. Retorna filas afectadas."""
         ...
 
+    # ── OPERACIÓN 4b: ACTUALIZAR PARCIAL (PATCH) ─────────────────────
+    async def actualizar_parcial(
+        self,
+        codigo: str,                       # PK del producto a actualizar
+        datos: dict[str, Any],             # SOLO los campos enviados (sin None)
+        esquema: Optional[str] = None,
+        retornar: bool = False             # True: incluye la fila final (evita un GET)
+    ) -> Optional[dict[str, Any]]:         # None si no existe
+        """Actualiza solo los campos enviados; no escribe si ninguno cambia."""
+        ...
+    # Ejemplo retorno: {"filasAfectadas": 0, "fila": None} (ya tenía esos valores)
+
     # ── OPERACIÓN 5: ELIMINAR (DELETE) ───────────────────────────────
     async def eliminar(
         self,
@@ -57,3 +89,22 @@ class IRepositorioProducto(Protocol):
     ) -> int:                              # Filas eliminadas (0 si no existía)
         """Elimina un producto. Retorna filas eliminadas."""
         ...
+
+    # ── OPERACIÓN 6: LOTE ────────────────────────────────────────────
+    async def ejecutar_lote(
+        self,
+        operaciones: list[dict[str, Any]],  # [{"operacion": "crear", "codigo": ..., "datos": {...}}]
+        esquema: Optional[str] = None,
+        todo_o_nada: bool = True           # True: un error revierte todo el lote
+    ) -> dict[str, Any]:                   # {"confirmado", "exitosas", "fallidas", "resultados"}
+        """Ejecuta varias operaciones en una sola transacción."""
+        ...
+
+    # ── OPERACIÓN 7: CREAR MASIVO ────────────────────────────────────
+    async def crear_masivo(
+        self,
+        filas: list[tuple],                # [(codigo, nombre, stock, valorunitario), ...] ya validadas
+        esquema: Optional[str] = None
+    ) -> list[str]:                        # Códigos insertados (los que ya existían se omiten)
+        """Inserta muchos productos en una sola sentencia."""
+        ...
@@ -0,0 +1,45 @@
+"""Contrato del repositorio de la cola de trabajos."""
+
+from typing import Any, Optional, Protocol
+
+
+class IRepositorioTrabajos(Protocol):
+    """Contrato para encolar, reclamar y actualizar trabajos persistidos en la BD."""
+
+    async def crear(self, id_trabajo: str, tipo: str, parametros: dict[str, Any],
+                    inquilino: Optional[str]) -> dict[str, Any]:
+        ...
+
+    async def crear_si_no_existe(self, id_trabajo: str, tipo: str, parametros: dict[str, Any],
+                                 inquilino: Optional[str]) -> Optional[dict[str, Any]]:
+        """Como crear(), pero None si ese id ya existe (trabajos programados)."""
+        ...
+
+    async def obtener(self, id_trabajo: str) -> Optional[dict[str, Any]]:
+        ...
+
+    async def cancelar(self, id_trabajo: str) -> Optional[dict[str, Any]]:
+        """Pendiente → cancelado; en curso → marca 'cancelar' para su worker."""
+        ...
+
+    async def reclamar(self, tipos: list[str], propietario: str) -> Optional[dict[str, Any]]:
+        """Toma el pendiente más antiguo de esos tipos (SKIP LOCKED entre workers)."""
+        ...
+
+    async def latido(self, id_trabajo: str, propietario: str,
+                     progreso: Optional[dict[str, Any]]) -> Optional[bool]:
+        """Confirma que sigue vivo. Retorna 'cancelar' (None si el trabajo ya no es suyo)."""
+        ...
+
+    async def finalizar(self, id_trabajo: str, propietario: str, estado: str,
+                        resultado: Optional[dict[str, Any]] = None,
+                        error: Optional[str] = None) -> None:
+        ...
+
+    async def liberar(self, id_trabajo: str, propietario: str) -> None:
+        """Devuelve a la cola un trabajo interrumpido por el apagado del worker."""
+        ...
+
+    async def recuperar_huerfanos(self, segundos_sin_latido: float, max_intentos: int) -> int:
+        """Reencola (o da por fallidos) los trabajos cuyo worker dejó de dar latidos."""
+        ...
@@ -0,0 +1,9 @@
+"""
+Repositorio de analítica de ventas (líneas de factura en columnas NumPy).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.analitica import RepositorioAnaliticaPostgreSQL
+"""
+
+from .repositorio_analitica_postgresql import RepositorioAnaliticaPostgreSQL
@@ -0,0 +1,169 @@
+"""Repositorio de analítica de ventas para PostgreSQL."""
+# Lee las líneas de factura en forma de COLUMNAS (arreglos NumPy), no de filas.
+#
+# 10 millones de líneas como filas de asyncpg son 10 millones de objetos
+# Record + 40 millones de objetos Python (int, str, Decimal). Aquí, en cambio:
+# - Las columnas se piden ya en tipos de ancho fijo: el código del producto
+#   se cambia por su posición en el catálogo (int4) y el subtotal por
+#   centavos (int8). Ningún texto ni Decimal viaja por fila.
+# - COPY ... TO STDOUT (FORMAT binary): el servidor envía las filas en su
+#   formato binario, sin pasar por el protocolo de filas.
+# - Como todas las filas miden lo mismo, el buffer completo se interpreta con
+#   UN dtype estructurado de NumPy (np.frombuffer): decodificar es copiar memoria.
+
+import asyncio
+from datetime import datetime
+
+try:                                   # Dependencia opcional
+    import numpy as np
+except ImportError:                    # Sin numpy: /api/analitica responde 501
+    np = None
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from repositorios.resiliencia import reintentable
+
+
+_FIRMA_COPY = b"PGCOPY\n\xff\r\n\x00"
+# Encabezado del formato binario de COPY: firma (11) + flags (4) + largo de la extensión (4).
+
+_DTYPE_LINEA = None if np is None else np.dtype([
+    ("campos", ">i2"),                             # Cantidad de columnas de la fila (siempre 4)
+    ("_l1", ">i4"), ("factura", ">i4"),            # Cada columna: largo (int32) + valor
+    ("_l2", ">i4"), ("producto", ">i4"),
+    ("_l3", ">i4"), ("cantidad", ">i4"),
+    ("_l4", ">i4"), ("centavos", ">i8"),
+])
+# Big-endian (">"): así escribe PostgreSQL los enteros en COPY binario.
+# Las columnas son NOT NULL: ninguna fila trae largo -1, todas miden 38 bytes.
+
+
+def decodificar_copy(buffer) -> dict[str, "np.ndarray"]:
+    """COPY binario (factura int4, producto int4, cantidad int4, centavos int8) → columnas."""
+    datos = memoryview(buffer)
+    if bytes(datos[:11]) != _FIRMA_COPY:
+        raise RuntimeError("Respuesta de COPY binario inválida (firma).")
+    inicio = 19 + int.from_bytes(datos[15:19], "big")   # Se salta la extensión del encabezado
+    cuerpo = datos[inicio:len(datos) - 2]               # Sin el marcador final (int16 = -1)
+    if len(cuerpo) % _DTYPE_LINEA.itemsize:
+        raise RuntimeError("Respuesta de COPY binario inválida (largo).")
+    filas = np.frombuffer(cuerpo, dtype=_DTYPE_LINEA)
+    if len(filas) and (filas["campos"] != 4).any():
+        raise RuntimeError("Respuesta de COPY binario inválida (columnas).")
+    return {
+        "factura": filas["factura"].astype(np.int64),
+        "producto": filas["producto"].astype(np.int32),
+        "cantidad": filas["cantidad"].astype(np.int64),
+        "centavos": filas["centavos"].astype(np.int64),
+    }
+    # astype: pasa a orden de bytes nativo y deja cada columna contigua en memoria
+    # (las operaciones vectorizadas sobre columnas contiguas son las más rápidas).
+
+
+class RepositorioAnaliticaPostgreSQL(BaseRepositorioPostgreSQL):
+    """Líneas de factura (con su factura y producto) en columnas NumPy."""
+
+    @reintentable()
+    async def obtener_lineas(self, esquema=None, desde: datetime | None = None,
+                             hasta: datetime | None = None):
+        """Retorna (productos, columnas): productos = [(codigo, nombre)], columnas = arreglos NumPy."""
+        esquema_final = await self._resolver_esquema(esquema)
+        particionada = await self._facturas_particionadas(esquema_final)
+        columnas_fecha = ("f.fecha", "d.fechafactura") if particionada else ("f.fecha",)
+        filtros, argumentos = [], []
+        if desde is not None:
+            argumentos.append(desde)
+            filtros += [f"{columna} >= ${len(argumentos) + 1}" for columna in columnas_fecha]
+        if hasta is not None:
+            argumentos.append(hasta)
+            filtros += [f"{columna} < ${len(argumentos) + 1}" for columna in columnas_fecha]
+        donde = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        misma_particion = " AND d.fechafactura = f.fecha" if particionada else ""
+        # $1 es la lista de códigos; las fechas, si vienen, son $2 y $3.
+        # Particionada: el rango se repite sobre d.fechafactura (el planificador no
+        # lo deduce del JOIN) para que también el detalle lea solo los meses pedidos.
+
+        sql_productos = f'SELECT codigo, nombre FROM "{esquema_final}"."producto" ORDER BY codigo'
+        sql_lineas = f'''
+            SELECT d.fknumfactura, (p.posicion - 1)::int4, d.cantidad, (d.subtotal * 100)::int8
+            FROM "{esquema_final}"."productosporfactura" d
+            JOIN "{esquema_final}"."factura" f ON f.numero = d.fknumfactura{misma_particion}
+            JOIN unnest($1::varchar[]) WITH ORDINALITY AS p(codigo, posicion)
+                 ON p.codigo = d.fkcodproducto
+            {donde}
+        '''
+        # La posición sale de la MISMA lista de códigos que se devuelve: aunque se cree
+        # un producto entre las dos consultas, los índices siempre coinciden.
+
+        async with self._conexion(esquema=esquema_final) as conn:
+            crudo = (await conn.get_raw_connection()).driver_connection  # asyncpg: COPY binario
+            productos = [(fila[0], fila[1])
+                         for fila in await self._ejecutar_crudo(conn, crudo.fetch(sql_productos))]
+            buffer = bytearray()                       # Nuevo en cada intento: un reintento no acumula
+
+            async def recibir(trozo: bytes) -> None:
+                buffer.extend(trozo)
+
+            await self._ejecutar_crudo(conn, crudo.copy_from_query(
+                sql_lineas, [codigo for codigo, _ in productos], *argumentos,
+                output=recibir, format="binary"
+            ))
+            # _ejecutar_crudo: el plazo de la petición cancela el COPY igual que una consulta normal.
+        return productos, await asyncio.to_thread(decodificar_copy, buffer)
+        # La conexión ya volvió al pool; la copia a columnas corre fuera del event loop.
+
+    # ── REPOSICIÓN: demanda diaria por producto ──────────────────────
+
+    @reintentable()
+    async def obtener_novedades(self, esquema=None, desde_numero: int = 0, desde_dia=None):
+        """(hoy según la BD, último número de factura, días con facturas nuevas desde desde_numero)."""
+        esquema_final = await self._resolver_esquema(esquema)
+        sql = self._sentencia(esquema_final, ("reposicion_novedades",), lambda: text(f'''
+            SELECT current_date AS hoy,
+                   (SELECT max(numero) FROM "{esquema_final}"."factura") AS ultimo,
+                   ARRAY(
+                       SELECT DISTINCT fecha::date FROM "{esquema_final}"."factura"
+                       WHERE numero > :desde_numero AND fecha >= CAST(:desde_dia AS date)
+                   ) AS dias
+        '''))
+        # numero es SERIAL: las facturas nuevas son las de número mayor al último visto,
+        # sin importar la fecha que traigan. Usa el índice de la PK.
+        async with self._conexion(esquema=esquema_final) as conn:
+            fila = (await self._ejecutar(conn, sql, {
+                "desde_numero": desde_numero, "desde_dia": desde_dia
+            })).one()
+            return fila.hoy, fila.ultimo or 0, list(fila.dias)
+
+    @reintentable()
+    async def obtener_demanda_diaria(self, esquema=None, dias=None):
+        """Unidades vendidas por (producto, día) en los días indicados, + catálogo con su stock."""
+        esquema_final = await self._resolver_esquema(esquema)
+        particionada = await self._facturas_particionadas(esquema_final)
+        poda = '''
+              AND d.fechafactura = f.fecha
+              AND d.fechafactura >= CAST(:primero AS date)
+              AND d.fechafactura < CAST(:ultimo AS date) + 1''' if particionada else ""
+        sql_demanda = self._sentencia(esquema_final, ("reposicion_demanda", particionada), lambda: text(f'''
+            SELECT d.fkcodproducto AS codigo, f.fecha::date AS dia, sum(d.cantidad) AS unidades
+            FROM "{esquema_final}"."productosporfactura" d
+            JOIN "{esquema_final}"."factura" f ON f.numero = d.fknumfactura
+            WHERE f.fecha >= CAST(:primero AS date) AND f.fecha < CAST(:ultimo AS date) + 1
+              AND f.fecha::date = ANY(CAST(:dias AS date[])){poda}
+            GROUP BY 1, 2
+        '''))
+        # El rango [primero, ultimo] deja usar un índice sobre fecha (y, particionada,
+        # leer solo esos meses de las dos tablas); ANY() descarta los días
+        # intermedios que no cambiaron. La suma por día la hace PostgreSQL: llegan
+        # (productos × días tocados) filas, no una por línea de factura.
+        sql_catalogo = self._sentencia(esquema_final, ("reposicion_catalogo",), lambda: text(
+            f'SELECT codigo, nombre, stock FROM "{esquema_final}"."producto" ORDER BY codigo'
+        ))
+        async with self._conexion(esquema=esquema_final) as conn:
+            catalogo = (await self._ejecutar(conn, sql_catalogo)).fetchall()
+            demanda = []
+            if dias:
+                demanda = (await self._ejecutar(conn, sql_demanda, {
+                    "primero": min(dias), "ultimo": max(dias), "dias": list(dias)
+                })).fetchall()
+            return [tuple(f) for f in catalogo], [tuple(f) for f in demanda]
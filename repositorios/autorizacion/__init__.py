@@ -0,0 +1,9 @@
+"""
+Repositorio de permisos por ruta (usuario, rol, rol_usuario, ruta, rutarol).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.autorizacion import RepositorioAutorizacionPostgreSQL
+"""
+
+from .repositorio_autorizacion_postgresql import RepositorioAutorizacionPostgreSQL
@@ -0,0 +1,75 @@
+"""Repositorio de permisos por ruta para PostgreSQL (tablas de seguridad del esquema public)."""
+# La autorización relee las cinco tablas completas y compila la matriz en
+# memoria. Son tablas pequeñas (decenas de roles, cientos de rutas) y se leen
+# solo al arrancar o cuando cambian (NOTIFY de la migración 004). La única
+# escritura: el login reemplaza una contraseña heredada en texto plano por su hash.
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from repositorios.resiliencia import reintentable
+
+
+_SQL_ROLES = text("SELECT nombre FROM public.rol ORDER BY id")
+
+_SQL_USUARIOS = text("""
+    SELECT u.email, r.nombre
+    FROM public.usuario u
+    JOIN public.rol_usuario ru ON ru.fkemail = u.email
+    JOIN public.rol r ON r.id = ru.fkidrol
+""")
+
+_SQL_RUTAS = text("SELECT ruta FROM public.ruta")
+
+_SQL_PERMISOS = text("SELECT ruta, rol FROM public.rutarol")
+# Siempre public: los usuarios y permisos son del sistema, no de cada inquilino.
+
+_SQL_CREDENCIALES = text("""
+    SELECT u.contrasena, COALESCE(array_agg(r.nombre ORDER BY r.id) FILTER (WHERE r.id IS NOT NULL), '{}')
+    FROM public.usuario u
+    LEFT JOIN public.rol_usuario ru ON ru.fkemail = u.email
+    LEFT JOIN public.rol r ON r.id = ru.fkidrol
+    WHERE u.email = :email
+    GROUP BY u.email, u.contrasena
+""")
+# Una sola ida a la BD por inicio de sesión: hash y roles juntos.
+
+_SQL_REEMPLAZAR_CONTRASENA = text("""
+    UPDATE public.usuario SET contrasena = :nuevo
+    WHERE email = :email AND contrasena = :anterior
+""")
+# AND contrasena = :anterior: si alguien la cambió mientras tanto, no se pisa.
+
+
+class RepositorioAutorizacionPostgreSQL(BaseRepositorioPostgreSQL):
+    """Lee usuarios, roles, rutas y permisos tal como están en la BD."""
+
+    @reintentable()
+    async def obtener_permisos(self) -> dict[str, list]:
+        """{"roles": [nombre], "usuarios": [(email, rol)], "rutas": [ruta], "permisos": [(ruta, rol)]}."""
+        async with self._conexion() as conn:
+            # REPEATABLE READ no hace falta: una recarga a medio cambio se corrige
+            # con el NOTIFY de ese mismo cambio (llega después del COMMIT).
+            return {
+                "roles": [fila[0] for fila in (await self._ejecutar(conn, _SQL_ROLES)).fetchall()],
+                "usuarios": [tuple(f) for f in (await self._ejecutar(conn, _SQL_USUARIOS)).fetchall()],
+                "rutas": [fila[0] for fila in (await self._ejecutar(conn, _SQL_RUTAS)).fetchall()],
+                "permisos": [tuple(f) for f in (await self._ejecutar(conn, _SQL_PERMISOS)).fetchall()],
+            }
+
+    @reintentable()
+    async def obtener_credenciales(self, email: str) -> tuple[str, list[str]] | None:
+        """(hash de la contraseña, [roles]) del usuario, o None si no existe."""
+        async with self._conexion() as conn:
+            fila = (await self._ejecutar(conn, _SQL_CREDENCIALES, {"email": email})).first()
+            return (fila[0], list(fila[1])) if fila else None
+
+    @reintentable()
+    async def reemplazar_contrasena(self, email: str, anterior: str, nuevo: str) -> bool:
+        """Cambia la contraseña solo si sigue siendo 'anterior'. True si se cambió."""
+        async with self._conexion(transaccion=True) as conn:
+            resultado = await self._ejecutar(
+                conn, _SQL_REEMPLAZAR_CONTRASENA, {"email": email, "anterior": anterior, "nuevo": nuevo}
+            )
+            return resultado.rowcount > 0
+    # Reintentable: repetirla tras un corte solo encuentra la contraseña ya cambiada.
@@ -7,21 +7,114 @@ Características de PostgreSQL:
 - Esquema por defecto: 'public'
 """
 
-from typing import Any                # Any: tipo comodín, acepta cualquier tipo.
+import asyncio
+import json
+import time as time_module            # perf_counter (el nombre 'time' es el tipo de datetime).
+from typing import Any, AsyncIterator, Awaitable, Callable
+                                      # Any: tipo comodín. AsyncIterator: tipo de un generador async.
+                                      # Awaitable/Callable: tipo de las funciones que recibe _ejecutar_lote.
+from contextlib import asynccontextmanager  # Convierte un generador async en "async with".
 from datetime import datetime, date, time  # Tipos de fecha/hora de Python.
 from decimal import Decimal           # Números con precisión exacta (para valores monetarios).
 from uuid import UUID                 # Identificador universal único de 128 bits.
 
 from sqlalchemy import text           # text(): escribir SQL crudo con parámetros seguros (:param).
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy import event          # Eventos del engine (medición de consultas para el perfilador).
+from sqlalchemy import exc as sa_exc  # Excepciones de SQLAlchemy (TimeoutError del pool).
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncConnection
                                       # create_async_engine: crea pool de conexiones asíncronas.
                                       # AsyncEngine: tipo del objeto engine (para type hints).
+                                      # AsyncConnection: conexión tomada del pool.
+
+from servicios.excepciones import (
+    ErrorDisponibilidad, ErrorServicioSaturado, ErrorPlazoExcedido, ErrorEsquemaInexistente,
+    ErrorBDTransitoria
+)
+from servicios.metricas import metricas
+from servicios.plazos import plazo_actual  # Plazo (deadline) de la petición en curso
+from servicios.perfilador import registrar_consulta  # Tiempos SQL de la petición perfilada
+from servicios.trazas import abrir_span_sql, cerrar_span_sql  # Span por sentencia SQL
+from servicios.inquilinos import inquilino_actual, es_nombre_valido  # Inquilino de la petición
+from repositorios.cache_inquilinos import registro_inquilinos  # Cachés por esquema del proceso
+from repositorios.resiliencia import circuito_para, clasificar, reintentable  # Errores transitorios
+from config import get_settings
 
 from servicios.abstracciones.i_proveedor_conexion import IProveedorConexion
 # Depende de la ABSTRACCIÓN (interfaz), no de la implementación concreta.
 # Esto cumple el principio D de SOLID (Inversión de Dependencias).
 
 
+_ENGINES: dict[str, AsyncEngine] = {}
+# Engines compartidos por TODO el proceso, uno por cadena de conexión.
+# La fábrica crea un repositorio nuevo en cada petición; si cada uno creara
+# su propio engine, cada petición abriría su propio pool y el límite de
+# conexiones (DB_POOL_SIZE) no serviría de nada.
+
+
+def _estado_pools() -> dict[str, Any]:
+    """Recolector de métricas: uso actual de cada pool de conexiones."""
+    estado = {}
+    for i, engine in enumerate(_ENGINES.values()):
+        pool = engine.pool
+        estado[f"pool_{i}"] = {
+            "tamano": pool.size(),                 # Conexiones permanentes configuradas
+            "en_uso": pool.checkedout(),           # Conexiones prestadas en este momento
+            "libres": pool.checkedin(),            # Conexiones esperando en el pool
+            "desborde": pool.overflow(),           # Conexiones extra abiertas (negativo = cupo sin usar)
+        }
+    return {"pools": estado}
+
+
+metricas.registrar_recolector(_estado_pools)
+
+
+def _medir_consultas(engine: AsyncEngine) -> None:
+    """Mide cada consulta: tiempos para el perfilador y un span SQL para las trazas."""
+    # Solo se registra con PERFILADO_HABILITADO o TRAZAS_HABILITADO: si no, cero costo por consulta.
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _antes(conn, cursor, sql, parametros, contexto, varias):
+        conn.info.setdefault("consultas_en_curso", []).append(
+            (time_module.perf_counter(), abrir_span_sql(sql))
+        )
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _despues(conn, cursor, sql, parametros, contexto, varias):
+        inicio, span_sql = conn.info["consultas_en_curso"].pop()
+        registrar_consulta(sql, inicio, time_module.perf_counter())
+        cerrar_span_sql(span_sql, filas=cursor.rowcount)   # Filas leídas o afectadas
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _error(contexto_error):                        # Consulta fallida: no hay after_cursor_execute
+        conexion = contexto_error.connection
+        if conexion is not None and conexion.info.get("consultas_en_curso"):
+            inicio, span_sql = conexion.info["consultas_en_curso"].pop()
+            registrar_consulta(f"[ERROR] {contexto_error.statement}", inicio, time_module.perf_counter())
+            cerrar_span_sql(span_sql, error=str(contexto_error.original_exception)[:500])
+
+
+_SQL_CONFIGURAR_SESION = text("""
+    SELECT
+        CASE WHEN CAST(:ms AS text) IS NOT NULL
+             THEN set_config('statement_timeout', :ms, true) END,
+        CASE WHEN CAST(:search_path AS text) IS NOT NULL
+             THEN set_config('search_path', :search_path, true) END
+""")
+# Fija statement_timeout y/o search_path (solo los que vengan con valor) en UNA consulta.
+
+_SQL_ESQUEMAS = text("""
+    SELECT nspname FROM pg_namespace
+    WHERE nspname NOT LIKE 'pg\\_%' AND nspname <> 'information_schema'
+""")
+# Esquemas de usuario: excluye los del sistema (pg_catalog, pg_toast, information_schema).
+
+_SQL_TIPOS_COLUMNAS = text("""
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = :esquema AND table_name = :tabla
+""")
+# Todas las columnas de la tabla en una sola consulta (se cachean juntas).
+
+
 class BaseRepositorioPostgreSQL:
     """Clase base con la lógica SQL de PostgreSQL. Los repositorios específicos heredan de esta clase."""
     # Clase abstracta en la práctica: no se usa directamente, siempre a través de subclases.
@@ -32,43 +125,234 @@ class BaseRepositorioPostgreSQL:
             raise ValueError("proveedor_conexion no puede ser None")
         self._proveedor_conexion = proveedor_conexion      # Guarda referencia (atributo privado)
         self._engine: AsyncEngine | None = None            # Engine: se crea lazy (primera vez que se necesita)
+        self._circuito = None                              # Circuito de esa BD (junto con el engine)
 
     async def _obtener_engine(self) -> AsyncEngine:
-        """Crea el engine de conexión la primera vez, luego lo reutiliza."""
+        """Obtiene el engine compartido para la cadena de conexión (lo crea la primera vez)."""
         if self._engine is None:                           # LAZY LOADING: solo la primera vez
             cadena = self._proveedor_conexion.obtener_cadena_conexion()  # Obtiene cadena del .env
-            self._engine = create_async_engine(cadena, echo=False)      # Crea pool de conexiones
-                                                           # echo=False: no imprime SQL en consola
+            engine = _ENGINES.get(cadena)                  # ¿Otro repositorio ya lo creó?
+            if engine is None:
+                opciones = self._proveedor_conexion.obtener_opciones_pool()
+                engine = create_async_engine(              # Crea pool de conexiones
+                    cadena, echo=False,                    # echo=False: no imprime SQL en consola
+                    pool_size=opciones["pool_size"],
+                    max_overflow=opciones["max_overflow"],
+                    pool_timeout=opciones["pool_timeout"], # Espera ACOTADA por una conexión libre
+                    connect_args={                         # Sentencias preparadas por conexión (asyncpg):
+                        "prepared_statement_cache_size":   # con muchos inquilinos hay más SQL distinto
+                            opciones["cache_sentencias"],
+                        "timeout": opciones["timeout_conexion"],  # Conectar: segundos, no el minuto de asyncpg
+                    },
+                )
+                config = get_settings()
+                if config.perfilado.habilitado or config.trazas.habilitado:
+                    _medir_consultas(engine)           # Tiempos SQL: perfilador y trazas
+                _ENGINES[cadena] = engine
+            self._engine = engine
+            self._circuito = circuito_para(cadena)         # Compartido, como el engine
         return self._engine                                # Retorna el engine (nuevo o existente)
 
+    @asynccontextmanager
+    async def _conexion(
+        self, transaccion: bool = False, esquema: str | None = None
+    ) -> AsyncIterator[AsyncConnection]:
+        """Presta una conexión del pool; si el pool está agotado lanza ErrorServicioSaturado."""
+        # transaccion=True → engine.begin(): commit al salir, rollback si hay error.
+        # transaccion=False → engine.connect(): solo lectura, sin commit.
+        # Si la petición tiene plazo, PostgreSQL lo recibe como statement_timeout:
+        # aunque la cancelación desde Python falle, el servidor aborta la consulta.
+        # esquema = el YA resuelto por _resolver_esquema() (?esquema= > inquilino > public):
+        # el cupo de conexiones y el search_path siguen al esquema que el SQL consulta, no
+        # al header. Así ?esquema=tienda_x sin X-Tenant también respeta el límite de
+        # tienda_x, y triggers y funciones sin esquema explícito resuelven en tienda_x.
+        # Sin esquema (trabajos, usuarios, pg_namespace) o con "public": tablas comunes,
+        # sin cupo ni search_path propios.
+        # Los errores transitorios (conexión caída, failover, serialización) salen como
+        # ErrorBDTransitoria y alimentan el circuito de la BD (repositorios/resiliencia.py).
+        engine = await self._obtener_engine()
+        circuito = self._circuito
+        sonda = circuito.permitir()                    # Circuito abierto: 503 sin tocar el pool
+        contexto = engine.begin() if transaccion else engine.connect()
+        plazo = plazo_actual()
+        inquilino = esquema if esquema != "public" else None
+        conectada = False                              # ¿Se llegó a tener la conexión?
+        respondio: bool | None = None                  # Para el circuito: ¿la BD respondió?
+        try:
+            async with self._cupo_inquilino(inquilino), contexto as conn:  # Aquí se espera por una conexión libre
+                conectada = True
+                if plazo is not None or inquilino is not None:
+                    if plazo is not None:
+                        plazo.verificar()                  # ¿Se agotó esperando la conexión?
+                    await conn.execute(_SQL_CONFIGURAR_SESION, {
+                        "ms": str(plazo.statement_timeout_ms()) if plazo else None,
+                        "search_path": f'"{inquilino}", public' if inquilino else None,
+                    })
+                    # set_config(..., true) = SET LOCAL: solo dura la transacción actual,
+                    # la conexión vuelve al pool sin timeout ni search_path propios.
+                    # Una sola ida y vuelta para ambos valores.
+                yield conn
+            respondio = True
+        except sa_exc.TimeoutError as ex:                  # Pasaron DB_POOL_TIMEOUT segundos sin cupo
+            metricas.incrementar("pool_esperas_agotadas_total")
+            raise ErrorServicioSaturado(
+                "No hay conexiones disponibles en el pool. Intente más tarde.",
+                retry_after=1
+            ) from ex
+        except (sa_exc.DBAPIError, OSError) as ex:
+            if getattr(getattr(ex, "orig", None), "sqlstate", None) == "57014":  # query_canceled (statement_timeout)
+                respondio = True
+                metricas.incrementar("plazos_excedidos_total", origen="postgresql")
+                raise ErrorPlazoExcedido(
+                    "PostgreSQL canceló la consulta por exceder el plazo de la petición."
+                ) from ex
+            causa = clasificar(ex, conectada)
+            if causa is None:                              # Permanente: el repositorio lo convierte en 500
+                respondio = conectada or None
+                raise
+            respondio = causa != "conexion"                # Serialización: la BD respondió bien
+            metricas.incrementar("bd_errores_transitorios_total", causa=causa)
+            raise ErrorBDTransitoria(
+                f"Error transitorio de PostgreSQL ({causa}): {ex}", causa, enviada=conectada
+            ) from ex
+        except ErrorPlazoExcedido:
+            metricas.incrementar("plazos_excedidos_total", origen="aplicacion")
+            raise
+        except Exception:
+            respondio = conectada or None                  # Error del cuerpo (datos, lote revertido...)
+            raise
+        finally:
+            circuito.registrar(respondio, sonda)
+
+    @asynccontextmanager
+    async def _cupo_inquilino(self, inquilino: str | None) -> AsyncIterator[None]:
+        """Limita las conexiones simultáneas de un inquilino (INQUILINO_LIMITE_CONEXIONES)."""
+        limite = get_settings().inquilinos.limite_conexiones
+        if inquilino is None or limite <= 0:
+            yield
+            return
+        semaforo = registro_inquilinos.semaforo(inquilino, limite)
+        espera = self._proveedor_conexion.obtener_opciones_pool()["pool_timeout"]
+        try:
+            await asyncio.wait_for(semaforo.acquire(), timeout=espera)
+        except asyncio.TimeoutError as ex:
+            metricas.incrementar("inquilinos_cupo_agotado_total", inquilino=inquilino)
+            raise ErrorServicioSaturado(
+                f"El inquilino '{inquilino}' alcanzó su límite de conexiones simultáneas.",
+                retry_after=1
+            ) from ex
+        try:
+            yield
+        finally:
+            semaforo.release()
+
+    async def _resolver_esquema(self, esquema: str | None) -> str:
+        """Esquema final: ?esquema= > inquilino de la petición > 'public'. Valida que exista."""
+        esquema_final = (esquema or inquilino_actual() or "public").strip()
+        if not es_nombre_valido(esquema_final):            # Se interpola en el SQL: solo identificadores
+            raise ErrorEsquemaInexistente(f"Nombre de esquema inválido: '{esquema_final}'")
+        config = get_settings().inquilinos
+        if config.validar_esquema and not await registro_inquilinos.existe(
+            esquema_final, self._cargar_esquemas, config.ttl_cache
+        ):
+            raise ErrorEsquemaInexistente(f"El esquema '{esquema_final}' no existe")
+        return esquema_final
+
+    async def _cargar_esquemas(self) -> set[str]:
+        """Lista de esquemas de usuario de la BD (para la caché de inquilinos)."""
+        async with self._conexion() as conn:
+            result = await self._ejecutar(conn, _SQL_ESQUEMAS)
+            return {fila[0] for fila in result.fetchall()}
+
+    def _sentencia(self, esquema: str, clave: Any, construir: Callable[[], Any]) -> Any:
+        """Sentencia text() cacheada por esquema: se arma una vez y se reutiliza."""
+        return registro_inquilinos.sentencia(esquema, clave, construir)
+
+    async def _ejecutar(self, conn: AsyncConnection, sql, parametros: dict[str, Any] | None = None):
+        """Ejecuta una sentencia respetando el plazo de la petición (la cancela si vence)."""
+        plazo = plazo_actual()
+        if plazo is None:                                  # Sin plazo: ejecución directa
+            return await conn.execute(sql, parametros)
+        return await plazo.esperar(conn.execute(sql, parametros))
+
+    async def _ejecutar_crudo(self, conn: AsyncConnection, operacion: Awaitable[Any]) -> Any:
+        """Como _ejecutar(), para llamadas directas al driver asyncpg (COPY, fetch crudo)."""
+        plazo = plazo_actual()
+        try:
+            if plazo is None:
+                return await operacion
+            return await plazo.esperar(operacion)
+        except ErrorPlazoExcedido:
+            raise
+        except Exception as ex:
+            cerrada = (await conn.get_raw_connection()).driver_connection.is_closed()
+            if getattr(ex, "sqlstate", None) is None and not cerrada:
+                raise                                  # Error de uso (argumentos, tipos): no es de la BD
+            if cerrada:
+                await conn.invalidate()                # El pool la descarta: el reintento usa otra
+            raise sa_exc.DBAPIError(None, None, ex, connection_invalidated=cerrada) from ex
+        # Los errores de asyncpg salen envueltos como los de SQLAlchemy: así _conexion()
+        # reconoce el 57014 (statement_timeout → 504) y los de conexión (ErrorBDTransitoria,
+        # circuito) igual que en las consultas normales, y @reintentable puede repetirlos.
+
+    @asynccontextmanager
+    async def _usar_conexion(
+        self, conn: AsyncConnection | None, transaccion: bool = False, esquema: str | None = None
+    ) -> AsyncIterator[AsyncConnection]:
+        """Usa la conexión recibida (operaciones en lote) o presta una nueva del pool."""
+        # Con conn: la operación participa en la transacción de quien la llama
+        # (no hace commit propio). Sin conn: comportamiento de siempre.
+        if conn is not None:
+            yield conn
+        else:
+            async with self._conexion(transaccion, esquema) as nueva:
+                yield nueva
+
     # ================================================================
     # MÉTODOS AUXILIARES — Detección y conversión de tipos
     # ================================================================
 
     async def _detectar_tipo_columna(
-        self, nombre_tabla: str, esquema: str, nombre_columna: str
+        self, nombre_tabla: str, esquema: str, nombre_columna: str,
+        conn: AsyncConnection | None = None
     ) -> str | None:
-        """Consulta information_schema para saber el tipo de una columna."""
+        """Tipo de una columna según information_schema (cacheado por esquema y tabla)."""
+        tipos = await self._tipos_columnas(nombre_tabla, esquema, conn)
+        return tipos.get(nombre_columna)
+
+    async def _tipos_columnas(
+        self, nombre_tabla: str, esquema: str, conn: AsyncConnection | None = None
+    ) -> dict[str, str]:
+        """Tipos de TODAS las columnas de la tabla: {columna: tipo}. Una consulta por TTL."""
+        # Antes se consultaba information_schema por cada columna de cada petición;
+        # con cientos de esquemas eso era la mitad del trabajo de un INSERT.
+        ttl = get_settings().inquilinos.ttl_cache
+        tipos = registro_inquilinos.tipos(esquema, nombre_tabla, ttl)
+        if tipos is not None:
+            return tipos                                   # Acierto: sin ir a la BD
+
         # information_schema.columns: vista del sistema con metadatos de todas las columnas.
-        sql = text("""
-            SELECT data_type, udt_name
-            FROM information_schema.columns
-            WHERE table_schema = :esquema
-            AND table_name = :tabla
-            AND column_name = :columna
-        """)
         # Los :parámetros son seguros (previenen SQL injection).
         try:
-            engine = await self._obtener_engine()
-            async with engine.connect() as conn:           # Obtiene conexión del pool
-                result = await conn.execute(sql, {         # Ejecuta con parámetros seguros
-                    "esquema": esquema, "tabla": nombre_tabla,
-                    "columna": nombre_columna
+            async with self._usar_conexion(conn, esquema=esquema) as conn:  # Del pool (o la recibida)
+                result = await self._ejecutar(conn, _SQL_TIPOS_COLUMNAS, {
+                    "esquema": esquema, "tabla": nombre_tabla
                 })
-                row = result.fetchone()                    # Primera fila del resultado
-                return row[0].lower() if row else None     # Tipo en minúsculas o None
+                tipos = {fila[0]: fila[1].lower() for fila in result.fetchall()}
+        except ErrorDisponibilidad:
+            raise                                          # BD saturada: no ocultarlo como "sin tipo"
         except Exception:
-            return None                                    # Si falla, retorna None (se usará str)
+            return {}                                      # Si falla, sin tipos (se usará str)
+        if tipos:                                          # Tabla inexistente: no se cachea
+            registro_inquilinos.guardar_tipos(esquema, nombre_tabla, tipos)
+        return tipos
+
+    async def _facturas_particionadas(self, esquema: str) -> bool:
+        """True si factura/productosporfactura están particionadas por mes (migración 006)."""
+        # La migración agrega productosporfactura.fechafactura: basta con los tipos
+        # de columnas ya cacheados, sin otra consulta. Los repositorios que leen
+        # facturas la usan para filtrar también por fecha (poda de particiones).
+        return await self._detectar_tipo_columna("productosporfactura", esquema, "fechafactura") is not None
 
     def _convertir_valor(self, valor: str, tipo_destino: str | None) -> Any:
         """Convierte un string al tipo Python que corresponde."""
@@ -128,6 +412,7 @@ class BaseRepositorioPostgreSQL:
     # OPERACIÓN 1: LISTAR (SELECT * LIMIT n)
     # ================================================================
 
+    @reintentable()
     async def _obtener_filas(
         self, nombre_tabla: str, esquema: str | None = None,
         limite: int | None = None
@@ -136,19 +421,18 @@ class BaseRepositorioPostgreSQL:
         if not nombre_tabla or not nombre_tabla.strip():   # Validación: tabla obligatoria
             raise ValueError("El nombre de la tabla no puede estar vacío")
 
-        esquema_final = (esquema or "public").strip()      # Default "public" si es None
+        esquema_final = await self._resolver_esquema(esquema)  # ?esquema= > inquilino > "public"
         limite_final = limite or 1000                      # Default 1000 si es None o 0
 
-        sql = text(
+        sql = self._sentencia(esquema_final, ("listar", nombre_tabla), lambda: text(
             f'SELECT * FROM "{esquema_final}"."{nombre_tabla}" LIMIT :limite'
-        )
+        ))
         # "comillas dobles": sintaxis PostgreSQL para identificadores.
         # :limite es parámetro seguro (previene SQL injection).
 
         try:
-            engine = await self._obtener_engine()          # Pool de conexiones (lazy)
-            async with engine.connect() as conn:           # Obtiene conexión, la libera al salir
-                result = await conn.execute(sql, {"limite": limite_final})  # await: no bloquea
+            async with self._conexion(esquema=esquema_final) as conn:           # Obtiene conexión del pool, la libera al salir
+                result = await self._ejecutar(conn, sql, {"limite": limite_final})  # await: no bloquea
                 columnas = result.keys()                   # ["codigo", "nombre", "stock", ...]
                 return [
                     {col: self._serializar_valor(row[i])   # Serializa cada valor para JSON
@@ -156,16 +440,54 @@ class BaseRepositorioPostgreSQL:
                     for row in result.fetchall()            # List comprehension de todas las filas
                 ]
                 # Cada fila tupla → diccionario: ("PR001", "Laptop", 20) → {"codigo": "PR001", ...}
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
         except Exception as ex:
             raise RuntimeError(
                 f"Error PostgreSQL al consultar "
                 f"'{esquema_final}.{nombre_tabla}': {ex}"
             ) from ex                                      # "from ex" conserva error original
 
+    # ================================================================
+    # OPERACIÓN 1b: LISTAR EN COLUMNAS (para formatos columnares)
+    # ================================================================
+
+    @reintentable()
+    async def _obtener_columnas(
+        self, nombre_tabla: str, esquema: str | None = None,
+        limite: int | None = None
+    ) -> tuple[list[str], list[tuple]]:
+        """Obtiene (nombres de columnas, filas como tuplas) SIN convertir a dict ni serializar."""
+        # Para Arrow/MessagePack: los valores quedan con su tipo nativo (Decimal, datetime...)
+        # y el codificador arma las columnas directamente, sin un dict por fila.
+        # limite=None → toda la tabla (exportaciones).
+        if not nombre_tabla or not nombre_tabla.strip():
+            raise ValueError("El nombre de la tabla no puede estar vacío")
+
+        esquema_final = await self._resolver_esquema(esquema)
+        clausula_limite = " LIMIT :limite" if limite else ""
+        sql = self._sentencia(esquema_final, ("columnas", nombre_tabla, clausula_limite), lambda: text(
+            f'SELECT * FROM "{esquema_final}"."{nombre_tabla}"{clausula_limite}'
+        ))
+        parametros = {"limite": limite} if limite else {}
+
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                result = await self._ejecutar(conn, sql, parametros)
+                return list(result.keys()), [tuple(row) for row in result.fetchall()]
+        except ErrorDisponibilidad:
+            raise
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al consultar "
+                f"'{esquema_final}.{nombre_tabla}': {ex}"
+            ) from ex
+
     # ================================================================
     # OPERACIÓN 2: BUSCAR POR CLAVE (SELECT * WHERE clave = valor)
     # ================================================================
 
+    @reintentable()
     async def _obtener_por_clave(
         self, nombre_tabla: str, nombre_clave: str, valor: str,
         esquema: str | None = None
@@ -178,7 +500,7 @@ class BaseRepositorioPostgreSQL:
         if not valor or not valor.strip():                 # valor: valor a buscar (ej: "PR001")
             raise ValueError("El valor no puede estar vacío")
 
-        esquema_final = (esquema or "public").strip()
+        esquema_final = await self._resolver_esquema(esquema)
 
         try:
             tipo_columna = await self._detectar_tipo_columna(  # Consulta metadatos de la BD
@@ -189,23 +511,22 @@ class BaseRepositorioPostgreSQL:
             if (tipo_columna in ('timestamp without time zone',
                                  'timestamp with time zone')
                     and self._es_fecha_sin_hora(valor)):
-                sql = text(f'''
+                sql = self._sentencia(esquema_final, ("filtrar_fecha", nombre_tabla, nombre_clave), lambda: text(f'''
                     SELECT * FROM "{esquema_final}"."{nombre_tabla}"
                     WHERE CAST("{nombre_clave}" AS DATE) = :valor
-                ''')
+                '''))
                 valor_convertido = self._extraer_solo_fecha(valor)
             else:
                 # Caso normal: WHERE "columna" = :valor
-                sql = text(f'''
+                sql = self._sentencia(esquema_final, ("filtrar", nombre_tabla, nombre_clave), lambda: text(f'''
                     SELECT * FROM "{esquema_final}"."{nombre_tabla}"
                     WHERE "{nombre_clave}" = :valor
-                ''')
+                '''))
                 valor_convertido = self._convertir_valor(valor, tipo_columna)
 
-            engine = await self._obtener_engine()
-            async with engine.connect() as conn:
-                result = await conn.execute(
-                    sql, {"valor": valor_convertido}       # Parámetro seguro
+            async with self._conexion(esquema=esquema_final) as conn:
+                result = await self._ejecutar(
+                    conn, sql, {"valor": valor_convertido}  # Parámetro seguro
                 )
                 columnas = result.keys()
                 return [
@@ -213,6 +534,8 @@ class BaseRepositorioPostgreSQL:
                      for i, col in enumerate(columnas)}
                     for row in result.fetchall()
                 ]
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
         except Exception as ex:
             raise RuntimeError(
                 f"Error PostgreSQL al filtrar "
@@ -223,27 +546,30 @@ class BaseRepositorioPostgreSQL:
     # OPERACIÓN 3: CREAR (INSERT INTO tabla VALUES (...))
     # ================================================================
 
+    @reintentable(idempotente=False)
     async def _crear(
         self, nombre_tabla: str, datos: dict[str, Any],
-        esquema: str | None = None
+        esquema: str | None = None, conn: AsyncConnection | None = None
     ) -> bool:
-        """Inserta una nueva fila en la tabla."""
+        """Inserta una nueva fila en la tabla. Con conn, participa en esa transacción."""
         if not nombre_tabla or not nombre_tabla.strip():
             raise ValueError("El nombre de la tabla no puede estar vacío")
         if not datos:                                      # dict vacío o None
             raise ValueError("Los datos no pueden estar vacíos")
 
-        esquema_final = (esquema or "public").strip()
+        esquema_final = esquema if conn is not None else await self._resolver_esquema(esquema)
+        # Con conn (lote) el esquema llega ya resuelto: validarlo aquí podría pedir
+        # OTRA conexión del pool (caché de esquemas vencida) con la del lote tomada.
         datos_finales = dict(datos)                        # Copia para no modificar el original
 
         columnas = ", ".join(f'"{k}"' for k in datos_finales.keys())
         # → '"codigo", "nombre", "stock", "valorunitario"'
         parametros = ", ".join(f":{k}" for k in datos_finales.keys())
         # → ':codigo, :nombre, :stock, :valorunitario'
-        sql = text(
+        sql = self._sentencia(esquema_final, ("crear", nombre_tabla, tuple(datos_finales)), lambda: text(
             f'INSERT INTO "{esquema_final}"."{nombre_tabla}" '
             f'({columnas}) VALUES ({parametros})'
-        )
+        ))
         # SQL final: INSERT INTO "public"."producto" ("codigo", ...) VALUES (:codigo, ...)
 
         try:
@@ -251,17 +577,18 @@ class BaseRepositorioPostgreSQL:
             for key, val in datos_finales.items():
                 if val is not None and isinstance(val, str):  # Solo convierte strings
                     tipo = await self._detectar_tipo_columna(
-                        nombre_tabla, esquema_final, key
+                        nombre_tabla, esquema_final, key, conn
                     )
                     valores[key] = self._convertir_valor(val, tipo)  # "20" → int(20)
                 else:
                     valores[key] = val                     # Ya es int/float: sin conversión
 
-            engine = await self._obtener_engine()
-            async with engine.begin() as conn:             # begin(): TRANSACCIÓN automática
+            async with self._usar_conexion(conn, transaccion=True, esquema=esquema_final) as conn:  # TRANSACCIÓN automática
                                                            # Commit si éxito, rollback si error
-                result = await conn.execute(sql, valores)
+                result = await self._ejecutar(conn, sql, valores)
                 return result.rowcount > 0                 # True si insertó al menos 1 fila
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
         except Exception as ex:
             raise RuntimeError(
                 f"Error PostgreSQL al insertar en "
@@ -272,11 +599,13 @@ class BaseRepositorioPostgreSQL:
     # OPERACIÓN 4: ACTUALIZAR (UPDATE tabla SET ... WHERE ...)
     # ================================================================
 
+    @reintentable(idempotente=False)
     async def _actualizar(
         self, nombre_tabla: str, nombre_clave: str, valor_clave: str,
-        datos: dict[str, Any], esquema: str | None = None
+        datos: dict[str, Any], esquema: str | None = None,
+        conn: AsyncConnection | None = None
     ) -> int:
-        """Actualiza filas. Retorna filas afectadas."""
+        """Actualiza filas. Retorna filas afectadas. Con conn, participa en esa transacción."""
         if not nombre_tabla or not nombre_tabla.strip():
             raise ValueError("El nombre de la tabla no puede estar vacío")
         if not nombre_clave or not nombre_clave.strip():
@@ -286,18 +615,23 @@ class BaseRepositorioPostgreSQL:
         if not datos:
             raise ValueError("Los datos no pueden estar vacíos")
 
-        esquema_final = (esquema or "public").strip()
+        esquema_final = esquema if conn is not None else await self._resolver_esquema(esquema)
+        # Con conn (lote) el esquema llega ya resuelto: validarlo aquí podría pedir
+        # OTRA conexión del pool (caché de esquemas vencida) con la del lote tomada.
         datos_finales = dict(datos)                        # Copia del diccionario
 
         clausula_set = ", ".join(
             f'"{k}" = :{k}' for k in datos_finales.keys()
         )
         # → '"nombre" = :nombre, "stock" = :stock'
-        sql = text(f'''
-            UPDATE "{esquema_final}"."{nombre_tabla}"
-            SET {clausula_set}
-            WHERE "{nombre_clave}" = :valor_clave
-        ''')
+        sql = self._sentencia(
+            esquema_final, ("actualizar", nombre_tabla, nombre_clave, tuple(datos_finales)),
+            lambda: text(f'''
+                UPDATE "{esquema_final}"."{nombre_tabla}"
+                SET {clausula_set}
+                WHERE "{nombre_clave}" = :valor_clave
+            ''')
+        )
         # :valor_clave es nombre fijo para no confundirse con los campos del SET.
 
         try:
@@ -305,38 +639,125 @@ class BaseRepositorioPostgreSQL:
             for key, val in datos_finales.items():         # Conversión de tipos para SET
                 if val is not None and isinstance(val, str):
                     tipo = await self._detectar_tipo_columna(
-                        nombre_tabla, esquema_final, key
+                        nombre_tabla, esquema_final, key, conn
                     )
                     valores[key] = self._convertir_valor(val, tipo)
                 else:
                     valores[key] = val
 
             tipo_clave = await self._detectar_tipo_columna(  # También convierte la PK
-                nombre_tabla, esquema_final, nombre_clave
+                nombre_tabla, esquema_final, nombre_clave, conn
             )
             valores["valor_clave"] = self._convertir_valor(
                 valor_clave, tipo_clave
             )
 
-            engine = await self._obtener_engine()
-            async with engine.begin() as conn:             # Transacción automática
-                result = await conn.execute(sql, valores)
+            async with self._usar_conexion(conn, transaccion=True, esquema=esquema_final) as conn:  # Transacción automática
+                result = await self._ejecutar(conn, sql, valores)
                 return result.rowcount                     # Filas afectadas (0 o 1)
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al actualizar "
+                f"'{esquema_final}.{nombre_tabla}': {ex}"
+            ) from ex
+
+    # ================================================================
+    # OPERACIÓN 4b: ACTUALIZAR PARCIAL (solo columnas enviadas y cambiadas)
+    # ================================================================
+
+    @reintentable()
+    async def _actualizar_parcial(
+        self, nombre_tabla: str, nombre_clave: str, valor_clave: str,
+        datos: dict[str, Any], esquema: str | None = None, retornar: bool = False
+    ) -> dict[str, Any] | None:
+        """UPDATE solo si algún valor cambia. None si la fila no existe.
+
+        Retorna {"filasAfectadas": 0 | 1, "fila": {...} | None}; "fila" (la
+        versión final, cambiada o no) solo con retornar=True.
+        """
+        if not nombre_tabla or not nombre_tabla.strip():
+            raise ValueError("El nombre de la tabla no puede estar vacío")
+        if not nombre_clave or not nombre_clave.strip():
+            raise ValueError("El nombre de la clave no puede estar vacío")
+        if not valor_clave or not valor_clave.strip():
+            raise ValueError("El valor de la clave no puede estar vacío")
+        if not datos:
+            raise ValueError("Los datos no pueden estar vacíos")
+
+        esquema_final = await self._resolver_esquema(esquema)
+        columnas = tuple(datos)
+        clausula_set = ", ".join(f'"{k}" = :{k}' for k in columnas)
+        distintos = " OR ".join(f'"{k}" IS DISTINCT FROM :{k}' for k in columnas)
+        # → '"stock" IS DISTINCT FROM :stock OR "nombre" IS DISTINCT FROM :nombre'
+        salida = "*" if retornar else "1"
+        sql = self._sentencia(
+            esquema_final, ("actualizar_parcial", nombre_tabla, nombre_clave, columnas, retornar),
+            lambda: text(f'''
+                WITH cambiada AS (
+                    UPDATE "{esquema_final}"."{nombre_tabla}"
+                    SET {clausula_set}
+                    WHERE "{nombre_clave}" = :valor_clave AND ({distintos})
+                    RETURNING {salida}
+                )
+                SELECT true AS cambiada, {salida} FROM cambiada
+                UNION ALL
+                SELECT false, {salida} FROM "{esquema_final}"."{nombre_tabla}"
+                WHERE "{nombre_clave}" = :valor_clave AND NOT EXISTS (SELECT 1 FROM cambiada)
+            ''')
+        )
+        # Una sola ida a la BD distingue los tres casos:
+        # - (true, ...): había algo distinto → se escribió la fila nueva.
+        # - (false, ...): existe pero ya tenía esos valores → NO se escribe nada:
+        #   sin versión nueva de la fila, sin WAL y sin disparar triggers (NOTIFY).
+        # - sin filas: no existe (404).
+        # Las columnas no enviadas no se tocan: si ninguna indexada cambia,
+        # PostgreSQL puede hacer un HOT update (sin tocar los índices).
+
+        try:
+            valores = {}
+            for key, val in datos.items():                 # Misma conversión que _actualizar()
+                if val is not None and isinstance(val, str):
+                    tipo = await self._detectar_tipo_columna(nombre_tabla, esquema_final, key)
+                    valores[key] = self._convertir_valor(val, tipo)
+                else:
+                    valores[key] = val
+            tipo_clave = await self._detectar_tipo_columna(nombre_tabla, esquema_final, nombre_clave)
+            valores["valor_clave"] = self._convertir_valor(valor_clave, tipo_clave)
+
+            async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+                result = await self._ejecutar(conn, sql, valores)
+                nombres = list(result.keys())[1:]          # Sin la columna "cambiada"
+                fila = result.fetchone()
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
         except Exception as ex:
             raise RuntimeError(
                 f"Error PostgreSQL al actualizar "
                 f"'{esquema_final}.{nombre_tabla}': {ex}"
             ) from ex
 
+        if fila is None:
+            return None
+        return {
+            "filasAfectadas": 1 if fila[0] else 0,
+            "fila": ({col: self._serializar_valor(fila[i + 1]) for i, col in enumerate(nombres)}
+                     if retornar else None),
+        }
+    # Reintentable aunque escribe: los valores son absolutos (no "stock + 1") y
+    # repetirla tras un corte a mitad del COMMIT solo encuentra "sin cambios".
+
     # ================================================================
     # OPERACIÓN 5: ELIMINAR (DELETE FROM tabla WHERE ...)
     # ================================================================
 
+    @reintentable(idempotente=False)
     async def _eliminar(
         self, nombre_tabla: str, nombre_clave: str, valor_clave: str,
-        esquema: str | None = None
+        esquema: str | None = None, conn: AsyncConnection | None = None
     ) -> int:
-        """Elimina filas. Retorna filas eliminadas."""
+        """Elimina filas. Retorna filas eliminadas. Con conn, participa en esa transacción."""
         if not nombre_tabla or not nombre_tabla.strip():
             raise ValueError("El nombre de la tabla no puede estar vacío")
         if not nombre_clave or not nombre_clave.strip():
@@ -344,29 +765,151 @@ class BaseRepositorioPostgreSQL:
         if not valor_clave or not valor_clave.strip():
             raise ValueError("El valor de la clave no puede estar vacío")
 
-        esquema_final = (esquema or "public").strip()
+        esquema_final = esquema if conn is not None else await self._resolver_esquema(esquema)
+        # Con conn (lote) el esquema llega ya resuelto: validarlo aquí podría pedir
+        # OTRA conexión del pool (caché de esquemas vencida) con la del lote tomada.
 
-        sql = text(f'''
+        sql = self._sentencia(esquema_final, ("eliminar", nombre_tabla, nombre_clave), lambda: text(f'''
             DELETE FROM "{esquema_final}"."{nombre_tabla}"
             WHERE "{nombre_clave}" = :valor_clave
-        ''')
+        '''))
 
         try:
             tipo_clave = await self._detectar_tipo_columna(  # Detecta tipo de la PK
-                nombre_tabla, esquema_final, nombre_clave
+                nombre_tabla, esquema_final, nombre_clave, conn
             )
             valor_convertido = self._convertir_valor(        # Convierte al tipo correcto
                 valor_clave, tipo_clave
             )
 
-            engine = await self._obtener_engine()
-            async with engine.begin() as conn:             # Transacción automática
-                result = await conn.execute(
-                    sql, {"valor_clave": valor_convertido}
+            async with self._usar_conexion(conn, transaccion=True, esquema=esquema_final) as conn:  # Transacción automática
+                result = await self._ejecutar(
+                    conn, sql, {"valor_clave": valor_convertido}
                 )
                 return result.rowcount                     # Filas eliminadas (0 o 1)
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
         except Exception as ex:
             raise RuntimeError(
                 f"Error PostgreSQL al eliminar de "
                 f"'{esquema_final}.{nombre_tabla}': {ex}"
             ) from ex
+
+    # ================================================================
+    # OPERACIÓN 6: LOTE (varias operaciones en UNA transacción)
+    # ================================================================
+
+    @reintentable(idempotente=False)
+    async def _ejecutar_lote(
+        self, operaciones: list[dict[str, Any]],
+        aplicar: Callable[[dict[str, Any], AsyncConnection, str], Awaitable[int]],
+        todo_o_nada: bool = True, esquema: str | None = None
+    ) -> dict[str, Any]:
+        """Ejecuta operaciones en orden sobre una sola conexión y una sola transacción."""
+        # aplicar(operacion, conn, esquema_final) ejecuta UNA operación y retorna las filas afectadas.
+        # todo_o_nada=True  → el primer error revierte TODO el lote (ROLLBACK).
+        # todo_o_nada=False → cada operación va en un SAVEPOINT: si falla, se revierte
+        #                     solo esa y el resto se confirma con un único COMMIT.
+        esquema_final = await self._resolver_esquema(esquema)
+        # Una sola vez y ANTES de tomar la conexión: resolverlo por operación, con la
+        # caché vencida, pedía una segunda conexión sosteniendo la primera (pool agotado → 503).
+        resultados: list[dict[str, Any]] = []
+        confirmado = True
+        try:
+            async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+                for indice, operacion in enumerate(operaciones):
+                    resultado = {
+                        "indice": indice,
+                        "operacion": operacion.get("operacion"),
+                        "codigo": operacion.get("codigo"),
+                    }
+                    resultados.append(resultado)
+                    punto = None if todo_o_nada else await conn.begin_nested()  # SAVEPOINT
+                    try:
+                        filas = await aplicar(operacion, conn, esquema_final)
+                    except ErrorDisponibilidad:
+                        raise                              # Plazo/pool: se aborta el lote entero
+                    except Exception as ex:
+                        resultado.update(estado="error", error=str(ex))
+                        if todo_o_nada:
+                            raise _LoteRevertido() from ex # Sale del "async with" → ROLLBACK
+                        await punto.rollback()             # ROLLBACK TO SAVEPOINT
+                        continue
+                    if punto is not None:
+                        await punto.commit()               # RELEASE SAVEPOINT
+                    resultado.update(estado="ok", filasAfectadas=filas)
+        except _LoteRevertido:
+            confirmado = False
+            for resultado in resultados:
+                if resultado["estado"] == "ok":
+                    resultado["estado"] = "revertida"      # Se ejecutó, pero el ROLLBACK la deshizo
+            for indice in range(len(resultados), len(operaciones)):
+                resultados.append({
+                    "indice": indice,
+                    "operacion": operaciones[indice].get("operacion"),
+                    "codigo": operaciones[indice].get("codigo"),
+                    "estado": "omitida",                   # No se llegó a ejecutar
+                })
+
+        return {
+            "confirmado": confirmado,
+            "exitosas": sum(1 for r in resultados if r["estado"] == "ok"),
+            "fallidas": sum(1 for r in resultados if r["estado"] == "error"),
+            "resultados": resultados,
+        }
+
+    # ================================================================
+    # OPERACIÓN 7: PROCEDIMIENTO ALMACENADO (CALL sp_...(..., p_resultado))
+    # ================================================================
+
+    @reintentable(idempotente=False)
+    async def _llamar_procedimiento(
+        self, nombre: str, argumentos: list[Any], esquema: str | None = None
+    ) -> dict[str, Any]:
+        """Ejecuta un procedimiento JSON-in/JSON-out y retorna su p_resultado como dict."""
+        # Convención de los sp_* del esquema (operaciones maestro-detalle):
+        #   CALL sp_x(IN clave/JSON..., INOUT p_resultado JSON) → {"exito": bool, ...}
+        # La operación compuesta (maestro + N detalles) es UNA sentencia: sin
+        # idas y vueltas por cada detalle ni transacción abierta entre ellas.
+        # dict/list → CAST(:pN AS json); str/int → parámetro tal cual.
+        # nombre: constante del repositorio (se interpola), nunca entrada del usuario.
+        esquema_final = await self._resolver_esquema(esquema)
+        es_json = tuple(isinstance(a, (dict, list)) for a in argumentos)
+        marcadores = "".join(
+            f"CAST(:p{i} AS json), " if json_ else f":p{i}, " for i, json_ in enumerate(es_json)
+        )
+        sql = self._sentencia(esquema_final, ("procedimiento", nombre, es_json), lambda: text(
+            f"CALL {nombre}({marcadores}NULL)"
+        ))
+        # Sin esquema en el nombre: el search_path lo resuelve (copia del inquilino si la
+        # tiene, si no public) y las tablas SIN esquema del cuerpo caen en el esquema pedido.
+        # El texto se arma una vez por esquema; asyncpg lo prepara una vez por conexión.
+        parametros = {
+            f"p{i}": json.dumps(a, default=str) if json_ else a
+            for i, (a, json_) in enumerate(zip(argumentos, es_json))
+        }
+
+        try:
+            async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+                fila = (await self._ejecutar(conn, sql, parametros)).first()
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al ejecutar '{esquema_final}.{nombre}': {ex}"
+            ) from ex
+
+        resultado = fila[0] if fila is not None else None
+        if isinstance(resultado, str):                     # json sin codec: llega como texto
+            resultado = json.loads(resultado)
+        if not isinstance(resultado, dict):
+            raise RuntimeError(f"'{nombre}' no devolvió p_resultado.")
+        metricas.incrementar("procedimientos_total", procedimiento=nombre,
+                             exito=str(bool(resultado.get("exito"))).lower())
+        return resultado
+        # Con exito=false el procedimiento ya deshizo su trabajo (bloque EXCEPTION):
+        # el COMMIT no confirma nada. Interpretar el error es tarea del servicio.
+
+
+class _LoteRevertido(Exception):
+    """Señal interna: una operación falló en un lote todo-o-nada."""
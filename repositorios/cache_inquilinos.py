@@ -0,0 +1,109 @@
+"""
+cache_inquilinos.py — Cachés por inquilino (esquema) compartidas por el proceso.
+
+Cada petición crea un repositorio nuevo, así que lo que deba sobrevivir
+entre peticiones vive aquí, a nivel de módulo:
+
+- Lista de esquemas existentes (para validar el inquilino sin consultar
+  pg_namespace en cada petición).
+- Tipos de columnas por (esquema, tabla): reemplaza la consulta a
+  information_schema que antes se hacía por CADA columna de CADA petición.
+- Sentencias SQL ya construidas por (esquema, clave): evita rearmar el
+  texto y el objeto text() en cada petición.
+- Semáforo de conexiones por inquilino: un inquilino ruidoso no puede
+  ocupar más de INQUILINO_LIMITE_CONEXIONES conexiones del pool.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from servicios.metricas import metricas
+
+
+class CacheInquilino:
+    """Metadatos y sentencias de UN esquema."""
+
+    def __init__(self):
+        self.tipos: dict[str, tuple[float, dict[str, str]]] = {}  # tabla → (momento, {columna: tipo})
+        self.sentencias: dict[Any, Any] = {}                        # clave → text() ya construido
+        self.semaforo: asyncio.Semaphore | None = None
+
+
+class RegistroInquilinos:
+    """Cachés de todos los inquilinos + lista de esquemas válidos."""
+
+    def __init__(self):
+        self._caches: dict[str, CacheInquilino] = {}
+        self._esquemas: frozenset[str] = frozenset()
+        self._cargados_en = 0.0                    # time.monotonic() de la última carga
+        self._candado = asyncio.Lock()
+
+    def cache(self, esquema: str) -> CacheInquilino:
+        """Caché del esquema (se crea la primera vez)."""
+        # Solo se llama con esquemas que ya pasaron existe() (_resolver_esquema): un
+        # nombre inventado en el header no crea entradas, el dict no crece sin límite.
+        # Con INQUILINO_VALIDAR_ESQUEMA=False esa garantía la da el operador.
+        cache = self._caches.get(esquema)
+        if cache is None:
+            cache = self._caches[esquema] = CacheInquilino()
+        return cache
+
+    # ── Lista de esquemas ────────────────────────────────────────────
+
+    async def existe(self, esquema: str, cargar: Callable[[], Awaitable[set[str]]],
+                     ttl: float) -> bool:
+        """True si el esquema existe. Recarga la lista si venció el TTL o si el esquema es desconocido."""
+        edad = time.monotonic() - self._cargados_en
+        if esquema in self._esquemas and edad < ttl:
+            return True                            # Camino rápido: sin consultar la BD
+        if edad < 1.0:
+            return esquema in self._esquemas       # Recién recargada: no martillar pg_namespace
+        async with self._candado:                  # Una sola recarga aunque lleguen 100 peticiones
+            if time.monotonic() - self._cargados_en >= 1.0:
+                self._esquemas = frozenset(await cargar())
+                self._cargados_en = time.monotonic()
+                metricas.incrementar("inquilinos_recargas_esquemas_total")
+        return esquema in self._esquemas
+
+    # ── Tipos de columnas ────────────────────────────────────────────
+
+    def tipos(self, esquema: str, tabla: str, ttl: float) -> dict[str, str] | None:
+        """Tipos cacheados de la tabla, o None si no están o vencieron."""
+        entrada = self.cache(esquema).tipos.get(tabla)
+        if entrada is None or time.monotonic() - entrada[0] >= ttl:
+            metricas.incrementar("inquilinos_cache_tipos_total", resultado="fallo")
+            return None
+        metricas.incrementar("inquilinos_cache_tipos_total", resultado="acierto")
+        return entrada[1]
+
+    def guardar_tipos(self, esquema: str, tabla: str, tipos: dict[str, str]) -> None:
+        self.cache(esquema).tipos[tabla] = (time.monotonic(), tipos)
+
+    # ── Sentencias ───────────────────────────────────────────────────
+
+    def sentencia(self, esquema: str, clave: Any, construir: Callable[[], Any]) -> Any:
+        """Sentencia cacheada por (esquema, clave); la construye la primera vez."""
+        sentencias = self.cache(esquema).sentencias
+        sql = sentencias.get(clave)
+        if sql is None:
+            sql = sentencias[clave] = construir()
+        return sql
+
+    # ── Límite de conexiones por inquilino ───────────────────────────
+
+    def semaforo(self, esquema: str, limite: int) -> asyncio.Semaphore:
+        cache = self.cache(esquema)
+        if cache.semaforo is None:
+            cache.semaforo = asyncio.Semaphore(limite)
+        return cache.semaforo
+
+    def limpiar(self) -> None:
+        """Olvida todo (útil tras migraciones de esquema)."""
+        self._caches.clear()
+        self._esquemas = frozenset()
+        self._cargados_en = 0.0
+
+
+registro_inquilinos = RegistroInquilinos()
+# Instancia única del proceso, compartida por todos los repositorios.
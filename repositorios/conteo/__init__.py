@@ -0,0 +1,9 @@
+"""
+Repositorio de conteo de filas (exacto, estimado por el planificador o mantenido por triggers).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.conteo import RepositorioConteoPostgreSQL
+"""
+
+from .repositorio_conteo_postgresql import RepositorioConteoPostgreSQL
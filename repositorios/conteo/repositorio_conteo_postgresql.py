@@ -0,0 +1,154 @@
+"""Repositorio de conteo de filas para PostgreSQL: exacto, estimado o mantenido."""
+# COUNT(*) recorre la tabla (o el índice) completa: con millones de facturas
+# y líneas son segundos por petición. Tres formas de obtener el total:
+# - exacto:    SELECT count(*) (con filtro si lo hay). Cuesta lo que mide la tabla.
+# - estimado:  lo que cree el planificador. Tabla completa: pg_class.reltuples
+#              escalado al tamaño actual del archivo (lo mismo que hace el
+#              planificador); con filtro o sin estadísticas: "Plan Rows" de EXPLAIN.
+#              Sin leer filas: microsegundos, error típico de unos pocos %.
+# - mantenido: sum(delta) de public.conteo_filas (triggers de la migración 005).
+#              Exacto y sin recorrer la tabla; solo tabla completa.
+
+import logging
+from typing import Any
+
+from sqlalchemy import text
+
+from config import get_settings
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from repositorios.resiliencia import reintentable
+from servicios.excepciones import ErrorDisponibilidad
+
+
+_log = logging.getLogger(__name__)
+
+FILTROS: dict[tuple[str, str], str] = {
+    ("producto", "nombre_prefijo"): """lower("nombre") LIKE :patron ESCAPE '\\'""",
+}
+# Condiciones permitidas (tabla, nombre) → SQL con :parámetros. Se interpolan:
+# NUNCA vienen del cliente; el servicio solo elige una de estas claves.
+
+_SQL_ESTIMADO = text("""
+    WITH hojas AS (
+        SELECT c.reltuples, c.relpages, pg_relation_size(c.oid) AS bytes
+        FROM pg_partition_tree(to_regclass(:nombre)) t
+        JOIN pg_class c ON c.oid = t.relid
+        WHERE t.isleaf
+    )
+    SELECT CASE WHEN bool_and(bytes = 0 OR (relpages > 0 AND reltuples >= 0))
+                THEN sum(CASE WHEN bytes = 0 THEN 0
+                              ELSE reltuples / relpages * (bytes / current_setting('block_size')::int)
+                         END)
+           END::bigint
+    FROM hojas
+""")
+# Filas por página (del último ANALYZE) × páginas actuales: sigue el crecimiento
+# de la tabla entre ANALYZE y ANALYZE. Particionada (migración 006): la suma de
+# cada partición (pg_partition_tree; sin particiones, la tabla misma). NULL si
+# alguna con datos nunca se analizó: entonces decide EXPLAIN.
+
+_SQL_MANTENIDO = text("""
+    SELECT sum(delta)::bigint, count(*)
+    FROM public.conteo_filas
+    WHERE esquema = :esquema AND tabla = :tabla
+""")
+
+_SQL_COMPACTAR = text("""
+    WITH borradas AS (
+        DELETE FROM public.conteo_filas
+        WHERE esquema = :esquema AND tabla = :tabla
+        RETURNING delta
+    )
+    INSERT INTO public.conteo_filas (esquema, tabla, delta)
+    SELECT :esquema, :tabla, sum(delta) FROM borradas
+    HAVING count(*) > 0
+""")
+# Junta los deltas en uno. Los que otra transacción agregue mientras tanto no
+# están en la foto del DELETE: quedan aparte y la suma sigue siendo correcta.
+# HAVING: si otro worker compactó a la vez, el DELETE no encuentra filas y
+# sum(delta) sería NULL (viola NOT NULL); así no se inserta nada.
+
+
+class RepositorioConteoPostgreSQL(BaseRepositorioPostgreSQL):
+    """Totales de filas sin (o con) recorrer la tabla."""
+
+    def _condicion(self, tabla: str, filtro: str | None) -> str:
+        if filtro is None:
+            return ""
+        condicion = FILTROS.get((tabla, filtro))
+        if condicion is None:
+            raise ValueError(f"Filtro de conteo desconocido para '{tabla}': '{filtro}'.")
+        return f" WHERE {condicion}"
+
+    # ── EXACTO ───────────────────────────────────────────────────────
+    @reintentable()
+    async def contar_exacto(self, tabla: str, esquema: str | None = None, filtro: str | None = None,
+                            parametros: dict[str, Any] | None = None) -> int:
+        """SELECT count(*) con el filtro indicado."""
+        esquema_final = await self._resolver_esquema(esquema)
+        condicion = self._condicion(tabla, filtro)
+        sql = self._sentencia(esquema_final, ("contar", tabla, filtro), lambda: text(
+            f'SELECT count(*) FROM "{esquema_final}"."{tabla}"{condicion}'
+        ))
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                return (await self._ejecutar(conn, sql, parametros or {})).scalar()
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al contar '{esquema_final}.{tabla}': {ex}"
+            ) from ex
+
+    # ── ESTIMADO ─────────────────────────────────────────────────────
+    @reintentable()
+    async def estimar(self, tabla: str, esquema: str | None = None, filtro: str | None = None,
+                      parametros: dict[str, Any] | None = None) -> int:
+        """Filas según las estadísticas del planificador (no lee la tabla)."""
+        esquema_final = await self._resolver_esquema(esquema)
+        condicion = self._condicion(tabla, filtro)
+        sql = self._sentencia(esquema_final, ("estimar", tabla, filtro), lambda: text(
+            f'EXPLAIN (FORMAT JSON) SELECT 1 FROM "{esquema_final}"."{tabla}"{condicion}'
+        ))
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                if filtro is None:
+                    filas = (await self._ejecutar(conn, _SQL_ESTIMADO, {
+                        "nombre": f'"{esquema_final}"."{tabla}"'
+                    })).scalar()
+                    if filas is not None:
+                        return max(filas, 0)
+                plan = (await self._ejecutar(conn, sql, parametros or {})).scalar()
+        except ErrorDisponibilidad:
+            raise
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al estimar '{esquema_final}.{tabla}': {ex}"
+            ) from ex
+        return int(plan[0]["Plan"]["Plan Rows"])
+        # EXPLAIN sin ANALYZE solo planifica: con filtro, el planificador usa el
+        # histograma y los valores frecuentes de la columna (pg_stats).
+
+    # ── MANTENIDO ────────────────────────────────────────────────────
+    @reintentable()
+    async def contar_mantenido(self, tabla: str, esquema: str | None = None) -> int | None:
+        """sum(delta) de public.conteo_filas, o None si la tabla no tiene contador instalado."""
+        esquema_final = await self._resolver_esquema(esquema)
+        claves = {"esquema": esquema_final, "tabla": tabla}
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                filas, deltas = (await self._ejecutar(conn, _SQL_MANTENIDO, claves)).one()
+        except ErrorDisponibilidad:
+            raise
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al leer el conteo de '{esquema_final}.{tabla}' "
+                f"(¿migración 005 aplicada?): {ex}"
+            ) from ex
+        if deltas > get_settings().conteo.compactar_desde:
+            try:
+                async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+                    await self._ejecutar(conn, _SQL_COMPACTAR, claves)
+            except Exception as ex:                        # El total ya se leyó: compactar es opcional
+                _log.warning("No se pudo compactar el conteo de '%s.%s' (%s)", esquema_final, tabla, ex)
+        return filas if deltas else None
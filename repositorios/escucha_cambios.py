@@ -0,0 +1,174 @@
+"""
+escucha_cambios.py — Conexión LISTEN compartida por todo el worker.
+
+El trigger de producto (database/migraciones/) publica cada cambio con
+NOTIFY. Un worker abre UNA sola conexión dedicada (fuera del pool) que
+escucha el canal y reparte cada evento a sus consumidores:
+
+- CatalogoProducto: réplica en memoria de producto.
+- DifusionCambiosProducto: stream SSE/WebSocket para terminales.
+- PermisosRutas: matriz rol → ruta de la autorización (canal propio).
+
+Mil suscriptores del stream no abren mil conexiones: la fan-out se hace
+en el proceso.
+
+Contrato de un consumidor (duck typing):
+    al_conectar()                 → antes del LISTEN (empezar a acumular eventos)
+    async sincronizar(conexion)   → después del LISTEN (carga completa, etc.)
+    al_notificar(evento: dict)    → cada NOTIFY, ya decodificado
+    al_desconectar()              → se perdió la conexión (datos posiblemente atrasados)
+    canal (atributo opcional)     → canal que escucha; sin él, CAMBIOS_CANAL (producto)
+
+Varios canales comparten la MISMA conexión: un LISTEN por canal.
+
+La conexión se confirma viva con SELECT 1 cada desfase_maximo/3 segundos;
+vigente() indica si la última confirmación está dentro del desfase máximo.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import suppress
+from decimal import Decimal
+from typing import Any
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+_SQL_TRIGGER = """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'trigger_notificar_cambio_producto' AND NOT tgisinternal
+    )
+"""
+
+
+def dsn_asyncpg(cadena: str) -> str:
+    """Convierte la cadena de SQLAlchemy (postgresql+asyncpg://...) a un DSN de asyncpg."""
+    return make_url(cadena).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class EscuchaCambios:
+    """Conexión dedicada con LISTEN + reparto de eventos a los consumidores."""
+
+    def __init__(self):
+        self._consumidores: list[Any] = []
+        self._conectado = False
+        self._confirmado_en = 0.0                      # time.monotonic() de la última confirmación
+        self._desfase_maximo = 0.0
+        self._tarea: asyncio.Task | None = None
+        self._resincronizar = False
+        self._por_canal: dict[str, list[Any]] = {}
+        self.reconexiones = 0
+
+    def registrar(self, consumidor: Any) -> None:
+        """Agrega un consumidor (antes de iniciar())."""
+        if consumidor not in self._consumidores:
+            self._consumidores.append(consumidor)
+
+    def vigente(self) -> bool:
+        """True si la conexión se confirmó viva dentro del desfase máximo."""
+        return self._conectado and time.monotonic() - self._confirmado_en <= self._desfase_maximo
+
+    def solicitar_resincronizacion(self) -> None:
+        """Un consumidor perdió la pista (evento inválido): reconectar y sincronizar de nuevo."""
+        self._resincronizar = True
+
+    def segundos_desde_confirmacion(self) -> float | None:
+        return round(time.monotonic() - self._confirmado_en, 3) if self._confirmado_en else None
+
+    # ── Ciclo de vida ────────────────────────────────────────────────
+
+    async def iniciar(self, cadena: str, config: Any, espera_inicial: float = 5.0) -> None:
+        """Arranca la tarea de LISTEN y espera (acotado) a la primera sincronización."""
+        if self._tarea is not None or not self._consumidores:
+            return
+        self._desfase_maximo = config.desfase_maximo
+        self._tarea = asyncio.create_task(self._mantener(dsn_asyncpg(cadena), config))
+        limite = time.monotonic() + espera_inicial
+        while not self._conectado and time.monotonic() < limite and not self._tarea.done():
+            await asyncio.sleep(0.05)
+        # Si no conectó a tiempo, la API arranca igual: cada consumidor sabe degradarse.
+
+    async def detener(self) -> None:
+        if self._tarea is not None:
+            self._tarea.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._tarea
+            self._tarea = None
+
+    async def _mantener(self, dsn: str, config: Any) -> None:
+        """Bucle: conectar → LISTEN → sincronizar → confirmar periódicamente. Reintenta si cae."""
+        while True:
+            conexion = None
+            try:
+                conexion = await asyncpg.connect(dsn)
+                if not await conexion.fetchval(_SQL_TRIGGER):
+                    _log.warning("Sin trigger de NOTIFY en producto: aplicar "
+                                 "database/migraciones/ (001 y siguientes)")
+                    await conexion.close()
+                    await asyncio.sleep(max(config.reintento, 30.0))
+                    continue
+
+                for consumidor in self._consumidores:  # LISTEN ANTES de cargar: no se pierde nada
+                    consumidor.al_conectar()
+                for canal in self._canales(config):
+                    await conexion.add_listener(canal, self._al_notificar)
+                for consumidor in self._consumidores:
+                    await consumidor.sincronizar(conexion)
+
+                self.reconexiones += 1
+                metricas.incrementar("escucha_cambios_conexiones_total")
+                self._confirmado_en = time.monotonic()
+                self._conectado = True
+                self._resincronizar = False
+
+                while True:                            # Latido: confirma que no hay NOTIFY perdidos
+                    await asyncio.sleep(config.desfase_maximo / 3)
+                    if self._resincronizar:
+                        raise RuntimeError("resincronización solicitada")
+                    await asyncio.wait_for(conexion.fetchval("SELECT 1"), config.desfase_maximo)
+                    self._confirmado_en = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                _log.warning("Escucha de cambios sin conexión (%s); reintentando", ex)
+                await asyncio.sleep(config.reintento)
+            finally:
+                self._conectado = False
+                for consumidor in self._consumidores:
+                    consumidor.al_desconectar()
+                if conexion is not None and not conexion.is_closed():
+                    with suppress(Exception):
+                        await asyncio.shield(conexion.close())
+
+    def _canales(self, config: Any) -> dict[str, list[Any]]:
+        """Canal → consumidores que lo escuchan."""
+        self._por_canal = {}
+        for consumidor in self._consumidores:
+            canal = getattr(consumidor, "canal", None) or config.canal
+            self._por_canal.setdefault(canal, []).append(consumidor)
+        return self._por_canal
+
+    def _al_notificar(self, conexion, pid, canal, payload: str) -> None:
+        """Callback de asyncpg para cada NOTIFY: decodifica UNA vez y reparte."""
+        try:
+            evento = json.loads(payload, parse_float=Decimal)  # numeric → Decimal, igual que la BD
+        except ValueError:
+            _log.warning("NOTIFY ilegible en %s: %.200s", canal, payload)
+            return
+        for consumidor in self._por_canal.get(canal, ()):
+            try:
+                consumidor.al_notificar(evento)
+            except Exception:                          # Un consumidor roto no afecta a los demás
+                _log.exception("Error aplicando evento de cambios")
+
+
+escucha_cambios = EscuchaCambios()
+# Instancia única por worker (proceso).
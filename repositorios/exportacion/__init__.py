@@ -0,0 +1,10 @@
+"""
+Repositorios de exportación masiva (lectura de tablas completas).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    SIN esta línea:   from repositorios.exportacion.repositorio_exportacion_postgresql import RepositorioExportacionPostgreSQL
+    CON esta línea:   from repositorios.exportacion import RepositorioExportacionPostgreSQL
+"""
+
+from .repositorio_exportacion_postgresql import RepositorioExportacionPostgreSQL
@@ -0,0 +1,44 @@
+"""Repositorio de exportación de tablas para PostgreSQL."""
+
+from typing import AsyncIterator
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from servicios.excepciones import ErrorDisponibilidad
+
+
+class RepositorioExportacionPostgreSQL(BaseRepositorioPostgreSQL):
+    """Lee tablas completas en forma de columnas (para BI / analítica)."""
+    # A diferencia de los repositorios por entidad, recibe el nombre de la tabla.
+    # Qué tablas se pueden exportar lo decide el servicio (lista blanca).
+
+    async def obtener_columnas(self, tabla, esquema=None, limite=None):
+        """Obtiene (columnas, filas) de la tabla. limite=None → todas las filas."""
+        return await self._obtener_columnas(tabla, esquema, limite)
+    # → SELECT * FROM "public"."productosporfactura" [LIMIT n]
+
+    async def obtener_por_lotes(self, tabla, esquema=None, limite=None,
+                                filas_por_lote=5000) -> AsyncIterator[tuple[list[str], list[tuple]]]:
+        """(columnas, lote de filas) por un cursor del servidor: nunca la tabla entera en memoria."""
+        esquema_final = await self._resolver_esquema(esquema)
+        clausula_limite = " LIMIT :limite" if limite else ""
+        sql = self._sentencia(esquema_final, ("columnas", tabla, clausula_limite), lambda: text(
+            f'SELECT * FROM "{esquema_final}"."{tabla}"{clausula_limite}'
+        ))
+        # Misma sentencia que obtener_columnas(); conn.stream() la abre como cursor
+        # (DECLARE ... FETCH): PostgreSQL entrega las filas de a un lote.
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                result = await conn.stream(sql, {"limite": limite} if limite else {})
+                columnas = list(result.keys())
+                async for lote in result.partitions(filas_por_lote):
+                    yield columnas, [tuple(fila) for fila in lote]
+        except ErrorDisponibilidad:
+            raise
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al exportar '{esquema_final}.{tabla}': {ex}"
+            ) from ex
+    # Sin @reintentable: un generador ya entregó filas, repetirlo las duplicaría.
+    # La conexión queda tomada mientras se consume (trabajos en segundo plano, no peticiones).
@@ -0,0 +1,9 @@
+"""
+Repositorio de facturas completas (documento JSON armado en PostgreSQL).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.factura import RepositorioFacturaPostgreSQL
+"""
+
+from .repositorio_factura_postgresql import RepositorioFacturaPostgreSQL
@@ -0,0 +1,113 @@
+"""Repositorio de facturas completas para PostgreSQL: el JSON se arma en la BD."""
+# Mostrar una factura necesita factura + sus líneas + el nombre de cada
+# producto + los nombres del cliente y del vendedor (persona). Con la API por
+# tabla eso es 1 + N consultas (N+1). Aquí es UNA consulta:
+# - json_build_object / json_agg arman el documento completo en PostgreSQL.
+# - convert_to(..., 'UTF8') lo entrega como bytea: asyncpg lo recibe como
+#   bytes y el controller los responde tal cual. Python no decodifica ni
+#   vuelve a codificar el JSON (ni siquiera pasa por str).
+# Los números (numeric) salen como números JSON y las fechas en ISO 8601.
+# Con la migración 006 (particiones por mes) las líneas se buscan también por
+# fechafactura = f.fecha: cada factura lee UNA partición del detalle.
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from repositorios.resiliencia import reintentable
+from servicios.excepciones import ErrorDisponibilidad
+
+
+def _documento(esquema: str, particionada: bool) -> str:
+    """Expresión SQL del documento de UNA factura (alias f, c, pc, e, v, pv)."""
+    misma_particion = " AND d.fechafactura = f.fecha" if particionada else ""
+    return f'''json_build_object(
+            'numero', f.numero, 'fecha', f.fecha, 'total', f.total,
+            'cliente', json_build_object(
+                'id', c.id, 'codigo', pc.codigo, 'nombre', pc.nombre,
+                'email', pc.email, 'empresa', e.nombre),
+            'vendedor', json_build_object(
+                'id', v.id, 'carnet', v.carnet, 'codigo', pv.codigo, 'nombre', pv.nombre),
+            'lineas', COALESCE((
+                SELECT json_agg(json_build_object(
+                           'codigo', d.fkcodproducto, 'nombre', p.nombre,
+                           'cantidad', d.cantidad, 'subtotal', d.subtotal)
+                       ORDER BY d.fkcodproducto)
+                FROM "{esquema}"."productosporfactura" d
+                JOIN "{esquema}"."producto" p ON p.codigo = d.fkcodproducto
+                WHERE d.fknumfactura = f.numero{misma_particion}), '[]'::json))'''
+
+
+def _uniones(esquema: str) -> str:
+    """JOIN de la factura f con cliente, vendedor y sus personas (uno por relación)."""
+    return f'''JOIN "{esquema}"."cliente" c ON c.id = f.fkidcliente
+        JOIN "{esquema}"."persona" pc ON pc.codigo = c.fkcodpersona
+        LEFT JOIN "{esquema}"."empresa" e ON e.codigo = c.fkcodempresa
+        JOIN "{esquema}"."vendedor" v ON v.id = f.fkidvendedor
+        JOIN "{esquema}"."persona" pv ON pv.codigo = v.fkcodpersona'''
+
+
+class RepositorioFacturaPostgreSQL(BaseRepositorioPostgreSQL):
+    """Facturas completas como bytes JSON listos para responder."""
+
+    @reintentable()
+    async def obtener_completa(self, numero: int, esquema: str | None = None) -> bytes | None:
+        """Documento JSON de la factura (bytes UTF-8), o None si no existe."""
+        esquema_final = await self._resolver_esquema(esquema)
+        particionada = await self._facturas_particionadas(esquema_final)
+        sql = self._sentencia(esquema_final, ("factura_completa", particionada), lambda: text(f'''
+            SELECT convert_to({_documento(esquema_final, particionada)}::text, 'UTF8')
+            FROM "{esquema_final}"."factura" f {_uniones(esquema_final)}
+            WHERE f.numero = :numero
+        '''))
+        # Particionada: sin la fecha no hay poda; se prueba el índice de la PK de
+        # cada mes (una lectura de índice por partición, no un recorrido).
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                return (await self._ejecutar(conn, sql, {"numero": numero})).scalar()
+        except ErrorDisponibilidad:
+            raise                                      # 503/504: el controller los traduce
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al leer facturas de '{esquema_final}': {ex}"
+            ) from ex
+
+    @reintentable()
+    async def listar_completas(self, despues: int, limite: int,
+                               esquema: str | None = None) -> tuple[bytes, int, int | None]:
+        """(arreglo JSON de facturas en bytes, cantidad, último número) con numero > despues."""
+        # Paginación por clave (keyset): WHERE numero > :despues ORDER BY numero LIMIT n.
+        # Usa el índice de la PK; cada página cuesta lo mismo, sin OFFSET que recorrer.
+        # Primero las facturas de la página y DESPUÉS los documentos: las líneas
+        # (subconsulta por factura) se arman solo para las facturas de la página.
+        # La página trae todas las columnas que usa el documento: no se vuelve a
+        # buscar cada factura (con particiones, ese JOIN terminaba en un Hash Join
+        # que recorría todos los meses; lo detectó benchmarks/regresion_planes.py).
+        esquema_final = await self._resolver_esquema(esquema)
+        particionada = await self._facturas_particionadas(esquema_final)
+        sql = self._sentencia(esquema_final, ("facturas_completas", particionada), lambda: text(f'''
+            WITH pagina AS (
+                SELECT numero, fecha, total, fkidcliente, fkidvendedor FROM "{esquema_final}"."factura"
+                WHERE numero > :despues
+                ORDER BY numero
+                LIMIT :limite
+            ),
+            documentos AS (
+                SELECT f.numero, {_documento(esquema_final, particionada)} AS documento
+                FROM pagina f
+                {_uniones(esquema_final)}
+            )
+            SELECT convert_to(COALESCE(json_agg(documento ORDER BY numero), '[]'::json)::text, 'UTF8'),
+                   count(*), max(numero)
+            FROM documentos
+        '''))
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                fila = (await self._ejecutar(conn, sql, {"despues": despues, "limite": limite})).one()
+                return fila[0], fila[1], fila[2]
+        except ErrorDisponibilidad:
+            raise                                      # 503/504: el controller los traduce
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al leer facturas de '{esquema_final}': {ex}"
+            ) from ex
+
@@ -0,0 +1,10 @@
+"""
+Repositorios de importación masiva (COPY a una tabla de staging + merge).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    SIN esta línea:   from repositorios.importacion.repositorio_importacion_postgresql import RepositorioImportacionPostgreSQL
+    CON esta línea:   from repositorios.importacion import RepositorioImportacionPostgreSQL
+"""
+
+from .repositorio_importacion_postgresql import RepositorioImportacionPostgreSQL
@@ -0,0 +1,73 @@
+"""Repositorio de importación masiva de productos para PostgreSQL."""
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+
+
+_COLUMNAS_STAGING = ("linea", "codigo", "nombre", "stock", "valorunitario")
+
+_SQL_CREAR_STAGING = text("""
+    CREATE TEMP TABLE producto_importacion (
+        linea           BIGINT         NOT NULL,
+        codigo          VARCHAR(30)    NOT NULL,
+        nombre          VARCHAR(100)   NOT NULL,
+        stock           INTEGER        NOT NULL,
+        valorunitario   NUMERIC(14,2)  NOT NULL
+    ) ON COMMIT DROP
+""")
+# Tabla TEMPORAL: solo la ve esta conexión y desaparece con el COMMIT/ROLLBACK.
+# 'linea' = número de línea en el archivo (si un código se repite, gana la última).
+
+
+class RepositorioImportacionPostgreSQL(BaseRepositorioPostgreSQL):
+    """Carga masiva: COPY a staging + INSERT ... ON CONFLICT en producto."""
+
+    async def importar_productos(self, lotes, esquema=None, al_cargar=None):
+        """Carga todos los lotes en staging y los fusiona en producto en UNA transacción."""
+        # Todo o nada: si el cliente corta la subida o algo falla, ROLLBACK y
+        # producto queda intacto. Mientras se carga staging no se bloquea producto;
+        # los bloqueos de fila solo se toman durante el merge final.
+        esquema_final = await self._resolver_esquema(esquema)
+        sql_fusionar = self._sentencia(esquema_final, ("importar_fusionar",), lambda: text(f'''
+            WITH fusion AS (
+                INSERT INTO "{esquema_final}"."producto" AS p (codigo, nombre, stock, valorunitario)
+                SELECT DISTINCT ON (codigo) codigo, nombre, stock, valorunitario
+                FROM producto_importacion
+                ORDER BY codigo, linea DESC
+                ON CONFLICT (codigo) DO UPDATE
+                SET nombre = EXCLUDED.nombre,
+                    stock = EXCLUDED.stock,
+                    valorunitario = EXCLUDED.valorunitario
+                WHERE (p.nombre, p.stock, p.valorunitario)
+                      IS DISTINCT FROM (EXCLUDED.nombre, EXCLUDED.stock, EXCLUDED.valorunitario)
+                RETURNING (xmax = 0) AS insertada
+            )
+            SELECT
+                count(*) FILTER (WHERE insertada)     AS insertadas,
+                count(*) FILTER (WHERE NOT insertada) AS actualizadas,
+                (SELECT count(DISTINCT codigo) FROM producto_importacion) AS distintas
+            FROM fusion
+        '''))
+        # DISTINCT ON: un INSERT ... ON CONFLICT no puede tocar dos veces la misma fila.
+        # WHERE ... IS DISTINCT FROM: las filas idénticas no se reescriben (ni disparan triggers).
+        # xmax = 0 → la fila es nueva (INSERT); si no, vino del DO UPDATE.
+
+        async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+            await self._ejecutar(conn, _SQL_CREAR_STAGING)
+            crudo = (await conn.get_raw_connection()).driver_connection  # asyncpg: COPY binario
+            async for lote in lotes:
+                if not lote:
+                    continue
+                await crudo.copy_records_to_table(
+                    "producto_importacion", records=lote, columns=_COLUMNAS_STAGING
+                )
+                if al_cargar is not None:
+                    await al_cargar(len(lote))
+
+            resultado = (await self._ejecutar(conn, sql_fusionar)).one()
+            return {
+                "insertadas": resultado.insertadas,
+                "actualizadas": resultado.actualizadas,
+                "sin_cambios": resultado.distintas - resultado.insertadas - resultado.actualizadas,
+            }
@@ -0,0 +1,9 @@
+"""
+Repositorio de operaciones maestro-detalle (procedimientos sp_* del esquema).
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.maestro_detalle import RepositorioMaestroDetallePostgreSQL
+"""
+
+from .repositorio_maestro_detalle_postgresql import RepositorioMaestroDetallePostgreSQL
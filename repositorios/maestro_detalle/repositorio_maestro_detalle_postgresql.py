@@ -0,0 +1,52 @@
+"""Repositorio maestro-detalle para PostgreSQL: llama a los procedimientos sp_* del esquema."""
+# Cada operación es UN CALL: el procedimiento inserta/actualiza el maestro y
+# todos sus detalles dentro de la BD y responde con p_resultado (JSON).
+#   sp_crear_<relacion>(p_maestro, p_detalles)             → {exito, codigo_maestro|numero_maestro|..., cantidad_detalles}
+#   sp_obtener_<relacion>(p_clave)                          → {exito, maestro, detalles}
+#   sp_actualizar_<relacion>(p_clave, p_maestro, p_detalles) → {exito, mensaje, cantidad_detalles}
+#   sp_eliminar_<relacion>(p_clave)                         → {exito, mensaje, detalles_eliminados}
+
+from typing import Any
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+
+
+RELACIONES = frozenset({
+    "persona_con_cliente", "persona_con_vendedor", "empresa_con_cliente",
+    "factura_con_productosporfactura", "usuario_con_rol_usuario",
+})
+# Sufijos de los procedimientos de database/bdfacturas_postgres.sql (sección 4).
+# El nombre se interpola en el CALL: solo se aceptan estos.
+
+
+class RepositorioMaestroDetallePostgreSQL(BaseRepositorioPostgreSQL):
+    """Operaciones maestro-detalle en una sola ida a la BD."""
+
+    def _procedimiento(self, operacion: str, relacion: str) -> str:
+        if relacion not in RELACIONES:
+            raise ValueError(f"Relación maestro-detalle desconocida: '{relacion}'")
+        return f"sp_{operacion}_{relacion}"
+
+    async def crear(self, relacion: str, maestro: dict[str, Any],
+                    detalles: list[dict[str, Any]], esquema: str | None = None) -> dict[str, Any]:
+        return await self._llamar_procedimiento(
+            self._procedimiento("crear", relacion), [maestro, detalles], esquema
+        )
+
+    async def obtener(self, relacion: str, clave: str | int,
+                      esquema: str | None = None) -> dict[str, Any]:
+        return await self._llamar_procedimiento(
+            self._procedimiento("obtener", relacion), [clave], esquema
+        )
+
+    async def actualizar(self, relacion: str, clave: str | int, maestro: dict[str, Any],
+                         detalles: list[dict[str, Any]], esquema: str | None = None) -> dict[str, Any]:
+        return await self._llamar_procedimiento(
+            self._procedimiento("actualizar", relacion), [clave, maestro, detalles], esquema
+        )
+
+    async def eliminar(self, relacion: str, clave: str | int,
+                       esquema: str | None = None) -> dict[str, Any]:
+        return await self._llamar_procedimiento(
+            self._procedimiento("eliminar", relacion), [clave], esquema
+        )
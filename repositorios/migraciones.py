@@ -0,0 +1,243 @@
+"""
+migraciones.py — Migraciones versionadas de la BD (database/migraciones/NNN_*.sql|.py).
+
+Cada archivo se aplica UNA vez, en orden de versión, y queda registrado en
+public.migracion (versión, nombre, suma SHA-256, fecha y duración). Se
+aplican al arrancar la app (MIGRACIONES_AL_INICIAR=True) o desde la consola:
+
+    python -m repositorios.migraciones              # estado: aplicadas y pendientes
+    python -m repositorios.migraciones aplicar      # aplica las pendientes
+    python -m repositorios.migraciones marcar 6     # registra 001..006 SIN ejecutarlas
+                                                    # (BD que ya se migró a mano con psql)
+
+- .sql: el archivo completo y su registro van en UNA transacción: o queda
+  aplicada y registrada, o no queda nada.
+- .py:  define "async def aplicar(conexion)" (conexión asyncpg) y corre en
+  autocommit: es lo que necesita CREATE INDEX CONCURRENTLY, que no admite
+  transacciones. Debe poder repetirse: si se corta a mitad, no queda
+  registrada y la próxima vez empieza de nuevo.
+- pg_advisory_lock: varios workers (o despliegues) que arrancan a la vez no
+  aplican la misma migración dos veces; los demás esperan y la ven aplicada.
+
+La BD base (database/bdfacturas_postgres.sql) no es una migración: se crea
+antes, una sola vez.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+
+import asyncpg
+
+from repositorios.escucha_cambios import dsn_asyncpg
+
+
+_log = logging.getLogger(__name__)
+
+DIRECTORIO = Path(__file__).resolve().parent.parent / "database" / "migraciones"
+# Directorio por defecto (MIGRACIONES_DIRECTORIO vacío).
+
+_ARCHIVO = re.compile(r"^(\d+)_[\w-]+\.(sql|py)$")
+# 001_notificar_cambios_producto.sql → versión 1. Otros archivos se ignoran.
+
+_BLOQUEO = 480_480_048
+# Clave de pg_advisory_lock: la misma en todos los procesos que migran esta BD.
+
+_SQL_TABLA = """
+    CREATE TABLE IF NOT EXISTS public.migracion (
+        version      INTEGER      NOT NULL,
+        nombre       TEXT         NOT NULL,
+        suma         CHAR(64)     NOT NULL,
+        aplicada     TIMESTAMPTZ  NOT NULL DEFAULT now(),
+        duracion_ms  INTEGER      NOT NULL DEFAULT 0,
+        CONSTRAINT migracion_pkey PRIMARY KEY (version)
+    )
+"""
+# Dentro del bloqueo: dos CREATE TABLE IF NOT EXISTS simultáneos pueden chocar.
+
+_SQL_APLICADAS = "SELECT version, nombre, suma, aplicada FROM public.migracion ORDER BY version"
+
+_SQL_REGISTRAR = """
+    INSERT INTO public.migracion (version, nombre, suma, duracion_ms)
+    VALUES ($1, $2, $3, $4)
+"""
+
+
+@dataclass(frozen=True)
+class Migracion:
+    """Un archivo de migración: versión, nombre del archivo, ruta y suma SHA-256."""
+    version: int
+    nombre: str
+    ruta: Path
+    suma: str
+
+
+def descubrir(directorio: Path | str | None = None) -> list[Migracion]:
+    """Migraciones del directorio ordenadas por versión. Versión repetida → ValueError."""
+    carpeta = Path(directorio) if directorio else DIRECTORIO
+    migraciones: dict[int, Migracion] = {}
+    for ruta in sorted(carpeta.iterdir()):
+        coincidencia = _ARCHIVO.match(ruta.name)
+        if coincidencia is None or not ruta.is_file():
+            continue
+        version = int(coincidencia.group(1))
+        if version in migraciones:
+            raise ValueError(
+                f"Versión de migración repetida: {migraciones[version].nombre} y {ruta.name}."
+            )
+        suma = hashlib.sha256(ruta.read_bytes()).hexdigest()
+        migraciones[version] = Migracion(version, ruta.name, ruta, suma)
+    return [migraciones[v] for v in sorted(migraciones)]
+
+
+def cargar_modulo(migracion: Migracion) -> ModuleType:
+    """Importa una migración .py por su ruta (el nombre empieza por dígitos: no sirve import)."""
+    spec = importlib.util.spec_from_file_location(f"migracion_{migracion.version:03d}", migracion.ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    if not callable(getattr(modulo, "aplicar", None)):
+        raise ValueError(f"La migración {migracion.nombre} no define 'async def aplicar(conexion)'.")
+    return modulo
+
+
+async def _aplicadas(conexion: asyncpg.Connection) -> dict[int, asyncpg.Record]:
+    """{versión: fila de public.migracion}. Crea la tabla si no existe."""
+    await conexion.execute(_SQL_TABLA)
+    return {fila["version"]: fila for fila in await conexion.fetch(_SQL_APLICADAS)}
+
+
+def _revisar_sumas(migraciones: list[Migracion], aplicadas: dict[int, asyncpg.Record]) -> None:
+    """Avisa si un archivo ya aplicado cambió: el cambio NO se aplicará (va en una migración nueva)."""
+    for migracion in migraciones:
+        fila = aplicadas.get(migracion.version)
+        if fila is not None and fila["suma"] != migracion.suma:
+            _log.warning("La migración %s cambió después de aplicarse (%s): el cambio no se aplica; "
+                         "agréguelo como una migración nueva.", migracion.nombre, fila["aplicada"])
+
+
+async def _aplicar_una(conexion: asyncpg.Connection, migracion: Migracion) -> int:
+    """Ejecuta una migración y la registra. Retorna la duración en milisegundos."""
+    inicio = time.perf_counter()
+    if migracion.ruta.suffix == ".sql":
+        async with conexion.transaction():
+            await conexion.execute(migracion.ruta.read_text(encoding="utf-8"))
+            # Sin parámetros: protocolo simple, admite varias sentencias y bloques $$.
+            duracion = int((time.perf_counter() - inicio) * 1000)
+            await conexion.execute(_SQL_REGISTRAR, migracion.version, migracion.nombre,
+                                   migracion.suma, duracion)
+        return duracion
+    await cargar_modulo(migracion).aplicar(conexion)  # Autocommit: cada sentencia por su cuenta
+    duracion = int((time.perf_counter() - inicio) * 1000)
+    await conexion.execute(_SQL_REGISTRAR, migracion.version, migracion.nombre, migracion.suma, duracion)
+    return duracion
+
+
+async def aplicar_pendientes(cadena: str, directorio: Path | str | None = None) -> list[str]:
+    """Aplica en orden las migraciones no registradas. Retorna los nombres aplicados."""
+    migraciones = descubrir(directorio)
+    conexion = await asyncpg.connect(dsn_asyncpg(cadena))
+    try:
+        await conexion.execute("SELECT pg_advisory_lock($1)", _BLOQUEO)
+        # Si otro proceso está migrando, espera aquí; al entrar ya ve lo que aplicó.
+        try:
+            aplicadas = await _aplicadas(conexion)
+            _revisar_sumas(migraciones, aplicadas)
+            hechas = []
+            for migracion in migraciones:
+                if migracion.version in aplicadas:
+                    continue
+                _log.info("Aplicando migración %s...", migracion.nombre)
+                try:
+                    duracion = await _aplicar_una(conexion, migracion)
+                except Exception as ex:
+                    raise RuntimeError(f"Error al aplicar la migración {migracion.nombre}: {ex}") from ex
+                _log.info("Migración %s aplicada en %d ms.", migracion.nombre, duracion)
+                hechas.append(migracion.nombre)
+            return hechas
+            # Si una falla, las siguientes no se intentan: pueden depender de ella.
+        finally:
+            await conexion.execute("SELECT pg_advisory_unlock($1)", _BLOQUEO)
+    finally:
+        await conexion.close()
+
+
+async def marcar(cadena: str, hasta: int, directorio: Path | str | None = None) -> list[str]:
+    """Registra como aplicadas (sin ejecutarlas) las versiones <= hasta que falten."""
+    conexion = await asyncpg.connect(dsn_asyncpg(cadena))
+    try:
+        await conexion.execute("SELECT pg_advisory_lock($1)", _BLOQUEO)
+        try:
+            aplicadas = await _aplicadas(conexion)
+            marcadas = []
+            for migracion in descubrir(directorio):
+                if migracion.version <= hasta and migracion.version not in aplicadas:
+                    await conexion.execute(_SQL_REGISTRAR, migracion.version, migracion.nombre,
+                                           migracion.suma, 0)
+                    marcadas.append(migracion.nombre)
+            return marcadas
+        finally:
+            await conexion.execute("SELECT pg_advisory_unlock($1)", _BLOQUEO)
+    finally:
+        await conexion.close()
+
+
+async def estado(cadena: str, directorio: Path | str | None = None) -> list[dict]:
+    """Una entrada por archivo: {"version", "nombre", "aplicada" (fecha o None), "modificada"}."""
+    migraciones = descubrir(directorio)
+    conexion = await asyncpg.connect(dsn_asyncpg(cadena))
+    try:
+        existe = await conexion.fetchval("SELECT to_regclass('public.migracion') IS NOT NULL")
+        aplicadas = ({fila["version"]: fila for fila in await conexion.fetch(_SQL_APLICADAS)}
+                     if existe else {})            # Solo lectura: no crea la tabla
+    finally:
+        await conexion.close()
+    return [{
+        "version": m.version, "nombre": m.nombre,
+        "aplicada": aplicadas[m.version]["aplicada"] if m.version in aplicadas else None,
+        "modificada": m.version in aplicadas and aplicadas[m.version]["suma"] != m.suma,
+    } for m in migraciones]
+
+
+# ─── Consola ─────────────────────────────────────────────────────────
+
+def main() -> None:
+    from config import get_settings                     # Aquí: importar el módulo no lee el .env
+    from servicios.conexion.proveedor_conexion import ProveedorConexion
+
+    parser = argparse.ArgumentParser(description="Migraciones versionadas de la BD.")
+    parser.add_argument("accion", nargs="?", default="estado", choices=("estado", "aplicar", "marcar"))
+    parser.add_argument("hasta", nargs="?", type=int, help="marcar: última versión ya aplicada a mano")
+    argumentos = parser.parse_args()
+
+    config = get_settings()
+    cadena = ProveedorConexion(config).obtener_cadena_conexion()
+    directorio = config.migraciones.directorio or None
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if argumentos.accion == "aplicar":
+        hechas = asyncio.run(aplicar_pendientes(cadena, directorio))
+        print(f"{len(hechas)} migración(es) aplicada(s)." if hechas else "Nada pendiente.")
+    elif argumentos.accion == "marcar":
+        if argumentos.hasta is None:
+            parser.error("marcar necesita la última versión aplicada (ej: marcar 6)")
+        marcadas = asyncio.run(marcar(cadena, argumentos.hasta, directorio))
+        for nombre in marcadas:
+            print(f"marcada   {nombre}")
+        print(f"{len(marcadas)} migración(es) marcada(s) como aplicada(s).")
+    else:
+        for fila in asyncio.run(estado(cadena, directorio)):
+            cuando = fila["aplicada"].strftime("%Y-%m-%d %H:%M") if fila["aplicada"] else "PENDIENTE"
+            aviso = "  (archivo modificado después de aplicarse)" if fila["modificada"] else ""
+            print(f"{fila['version']:>4}  {cuando:<16}  {fila['nombre']}{aviso}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+Repositorio de las particiones mensuales de factura y productosporfactura.
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.particiones import RepositorioParticionesPostgreSQL
+"""
+
+from .repositorio_particiones_postgresql import RepositorioParticionesPostgreSQL
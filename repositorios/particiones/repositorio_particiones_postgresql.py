@@ -0,0 +1,96 @@
+"""Repositorio de particiones mensuales (migración 006) para PostgreSQL."""
+# La lógica de cada mes vive en la BD (particion_mensual_crear / _archivar):
+# así también se puede ejecutar a mano desde psql. Aquí solo se listan los
+# meses existentes y se llaman las funciones, un mes por transacción: si el
+# DETACH de un mes no consigue el bloqueo, los demás siguen.
+
+from datetime import date
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from repositorios.resiliencia import reintentable
+from servicios.excepciones import ErrorDisponibilidad
+
+
+_SQL_MESES = text(r"""
+    SELECT c.relkind = 'p',
+           ARRAY(
+               SELECT to_date(substring(p.relname from '_p(\d{6})$'), 'YYYYMM')
+               FROM pg_inherits i
+               JOIN pg_class p ON p.oid = i.inhrelid
+               WHERE i.inhparent = c.oid AND p.relname ~ '_p\d{6}$'
+               ORDER BY 1
+           )
+    FROM pg_class c
+    WHERE c.oid = to_regclass(:factura)
+""")
+# Meses por el nombre de la partición (factura_pAAAAMM): los que crea particion_mensual_crear.
+
+_SQL_CREAR = text("SELECT particion_mensual_crear(:esquema, :mes)")
+
+_SQL_ARCHIVAR = text("SELECT particion_mensual_archivar(:esquema, :mes, :archivo)")
+
+_SQL_ESPERA_BLOQUEO = text("SELECT set_config('lock_timeout', :espera, true)")
+# DETACH pide un bloqueo exclusivo de la tabla padre: sin límite haría cola detrás
+# de una exportación larga y, peor, todas las consultas nuevas harían cola detrás de él.
+
+
+class RepositorioParticionesPostgreSQL(BaseRepositorioPostgreSQL):
+    """Meses particionados de factura: listar, crear y archivar."""
+
+    @reintentable()
+    async def listar_meses(self, esquema: str | None = None) -> list[date] | None:
+        """Primer día de cada mes con partición, o None si factura no está particionada."""
+        esquema_final = await self._resolver_esquema(esquema)
+        try:
+            async with self._conexion(esquema=esquema_final) as conn:
+                fila = (await self._ejecutar(conn, _SQL_MESES, {
+                    "factura": f'"{esquema_final}"."factura"'
+                })).first()
+        except ErrorDisponibilidad:
+            raise                                          # 503/504: el controller los traduce
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al listar particiones de '{esquema_final}': {ex}"
+            ) from ex
+        if fila is None or not fila[0]:
+            return None
+        return list(fila[1])
+
+    @reintentable()
+    async def crear_mes(self, mes: date, esquema: str | None = None) -> bool:
+        """Crea la partición del mes en las dos tablas. False si ya existía."""
+        # Reintentable aunque escriba: la función no hace nada si el mes ya existe.
+        esquema_final = await self._resolver_esquema(esquema)
+        try:
+            async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+                return (await self._ejecutar(conn, _SQL_CREAR, {
+                    "esquema": esquema_final, "mes": mes
+                })).scalar()
+        except ErrorDisponibilidad:
+            raise
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al crear la partición {mes:%Y-%m} de '{esquema_final}': {ex}"
+            ) from ex
+
+    @reintentable()
+    async def archivar_mes(self, mes: date, archivo: str, espera_bloqueo: float,
+                           esquema: str | None = None) -> int | None:
+        """DETACH del mes y traslado al esquema de archivo. Facturas archivadas (None: no existía)."""
+        esquema_final = await self._resolver_esquema(esquema)
+        try:
+            async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+                await self._ejecutar(conn, _SQL_ESPERA_BLOQUEO, {
+                    "espera": f"{int(espera_bloqueo * 1000)}ms"
+                })
+                return (await self._ejecutar(conn, _SQL_ARCHIVAR, {
+                    "esquema": esquema_final, "mes": mes, "archivo": archivo
+                })).scalar()
+        except ErrorDisponibilidad:
+            raise
+        except Exception as ex:
+            raise RuntimeError(
+                f"Error PostgreSQL al archivar la partición {mes:%Y-%m} de '{esquema_final}': {ex}"
+            ) from ex
@@ -16,3 +16,6 @@ Repositorios específicos de producto.
 from .repositorio_producto_postgresql import RepositorioProductoPostgreSQL
 # from .repositorio_producto_postgresql  → desde repositorio_producto_postgresql.py (esta carpeta)
 # import RepositorioProductoPostgreSQL   → trae la clase concreta de producto
+
+from .repositorio_producto_memoria import RepositorioProductoMemoria
+# Mismo contrato, datos en memoria del proceso (DB_PROVIDER=memoria)
@@ -0,0 +1,164 @@
+"""
+catalogo_producto.py — Réplica en memoria de la tabla producto (LISTEN/NOTIFY).
+
+producto es pequeña y se lee muchísimo más de lo que se escribe. Con
+CATALOGO_HABILITADO=True cada worker:
+
+1. Se registra en la conexión LISTEN compartida (repositorios/escucha_cambios.py).
+2. Carga la tabla completa en memoria: índice por código (dict), lista
+   ordenada de códigos (listados) e índice por nombre (lista ordenada →
+   búsqueda por prefijo con bisect).
+3. Aplica cada NOTIFY del trigger (INSERT/UPDATE/DELETE) de forma incremental.
+4. Si la conexión se cae, el catálogo deja de estar "vigente" y las lecturas
+   vuelven a PostgreSQL; al reconectar se hace una resincronización completa.
+
+Desfase acotado: el catálogo solo responde si la conexión LISTEN se confirmó
+viva hace menos de CAMBIOS_DESFASE_MAXIMO segundos. Las notificaciones que
+llegaron antes de esa confirmación ya están aplicadas (llegan en orden).
+
+Requiere el trigger de database/migraciones/001_notificar_cambios_producto.sql.
+"""
+
+import bisect
+import logging
+from typing import Any
+
+from repositorios.escucha_cambios import escucha_cambios
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+_SQL_CARGAR = 'SELECT * FROM "public"."producto" ORDER BY "codigo"'
+
+
+class CatalogoProducto:
+    """Índices en memoria de producto + tarea que los mantiene al día."""
+
+    def __init__(self):
+        self._columnas: list[str] = []
+        self._filas: dict[str, tuple] = {}             # codigo → fila (tupla con tipos nativos)
+        self._codigos: list[str] = []                  # Códigos ordenados: orden de listar()
+        self._nombres: list[tuple[str, str]] = []      # (nombre en minúsculas, codigo), ordenada
+        self._pendientes: list[dict] | None = None     # NOTIFY recibidos durante una carga completa
+        self._listo = False
+        self.eventos_aplicados = 0
+        self.resincronizaciones = 0
+
+    # ── Lectura ──────────────────────────────────────────────────────
+
+    def vigente(self) -> bool:
+        """True si se puede responder desde memoria sin pasarse del desfase máximo."""
+        return self._listo and escucha_cambios.vigente()
+
+    @property
+    def columnas(self) -> list[str]:
+        return self._columnas
+
+    def listar(self, limite: int | None = None) -> list[tuple]:
+        """Filas en orden de código (hasta 'limite'). O(k)."""
+        codigos = self._codigos if limite is None else self._codigos[:limite]
+        return [self._filas[codigo] for codigo in codigos]
+    # El orden es el de Python (puntos de código), igual al ORDER BY codigo de
+    # PostgreSQL con intercalación "C"; con otra (es_ES...) puede diferir en
+    # mayúsculas y signos. Sale de _codigos y no del dict: en el dict, un NOTIFY
+    # INSERT (o un cambio de código) deja la fila al final, no en su lugar.
+
+    def obtener(self, codigo: str) -> tuple | None:
+        """Fila del producto o None. O(1)."""
+        return self._filas.get(codigo)
+
+    def buscar_prefijo(self, prefijo: str, limite: int) -> list[tuple]:
+        """Productos cuyo nombre empieza por 'prefijo' (sin distinguir mayúsculas). O(log n + k)."""
+        clave = prefijo.lower()
+        inicio = bisect.bisect_left(self._nombres, (clave, ""))
+        resultado = []
+        for nombre, codigo in self._nombres[inicio:inicio + limite]:
+            if not nombre.startswith(clave):
+                break                                  # Lista ordenada: ya no hay más coincidencias
+            resultado.append(self._filas[codigo])
+        return resultado
+
+    # ── Mantenimiento de los índices ─────────────────────────────────
+
+    def _cargar(self, columnas: list[str], filas: list[tuple]) -> None:
+        """Reemplaza el catálogo completo (carga inicial o resincronización)."""
+        indice_codigo = columnas.index("codigo")
+        indice_nombre = columnas.index("nombre")
+        self._columnas = columnas
+        self._filas = {fila[indice_codigo]: fila for fila in filas}
+        self._codigos = sorted(self._filas)
+        self._nombres = sorted((fila[indice_nombre].lower(), fila[indice_codigo]) for fila in filas)
+
+    def _quitar(self, codigo: str) -> None:
+        fila = self._filas.pop(codigo, None)
+        if fila is not None:
+            del self._codigos[bisect.bisect_left(self._codigos, codigo)]
+            entrada = (fila[self._columnas.index("nombre")].lower(), codigo)
+            posicion = bisect.bisect_left(self._nombres, entrada)
+            if posicion < len(self._nombres) and self._nombres[posicion] == entrada:
+                del self._nombres[posicion]
+
+    def _aplicar(self, evento: dict[str, Any]) -> None:
+        """Aplica un NOTIFY del trigger: {"op", "codigo", "anterior", "fila"}."""
+        operacion = evento["op"]
+        if operacion == "TRUNCATE":
+            self._cargar(self._columnas, [])
+        elif operacion == "DELETE":
+            self._quitar(evento["codigo"])
+        else:                                          # INSERT o UPDATE: la fila completa viaja en el payload
+            self._quitar(evento.get("anterior") or evento["codigo"])
+            datos = evento["fila"]
+            fila = tuple(datos.get(columna) for columna in self._columnas)
+            if evento["codigo"] not in self._filas:
+                bisect.insort(self._codigos, evento["codigo"])
+            self._filas[evento["codigo"]] = fila
+            bisect.insort(self._nombres, (datos["nombre"].lower(), evento["codigo"]))
+        self.eventos_aplicados += 1
+
+    # ── Consumidor de escucha_cambios ────────────────────────────────
+
+    def al_conectar(self) -> None:
+        self._pendientes = []                          # Acumula lo que llegue durante la carga
+
+    async def sincronizar(self, conexion) -> None:
+        """Carga completa (inicio o reconexión) y luego los cambios acumulados."""
+        sentencia = await conexion.prepare(_SQL_CARGAR)
+        columnas = [atributo.name for atributo in sentencia.get_attributes()]
+        self._cargar(columnas, [tuple(r.values()) for r in await sentencia.fetch()])
+        pendientes, self._pendientes = self._pendientes or [], None
+        for evento in pendientes:                      # Cambios confirmados durante la carga
+            self._aplicar(evento)                      # (reaplicar uno ya incluido es inocuo)
+        self.resincronizaciones += 1
+        metricas.incrementar("catalogo_resincronizaciones_total")
+        self._listo = True
+
+    def al_notificar(self, evento: dict[str, Any]) -> None:
+        if self._pendientes is not None:               # Carga completa en curso: se aplica después
+            self._pendientes.append(evento)
+            return
+        try:
+            self._aplicar(evento)
+        except Exception:                              # Evento inesperado: más vale recargar todo
+            _log.exception("Evento de catálogo inválido; se fuerza resincronización")
+            self._listo = False
+            escucha_cambios.solicitar_resincronizacion()
+
+    def al_desconectar(self) -> None:
+        self._listo = False                            # Sin conexión confirmada: lecturas a PostgreSQL
+        self._pendientes = None
+
+    def estado(self) -> dict[str, Any]:
+        """Estado para /api/metricas/."""
+        return {"catalogo_producto": {
+            "vigente": self.vigente(),
+            "productos": len(self._filas),
+            "eventos_aplicados": self.eventos_aplicados,
+            "resincronizaciones": self.resincronizaciones,
+            "segundos_desde_confirmacion": escucha_cambios.segundos_desde_confirmacion(),
+        }}
+
+
+catalogo_producto = CatalogoProducto()
+# Instancia única por worker (proceso).
+metricas.registrar_recolector(catalogo_producto.estado)
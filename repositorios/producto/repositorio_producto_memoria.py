@@ -0,0 +1,307 @@
+"""Repositorio de producto en memoria (DB_PROVIDER=memoria)."""
+# Mismo contrato que RepositorioProductoPostgreSQL (IRepositorioProducto), sin BD.
+# Sirve para separar el costo de la capa Python (FastAPI, Pydantic,
+# serialización, middlewares) de la latencia de PostgreSQL, y para pruebas rápidas.
+#
+# Almacén compacto por columnas, uno por esquema:
+# - codigo y nombre: listas de str. stock y valorunitario: array('q'), enteros
+#   de 64 bits contiguos (valorunitario en centavos): 8 bytes por valor en vez
+#   de un objeto int/Decimal por celda.
+# - Índice por código: dict codigo → posición. Eliminar mueve la última fila
+#   al hueco: O(1), sin desplazar las demás.
+# - Índice por nombre: lista ordenada (nombre en minúsculas, codigo) → prefijo con bisect.
+#
+# Las restricciones de la tabla (PK, NOT NULL, largo, CHECK >= 0) se revisan
+# igual que en PostgreSQL y fallan con RuntimeError, como el repositorio real.
+# Ninguna operación hace await a mitad de un cambio: cada una es atómica
+# frente a las demás peticiones del event loop. Cada worker tiene su propia
+# copia y se pierde al reiniciar.
+
+import bisect
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any
+
+from config import get_settings
+from servicios.excepciones import ErrorEsquemaInexistente
+from servicios.inquilinos import es_nombre_valido, inquilino_actual
+
+
+COLUMNAS = ["codigo", "nombre", "stock", "valorunitario"]
+_LARGOS = {"codigo": 30, "nombre": 100}                # VARCHAR(30), VARCHAR(100)
+_MAX_STOCK = 2**31 - 1                                 # INTEGER
+_MAX_CENTAVOS = 10**14 - 1                             # NUMERIC(14,2)
+_CENTAVO = Decimal("0.01")
+
+
+def _a_centavos(valor: Any) -> int:
+    """NUMERIC(14,2): redondea a 2 decimales (como PostgreSQL) y lo guarda en centavos."""
+    return int(Decimal(str(valor)).quantize(_CENTAVO, rounding=ROUND_HALF_UP) * 100)
+
+
+class AlmacenProductos:
+    """Tabla producto de un esquema, en columnas."""
+
+    def __init__(self):
+        self.codigos: list[str] = []
+        self.nombres: list[str] = []
+        self.stocks = array("q")
+        self.centavos = array("q")
+        self.posiciones: dict[str, int] = {}           # codigo → posición en las columnas
+        self.por_nombre: list[tuple[str, str]] = []    # (nombre en minúsculas, codigo), ordenada
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    # ── Lectura ──────────────────────────────────────────────────────
+
+    def fila(self, posicion: int) -> tuple:
+        """(codigo, nombre, stock, valorunitario) con los tipos que entrega asyncpg."""
+        return (self.codigos[posicion], self.nombres[posicion], self.stocks[posicion],
+                Decimal(self.centavos[posicion]).scaleb(-2))
+
+    def diccionario(self, posicion: int) -> dict[str, Any]:
+        """Fila ya serializada para JSON (valorunitario float, como _serializar_valor)."""
+        return {"codigo": self.codigos[posicion], "nombre": self.nombres[posicion],
+                "stock": self.stocks[posicion], "valorunitario": self.centavos[posicion] / 100}
+
+    def posiciones_prefijo(self, prefijo: str, limite: int) -> list[int]:
+        clave = prefijo.lower()
+        inicio = bisect.bisect_left(self.por_nombre, (clave, ""))
+        resultado = []
+        for nombre, codigo in self.por_nombre[inicio:inicio + limite]:
+            if not nombre.startswith(clave):
+                break                                  # Lista ordenada: ya no hay más coincidencias
+            resultado.append(self.posiciones[codigo])
+        return resultado
+
+    # ── Escritura ────────────────────────────────────────────────────
+
+    def _validar(self, codigo: Any, nombre: Any, stock: Any, centavos: int | None) -> None:
+        for columna, valor in (("codigo", codigo), ("nombre", nombre), ("stock", stock),
+                               ("valorunitario", centavos)):
+            if valor is None:
+                raise RuntimeError(f'null value in column "{columna}" violates not-null constraint')
+        for columna, valor in (("codigo", codigo), ("nombre", nombre)):
+            if len(valor) > _LARGOS[columna]:
+                raise RuntimeError(f"value too long for type character varying({_LARGOS[columna]})")
+        if not 0 <= stock <= _MAX_STOCK:
+            raise RuntimeError('new row violates check constraint "producto_stock_check"')
+        if not 0 <= centavos <= _MAX_CENTAVOS:
+            raise RuntimeError('new row violates check constraint "producto_valorunitario_check"')
+
+    def insertar(self, codigo: str, nombre: str, stock: int, centavos: int) -> None:
+        self._validar(codigo, nombre, stock, centavos)
+        if codigo in self.posiciones:
+            raise RuntimeError(f'duplicate key value violates unique constraint "producto_pkey" ({codigo})')
+        self.posiciones[codigo] = len(self.codigos)
+        self.codigos.append(codigo)
+        self.nombres.append(nombre)
+        self.stocks.append(stock)
+        self.centavos.append(centavos)
+        bisect.insort(self.por_nombre, (nombre.lower(), codigo))
+
+    def actualizar(self, codigo: str, datos: dict[str, Any]) -> int:
+        posicion = self.posiciones.get(codigo)
+        if posicion is None:
+            return 0
+        desconocidas = set(datos) - set(COLUMNAS)
+        if desconocidas:
+            raise RuntimeError(f'column "{desconocidas.pop()}" of relation "producto" does not exist')
+        nuevo = datos.get("codigo", codigo)
+        nombre = datos.get("nombre", self.nombres[posicion])
+        stock = int(datos["stock"]) if datos.get("stock") is not None else datos.get("stock", self.stocks[posicion])
+        centavos = (_a_centavos(datos["valorunitario"]) if datos.get("valorunitario") is not None
+                    else datos.get("valorunitario", self.centavos[posicion]))
+        self._validar(nuevo, nombre, stock, centavos)  # Todo se valida antes de tocar nada
+        if nuevo != codigo and nuevo in self.posiciones:
+            raise RuntimeError(f'duplicate key value violates unique constraint "producto_pkey" ({nuevo})')
+
+        self._quitar_nombre(self.nombres[posicion], codigo)
+        if nuevo != codigo:
+            del self.posiciones[codigo]
+            self.posiciones[nuevo] = posicion
+            self.codigos[posicion] = nuevo
+        self.nombres[posicion] = nombre
+        self.stocks[posicion] = stock
+        self.centavos[posicion] = centavos
+        bisect.insort(self.por_nombre, (nombre.lower(), nuevo))
+        return 1
+
+    def eliminar(self, codigo: str) -> int:
+        posicion = self.posiciones.pop(codigo, None)
+        if posicion is None:
+            return 0
+        self._quitar_nombre(self.nombres[posicion], codigo)
+        ultima = len(self.codigos) - 1
+        if posicion != ultima:                         # La última fila ocupa el hueco
+            for columna in (self.codigos, self.nombres, self.stocks, self.centavos):
+                columna[posicion] = columna[ultima]
+            self.posiciones[self.codigos[posicion]] = posicion
+        for columna in (self.codigos, self.nombres, self.stocks, self.centavos):
+            columna.pop()
+        return 1
+
+    def _quitar_nombre(self, nombre: str, codigo: str) -> None:
+        entrada = (nombre.lower(), codigo)
+        posicion = bisect.bisect_left(self.por_nombre, entrada)
+        if posicion < len(self.por_nombre) and self.por_nombre[posicion] == entrada:
+            del self.por_nombre[posicion]
+
+    def copiar(self) -> "AlmacenProductos":
+        """Copia completa (lote todo-o-nada: la memoria no tiene ROLLBACK)."""
+        copia = AlmacenProductos()
+        copia.codigos, copia.nombres = list(self.codigos), list(self.nombres)
+        copia.stocks, copia.centavos = array("q", self.stocks), array("q", self.centavos)
+        copia.posiciones, copia.por_nombre = dict(self.posiciones), list(self.por_nombre)
+        return copia
+
+    def sembrar(self, cantidad: int) -> None:
+        """Productos sintéticos PR00000001... (DB_MEMORIA_PRODUCTOS)."""
+        for i in range(1, cantidad + 1):
+            self.insertar(f"PR{i:08d}", f"Producto {i:08d}", i % 500, 1000 + (i * 7919) % 10_000_000)
+
+
+_ALMACENES: dict[str, AlmacenProductos] = {}
+# Un almacén por esquema, compartido por todo el proceso (como _ENGINES en PostgreSQL).
+
+
+class RepositorioProductoMemoria:
+    """Acceso a datos de producto en memoria. Cumple IRepositorioProducto por duck typing."""
+
+    def __init__(self, proveedor_conexion=None):
+        self._proveedor_conexion = proveedor_conexion  # Misma firma que los repositorios SQL (no se usa)
+
+    def _almacen(self, esquema: str | None) -> AlmacenProductos:
+        """Almacén del esquema: ?esquema= > inquilino > 'public'. Se crea al primer uso."""
+        nombre = self._nombre(esquema)
+        if not es_nombre_valido(nombre):
+            raise ErrorEsquemaInexistente(f"Nombre de esquema inválido: '{nombre}'")
+        almacen = _ALMACENES.get(nombre)
+        if almacen is None:
+            almacen = _ALMACENES[nombre] = AlmacenProductos()
+            if nombre == "public":
+                almacen.sembrar(get_settings().database.memoria_productos)
+        return almacen
+
+    # ── OPERACIÓN 1: LISTAR ──────────────────────────────────────────
+    async def obtener_todos(self, esquema=None, limite=None):
+        almacen = self._almacen(esquema)
+        return [almacen.diccionario(i) for i in range(min(limite or 1000, len(almacen)))]
+
+    # ── OPERACIÓN 1b: LISTAR EN COLUMNAS ─────────────────────────────
+    async def obtener_columnas(self, esquema=None, limite=None):
+        almacen = self._almacen(esquema)
+        return list(COLUMNAS), [almacen.fila(i) for i in range(min(limite or 1000, len(almacen)))]
+
+    # ── OPERACIÓN 2: BUSCAR POR CÓDIGO ───────────────────────────────
+    async def obtener_por_codigo(self, codigo, esquema=None):
+        almacen = self._almacen(esquema)
+        posicion = almacen.posiciones.get(str(codigo))
+        return [] if posicion is None else [almacen.diccionario(posicion)]
+
+    # ── OPERACIÓN 2b: BUSCAR POR PREFIJO DEL NOMBRE ──────────────────
+    async def buscar_por_nombre(self, prefijo, esquema=None, limite=None):
+        almacen = self._almacen(esquema)
+        return [almacen.diccionario(i) for i in almacen.posiciones_prefijo(prefijo, limite or 50)]
+
+    # ── OPERACIÓN 3: CREAR ───────────────────────────────────────────
+    async def crear(self, datos, esquema=None):
+        almacen = self._almacen(esquema)
+        self._insertar(almacen, datos)
+        return True
+
+    def _insertar(self, almacen: AlmacenProductos, datos: dict[str, Any]) -> None:
+        desconocidas = set(datos) - set(COLUMNAS)
+        if desconocidas:
+            raise RuntimeError(f'column "{desconocidas.pop()}" of relation "producto" does not exist')
+        stock, valor = datos.get("stock"), datos.get("valorunitario")
+        almacen.insertar(datos.get("codigo"), datos.get("nombre"),
+                         None if stock is None else int(stock),
+                         None if valor is None else _a_centavos(valor))
+
+    # ── OPERACIÓN 4: ACTUALIZAR ──────────────────────────────────────
+    async def actualizar(self, codigo, datos, esquema=None):
+        return self._almacen(esquema).actualizar(str(codigo), datos)
+
+    # ── OPERACIÓN 4b: ACTUALIZAR PARCIAL ─────────────────────────────
+    async def actualizar_parcial(self, codigo, datos, esquema=None, retornar=False):
+        almacen = self._almacen(esquema)
+        posicion = almacen.posiciones.get(str(codigo))
+        if posicion is None:
+            return None
+        actual = almacen.diccionario(posicion)
+        nuevos = {k: (_a_centavos(v) / 100 if k == "valorunitario" and v is not None
+                      else int(v) if k == "stock" and v is not None else v)
+                  for k, v in datos.items()}           # Mismo redondeo que guardaría la tabla
+        filas = almacen.actualizar(str(codigo), datos) if any(
+            actual.get(k) != v for k, v in nuevos.items()
+        ) else 0                                       # IS DISTINCT FROM: sin cambios no se escribe
+        return {"filasAfectadas": filas,
+                "fila": almacen.diccionario(almacen.posiciones[str(codigo)]) if retornar else None}
+
+    # ── OPERACIÓN 5: ELIMINAR ────────────────────────────────────────
+    async def eliminar(self, codigo, esquema=None):
+        return self._almacen(esquema).eliminar(str(codigo))
+
+    # ── OPERACIÓN 6: LOTE ────────────────────────────────────────────
+    async def ejecutar_lote(self, operaciones, esquema=None, todo_o_nada=True):
+        """Mismo resultado que BaseRepositorioPostgreSQL._ejecutar_lote()."""
+        almacen = self._almacen(esquema)
+        respaldo = almacen.copiar() if todo_o_nada else None
+        resultados: list[dict[str, Any]] = []
+        for indice, operacion in enumerate(operaciones):
+            resultado = {"indice": indice, "operacion": operacion.get("operacion"),
+                         "codigo": operacion.get("codigo")}
+            resultados.append(resultado)
+            try:
+                filas = self._aplicar(almacen, operacion)
+            except Exception as ex:
+                resultado.update(estado="error", error=str(ex))
+                if todo_o_nada:
+                    break
+                continue                               # Cada operación es atómica: nada que deshacer
+            resultado.update(estado="ok", filasAfectadas=filas)
+
+        confirmado = not (todo_o_nada and any(r["estado"] == "error" for r in resultados))
+        if not confirmado:
+            _ALMACENES[self._nombre(esquema)] = respaldo  # "ROLLBACK": vuelve la copia previa
+            for resultado in resultados:
+                if resultado["estado"] == "ok":
+                    resultado["estado"] = "revertida"
+            for indice in range(len(resultados), len(operaciones)):
+                resultados.append({"indice": indice, "operacion": operaciones[indice].get("operacion"),
+                                   "codigo": operaciones[indice].get("codigo"), "estado": "omitida"})
+        return {
+            "confirmado": confirmado,
+            "exitosas": sum(1 for r in resultados if r["estado"] == "ok"),
+            "fallidas": sum(1 for r in resultados if r["estado"] == "error"),
+            "resultados": resultados,
+        }
+
+    def _nombre(self, esquema: str | None) -> str:
+        return (esquema or inquilino_actual() or "public").strip()
+
+    def _aplicar(self, almacen: AlmacenProductos, operacion: dict[str, Any]) -> int:
+        tipo = operacion["operacion"]
+        if tipo == "crear":
+            self._insertar(almacen, operacion["datos"])
+            return 1
+        if tipo == "actualizar":
+            filas = almacen.actualizar(str(operacion["codigo"]), operacion["datos"])
+        else:                                          # "eliminar"
+            filas = almacen.eliminar(str(operacion["codigo"]))
+        if filas == 0:                                 # En un lote, "no existe" es un error
+            raise LookupError(f"No existe producto con codigo = {operacion['codigo']}")
+        return filas
+
+    # ── OPERACIÓN 7: CREAR MASIVO ────────────────────────────────────
+    async def crear_masivo(self, filas, esquema=None):
+        """Inserta tuplas (codigo, nombre, stock, valorunitario); omite los códigos existentes."""
+        almacen = self._almacen(esquema)
+        insertados = []
+        for codigo, nombre, stock, valor in filas:     # Ya validadas (servicios/validacion_masiva.py)
+            if codigo not in almacen.posiciones:       # ON CONFLICT (codigo) DO NOTHING
+                almacen.insertar(codigo, nombre, stock, _a_centavos(valor))
+                insertados.append(codigo)
+        return insertados
@@ -1,8 +1,15 @@
 """Repositorio de producto para PostgreSQL."""
 
+from sqlalchemy import text
+
 from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
 # Importa la clase base que tiene toda la lógica SQL genérica.
 # Al heredar de ella, obtenemos los 5 métodos protegidos (_obtener_filas, etc.).
+from repositorios.resiliencia import reintentable  # Reintentos de errores transitorios de la BD
+from repositorios.producto.catalogo_producto import catalogo_producto
+# Réplica en memoria (CATALOGO_HABILITADO=True): lecturas sin ir a PostgreSQL.
+from servicios.inquilinos import inquilino_actual
+from servicios.metricas import metricas
 
 
 class RepositorioProductoPostgreSQL(BaseRepositorioPostgreSQL):
@@ -13,21 +20,79 @@ class RepositorioProductoPostgreSQL(BaseRepositorioPostgreSQL):
     TABLA = "producto"                     # Nombre de la tabla en la BD
     CLAVE_PRIMARIA = "codigo"              # Nombre de la columna PK
 
+    # ── CATÁLOGO EN MEMORIA ──────────────────────────────────────────
+    def _catalogo(self, esquema):
+        """El catálogo en memoria si puede responder por este esquema; si no, None."""
+        # Solo replica public.producto: otros esquemas e inquilinos van a la BD.
+        if (esquema or inquilino_actual() or "public").strip() != "public":
+            return None
+        if not catalogo_producto.vigente():        # Desactivado, sin conexión o desfase excedido
+            metricas.incrementar("catalogo_lecturas_total", origen="bd")
+            return None
+        metricas.incrementar("catalogo_lecturas_total", origen="memoria")
+        return catalogo_producto
+
+    def _a_diccionarios(self, columnas, filas):
+        """Filas del catálogo → mismo formato que _obtener_filas()."""
+        return [
+            {col: self._serializar_valor(fila[i]) for i, col in enumerate(columnas)}
+            for fila in filas
+        ]
+
     # ── OPERACIÓN 1: LISTAR ──────────────────────────────────────────
     async def obtener_todos(self, esquema=None, limite=None):
         """Obtiene todos los productos."""
+        catalogo = self._catalogo(esquema)
+        if catalogo is not None:                   # Desde memoria: sin SQL
+            return self._a_diccionarios(catalogo.columnas, catalogo.listar(limite or 1000))
         return await self._obtener_filas(self.TABLA, esquema, limite)
     # Delega a la clase base → SELECT * FROM "public"."producto" LIMIT 1000
 
+    # ── OPERACIÓN 1b: LISTAR EN COLUMNAS ─────────────────────────────
+    async def obtener_columnas(self, esquema=None, limite=None):
+        """Obtiene los productos como (columnas, filas) para Arrow/MessagePack."""
+        catalogo = self._catalogo(esquema)
+        if catalogo is not None:
+            return list(catalogo.columnas), catalogo.listar(limite or 1000)
+        return await self._obtener_columnas(self.TABLA, esquema, limite or 1000)
+    # Mismo LIMIT por defecto que obtener_todos(): solo cambia el formato del resultado.
+
     # ── OPERACIÓN 2: BUSCAR POR CÓDIGO ───────────────────────────────
     async def obtener_por_codigo(self, codigo, esquema=None):
         """Obtiene un producto por su codigo."""
+        catalogo = self._catalogo(esquema)
+        if catalogo is not None:
+            fila = catalogo.obtener(str(codigo))   # O(1): búsqueda en dict
+            return self._a_diccionarios(catalogo.columnas, [fila] if fila else [])
         return await self._obtener_por_clave(
             self.TABLA, self.CLAVE_PRIMARIA, str(codigo), esquema
         )
     # str(codigo): convierte a string por seguridad.
     # → SELECT * FROM "public"."producto" WHERE "codigo" = :valor
 
+    # ── OPERACIÓN 2b: BUSCAR POR PREFIJO DEL NOMBRE ──────────────────
+    @reintentable()
+    async def buscar_por_nombre(self, prefijo, esquema=None, limite=None):
+        """Productos cuyo nombre empieza por 'prefijo' (sin distinguir mayúsculas)."""
+        limite_final = limite or 50
+        catalogo = self._catalogo(esquema)
+        if catalogo is not None:                   # Índice ordenado por nombre: bisect
+            return self._a_diccionarios(catalogo.columnas, catalogo.buscar_prefijo(prefijo, limite_final))
+
+        esquema_final = await self._resolver_esquema(esquema)
+        sql = self._sentencia(esquema_final, ("buscar_nombre", self.TABLA), lambda: text(f'''
+            SELECT * FROM "{esquema_final}"."{self.TABLA}"
+            WHERE lower("nombre") LIKE :patron ESCAPE '\\'
+            ORDER BY lower("nombre"), "codigo"
+            LIMIT :limite
+        '''))
+        patron = (prefijo.lower().replace("\\", "\\\\")
+                  .replace("%", "\\%").replace("_", "\\_")) + "%"
+        # Escapa los comodines de LIKE: "50%" busca literalmente "50%".
+        async with self._conexion(esquema=esquema_final) as conn:
+            result = await self._ejecutar(conn, sql, {"patron": patron, "limite": limite_final})
+            return self._a_diccionarios(list(result.keys()), result.fetchall())
+
     # ── OPERACIÓN 3: CREAR ───────────────────────────────────────────
     async def crear(self, datos, esquema=None):
         """Crea un nuevo producto."""
@@ -43,6 +108,15 @@ class RepositorioProductoPostgreSQL(BaseRepositorioPostgreSQL):
         )
     # → UPDATE "public"."producto" SET ... WHERE "codigo" = :valor_clave
 
+    # ── OPERACIÓN 4b: ACTUALIZAR PARCIAL ─────────────────────────────
+    async def actualizar_parcial(self, codigo, datos, esquema=None, retornar=False):
+        """Actualiza solo las columnas enviadas, y solo si alguna cambia."""
+        return await self._actualizar_parcial(
+            self.TABLA, self.CLAVE_PRIMARIA, str(codigo), datos, esquema, retornar
+        )
+    # → UPDATE ... SET "stock" = :stock WHERE "codigo" = :valor_clave
+    #   AND ("stock" IS DISTINCT FROM :stock)
+
     # ── OPERACIÓN 5: ELIMINAR ────────────────────────────────────────
     async def eliminar(self, codigo, esquema=None):
         """Elimina un producto por su codigo."""
@@ -50,3 +124,51 @@ class RepositorioProductoPostgreSQL(BaseRepositorioPostgreSQL):
             self.TABLA, self.CLAVE_PRIMARIA, str(codigo), esquema
         )
     # → DELETE FROM "public"."producto" WHERE "codigo" = :valor_clave
+
+    # ── OPERACIÓN 6: LOTE ────────────────────────────────────────────
+    async def ejecutar_lote(self, operaciones, esquema=None, todo_o_nada=True):
+        """Ejecuta crear/actualizar/eliminar en una sola conexión y transacción."""
+        async def aplicar(operacion, conn, esquema_final):
+            tipo = operacion["operacion"]
+            if tipo == "crear":
+                creado = await self._crear(self.TABLA, operacion["datos"], esquema_final, conn)
+                return 1 if creado else 0
+            if tipo == "actualizar":
+                filas = await self._actualizar(
+                    self.TABLA, self.CLAVE_PRIMARIA, str(operacion["codigo"]),
+                    operacion["datos"], esquema_final, conn
+                )
+            else:                                  # "eliminar"
+                filas = await self._eliminar(
+                    self.TABLA, self.CLAVE_PRIMARIA, str(operacion["codigo"]), esquema_final, conn
+                )
+            if filas == 0:                         # En un lote, "no existe" es un error
+                raise LookupError(f"No existe producto con codigo = {operacion['codigo']}")
+            return filas
+
+        return await self._ejecutar_lote(operaciones, aplicar, todo_o_nada, esquema)
+    # N operaciones → 1 conexión, 1 BEGIN y 1 COMMIT (en vez de N de cada uno).
+
+    # ── OPERACIÓN 7: CREAR MASIVO ────────────────────────────────────
+    @reintentable(idempotente=False)
+    async def crear_masivo(self, filas, esquema=None):
+        """Inserta tuplas (codigo, nombre, stock, valorunitario). Retorna los códigos insertados."""
+        esquema_final = await self._resolver_esquema(esquema)
+        sql = self._sentencia(esquema_final, ("crear_masivo",), lambda: text(f'''
+            INSERT INTO "{esquema_final}"."producto" (codigo, nombre, stock, valorunitario)
+            SELECT * FROM unnest(
+                CAST(:codigos AS varchar[]), CAST(:nombres AS varchar[]),
+                CAST(:stocks AS integer[]), CAST(:valores AS numeric[])
+            )
+            ON CONFLICT (codigo) DO NOTHING
+            RETURNING codigo
+        '''))
+        # Las tuplas viajan como 4 arreglos (uno por columna): UNA sentencia y UN
+        # viaje a la BD para miles de filas, sin dicts ni detección de tipos por columna.
+        # ON CONFLICT DO NOTHING: los códigos que ya existen no abortan el resto.
+        codigos, nombres, stocks, valores = (list(c) for c in zip(*filas)) if filas else ([], [], [], [])
+        async with self._conexion(transaccion=True, esquema=esquema_final) as conn:
+            result = await self._ejecutar(conn, sql, {
+                "codigos": codigos, "nombres": nombres, "stocks": stocks, "valores": valores
+            })
+            return [fila[0] for fila in result.fetchall()]
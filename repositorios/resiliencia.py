@@ -0,0 +1,203 @@
+"""
+resiliencia.py — Errores transitorios de la BD: clasificación, reintentos y circuito.
+
+Antes todo error de PostgreSQL terminaba en RuntimeError → 500, igual una
+violación de llave que una conexión cortada por un failover; y durante el
+failover cada petición esperaba su propio timeout de conexión.
+
+- clasificar(): separa lo TRANSITORIO (conexión caída o rechazada, BD
+  reiniciando, réplica de solo lectura tras un failover, conflicto de
+  serialización o deadlock) de lo PERMANENTE (datos inválidos, SQL, permisos).
+  _conexion() convierte lo transitorio en ErrorBDTransitoria (503).
+- @reintentable: reintenta la operación completa con espera exponencial y
+  jitter (los workers no reintentan todos a la vez), sin pasarse del plazo.
+  Lecturas: siempre. Escrituras: solo si la sentencia no llegó al servidor
+  (falló al conectar) o PostgreSQL abortó la transacción entera (40001/40P01);
+  una conexión cortada a mitad de un COMMIT no se sabe si confirmó → no se repite.
+- Circuito (uno por engine): tras RESILIENCIA_UMBRAL_FALLOS fallos de conexión
+  seguidos se abre y las peticiones fallan de inmediato (503 + Retry-After) en
+  vez de hacer cola esperando conexiones imposibles. Pasada la espera deja
+  pasar UNA petición de prueba: si funciona se cierra, si no se reabre con el
+  doble de espera (hasta RESILIENCIA_APERTURA_MAXIMA).
+
+Métricas: bd_errores_transitorios_total, bd_reintentos_total,
+circuito_rechazos_total, circuito_transiciones_total y el estado de cada
+circuito en "recolectadas".
+"""
+
+import asyncio
+import functools
+import math
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import exc as sa_exc
+
+from config import get_settings
+from servicios.excepciones import ErrorBDTransitoria, ErrorCircuitoAbierto
+from servicios.metricas import metricas
+from servicios.plazos import plazo_actual
+
+
+_SQLSTATE_SERIALIZACION = {"40001", "40P01"}       # serialization_failure, deadlock_detected
+_SQLSTATE_CONEXION = {
+    "57P01", "57P02", "57P03",                     # admin/crash shutdown, cannot_connect_now (arrancando)
+    "53300",                                       # too_many_connections
+    "25006",                                       # read_only_sql_transaction: primario degradado a réplica
+}
+# Además toda la clase 08 (connection_exception). El resto (23xxx llaves y CHECK,
+# 42xxx SQL, 28xxx credenciales...) es permanente: reintentar daría el mismo error.
+
+
+def clasificar(ex: BaseException, conectada: bool) -> str | None:
+    """'conexion', 'serializacion' o None (permanente)."""
+    if isinstance(ex, sa_exc.DBAPIError):
+        sqlstate = getattr(ex.orig, "sqlstate", None) or ""
+        if sqlstate in _SQLSTATE_SERIALIZACION:
+            return "serializacion"
+        if ex.connection_invalidated or sqlstate.startswith("08") or sqlstate in _SQLSTATE_CONEXION:
+            return "conexion"                      # connection_invalidated: SQLAlchemy vio la conexión muerta
+        return None
+    if isinstance(ex, OSError) and not conectada:  # Rechazada, host caído, timeout al conectar
+        return "conexion"                          # (durante la sentencia asyncpg ya llega como DBAPIError)
+    return None
+
+
+# ── Circuito ─────────────────────────────────────────────────────────
+
+class Circuito:
+    """Circuit breaker de UNA base de datos: cerrado → abierto → semiabierto → cerrado."""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.estado = "cerrado"
+        self.fallos_seguidos = 0
+        self.aperturas_seguidas = 0                # Cada reapertura seguida duplica la espera
+        self.abierto_hasta = 0.0                   # time.monotonic()
+        self.sonda_en_curso = False
+
+    def permitir(self) -> bool:
+        """Deja pasar la petición (True si es la de prueba) o lanza ErrorCircuitoAbierto."""
+        if self.estado == "cerrado":
+            return False
+        restante = self.abierto_hasta - time.monotonic()
+        if self.estado == "abierto" and restante > 0:
+            self._rechazar(restante)
+        if self.sonda_en_curso:                    # Semiabierto: ya hay una prueba en vuelo
+            self._rechazar(1)
+        self._cambiar("semiabierto")
+        self.sonda_en_curso = True
+        return True
+
+    def registrar(self, exito: bool | None, sonda: bool) -> None:
+        """exito: True (la BD respondió), False (fallo de conexión), None (no se sabe)."""
+        if sonda:
+            self.sonda_en_curso = False
+        if exito is None:                          # Cupo agotado, cancelación...: no dice nada de la BD
+            return
+        umbral = get_settings().resiliencia.umbral_fallos
+        if exito:
+            self.fallos_seguidos = 0
+            if sonda:
+                self.aperturas_seguidas = 0
+                self._cambiar("cerrado")
+            return
+        self.fallos_seguidos += 1
+        if sonda or (self.estado == "cerrado" and umbral > 0 and self.fallos_seguidos >= umbral):
+            self._abrir()
+
+    def _abrir(self) -> None:
+        config = get_settings().resiliencia
+        espera = min(config.apertura * 2 ** self.aperturas_seguidas, config.apertura_maxima)
+        self.aperturas_seguidas += 1
+        self.abierto_hasta = time.monotonic() + espera * random.uniform(0.8, 1.2)
+        # ±20%: los workers no prueban la BD todos en el mismo instante.
+        self._cambiar("abierto")
+
+    def _cambiar(self, estado: str) -> None:
+        if estado != self.estado:
+            self.estado = estado
+            metricas.incrementar("circuito_transiciones_total", circuito=self.nombre, estado=estado)
+
+    def _rechazar(self, restante: float) -> None:
+        metricas.incrementar("circuito_rechazos_total", circuito=self.nombre)
+        raise ErrorCircuitoAbierto(
+            "La base de datos no responde (circuito abierto); no se intentó la consulta.",
+            retry_after=max(1, math.ceil(restante))
+        )
+
+    def describir(self) -> dict[str, Any]:
+        return {
+            "estado": self.estado,
+            "fallos_seguidos": self.fallos_seguidos,
+            "reabre_en": round(max(0.0, self.abierto_hasta - time.monotonic()), 2)
+                         if self.estado == "abierto" else 0.0,
+        }
+
+
+_CIRCUITOS: dict[str, Circuito] = {}
+# Uno por cadena de conexión (como _ENGINES): compartido por todos los repositorios del proceso.
+
+
+def circuito_para(cadena: str) -> Circuito:
+    """Circuito de la BD de esa cadena (se crea la primera vez)."""
+    circuito = _CIRCUITOS.get(cadena)
+    if circuito is None:
+        circuito = _CIRCUITOS[cadena] = Circuito(f"bd_{len(_CIRCUITOS)}")
+        # Nombre por índice, como los pools: la cadena lleva la contraseña.
+    return circuito
+
+
+def _estado_circuitos() -> dict[str, Any]:
+    """Recolector de métricas: estado de cada circuito."""
+    return {"circuitos": {c.nombre: c.describir() for c in _CIRCUITOS.values()}}
+
+
+metricas.registrar_recolector(_estado_circuitos)
+
+
+# ── Reintentos ───────────────────────────────────────────────────────
+
+_reintentando: ContextVar[bool] = ContextVar("reintentando", default=False)
+# Solo reintenta la operación más externa: si _obtener_por_clave ya reintenta,
+# el _tipos_columnas que llama por dentro no multiplica los intentos (3 × 3).
+
+
+def espera_con_jitter(intento: int) -> float:
+    """Segundos antes del intento siguiente: aleatorio en [0, base · 2^(intento-1)] ('full jitter')."""
+    config = get_settings().resiliencia
+    return random.uniform(0, min(config.espera_maxima, config.espera_base * 2 ** (intento - 1)))
+
+
+def reintentable(idempotente: bool = True):
+    """Decorador de métodos de repositorio: reintenta los ErrorBDTransitoria seguros de repetir."""
+    def decorar(metodo: Callable[..., Awaitable[Any]]):
+        @functools.wraps(metodo)
+        async def envoltura(*args, **kwargs):
+            if _reintentando.get():                # Dentro de otra operación reintentable
+                return await metodo(*args, **kwargs)
+            token = _reintentando.set(True)
+            try:
+                intento = 1
+                while True:
+                    try:
+                        return await metodo(*args, **kwargs)
+                    except ErrorCircuitoAbierto:
+                        raise                      # Fallar rápido es el objetivo: no se espera
+                    except ErrorBDTransitoria as ex:
+                        segura = idempotente or ex.causa == "serializacion" or not ex.enviada
+                        if not segura or intento >= get_settings().resiliencia.intentos:
+                            raise
+                        espera = espera_con_jitter(intento)
+                        plazo = plazo_actual()
+                        if plazo is not None and plazo.restante() <= espera:
+                            raise                  # No alcanza: mejor 503 ahora que 504 después
+                        metricas.incrementar("bd_reintentos_total", causa=ex.causa)
+                        await asyncio.sleep(espera)
+                        intento += 1
+            finally:
+                _reintentando.reset(token)
+        return envoltura
+    return decorar
@@ -0,0 +1,9 @@
+"""
+Repositorio de la cola de trabajos en segundo plano.
+
+Re-exporta la clase para permitir una ruta de import más corta:
+
+    from repositorios.trabajos import RepositorioTrabajosPostgreSQL
+"""
+
+from .repositorio_trabajos_postgresql import RepositorioTrabajosPostgreSQL
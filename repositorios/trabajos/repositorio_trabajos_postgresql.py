@@ -0,0 +1,168 @@
+"""Repositorio de la cola de trabajos (tabla public.trabajo, migración 003)."""
+
+import json
+from typing import Any
+
+from sqlalchemy import text
+
+from repositorios.base_repositorio_postgresql import BaseRepositorioPostgreSQL
+from repositorios.resiliencia import reintentable
+
+
+_COLUMNAS = """
+    id, tipo, parametros, inquilino, estado, progreso, resultado, error, intentos,
+    cancelar, propietario, creado, iniciado, latido, finalizado
+"""
+# Siempre public.trabajo: la cola es del sistema, no de cada inquilino
+# (el inquilino que pidió el trabajo queda en su columna).
+
+_SQL_CREAR = text(f"""
+    INSERT INTO public.trabajo (id, tipo, parametros, inquilino)
+    VALUES (:id, :tipo, CAST(:parametros AS jsonb), :inquilino)
+    RETURNING {_COLUMNAS}
+""")
+
+_SQL_CREAR_SI_NO_EXISTE = text(f"""
+    INSERT INTO public.trabajo (id, tipo, parametros, inquilino)
+    VALUES (:id, :tipo, CAST(:parametros AS jsonb), :inquilino)
+    ON CONFLICT (id) DO NOTHING
+    RETURNING {_COLUMNAS}
+""")
+# Trabajos programados: todos los workers encolan el mismo id; solo el primero entra.
+
+_SQL_OBTENER = text(f"SELECT {_COLUMNAS} FROM public.trabajo WHERE id = :id")
+
+_SQL_CANCELAR = text(f"""
+    UPDATE public.trabajo
+    SET estado = CASE WHEN estado = 'pendiente' THEN 'cancelado' ELSE estado END,
+        finalizado = CASE WHEN estado = 'pendiente' THEN now() ELSE finalizado END,
+        cancelar = (estado = 'ejecutando')
+    WHERE id = :id AND estado IN ('pendiente', 'ejecutando')
+    RETURNING {_COLUMNAS}
+""")
+# Un pendiente se cancela aquí mismo; uno en curso lo cancela su worker en el próximo latido.
+
+_SQL_RECLAMAR = text(f"""
+    UPDATE public.trabajo
+    SET estado = 'ejecutando', propietario = :propietario, intentos = intentos + 1,
+        iniciado = now(), latido = now(), cancelar = FALSE
+    WHERE id = (
+        SELECT id FROM public.trabajo
+        WHERE estado = 'pendiente' AND tipo = ANY(:tipos)
+        ORDER BY creado
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING {_COLUMNAS}
+""")
+# FOR UPDATE SKIP LOCKED: dos workers que reclaman a la vez toman trabajos
+# distintos sin esperarse (ni tomar el mismo dos veces).
+
+_SQL_LATIDO = text("""
+    UPDATE public.trabajo
+    SET latido = now(), progreso = COALESCE(CAST(:progreso AS jsonb), progreso)
+    WHERE id = :id AND propietario = :propietario AND estado = 'ejecutando'
+    RETURNING cancelar
+""")
+
+_SQL_FINALIZAR = text("""
+    UPDATE public.trabajo
+    SET estado = :estado, resultado = CAST(:resultado AS jsonb), error = :error,
+        finalizado = now(), latido = now()
+    WHERE id = :id AND propietario = :propietario AND estado = 'ejecutando'
+""")
+
+_SQL_LIBERAR = text("""
+    UPDATE public.trabajo
+    SET estado = 'pendiente', propietario = NULL, intentos = GREATEST(intentos - 1, 0)
+    WHERE id = :id AND propietario = :propietario AND estado = 'ejecutando'
+""")
+# Interrumpido por un apagado ordenado: no cuenta como intento fallido.
+
+_SQL_RECUPERAR_HUERFANOS = text("""
+    UPDATE public.trabajo
+    SET estado = CASE WHEN intentos >= :max_intentos THEN 'fallido' ELSE 'pendiente' END,
+        error = CASE WHEN intentos >= :max_intentos
+                     THEN 'El worker que lo ejecutaba dejó de responder.' ELSE error END,
+        finalizado = CASE WHEN intentos >= :max_intentos THEN now() ELSE finalizado END,
+        propietario = NULL
+    WHERE estado = 'ejecutando'
+      AND latido < now() - make_interval(secs => :segundos)
+""")
+# El worker murió (kill -9, OOM, reinicio del contenedor): su trabajo vuelve a la cola.
+
+
+def _json(valor: Any) -> Any:
+    """jsonb llega como texto con text(); se decodifica una sola vez."""
+    return json.loads(valor) if isinstance(valor, str) else valor
+
+
+class RepositorioTrabajosPostgreSQL(BaseRepositorioPostgreSQL):
+    """Operaciones de la cola de trabajos. Cada método es una sola sentencia corta."""
+
+    @staticmethod
+    def _a_diccionario(fila) -> dict[str, Any] | None:
+        if fila is None:
+            return None
+        datos = dict(fila._mapping)
+        for campo in ("parametros", "progreso", "resultado"):
+            datos[campo] = _json(datos[campo])
+        for campo in ("creado", "iniciado", "latido", "finalizado"):
+            if datos[campo] is not None:
+                datos[campo] = datos[campo].isoformat()
+        return datos
+
+    @reintentable(idempotente=False)
+    async def _una_fila(self, sql, parametros: dict[str, Any]) -> dict[str, Any] | None:
+        async with self._conexion(transaccion=True) as conn:
+            resultado = await self._ejecutar(conn, sql, parametros)
+            return self._a_diccionario(resultado.first())
+
+    async def crear(self, id_trabajo, tipo, parametros, inquilino):
+        return await self._una_fila(_SQL_CREAR, {
+            "id": id_trabajo, "tipo": tipo,
+            "parametros": json.dumps(parametros), "inquilino": inquilino,
+        })
+
+    async def crear_si_no_existe(self, id_trabajo, tipo, parametros, inquilino):
+        return await self._una_fila(_SQL_CREAR_SI_NO_EXISTE, {
+            "id": id_trabajo, "tipo": tipo,
+            "parametros": json.dumps(parametros), "inquilino": inquilino,
+        })
+
+    async def obtener(self, id_trabajo):
+        return await self._una_fila(_SQL_OBTENER, {"id": id_trabajo})
+
+    async def cancelar(self, id_trabajo):
+        return await self._una_fila(_SQL_CANCELAR, {"id": id_trabajo})
+
+    async def reclamar(self, tipos, propietario):
+        return await self._una_fila(_SQL_RECLAMAR, {"tipos": list(tipos), "propietario": propietario})
+
+    async def latido(self, id_trabajo, propietario, progreso):
+        async with self._conexion(transaccion=True) as conn:
+            resultado = await self._ejecutar(conn, _SQL_LATIDO, {
+                "id": id_trabajo, "propietario": propietario,
+                "progreso": json.dumps(progreso, default=str) if progreso is not None else None,
+            })
+            fila = resultado.first()
+            return None if fila is None else bool(fila.cancelar)
+
+    async def finalizar(self, id_trabajo, propietario, estado, resultado=None, error=None):
+        async with self._conexion(transaccion=True) as conn:
+            await self._ejecutar(conn, _SQL_FINALIZAR, {
+                "id": id_trabajo, "propietario": propietario, "estado": estado,
+                "resultado": json.dumps(resultado, default=str) if resultado is not None else None,
+                "error": error,
+            })
+
+    async def liberar(self, id_trabajo, propietario):
+        async with self._conexion(transaccion=True) as conn:
+            await self._ejecutar(conn, _SQL_LIBERAR, {"id": id_trabajo, "propietario": propietario})
+
+    async def recuperar_huerfanos(self, segundos_sin_latido, max_intentos):
+        async with self._conexion(transaccion=True) as conn:
+            resultado = await self._ejecutar(conn, _SQL_RECUPERAR_HUERFANOS, {
+                "segundos": float(segundos_sin_latido), "max_intentos": max_intentos,
+            })
+            return resultado.rowcount
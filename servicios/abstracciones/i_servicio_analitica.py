@@ -0,0 +1,15 @@
+"""Contrato del servicio de analítica de ventas."""
+
+from datetime import date
+from typing import Any, Optional, Protocol
+
+
+class IServicioAnalitica(Protocol):
+    """Contrato del servicio de analítica."""
+
+    async def analizar(
+        self, esquema: Optional[str] = None,
+        desde: Optional[date] = None,          # Primer día incluido
+        hasta: Optional[date] = None           # Último día incluido
+    ) -> dict[str, Any]:                       # Resumen + clasificación ABC (cacheado)
+        ...
@@ -0,0 +1,12 @@
+"""Contrato del servicio de inicio de sesión."""
+
+from typing import Any, Protocol
+
+
+class IServicioAutenticacion(Protocol):
+    """Contrato del servicio de autenticación."""
+
+    async def iniciar_sesion(
+        self, email: str, contrasena: str
+    ) -> dict[str, Any]:                       # {access_token, token_type, expira_en, usuario, roles}
+        ...
@@ -0,0 +1,12 @@
+"""Contrato del servicio de autorización por ruta."""
+
+from typing import Any, Protocol
+
+
+class IServicioAutorizacion(Protocol):
+    """Contrato del servicio de autorización."""
+
+    async def compilar(
+        self, arbol: Any                       # ArbolRutas: plantillas de la API ya indexadas
+    ) -> Any:                                  # MatrizPermisos lista para decidir() por petición
+        ...
@@ -0,0 +1,21 @@
+"""Contrato del servicio de conteo de filas."""
+
+from typing import Any, Optional, Protocol
+
+
+class IServicioConteo(Protocol):
+    """Contrato del servicio de conteo."""
+
+    async def contar(
+        self, tabla: str,
+        modo: Optional[str] = None,            # exacto | estimado | mantenido (None: CONTEO_MODO_POR_DEFECTO)
+        esquema: Optional[str] = None,
+        filtro: Optional[str] = None,
+        parametros: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:                       # {tabla, modo, filas, exacto, vigencia_s} (cacheado)
+        ...
+
+    async def contar_productos_por_prefijo(
+        self, prefijo: str, modo: Optional[str] = None, esquema: Optional[str] = None
+    ) -> dict[str, Any]:
+        ...
@@ -0,0 +1,14 @@
+"""Contrato del servicio de exportación de tablas."""
+
+from typing import Protocol, Optional
+
+
+class IServicioExportacion(Protocol):
+    """Contrato del servicio de exportación."""
+
+    async def exportar(
+        self, tabla: str,                      # Debe estar en la lista blanca
+        esquema: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> tuple[list[str], list[tuple]]:
+        ...
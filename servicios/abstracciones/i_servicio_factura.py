@@ -0,0 +1,17 @@
+"""Contrato del servicio de facturas completas."""
+
+from typing import Any, Protocol
+
+
+class IServicioFactura(Protocol):
+    """Contrato del servicio de facturas completas."""
+
+    async def obtener_completa(
+        self, numero: int, esquema: str | None = None
+    ) -> bytes | None:                         # Documento JSON ya serializado (None = no existe)
+        ...
+
+    async def listar_completas(
+        self, despues: int | None = None, limite: int | None = None, esquema: str | None = None
+    ) -> dict[str, Any]:                       # {"datos": bytes, "total", "limite", "siguiente"}
+        ...
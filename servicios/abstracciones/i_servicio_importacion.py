@@ -0,0 +1,15 @@
+"""Contrato del servicio de importación masiva de productos."""
+
+from typing import Any, AsyncIterator, Optional, Protocol
+
+
+class IServicioImportacion(Protocol):
+    """Contrato del servicio de importación."""
+
+    async def importar(
+        self, flujo: AsyncIterator[bytes],     # Cuerpo de la petición, por trozos
+        formato: str,                          # "csv" o "ndjson"
+        esquema: Optional[str] = None,
+        id_importacion: Optional[str] = None   # None → se genera uno
+    ) -> dict[str, Any]:                       # Estado final (filas, resultado del merge)
+        ...
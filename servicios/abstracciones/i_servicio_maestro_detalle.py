@@ -0,0 +1,21 @@
+"""Contrato del servicio de operaciones maestro-detalle."""
+
+from typing import Any, Protocol
+
+
+class IServicioMaestroDetalle(Protocol):
+    """Contrato del servicio maestro-detalle. exito=false → ErrorProcedimiento."""
+
+    async def crear(self, nombre: str, maestro: dict[str, Any], detalles: list[dict[str, Any]],
+                    esquema: str | None = None) -> dict[str, Any]:
+        ...
+
+    async def obtener(self, nombre: str, clave: str, esquema: str | None = None) -> dict[str, Any]:
+        ...
+
+    async def actualizar(self, nombre: str, clave: str, maestro: dict[str, Any],
+                         detalles: list[dict[str, Any]], esquema: str | None = None) -> dict[str, Any]:
+        ...
+
+    async def eliminar(self, nombre: str, clave: str, esquema: str | None = None) -> dict[str, Any]:
+        ...
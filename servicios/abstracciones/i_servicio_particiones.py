@@ -0,0 +1,16 @@
+"""Contrato del servicio de particiones mensuales de facturas."""
+
+from datetime import date
+from typing import Any, Optional, Protocol
+
+
+class IServicioParticiones(Protocol):
+    """Contrato del servicio de particiones."""
+
+    async def mantener(
+        self, esquema: Optional[str] = None,
+        meses_adelante: Optional[int] = None,  # None: PARTICIONES_MESES_ADELANTE
+        meses_retencion: Optional[int] = None, # None: PARTICIONES_MESES_RETENCION (0 = no archivar)
+        hoy: Optional[date] = None
+    ) -> dict[str, Any]:                       # {creadas, archivadas, errores, esquema_archivo, hasta}
+        ...
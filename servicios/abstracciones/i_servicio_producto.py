@@ -16,6 +16,13 @@ class IServicioProducto(Protocol):
     ) -> list[dict[str, Any]]:
         ...
 
+    # ── OPERACIÓN 1b: LISTAR EN COLUMNAS ─────────────────────────────
+    async def listar_columnas(
+        self, esquema: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> tuple[list[str], list[tuple]]:        # (columnas, filas) para formatos columnares
+        ...
+
     # ── OPERACIÓN 2: BUSCAR POR CÓDIGO ───────────────────────────────
     async def obtener_por_codigo(
         self, codigo: str,                     # PK del producto (ej: "PR001")
@@ -23,6 +30,14 @@ class IServicioProducto(Protocol):
     ) -> list[dict[str, Any]]:
         ...
 
+    # ── OPERACIÓN 2b: BUSCAR POR NOMBRE ──────────────────────────────
+    async def buscar_por_nombre(
+        self, prefijo: str,                    # Inicio del nombre (ej: "lap")
+        esquema: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        ...
+
     # ── OPERACIÓN 3: CREAR ───────────────────────────────────────────
     async def crear(
         self, datos: dict[str, Any],           # Campos del producto
@@ -38,9 +53,33 @@ class IServicioProducto(Protocol):
     ) -> int:                                  # Filas afectadas
         ...
 
+    # ── OPERACIÓN 4b: ACTUALIZAR PARCIAL ─────────────────────────────
+    async def actualizar_parcial(
+        self, codigo: str,                     # PK del producto
+        datos: dict[str, Any],                 # Solo los campos enviados
+        esquema: Optional[str] = None,
+        retornar: bool = False                 # Incluir la fila final
+    ) -> Optional[dict[str, Any]]:             # None si no existe
+        ...
+
     # ── OPERACIÓN 5: ELIMINAR ────────────────────────────────────────
     async def eliminar(
         self, codigo: str,                     # PK del producto
         esquema: Optional[str] = None
     ) -> int:                                  # Filas eliminadas
         ...
+
+    # ── OPERACIÓN 6: LOTE ────────────────────────────────────────────
+    async def ejecutar_lote(
+        self, operaciones: list[dict[str, Any]],   # Operaciones en orden
+        esquema: Optional[str] = None,
+        todo_o_nada: bool = True
+    ) -> dict[str, Any]:                       # Resultado por operación
+        ...
+
+    # ── OPERACIÓN 7: CREAR MASIVO ────────────────────────────────────
+    async def crear_masivo(
+        self, cuerpo: bytes,                   # JSON crudo: lista de productos
+        esquema: Optional[str] = None
+    ) -> dict[str, Any]:                       # Insertadas, duplicadas y errores por fila
+        ...
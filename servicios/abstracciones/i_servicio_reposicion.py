@@ -0,0 +1,12 @@
+"""Contrato del servicio de reposición de stock."""
+
+from typing import Any, Optional, Protocol
+
+
+class IServicioReposicion(Protocol):
+    """Contrato del servicio de reposición."""
+
+    async def pronosticar(
+        self, esquema: Optional[str] = None
+    ) -> dict[str, Any]:                       # Pronóstico + punto de reorden de todo el catálogo
+        ...
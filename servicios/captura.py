@@ -0,0 +1,170 @@
+"""
+captura.py — Muestra de peticiones reales en disco, para reproducirlas después.
+
+Los benchmarks sintéticos no tienen la mezcla real de inquilinos, búsquedas
+y escrituras. El middleware de captura (middlewares/captura.py) arma un
+registro por petición muestreada y este módulo lo escribe:
+
+- Formato: una línea JSON por petición (claves cortas, ver abajo), en
+  archivos gzip captura-AAAAMMDD-HHMMSS-<pid>.ndjson.gz. Cada lote se
+  agrega como un miembro gzip nuevo: un corte a mitad solo pierde el lote
+  en curso y el archivo se sigue leyendo con gzip.open().
+- Un hilo aparte redacta, agrupa y comprime (como el exportador de
+  trazas): la petición solo paga un put() en la cola.
+- Redacción: en cuerpos JSON/NDJSON y en la query, el valor de los campos
+  de CAPTURA_REDACTAR se reemplaza por "***" a cualquier profundidad.
+  Authorization y Cookie nunca se guardan.
+
+Registro: {"t": inicio (epoch), "m": método, "p": ruta, "q": query,
+"i": inquilino, "h": {header: valor}, "b": cuerpo (texto), "nb": bytes del
+cuerpo no guardado, "e": estado, "d": milisegundos, "r": plantilla de la
+ruta, "n": bytes de la respuesta}. Las claves sin valor se omiten.
+"""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode
+
+from config import get_settings
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+REDACTADO = "***"
+
+TIPOS_CON_CUERPO = ("application/json", "application/x-ndjson")
+# Solo estos cuerpos se guardan (y se redactan). Otros (CSV, binarios): solo el tamaño.
+
+
+def _campos(lista: str) -> frozenset[str]:
+    """'a, B ,c' → {'a', 'b', 'c'}."""
+    return frozenset(c.strip().lower() for c in lista.split(",") if c.strip())
+
+
+def _redactar_valor(valor: Any, campos: frozenset[str]) -> Any:
+    """Copia de valor con los campos sensibles reemplazados, a cualquier profundidad."""
+    if isinstance(valor, dict):
+        return {k: REDACTADO if k.lower() in campos else _redactar_valor(v, campos)
+                for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_redactar_valor(v, campos) for v in valor]
+    return valor
+
+
+def redactar_cuerpo(cuerpo: bytes, tipo: str) -> str | None:
+    """Cuerpo JSON/NDJSON redactado como texto, o None si no se puede guardar."""
+    campos = _campos(get_settings().captura.redactar)
+    try:
+        texto = cuerpo.decode("utf-8")
+        if tipo.startswith("application/x-ndjson"):
+            return "\n".join(
+                json.dumps(_redactar_valor(json.loads(linea), campos), separators=(",", ":"),
+                           ensure_ascii=False)
+                for linea in texto.splitlines() if linea.strip()
+            )
+        return json.dumps(_redactar_valor(json.loads(texto), campos), separators=(",", ":"),
+                          ensure_ascii=False)
+    except ValueError:
+        return None                                    # No es JSON válido: no se guarda (podría tener secretos)
+
+
+def redactar_query(query: str) -> str:
+    """Query string con los parámetros sensibles redactados."""
+    campos = _campos(get_settings().captura.redactar)
+    pares = parse_qsl(query, keep_blank_values=True)
+    if not any(nombre.lower() in campos for nombre, _ in pares):
+        return query                                   # Caso común: tal cual, sin re-codificar
+    return urlencode([(n, REDACTADO if n.lower() in campos else v) for n, v in pares], safe="*")
+
+
+def preparar(registro: dict[str, Any]) -> dict[str, Any]:
+    """Registro final: redacta query y cuerpo (llegan crudos en "q" y "_cuerpo"/"_tipo")."""
+    cuerpo, tipo = registro.pop("_cuerpo", None), registro.pop("_tipo", "")
+    if registro.get("q"):
+        registro["q"] = redactar_query(registro["q"])
+    if cuerpo:
+        texto = (redactar_cuerpo(cuerpo, tipo)
+                 if tipo.startswith(TIPOS_CON_CUERPO) and len(cuerpo) <= get_settings().captura.max_cuerpo
+                 else None)
+        if texto is None:
+            registro["nb"] = len(cuerpo)               # Se sabe que tenía cuerpo: no se reproduce
+        else:
+            registro["b"] = texto
+    return registro
+
+
+class GrabadorCaptura:
+    """Escribe los registros de captura en archivos gzip desde un hilo aparte."""
+
+    def __init__(self):
+        self._cola: queue.Queue[dict[str, Any] | None] = queue.Queue()
+        self._hilo: threading.Thread | None = None
+
+    def iniciar(self) -> None:
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="grabador-captura", daemon=True)
+            self._hilo.start()
+
+    def detener(self) -> None:
+        """Escribe lo pendiente y termina (lo llama el apagado de la app)."""
+        if self._hilo is not None:
+            self._cola.put(None)
+            self._hilo.join(timeout=10)
+            self._hilo = None
+
+    def encolar(self, registro: dict[str, Any]) -> None:
+        if self._hilo is None:
+            return
+        if self._cola.qsize() >= get_settings().captura.max_cola:
+            metricas.incrementar("captura_descartadas_total")   # Disco atrasado: no crecer sin límite
+            return
+        self._cola.put(registro)
+
+    def _bucle(self) -> None:
+        ruta: Path | None = None
+        while True:
+            registro = self._cola.get()
+            lote = [registro] if registro is not None else []
+            while registro is not None and len(lote) < 1000:
+                try:                                   # Lo que ya esté en cola va en el mismo lote
+                    registro = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if registro is not None:
+                    lote.append(registro)
+            ruta = self._escribir(lote, ruta)
+            if registro is None:                       # detener()
+                return
+            time.sleep(0.5)                            # Lotes más grandes: mejor compresión
+
+    def _escribir(self, lote: list[dict[str, Any]], ruta: Path | None) -> Path | None:
+        """Agrega el lote como un miembro gzip; rota el archivo al pasar CAPTURA_MAX_MB."""
+        if not lote:
+            return ruta
+        config = get_settings().captura
+        try:
+            if ruta is None or not ruta.exists() or ruta.stat().st_size >= config.max_mb * 1024 * 1024:
+                carpeta = Path(config.directorio)
+                carpeta.mkdir(parents=True, exist_ok=True)
+                ruta = carpeta / f"captura-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.ndjson.gz"
+            lineas = "".join(json.dumps(preparar(r), separators=(",", ":"), ensure_ascii=False) + "\n"
+                             for r in lote)
+            with gzip.open(ruta, "at", encoding="utf-8") as archivo:
+                archivo.write(lineas)
+            metricas.incrementar("captura_peticiones_total", len(lote))
+        except Exception as ex:                        # Capturar nunca tumba la API
+            metricas.incrementar("captura_errores_escritura_total")
+            _log.warning("No se pudieron escribir %d peticiones capturadas (%s)", len(lote), ex)
+        return ruta
+
+
+grabador_captura = GrabadorCaptura()
+# Instancia única por worker (proceso).
@@ -0,0 +1,140 @@
+"""
+contrasenas.py — Verificación (y hash) de contraseñas BCrypt en un pool de procesos.
+
+bcrypt es lento A PROPÓSITO (~250-350 ms con costo 12): si se verifica en el
+event loop, cada inicio de sesión congela TODAS las peticiones del worker
+durante ese tiempo. Aquí la verificación corre en otros procesos:
+
+- Pool ACOTADO: AUTENTICACION_PROCESOS procesos (núcleos que se dedican a
+  hashear como máximo), creados la primera vez que se necesitan.
+- Cola ACOTADA: como máximo AUTENTICACION_MAX_EN_ESPERA verificaciones
+  esperando proceso. Más allá → ErrorServicioSaturado (503 + Retry-After):
+  una avalancha de logins no acumula trabajo sin límite.
+- Usuario inexistente: se verifica igual contra un hash ficticio, para que
+  el tiempo de respuesta no revele qué emails existen.
+- Contraseña heredada en texto plano: también se paga un bcrypt ficticio (el
+  tiempo no revela qué cuentas siguen sin hash) y solo se acepta con
+  AUTENTICACION_TEXTO_PLANO=True (el login la convierte a bcrypt).
+
+Este módulo solo importa bcrypt: es lo que carga cada proceso del pool
+(contexto "spawn": no hereda el event loop ni los hilos del worker).
+
+bcrypt es opcional (requirements.txt); sin él, el login responde 501.
+"""
+
+import asyncio
+import hmac
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:                                   # Dependencia opcional
+    import bcrypt
+except ImportError:                    # Sin bcrypt: POST /api/auth/login responde 501
+    bcrypt = None
+
+
+_HASH_FICTICIO = b"$2b$12$YhMNAwcTUIQSB5.tiXUuMu5Ce0jtoO7REPoti7x7peYOBbAsQ00Za"
+# Hash de una contraseña aleatoria descartada: mismo costo (12) que los reales.
+
+_PREFIJOS_BCRYPT = ("$2a$", "$2b$", "$2y$")
+_MAX_BYTES = 72                        # bcrypt solo usa los primeros 72 bytes (y bcrypt>=5 rechaza más)
+_COSTO = 12                            # Mismo costo que los hashes del esquema ($2a$12$...)
+
+
+def bcrypt_disponible() -> bool:
+    return bcrypt is not None
+
+
+def es_hash_bcrypt(valor: str) -> bool:
+    return valor.startswith(_PREFIJOS_BCRYPT)
+
+
+def _hashear(contrasena: bytes) -> bytes:
+    """Corre DENTRO de un proceso del pool."""
+    return bcrypt.hashpw(contrasena, bcrypt.gensalt(_COSTO))
+
+
+def _verificar(contrasena: bytes, hash_guardado: bytes) -> bool:
+    """Corre DENTRO de un proceso del pool (función de módulo: se envía por nombre)."""
+    try:
+        return bcrypt.checkpw(contrasena, hash_guardado)
+    except ValueError:                 # Hash mal formado en la BD
+        return False
+
+
+class VerificadorContrasenas:
+    """Pool de procesos acotado para bcrypt, compartido por todo el worker."""
+
+    def __init__(self):
+        self._pool: ProcessPoolExecutor | None = None
+        self._cupos: asyncio.Semaphore | None = None
+
+    def _obtener_pool(self, procesos: int, max_en_espera: int) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=procesos, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._cupos = asyncio.Semaphore(procesos + max_en_espera)
+        return self._pool
+
+    async def verificar(self, contrasena: str, hash_guardado: str | None) -> bool:
+        """True si la contraseña corresponde al hash. hash_guardado=None → usuario inexistente."""
+        from config import get_settings
+        from servicios.excepciones import ErrorDisponibilidad, ErrorServicioSaturado
+        # Imports tardíos: los procesos del pool importan este módulo y no necesitan config.
+
+        config = get_settings().autenticacion
+        clave = contrasena.encode("utf-8")
+        plano = hash_guardado is not None and not es_hash_bcrypt(hash_guardado)
+        # Contraseña heredada en texto plano (datos de ejemplo): se compara aparte, pero
+        # DESPUÉS del mismo bcrypt (ficticio) que cualquier otra verificación.
+
+        pool = self._obtener_pool(config.procesos, config.max_en_espera)
+        if self._cupos.locked():                       # Pool ocupado y cola llena: no se encola más
+            raise ErrorServicioSaturado("Demasiados inicios de sesión en curso.", retry_after=1)
+        async with self._cupos:
+            valida = len(clave) <= _MAX_BYTES and hash_guardado is not None and not plano
+            try:
+                coincide = await asyncio.get_running_loop().run_in_executor(
+                    pool, _verificar, clave[:_MAX_BYTES],
+                    (hash_guardado or "").encode("ascii") if valida else _HASH_FICTICIO
+                )
+            except BrokenProcessPool:                  # Un proceso murió: se recrea en la próxima
+                self.detener()
+                raise ErrorDisponibilidad("Pool de verificación de contraseñas reiniciado.", retry_after=1)
+            if plano:                                  # Comparación en tiempo constante, solo si se permite
+                return config.texto_plano and hmac.compare_digest(clave, hash_guardado.encode("utf-8"))
+            return valida and coincide
+            # Inválida de antemano (usuario inexistente, texto plano, contraseña > 72 bytes):
+            # se hashea igual contra el ficticio → mismo tiempo de respuesta que una errónea.
+
+    async def hashear(self, contrasena: str) -> str:
+        """Hash bcrypt de una contraseña nueva (crear/actualizar usuario), en el mismo pool."""
+        from config import get_settings
+        from servicios.excepciones import ErrorDisponibilidad, ErrorServicioSaturado
+
+        clave = contrasena.encode("utf-8")
+        if len(clave) > _MAX_BYTES:
+            raise ValueError(f"La contraseña no puede superar {_MAX_BYTES} bytes.")
+        config = get_settings().autenticacion
+        pool = self._obtener_pool(config.procesos, config.max_en_espera)
+        if self._cupos.locked():
+            raise ErrorServicioSaturado("Demasiadas operaciones de contraseña en curso.", retry_after=1)
+        async with self._cupos:
+            try:
+                resultado = await asyncio.get_running_loop().run_in_executor(pool, _hashear, clave)
+            except BrokenProcessPool:
+                self.detener()
+                raise ErrorDisponibilidad("Pool de verificación de contraseñas reiniciado.", retry_after=1)
+        return resultado.decode("ascii")
+
+    def detener(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._cupos = None
+
+
+verificador_contrasenas = VerificadorContrasenas()
+# Instancia única por worker (proceso).
@@ -0,0 +1,223 @@
+"""
+difusion_cambios.py — Reparto de cambios de stock y precio a muchos suscriptores.
+
+Las terminales de tienda consultaban GET /api/producto/ en bucle para ver
+el stock. Ahora se suscriben (SSE o WebSocket) y reciben solo los cambios.
+
+Flujo:
+    trigger de producto → NOTIFY → escucha_cambios (1 conexión por worker)
+        → DifusionCambiosProducto.al_notificar() → cada Suscripcion
+
+Decisiones:
+- Fan-out en el proceso: miles de suscriptores no abren miles de conexiones.
+- Contrapresión por cliente: cada suscripción guarda a lo sumo UN evento
+  pendiente por producto. Si un cliente lento se atrasa, sus cambios del
+  mismo producto se fusionan (stock/precio son valores absolutos: solo
+  importa el último) y la memoria por cliente queda acotada. Un cliente
+  lento nunca frena a los demás ni al listener.
+- Reanudación: cada evento lleva el 'seq' de una secuencia de la BD
+  (migración 002). Al reconectar, el cliente envía Last-Event-ID (o
+  ?desde=) y recibe lo que se perdió desde el historial reciente. Si el
+  historial no alcanza, recibe un evento 'reinicio' (debe recargar el
+  listado completo y seguir escuchando).
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from decimal import Decimal
+from typing import Any
+
+from config import get_settings
+from servicios.excepciones import ErrorServicioSaturado
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+_SQL_ULTIMA_SECUENCIA = """
+    SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM producto_cambios_seq
+"""
+
+
+def _numero(valor: Any) -> Any:
+    """Decimal → float, igual que el JSON del resto de la API."""
+    return float(valor) if isinstance(valor, Decimal) else valor
+
+
+class Suscripcion:
+    """Un cliente conectado al stream: eventos pendientes fusionados por producto."""
+
+    def __init__(self, codigos: set[str] | None, max_pendientes: int):
+        self.codigos = codigos                         # None = todos los productos
+        self._pendientes: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._max_pendientes = max_pendientes
+        self._senal = asyncio.Event()
+        self.reinicio: str | None = None               # Motivo si el cliente debe recargar todo
+
+    def entregar(self, delta: dict[str, Any]) -> None:
+        """Encola un cambio SIN esperar (lo llama el listener para cada suscriptor)."""
+        if self.codigos is not None and delta["codigo"] not in self.codigos:
+            return
+        previo = self._pendientes.pop(delta["codigo"], None)
+        if previo is not None:                         # Cliente atrasado: fusiona con el pendiente
+            delta = {**delta,                          # Valores nuevos del último, "anteriores" del primero
+                     "stockAnterior": previo["stockAnterior"],
+                     "valorunitarioAnterior": previo["valorunitarioAnterior"]}
+            metricas.incrementar("cambios_fusionados_total")
+        elif len(self._pendientes) >= self._max_pendientes:
+            self.pedir_reinicio("cliente demasiado atrasado")
+            return
+        self._pendientes[delta["codigo"]] = delta     # Al final: orden de llegada del último cambio
+        self._senal.set()
+
+    def pedir_reinicio(self, motivo: str) -> None:
+        self._pendientes.clear()                       # Lo pendiente ya no sirve: recargará todo
+        self.reinicio = motivo
+        self._senal.set()
+
+    async def siguientes(self, espera: float) -> list[dict[str, Any]]:
+        """Espera hasta 'espera' segundos y retorna los cambios pendientes ([] = latido)."""
+        if not self._pendientes and self.reinicio is None:
+            try:
+                await asyncio.wait_for(self._senal.wait(), espera)
+            except asyncio.TimeoutError:
+                return []
+        self._senal.clear()
+        eventos = list(self._pendientes.values())
+        self._pendientes.clear()
+        return eventos
+
+
+class DifusionCambiosProducto:
+    """Consumidor de escucha_cambios que reparte deltas de stock/precio."""
+
+    def __init__(self):
+        self._suscripciones: set[Suscripcion] = set()
+        self._historial: deque[dict[str, Any]] = deque()
+        self._cubre_desde: int | None = None           # Desde este seq el historial está completo
+        self._ultimo_seq = 0
+        self._secuencia_local = 0                      # Solo si falta la migración 002
+
+    @property
+    def suscriptores(self) -> int:
+        return len(self._suscripciones)
+
+    # ── Suscripciones ────────────────────────────────────────────────
+
+    def suscribir(self, desde: int | None = None, codigos: set[str] | None = None) -> Suscripcion:
+        """Nueva suscripción; con 'desde', primero recibe lo que se perdió."""
+        config = get_settings().cambios
+        if len(self._suscripciones) >= config.max_suscriptores:
+            raise ErrorServicioSaturado("Límite de suscriptores del stream alcanzado.", retry_after=5)
+
+        suscripcion = Suscripcion(codigos, config.historial)
+        if desde is not None:
+            self._reanudar(suscripcion, desde)
+        self._suscripciones.add(suscripcion)           # Sin await entre reanudar y registrar: sin huecos
+        metricas.fijar("cambios_suscriptores", len(self._suscripciones))
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        self._suscripciones.discard(suscripcion)
+        metricas.fijar("cambios_suscriptores", len(self._suscripciones))
+
+    def _reanudar(self, suscripcion: Suscripcion, desde: int) -> None:
+        """Reenvía los eventos posteriores a 'desde' o pide reinicio si ya no están."""
+        if self._cubre_desde is None or desde < self._cubre_desde:
+            suscripcion.pedir_reinicio("historial insuficiente para reanudar")
+            return
+        # Mismo worker: todo lo que llegó DESPUÉS del último evento visto (orden de commit).
+        # Otro worker: los seq mayores (los commits casi simultáneos pueden llegar desordenados).
+        posicion = next((i for i in range(len(self._historial) - 1, -1, -1)
+                         if self._historial[i]["seq"] == desde), None)
+        if posicion is not None:
+            pendientes = list(self._historial)[posicion + 1:]
+        else:
+            pendientes = [d for d in self._historial if d["seq"] > desde]
+        for delta in pendientes:
+            suscripcion.entregar(delta)
+
+    # ── Consumidor de escucha_cambios ────────────────────────────────
+
+    def al_conectar(self) -> None:
+        pass                                           # No hay carga que proteger
+
+    async def sincronizar(self, conexion) -> None:
+        """Tras (re)conectar: ¿se perdieron eventos mientras no había conexión?"""
+        try:
+            actual = await conexion.fetchval(_SQL_ULTIMA_SECUENCIA)
+        except Exception:                              # Sin migración 002: no hay reanudación entre workers
+            _log.warning("Falta database/migraciones/002_secuencia_cambios_producto.sql: "
+                         "el stream no podrá reanudarse por secuencia")
+            actual = self._ultimo_seq
+        if self._cubre_desde is not None and actual > self._ultimo_seq:
+            self._historial.clear()                    # Hubo cambios sin notificar: el historial tiene huecos
+            for suscripcion in self._suscripciones:
+                suscripcion.pedir_reinicio("cambios perdidos durante una reconexión")
+        if self._cubre_desde is None or actual > self._ultimo_seq:
+            self._cubre_desde = actual                 # Completo a partir de aquí
+        self._ultimo_seq = max(self._ultimo_seq, actual)
+
+    def al_notificar(self, evento: dict[str, Any]) -> None:
+        if "seq" not in evento:
+            self._secuencia_local += 1
+            evento = {**evento, "seq": self._secuencia_local}
+        self._ultimo_seq = max(self._ultimo_seq, evento["seq"])
+
+        if evento["op"] == "TRUNCATE":
+            self._historial.clear()
+            self._cubre_desde = evento["seq"]
+            for suscripcion in self._suscripciones:
+                suscripcion.pedir_reinicio("tabla producto vaciada")
+            return
+
+        delta = self._a_delta(evento)
+        if delta is None:
+            return                                     # Cambió otra columna (ej: nombre): no interesa
+
+        if len(self._historial) >= get_settings().cambios.historial:
+            self._cubre_desde = self._historial.popleft()["seq"]
+        self._historial.append(delta)
+        for suscripcion in self._suscripciones:       # Fan-out: O(suscriptores), sin await
+            suscripcion.entregar(delta)
+        metricas.incrementar("cambios_difundidos_total")
+
+    def al_desconectar(self) -> None:
+        pass                                           # sincronizar() detecta lo perdido al volver
+
+    @staticmethod
+    def _a_delta(evento: dict[str, Any]) -> dict[str, Any] | None:
+        """Evento del trigger → delta de stock/precio (None si no cambiaron)."""
+        fila = evento.get("fila") or {}
+        previa = evento.get("previa") or {}
+        if (evento["op"] == "UPDATE" and evento.get("anterior") == evento["codigo"]
+                and fila.get("stock") == previa.get("stock")
+                and fila.get("valorunitario") == previa.get("valorunitario")):
+            return None
+        delta = {
+            "seq": evento["seq"],
+            "op": evento["op"],                        # INSERT, UPDATE o DELETE
+            "codigo": evento["codigo"],
+            "stock": fila.get("stock"),                # None en DELETE
+            "stockAnterior": previa.get("stock"),      # None en INSERT
+            "valorunitario": _numero(fila.get("valorunitario")),
+            "valorunitarioAnterior": _numero(previa.get("valorunitario")),
+        }
+        if evento.get("anterior") not in (None, evento["codigo"]):
+            delta["codigoAnterior"] = evento["anterior"]
+        return delta
+
+    def estado(self) -> dict[str, Any]:
+        """Estado para /api/metricas/."""
+        return {"cambios_producto": {
+            "suscriptores": len(self._suscripciones),
+            "historial": len(self._historial),
+            "cubre_desde": self._cubre_desde,
+            "ultimo_seq": self._ultimo_seq,
+        }}
+
+
+difusion_cambios = DifusionCambiosProducto()
+# Instancia única por worker (proceso).
+metricas.registrar_recolector(difusion_cambios.estado)
@@ -0,0 +1,271 @@
+"""
+ejecutor_trabajos.py — Ejecución de trabajos en segundo plano dentro del worker.
+
+Las operaciones pesadas (exportar una tabla completa, importar un catálogo,
+reconstruir un reporte) no caben en una petición HTTP: el proxy corta a los
+60 s. Ahora la petición solo ENCOLA el trabajo (tabla 'trabajo', migración
+003) y responde 202; este ejecutor lo toma y lo corre.
+
+Flujo:
+    POST /api/trabajos → INSERT pendiente → despertar()
+    _bucle_cola:    reclama pendientes (SKIP LOCKED) mientras haya cupo
+    _bucle_latidos: cada TRABAJOS_LATIDO s guarda progreso, lee pedidos de
+                    cancelación y reencola trabajos huérfanos de otros workers
+    _bucle_programados: al arrancar y cada PARTICIONES_PROGRAMAR_CADA horas
+                    encola el mantenimiento de particiones (un id por período:
+                    con varios workers entra uno solo)
+
+Límites (para no acaparar el pool que atiende peticiones):
+- TRABAJOS_TRABAJADORES: trabajos simultáneos en el worker (0 = solo encola).
+- TRABAJOS_LIMITES / TRABAJOS_LIMITE_POR_TIPO: simultáneos por tipo. Solo se
+  reclaman tipos con cupo libre: una cola llena de importaciones no impide
+  que avance una exportación.
+
+Tipos de trabajo: se registran con el decorador @registrar_tipo (ver
+servicios/tareas_trabajos.py). La función recibe un ContextoTrabajo y
+retorna un dict con el resultado.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from config import get_settings
+from servicios.inquilinos import fijar_inquilino
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+
+class TipoTrabajo:
+    """Un tipo registrado: función que ejecuta y validación opcional de parámetros."""
+
+    def __init__(self, nombre: str, ejecutar: Callable[["ContextoTrabajo"], Awaitable[dict[str, Any]]],
+                 validar: Callable[[dict[str, Any]], dict[str, Any]] | None):
+        self.nombre = nombre
+        self.ejecutar = ejecutar
+        self.validar = validar                         # Corre al ENCOLAR: error → 400 inmediato
+
+
+TIPOS: dict[str, TipoTrabajo] = {}
+
+
+def registrar_tipo(nombre: str, validar: Callable[[dict[str, Any]], dict[str, Any]] | None = None):
+    """Decorador: @registrar_tipo("exportacion", validar=...) sobre una función async."""
+    def decorar(funcion):
+        TIPOS[nombre] = TipoTrabajo(nombre, funcion, validar)
+        return funcion
+    return decorar
+
+
+def ruta_trabajo(id_trabajo: str, sufijo: str) -> Path:
+    """Archivo de un trabajo en TRABAJOS_DIRECTORIO (resultado, archivo subido, ...)."""
+    directorio = Path(get_settings().trabajos.directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio / f"{id_trabajo}{sufijo}"
+
+
+class ContextoTrabajo:
+    """Lo que recibe la función de un trabajo."""
+
+    def __init__(self, trabajo: dict[str, Any]):
+        self.id: str = trabajo["id"]
+        self.tipo: str = trabajo["tipo"]
+        self.parametros: dict[str, Any] = trabajo["parametros"] or {}
+        self.inquilino: str | None = trabajo["inquilino"]
+        self.intentos: int = trabajo["intentos"]
+        self._progreso: dict[str, Any] | Callable[[], dict[str, Any] | None] | None = None
+        self.motivo_fin: str | None = None             # "cancelado", "apagado" o "perdido"
+
+    def fijar_progreso(self, progreso: dict[str, Any] | Callable[[], dict[str, Any] | None]) -> None:
+        """Progreso a publicar en el próximo latido (un dict, o una función que lo calcule)."""
+        self._progreso = progreso
+
+    def progreso(self) -> dict[str, Any] | None:
+        return self._progreso() if callable(self._progreso) else self._progreso
+
+    @property
+    def interrumpido(self) -> bool:
+        """True si se cortó por apagado o pérdida del trabajo: otro intento lo retomará."""
+        return self.motivo_fin in ("apagado", "perdido")
+
+
+class EjecutorTrabajos:
+    """Reclama y ejecuta trabajos de la cola con concurrencia acotada."""
+
+    def __init__(self):
+        self.propietario = f"{socket.gethostname()}:{os.getpid()}"
+        self._servicio = None
+        self._en_curso: dict[str, tuple[asyncio.Task, ContextoTrabajo]] = {}
+        self._tareas: list[asyncio.Task] = []
+        self._despertar: asyncio.Event | None = None
+
+    def despertar(self) -> None:
+        """Hay trabajo nuevo (o un cupo libre): reclamar sin esperar al próximo sondeo."""
+        if self._despertar is not None:
+            self._despertar.set()
+
+    # ── Ciclo de vida ────────────────────────────────────────────────
+
+    async def iniciar(self, servicio) -> None:
+        """Arranca los bucles de cola y latidos (servicio = ServicioTrabajos)."""
+        if self._tareas or get_settings().trabajos.trabajadores <= 0:
+            return                                     # Worker que solo encola
+        self._servicio = servicio
+        self._despertar = asyncio.Event()
+        self._tareas = [asyncio.create_task(self._bucle_cola()),
+                        asyncio.create_task(self._bucle_latidos())]
+        if get_settings().particiones.programar_cada > 0:
+            self._tareas.append(asyncio.create_task(self._bucle_programados()))
+
+    async def detener(self) -> None:
+        """Apagado ordenado: corta los trabajos en curso y los devuelve a la cola."""
+        for tarea in self._tareas:
+            tarea.cancel()
+        for tarea in self._tareas:
+            with suppress(asyncio.CancelledError):
+                await tarea
+        self._tareas = []
+        en_curso = list(self._en_curso.values())
+        for tarea, contexto in en_curso:
+            contexto.motivo_fin = "apagado"
+            tarea.cancel()
+        if en_curso:
+            await asyncio.gather(*(tarea for tarea, _ in en_curso), return_exceptions=True)
+
+    # ── Cola ─────────────────────────────────────────────────────────
+
+    def _tipos_con_cupo(self) -> list[str]:
+        config = get_settings().trabajos
+        ocupados: dict[str, int] = {}
+        for _, contexto in self._en_curso.values():
+            ocupados[contexto.tipo] = ocupados.get(contexto.tipo, 0) + 1
+        return [tipo for tipo in TIPOS
+                if ocupados.get(tipo, 0) < config.limites.get(tipo, config.limite_por_tipo)]
+
+    async def _bucle_cola(self) -> None:
+        config = get_settings().trabajos
+        while True:
+            self._despertar.clear()
+            try:
+                while len(self._en_curso) < config.trabajadores:
+                    tipos = self._tipos_con_cupo()
+                    if not tipos:
+                        break
+                    trabajo = await self._servicio.reclamar(tipos, self.propietario)
+                    if trabajo is None:                # Cola vacía para los tipos con cupo
+                        break
+                    self._lanzar(trabajo)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:                    # BD caída o sin migración 003: reintenta
+                _log.warning("No se pudo consultar la cola de trabajos (%s)", ex)
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._despertar.wait(), config.intervalo_sondeo)
+
+    def _lanzar(self, trabajo: dict[str, Any]) -> None:
+        contexto = ContextoTrabajo(trabajo)
+        tarea = asyncio.create_task(self._ejecutar(contexto))
+        self._en_curso[contexto.id] = (tarea, contexto)
+        metricas.fijar("trabajos_en_curso", len(self._en_curso))
+
+    async def _ejecutar(self, contexto: ContextoTrabajo) -> None:
+        """Corre un trabajo y registra cómo terminó."""
+        inicio = time.perf_counter()
+        estado = "fallido"
+        fijar_inquilino(contexto.inquilino)            # Mismo esquema que la petición que lo encoló
+        try:
+            resultado = await TIPOS[contexto.tipo].ejecutar(contexto)
+            estado = "completado"
+            await self._servicio.finalizar(contexto.id, self.propietario, estado, resultado=resultado)
+        except asyncio.CancelledError:
+            estado = contexto.motivo_fin or "cancelado"
+            with suppress(Exception):
+                if estado == "apagado":                # Lo retoma este u otro worker
+                    await self._servicio.liberar(contexto.id, self.propietario)
+                elif estado == "cancelado":
+                    await self._servicio.finalizar(contexto.id, self.propietario, "cancelado",
+                                                   error="Cancelado por el usuario.")
+                # "perdido": otro worker ya lo dio por huérfano; no se toca la fila.
+        except Exception as ex:
+            _log.exception("Trabajo %s (%s) fallido", contexto.id, contexto.tipo)
+            with suppress(Exception):
+                await self._servicio.finalizar(contexto.id, self.propietario, "fallido",
+                                               error=str(ex) or type(ex).__name__)
+        finally:
+            self._en_curso.pop(contexto.id, None)
+            metricas.fijar("trabajos_en_curso", len(self._en_curso))
+            metricas.incrementar("trabajos_total", tipo=contexto.tipo, estado=estado)
+            metricas.incrementar("trabajos_segundos_total", time.perf_counter() - inicio,
+                                 tipo=contexto.tipo)
+            self.despertar()                           # Cupo libre: reclamar el siguiente
+
+    # ── Latidos ──────────────────────────────────────────────────────
+
+    async def _bucle_latidos(self) -> None:
+        config = get_settings().trabajos
+        ultima_recuperacion = 0.0
+        while True:
+            await asyncio.sleep(config.latido)
+            try:
+                for id_trabajo, (tarea, contexto) in list(self._en_curso.items()):
+                    cancelar = await self._servicio.latido(id_trabajo, self.propietario, contexto.progreso())
+                    if (cancelar or cancelar is None) and not tarea.done():
+                        contexto.motivo_fin = "cancelado" if cancelar else "perdido"
+                        tarea.cancel()
+                if time.monotonic() - ultima_recuperacion >= config.latido * 3:
+                    ultima_recuperacion = time.monotonic()
+                    recuperados = await self._servicio.recuperar_huerfanos(
+                        config.latido * 3, config.max_intentos
+                    )
+                    if recuperados:
+                        _log.warning("%d trabajo(s) huérfano(s) devuelto(s) a la cola", recuperados)
+                        metricas.incrementar("trabajos_huerfanos_total", recuperados)
+                        self.despertar()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                _log.warning("No se pudo registrar el latido de los trabajos (%s)", ex)
+
+    # ── Programados ──────────────────────────────────────────────────
+
+    async def _bucle_programados(self) -> None:
+        config = get_settings().particiones
+        intervalo = config.programar_cada * 3600
+        while True:
+            periodo = int(time.time() // intervalo)      # Mismo número en todos los workers
+            for esquema in config.esquemas:
+                try:
+                    trabajo = await self._servicio.programar(
+                        "particiones", {"esquema": esquema, "programado": True},
+                        f"particiones-{esquema}-{periodo}"
+                    )
+                    if trabajo is not None:
+                        metricas.incrementar("trabajos_programados_total", tipo="particiones")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:                # BD caída o sin migración 003: próximo período
+                    _log.warning("No se pudo programar el mantenimiento de particiones de '%s' (%s)",
+                                 esquema, ex)
+            await asyncio.sleep((periodo + 1) * intervalo - time.time())
+        # Sin este bucle los meses nuevos solo aparecían con un POST manual: pasados
+        # PARTICIONES_MESES_ADELANTE meses, todo INSERT de factura fallaba sin partición.
+
+    def estado(self) -> dict[str, Any]:
+        """Estado para /api/metricas/."""
+        return {"trabajos": {
+            "propietario": self.propietario,
+            "activo": bool(self._tareas),
+            "en_curso": {id_trabajo: contexto.tipo for id_trabajo, (_, contexto) in self._en_curso.items()},
+        }}
+
+
+ejecutor_trabajos = EjecutorTrabajos()
+# Instancia única por worker (proceso).
+metricas.registrar_recolector(ejecutor_trabajos.estado)
@@ -0,0 +1,97 @@
+"""
+excepciones.py — Errores con traducción HTTP propia (disponibilidad, inquilinos).
+
+Los repositorios convierten cualquier error de la BD en RuntimeError
+(que el controller traduce a 500). Estos errores son la excepción:
+indican que la BD está sobrecargada o no responde a tiempo, y el
+controller los traduce a un código HTTP específico (503, 504...)
+para que el cliente sepa que puede reintentar más tarde.
+
+ErrorBDTransitoria: la BD falló de una forma que se arregla sola (conexión
+caída, failover, conflicto de serialización). Los repositorios la reintentan
+si es seguro; si no alcanza, 503. ErrorCircuitoAbierto: la BD está caída y
+ni se intenta (503 inmediato con Retry-After).
+
+ErrorEsquemaInexistente es un error del cliente: pidió un inquilino
+(esquema) que no existe → 400.
+
+ErrorProcedimiento: un procedimiento maestro-detalle (sp_*) respondió
+exito=false → 404, 409 o 400 según el error.
+
+ErrorNoSoportado: el proveedor configurado (DB_PROVIDER) no implementa la
+entidad pedida (ej: ?conteo= con DB_PROVIDER=memoria) → 501. Es un límite
+del servidor, no un error del cliente.
+
+ErrorCargaExcesiva: el cuerpo de una carga masiva trae más filas de las
+permitidas → 413. Se lanza a mitad de la validación, apenas se pasa el tope.
+"""
+
+
+class ErrorDisponibilidad(RuntimeError):
+    """Error temporal: la petición no se pudo atender, pero puede reintentarse."""
+    # Hereda de RuntimeError → el código existente que captura Exception sigue funcionando.
+
+    estado_http = 503                  # Código HTTP con el que el controller responde
+    mensaje_http = "Servicio no disponible temporalmente."
+
+    def __init__(self, mensaje: str, retry_after: int | None = None):
+        super().__init__(mensaje)
+        self.retry_after = retry_after # Segundos sugeridos antes de reintentar (header Retry-After)
+
+
+class ErrorServicioSaturado(ErrorDisponibilidad):
+    """No hay cupo: el pool de conexiones o el límite de la ruta están agotados."""
+    estado_http = 503                  # 503 Service Unavailable
+
+
+class ErrorPlazoExcedido(ErrorDisponibilidad):
+    """Se agotó el plazo de la petición (o el cliente se desconectó) y la consulta se canceló."""
+    estado_http = 504                  # 504 Gateway Timeout
+    mensaje_http = "Se agotó el tiempo de espera de la petición."
+
+
+class ErrorBDTransitoria(ErrorDisponibilidad):
+    """Error de la BD que no depende de los datos: reintentar puede funcionar."""
+    estado_http = 503
+    mensaje_http = "La base de datos no está disponible temporalmente."
+
+    def __init__(self, mensaje: str, causa: str, enviada: bool, retry_after: int | None = 1):
+        super().__init__(mensaje, retry_after)
+        self.causa = causa             # "conexion" (caída, failover) o "serializacion" (40001/40P01)
+        self.enviada = enviada         # False: falló al conectar, la sentencia nunca llegó al servidor
+
+
+class ErrorCircuitoAbierto(ErrorBDTransitoria):
+    """El circuito de la BD está abierto: se rechaza sin intentar conectar."""
+
+    def __init__(self, mensaje: str, retry_after: int):
+        super().__init__(mensaje, "circuito", enviada=False, retry_after=retry_after)
+
+
+class ErrorEsquemaInexistente(ValueError):
+    """El esquema (inquilino) pedido no existe en la base de datos."""
+    # Hereda de ValueError: es un error del cliente (400), no del servidor.
+
+
+class ErrorProcedimiento(ValueError):
+    """Un procedimiento almacenado respondió p_resultado.exito = false."""
+    # Error del cliente (registro inexistente, clave duplicada, datos inválidos):
+    # el procedimiento ya deshizo sus cambios. estado_http lo decide el servicio.
+
+    def __init__(self, mensaje: str, estado_http: int = 400):
+        super().__init__(mensaje)
+        self.estado_http = estado_http
+
+
+class ErrorNoSoportado(RuntimeError):
+    """El proveedor de datos configurado no implementa esta funcionalidad."""
+    # Hereda de RuntimeError, NO de ValueError: los controllers traducen ValueError
+    # a 400 y esto no es culpa del cliente.
+    estado_http = 501                  # 501 Not Implemented
+
+
+class ErrorCargaExcesiva(Exception):
+    """La carga masiva supera el máximo de filas por petición."""
+    # Hereda de Exception, NO de ValueError: pydantic convierte los ValueError de un
+    # validador en error de esa fila y seguiría con la lista; esta corta la validación.
+    estado_http = 413                  # 413 Content Too Large
@@ -7,7 +7,29 @@ Lee DB_PROVIDER del .env y crea el repositorio y servicio correspondientes.
 
 from servicios.conexion.proveedor_conexion import ProveedorConexion  # Lee configuración del .env
 from repositorios.producto import RepositorioProductoPostgreSQL      # Repo concreto para PostgreSQL
+from repositorios.producto import RepositorioProductoMemoria         # Repo en memoria (sin BD)
 from servicios.servicio_producto import ServicioProducto              # Servicio de negocio
+from repositorios.exportacion import RepositorioExportacionPostgreSQL
+from servicios.servicio_exportacion import ServicioExportacion
+from repositorios.importacion import RepositorioImportacionPostgreSQL
+from servicios.servicio_importacion import ServicioImportacion
+from repositorios.trabajos import RepositorioTrabajosPostgreSQL
+from servicios.servicio_trabajos import ServicioTrabajos
+from repositorios.analitica import RepositorioAnaliticaPostgreSQL
+from repositorios.autorizacion import RepositorioAutorizacionPostgreSQL
+from repositorios.maestro_detalle import RepositorioMaestroDetallePostgreSQL
+from repositorios.factura import RepositorioFacturaPostgreSQL
+from servicios.servicio_analitica import ServicioAnalitica
+from servicios.servicio_reposicion import ServicioReposicion
+from servicios.servicio_autorizacion import ServicioAutorizacion
+from servicios.servicio_autenticacion import ServicioAutenticacion
+from servicios.servicio_maestro_detalle import ServicioMaestroDetalle
+from servicios.servicio_factura import ServicioFactura
+from repositorios.conteo import RepositorioConteoPostgreSQL
+from servicios.servicio_conteo import ServicioConteo
+from repositorios.particiones import RepositorioParticionesPostgreSQL
+from servicios.servicio_particiones import ServicioParticiones
+from servicios.excepciones import ErrorNoSoportado                     # Proveedor sin la entidad → 501
 
 
 # =====================================================================
@@ -24,8 +46,8 @@ def _obtener_proveedor():
 def _crear_repo_entidad(repos_por_proveedor: dict, proveedor, nombre: str):
     """Instancia el repositorio específico según el proveedor activo."""
     clase = repos_por_proveedor.get(nombre)            # Busca la clase en el diccionario
-    if clase is None:                                  # Proveedor no soportado
-        raise ValueError(
+    if clase is None:                                  # Proveedor no soportado → 501 (no es culpa del cliente)
+        raise ErrorNoSoportado(
             f"Proveedor '{nombre}' no soportado para esta entidad. "
             f"Opciones: {list(repos_por_proveedor.keys())}"
         )
@@ -41,6 +63,7 @@ def _crear_repo_entidad(repos_por_proveedor: dict, proveedor, nombre: str):
 _REPOS_PRODUCTO = {
     "postgres": RepositorioProductoPostgreSQL,         # Proveedor → Clase de repositorio
     "postgresql": RepositorioProductoPostgreSQL,       # Alias: mismo repositorio
+    "memoria": RepositorioProductoMemoria,             # Sin BD: benchmarks de la capa Python y pruebas
 }
 # Para agregar MySQL en el futuro, solo agregas:
 #   "mysql": RepositorioProductoMysqlMariaDB,
@@ -54,3 +77,174 @@ def crear_servicio_producto() -> ServicioProducto:
     return ServicioProducto(repo)                      # 3. Inyecta repo en servicio
 # Esta es la ÚNICA función que el controller necesita llamar.
 # El controller no sabe qué BD se usa — la fábrica decide todo.
+
+
+# =====================================================================
+# FACTORY DE EXPORTACIÓN
+# =====================================================================
+
+_REPOS_EXPORTACION = {
+    "postgres": RepositorioExportacionPostgreSQL,
+    "postgresql": RepositorioExportacionPostgreSQL,
+}
+
+
+def crear_servicio_exportacion() -> ServicioExportacion:
+    """Crea el servicio de exportación de tablas."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_EXPORTACION, proveedor, nombre)
+    return ServicioExportacion(repo)
+
+
+# =====================================================================
+# FACTORY DE IMPORTACIÓN
+# =====================================================================
+
+_REPOS_IMPORTACION = {
+    "postgres": RepositorioImportacionPostgreSQL,
+    "postgresql": RepositorioImportacionPostgreSQL,
+}
+
+
+def crear_servicio_importacion() -> ServicioImportacion:
+    """Crea el servicio de importación masiva de productos."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_IMPORTACION, proveedor, nombre)
+    return ServicioImportacion(repo)
+
+
+# =====================================================================
+# FACTORY DE TRABAJOS EN SEGUNDO PLANO
+# =====================================================================
+
+_REPOS_TRABAJOS = {
+    "postgres": RepositorioTrabajosPostgreSQL,
+    "postgresql": RepositorioTrabajosPostgreSQL,
+}
+
+
+def crear_servicio_trabajos() -> ServicioTrabajos:
+    """Crea el servicio de la cola de trabajos."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_TRABAJOS, proveedor, nombre)
+    return ServicioTrabajos(repo)
+
+
+# =====================================================================
+# FACTORY DE ANALÍTICA DE VENTAS
+# =====================================================================
+
+_REPOS_ANALITICA = {
+    "postgres": RepositorioAnaliticaPostgreSQL,
+    "postgresql": RepositorioAnaliticaPostgreSQL,
+}
+
+
+def crear_servicio_analitica() -> ServicioAnalitica:
+    """Crea el servicio de analítica de ventas (ABC, ticket, canasta)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_ANALITICA, proveedor, nombre)
+    return ServicioAnalitica(repo)
+
+
+def crear_servicio_reposicion() -> ServicioReposicion:
+    """Crea el servicio de reposición de stock (usa el mismo repositorio de analítica)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_ANALITICA, proveedor, nombre)
+    return ServicioReposicion(repo)
+
+
+# =====================================================================
+# FACTORY DE AUTORIZACIÓN POR RUTA
+# =====================================================================
+
+_REPOS_AUTORIZACION = {
+    "postgres": RepositorioAutorizacionPostgreSQL,
+    "postgresql": RepositorioAutorizacionPostgreSQL,
+}
+
+
+def crear_servicio_autorizacion() -> ServicioAutorizacion:
+    """Crea el servicio que compila la matriz de permisos rol → ruta."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_AUTORIZACION, proveedor, nombre)
+    return ServicioAutorizacion(repo)
+
+
+# =====================================================================
+# FACTORY DE AUTENTICACIÓN (INICIO DE SESIÓN)
+# =====================================================================
+
+def crear_servicio_autenticacion() -> ServicioAutenticacion:
+    """Crea el servicio de inicio de sesión (mismas tablas de seguridad que la autorización)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_AUTORIZACION, proveedor, nombre)
+    return ServicioAutenticacion(repo)
+
+
+# =====================================================================
+# FACTORY DE MAESTRO-DETALLE (PROCEDIMIENTOS ALMACENADOS)
+# =====================================================================
+
+_REPOS_MAESTRO_DETALLE = {
+    "postgres": RepositorioMaestroDetallePostgreSQL,
+    "postgresql": RepositorioMaestroDetallePostgreSQL,
+}
+
+
+def crear_servicio_maestro_detalle() -> ServicioMaestroDetalle:
+    """Crea el servicio de operaciones maestro-detalle (sp_* del esquema)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_MAESTRO_DETALLE, proveedor, nombre)
+    return ServicioMaestroDetalle(repo)
+
+
+# =====================================================================
+# FACTORY DE FACTURAS COMPLETAS
+# =====================================================================
+
+_REPOS_FACTURA = {
+    "postgres": RepositorioFacturaPostgreSQL,
+    "postgresql": RepositorioFacturaPostgreSQL,
+}
+
+
+def crear_servicio_factura() -> ServicioFactura:
+    """Crea el servicio de lectura de facturas completas (JSON armado en la BD)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_FACTURA, proveedor, nombre)
+    return ServicioFactura(repo)
+
+
+# =====================================================================
+# FACTORY DE CONTEO DE FILAS
+# =====================================================================
+
+_REPOS_CONTEO = {
+    "postgres": RepositorioConteoPostgreSQL,
+    "postgresql": RepositorioConteoPostgreSQL,
+}
+
+
+def crear_servicio_conteo() -> ServicioConteo:
+    """Crea el servicio de totales de filas (exacto, estimado o mantenido)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_CONTEO, proveedor, nombre)
+    return ServicioConteo(repo)
+
+
+# =====================================================================
+# FACTORY DE PARTICIONES MENSUALES DE FACTURAS
+# =====================================================================
+
+_REPOS_PARTICIONES = {
+    "postgres": RepositorioParticionesPostgreSQL,
+    "postgresql": RepositorioParticionesPostgreSQL,
+}
+
+
+def crear_servicio_particiones() -> ServicioParticiones:
+    """Crea el servicio que crea y archiva los meses de factura (migración 006)."""
+    proveedor, nombre = _obtener_proveedor()
+    repo = _crear_repo_entidad(_REPOS_PARTICIONES, proveedor, nombre)
+    return ServicioParticiones(repo)
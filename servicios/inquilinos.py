@@ -0,0 +1,34 @@
+"""
+inquilinos.py — Inquilino (tenant) de la petición en curso.
+
+El middleware de inquilinos resuelve el inquilino (header o prefijo de
+ruta) y lo guarda en una ContextVar. El repositorio lo usa como esquema
+por defecto cuando la petición no envía ?esquema=, y fija con él el
+search_path de la conexión.
+"""
+
+import re
+from contextvars import ContextVar
+
+
+PATRON_ESQUEMA = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
+# Identificador PostgreSQL simple: letra o _, luego letras, dígitos o _ (máx. 63).
+# Los nombres de esquema se interpolan en el SQL; nada fuera de este patrón pasa.
+
+
+_inquilino: ContextVar[str | None] = ContextVar("inquilino", default=None)
+
+
+def inquilino_actual() -> str | None:
+    """Inquilino de la petición en curso, o None si no se indicó."""
+    return _inquilino.get()
+
+
+def fijar_inquilino(inquilino: str | None) -> None:
+    """Asigna (o limpia, con None) el inquilino de la petición en curso."""
+    _inquilino.set(inquilino)
+
+
+def es_nombre_valido(nombre: str) -> bool:
+    """True si el nombre es un identificador de esquema aceptable."""
+    return bool(PATRON_ESQUEMA.match(nombre))
@@ -0,0 +1,64 @@
+"""
+metricas.py — Registro en memoria de métricas de la aplicación.
+
+Guarda contadores (solo crecen: peticiones atendidas, rechazadas...)
+y medidores (suben y bajan: peticiones en curso, conexiones usadas...).
+El endpoint GET /api/metricas expone una instantánea en JSON.
+
+Cada worker de uvicorn tiene su propio registro (memoria del proceso).
+"""
+
+from collections import defaultdict   # defaultdict: diccionario con valor inicial automático.
+from typing import Any, Callable      # Callable: tipo de una función (para los recolectores).
+
+
+class RegistroMetricas:
+    """Contadores y medidores identificados por nombre + etiquetas."""
+
+    def __init__(self):
+        self._contadores: dict[tuple, float] = defaultdict(float)  # (nombre, etiquetas) → valor
+        self._medidores: dict[tuple, float] = {}
+        self._recolectores: list[Callable[[], dict[str, Any]]] = []
+    # Las etiquetas se guardan como tupla ordenada para poder usarlas como clave de dict.
+
+    @staticmethod
+    def _clave(nombre: str, etiquetas: dict[str, Any]) -> tuple:
+        return (nombre, tuple(sorted(etiquetas.items())))
+    # ("admision_atendidas_total", (("ruta", "GET /api/producto/"),))
+
+    def incrementar(self, nombre: str, valor: float = 1, **etiquetas) -> None:
+        """Suma 'valor' a un contador."""
+        self._contadores[self._clave(nombre, etiquetas)] += valor
+
+    def fijar(self, nombre: str, valor: float, **etiquetas) -> None:
+        """Asigna el valor actual de un medidor."""
+        self._medidores[self._clave(nombre, etiquetas)] = valor
+
+    def sumar_medidor(self, nombre: str, delta: float, **etiquetas) -> None:
+        """Suma (o resta, con delta negativo) al valor actual de un medidor."""
+        clave = self._clave(nombre, etiquetas)
+        self._medidores[clave] = self._medidores.get(clave, 0) + delta
+
+    def registrar_recolector(self, recolector: Callable[[], dict[str, Any]]) -> None:
+        """Registra una función que aporta valores calculados al momento de consultar."""
+        self._recolectores.append(recolector)
+    # Ej: el estado del pool de conexiones se lee del engine solo cuando alguien consulta.
+
+    def instantanea(self) -> dict[str, Any]:
+        """Retorna todas las métricas en un dict serializable a JSON."""
+        resultado: dict[str, Any] = {"contadores": [], "medidores": [], "recolectadas": {}}
+        for (nombre, etiquetas), valor in sorted(self._contadores.items()):
+            resultado["contadores"].append(
+                {"nombre": nombre, "etiquetas": dict(etiquetas), "valor": valor}
+            )
+        for (nombre, etiquetas), valor in sorted(self._medidores.items()):
+            resultado["medidores"].append(
+                {"nombre": nombre, "etiquetas": dict(etiquetas), "valor": valor}
+            )
+        for recolector in self._recolectores:
+            resultado["recolectadas"].update(recolector())
+        return resultado
+
+
+metricas = RegistroMetricas()
+# Instancia única del proceso: todos los módulos importan este mismo objeto.
@@ -0,0 +1,206 @@
+"""
+perfilador.py — Perfilador por muestreo de UNA petición (salida speedscope).
+
+Cuando una petición concreta es lenta en producción, el promedio de las
+métricas no dice dónde se fue el tiempo. El perfilador toma una muestra
+de la pila de la petición cada PERFILADO_INTERVALO_MS milisegundos:
+
+- Si la tarea de la petición está ejecutando Python → pila real del hilo
+  (controller → servicio → repositorio → SQLAlchemy → ...).
+- Si está suspendida en un await (esperando a PostgreSQL, al pool...) →
+  la cadena de corrutinas suspendidas, terminada en "[esperando]". Así el
+  tiempo de E/S también aparece en la gráfica, atribuido a quien espera.
+
+Las consultas SQL de la petición se registran aparte (repositorio →
+registrar_consulta) con su duración, y se exportan como un segundo perfil
+"evented" en el mismo archivo: en speedscope se ve la línea de tiempo de
+las consultas junto a la flame graph.
+
+Archivo: https://www.speedscope.app/file-format-schema.json
+Abrir en https://www.speedscope.app (o `speedscope archivo.speedscope.json`).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+
+_RAIZ = str(Path(__file__).resolve().parent.parent)
+# Rutas de archivos del proyecto se muestran relativas a la raíz (más legibles).
+
+_MAX_MUESTRAS = 200_000
+# Tope de muestras por petición (una petición colgada no llena la memoria).
+
+_perfil_actual: ContextVar["Perfil | None"] = ContextVar("perfil_actual", default=None)
+
+
+def perfil_actual() -> "Perfil | None":
+    """Perfil activo de la petición en curso (None casi siempre)."""
+    return _perfil_actual.get()
+
+
+def fijar_perfil(perfil: "Perfil | None") -> None:
+    _perfil_actual.set(perfil)
+
+
+def registrar_consulta(sql: str, inicio: float, fin: float) -> None:
+    """Lo llama el repositorio al terminar cada consulta (solo si la petición se perfila)."""
+    perfil = _perfil_actual.get()
+    if perfil is not None:
+        perfil.consultas.append((sql, inicio, fin))
+
+
+def _nombre_archivo(ruta: str) -> str:
+    return os.path.relpath(ruta, _RAIZ) if ruta.startswith(_RAIZ) else ruta
+
+
+class Perfil:
+    """Muestras de una petición + consultas SQL; se exporta a speedscope."""
+
+    def __init__(self, nombre: str, intervalo: float):
+        self.nombre = nombre
+        self.intervalo = intervalo
+        self.consultas: list[tuple[str, float, float]] = []   # (sql, inicio, fin) en perf_counter
+        self._muestras: list[tuple[tuple[int, ...], float]] = []  # (índices de marcos, ms)
+        self._marcos: dict[tuple[str, str, int], int] = {}       # (nombre, archivo, línea) → índice
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tarea: asyncio.Task | None = None
+        self._hilo_loop: int | None = None
+        self._detener = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self.inicio = 0.0
+        self.fin = 0.0
+
+    # ── Muestreo ─────────────────────────────────────────────────────
+
+    def iniciar(self) -> None:
+        """Empieza a muestrear la tarea actual (llamar desde la tarea de la petición)."""
+        self._loop = asyncio.get_running_loop()
+        self._tarea = asyncio.current_task()
+        self._hilo_loop = threading.get_ident()
+        self.inicio = time.perf_counter()
+        self._hilo = threading.Thread(target=self._muestrear, name="perfilador", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self.fin = time.perf_counter()
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _muestrear(self) -> None:
+        """Hilo aparte: cada 'intervalo' segundos toma la pila de la petición."""
+        anterior = time.perf_counter()
+        while not self._detener.wait(self.intervalo):
+            ahora = time.perf_counter()
+            pila = self._pila()
+            if pila and len(self._muestras) < _MAX_MUESTRAS:
+                self._muestras.append((pila, (ahora - anterior) * 1000))
+            anterior = ahora
+
+    def _pila(self) -> tuple[int, ...]:
+        """Pila actual de la petición como índices de marcos (raíz primero)."""
+        marcos: list[tuple[str, str, int]] = []
+        if asyncio.current_task(self._loop) is self._tarea:      # La petición tiene la CPU
+            marco = sys._current_frames().get(self._hilo_loop)
+            while marco is not None:
+                marcos.append(self._describir(marco.f_code, marco.f_lineno))
+                marco = marco.f_back
+            marcos.reverse()
+        else:                                                    # Suspendida en un await
+            corrutina = self._tarea.get_coro() if self._tarea else None
+            while corrutina is not None:
+                marco = getattr(corrutina, "cr_frame", None) or getattr(corrutina, "ag_frame", None) \
+                    or getattr(corrutina, "gi_frame", None)
+                if marco is None:
+                    break
+                marcos.append(self._describir(marco.f_code, marco.f_lineno))
+                corrutina = getattr(corrutina, "cr_await", None) or getattr(corrutina, "gi_yieldfrom", None)
+            if not marcos:
+                return ()
+            marcos.append(("[esperando]", "", 0))
+        return tuple(self._indice(m) for m in marcos)
+
+    @staticmethod
+    def _describir(codigo, linea: int) -> tuple[str, str, int]:
+        return (getattr(codigo, "co_qualname", codigo.co_name), _nombre_archivo(codigo.co_filename), linea or 0)
+
+    def _indice(self, marco: tuple[str, str, int]) -> int:
+        indice = self._marcos.get(marco)
+        if indice is None:
+            indice = self._marcos[marco] = len(self._marcos)
+        return indice
+
+    # ── Exportación ──────────────────────────────────────────────────
+
+    def resumen(self) -> dict[str, Any]:
+        total_sql = sum(fin - inicio for _, inicio, fin in self.consultas)
+        return {
+            "duracion_ms": round((self.fin - self.inicio) * 1000, 3),
+            "muestras": len(self._muestras),
+            "consultas": len(self.consultas),
+            "sql_ms": round(total_sql * 1000, 3),
+        }
+
+    def a_speedscope(self) -> dict[str, Any]:
+        """Formato de archivo de speedscope: perfil muestreado + línea de tiempo SQL."""
+        marcos = [{"name": nombre, "file": archivo, "line": linea}
+                  for (nombre, archivo, linea) in self._marcos]
+        duracion = (self.fin - self.inicio) * 1000
+        perfiles = [{
+            "type": "sampled",
+            "name": self.nombre,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(duracion, 3),
+            "samples": [list(pila) for pila, _ in self._muestras],
+            "weights": [round(peso, 3) for _, peso in self._muestras],
+        }]
+
+        carriles: list[list[dict[str, Any]]] = []             # Consultas simultáneas → carriles aparte
+        fines: list[float] = []
+        for sql, inicio, fin in sorted(self.consultas, key=lambda c: c[1]):
+            nombre = " ".join(sql.split())[:200]
+            marcos.append({"name": f"SQL {(fin - inicio) * 1000:.2f} ms: {nombre}"})
+            carril = next((i for i, fin_carril in enumerate(fines) if fin_carril <= inicio), None)
+            if carril is None:
+                carril = len(carriles)
+                carriles.append([])
+                fines.append(0.0)
+            fines[carril] = fin
+            carriles[carril].append({"type": "O", "frame": len(marcos) - 1,
+                                     "at": round((inicio - self.inicio) * 1000, 3)})
+            carriles[carril].append({"type": "C", "frame": len(marcos) - 1,
+                                     "at": round((fin - self.inicio) * 1000, 3)})
+        for numero, eventos in enumerate(carriles, start=1):
+            # Un perfil "evented" exige eventos anidados: cada carril no tiene solapamientos.
+            perfiles.append({
+                "type": "evented",
+                "name": f"{self.nombre} — consultas SQL" + (f" ({numero})" if len(carriles) > 1 else ""),
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(max(duracion, eventos[-1]["at"]), 3),
+                "events": eventos,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.nombre,
+            "exporter": "apifacturas perfilador",
+            "activeProfileIndex": 0,
+            "shared": {"frames": marcos},
+            "profiles": perfiles,
+        }
+
+    def guardar(self, directorio: str, nombre_archivo: str) -> Path:
+        ruta = Path(directorio)
+        ruta.mkdir(parents=True, exist_ok=True)
+        ruta = ruta / nombre_archivo
+        ruta.write_text(json.dumps(self.a_speedscope()), encoding="utf-8")
+        return ruta
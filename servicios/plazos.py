@@ -0,0 +1,87 @@
+"""
+plazos.py — Plazo (deadline) de la petición en curso.
+
+El middleware de plazos crea un Plazo al inicio de cada petición y lo
+guarda en una ContextVar. Cualquier capa (servicio, repositorio) puede
+consultarlo con plazo_actual() sin recibirlo como parámetro.
+
+El repositorio lo usa para:
+1. Fijar statement_timeout en la conexión (PostgreSQL aborta la consulta).
+2. Cancelar la consulta en curso si el plazo vence o el cliente se va.
+"""
+
+import asyncio
+from contextlib import suppress
+from contextvars import ContextVar    # Variable "por petición": cada tarea asyncio ve su propio valor.
+from typing import Any, Awaitable
+
+from servicios.excepciones import ErrorPlazoExcedido
+
+
+class Plazo:
+    """Momento límite de una petición + señal de cancelación (cliente desconectado)."""
+
+    def __init__(self, segundos: float):
+        self._loop = asyncio.get_running_loop()
+        self.segundos = segundos
+        self.limite = self._loop.time() + segundos     # Reloj monotónico del event loop
+        self._cancelado = asyncio.Event()
+        self.motivo: str | None = None
+
+    def restante(self) -> float:
+        """Segundos que quedan antes del límite (puede ser negativo)."""
+        return self.limite - self._loop.time()
+
+    def cancelar(self, motivo: str) -> None:
+        """Cancela la petición antes de tiempo (ej: el cliente cerró la conexión)."""
+        self.motivo = motivo
+        self._cancelado.set()
+
+    def verificar(self) -> None:
+        """Lanza ErrorPlazoExcedido si el plazo ya venció o la petición fue cancelada."""
+        if self._cancelado.is_set():
+            raise ErrorPlazoExcedido(f"Petición cancelada: {self.motivo}.")
+        if self.restante() <= 0:
+            raise ErrorPlazoExcedido(f"Se agotó el plazo de {self.segundos:g} s de la petición.")
+
+    async def esperar(self, operacion: Awaitable[Any]) -> Any:
+        """Espera 'operacion' sin pasarse del plazo; si vence, la cancela."""
+        self.verificar()
+        tarea = asyncio.ensure_future(operacion)
+        vigia = asyncio.ensure_future(self._cancelado.wait())
+        try:
+            await asyncio.wait(
+                {tarea, vigia}, timeout=self.restante(),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:                 # Cancelaron la petición desde fuera
+            tarea.cancel()
+            raise
+        finally:
+            vigia.cancel()
+
+        if tarea.done():
+            return tarea.result()                      # Terminó a tiempo (o lanzó su propio error)
+
+        tarea.cancel()                                 # asyncpg envía la cancelación al servidor
+        with suppress(asyncio.CancelledError, Exception):
+            await tarea
+        self.verificar()
+        raise ErrorPlazoExcedido("Se agotó el plazo de la petición.")
+
+    def statement_timeout_ms(self) -> int:
+        """Plazo restante en milisegundos, listo para SET statement_timeout."""
+        return max(1, int(self.restante() * 1000))     # 0 en PostgreSQL = "sin límite": nunca enviar 0
+
+
+_plazo: ContextVar[Plazo | None] = ContextVar("plazo", default=None)
+
+
+def plazo_actual() -> Plazo | None:
+    """Plazo de la petición en curso, o None si no hay (scripts, tareas en segundo plano)."""
+    return _plazo.get()
+
+
+def fijar_plazo(plazo: Plazo | None) -> None:
+    """Asigna (o limpia, con None) el plazo de la petición en curso."""
+    _plazo.set(plazo)
@@ -0,0 +1,231 @@
+"""Servicio de analítica de ventas: clasificación ABC, participación, ticket y canasta."""
+# Capa de negocio: valida el rango de fechas, calcula las métricas con NumPy
+# (operaciones vectorizadas, sin bucles de Python por línea de factura) y
+# guarda el resultado ANALITICA_TTL segundos por (inquilino, rango).
+#
+# Todo sale de tres agregaciones por grupo:
+# - np.bincount(producto, weights=...) → ingresos, unidades y líneas por producto
+# - np.bincount(factura, weights=...)  → ingreso (ticket), unidades y líneas por factura
+# - argsort + cumsum de los ingresos   → curva de Pareto y clases A/B/C
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+try:                                   # Dependencia opcional
+    import numpy as np
+except ImportError:                    # Sin numpy: /api/analitica responde 501
+    np = None
+
+from config import get_settings
+from servicios.inquilinos import inquilino_actual
+from servicios.metricas import metricas
+
+
+CLASES = ("A", "B", "C")
+
+_CACHE: "OrderedDict[tuple, tuple[float, dict[str, Any]]]" = OrderedDict()
+# (esquema, desde, hasta) → (expira, resultado). Orden LRU: el más viejo sale primero.
+_EN_CURSO: dict[tuple, asyncio.Future] = {}
+# Cálculos en marcha: 50 peticiones simultáneas con el caché vacío → UN cálculo.
+
+
+def numpy_disponible() -> bool:
+    return np is not None
+
+
+# =====================================================================
+# CÁLCULO VECTORIZADO
+# =====================================================================
+
+def _por_factura(factura: "np.ndarray") -> tuple["np.ndarray", int]:
+    """Número de factura → índice denso 0..n-1 (para bincount) y cantidad de facturas."""
+    minimo = int(factura.min())
+    rango = int(factura.max()) - minimo + 1
+    if rango <= 4 * len(factura) + 1024:       # Números SERIAL casi contiguos: restar basta
+        indice = factura - minimo
+        presentes = np.flatnonzero(np.bincount(indice, minlength=rango))
+        denso = np.empty(rango, dtype=np.int64)
+        denso[presentes] = np.arange(len(presentes))
+        return denso[indice], len(presentes)
+    unicas, indice = np.unique(factura, return_inverse=True)   # Huecos grandes: ordenar (más lento)
+    return indice, len(unicas)
+
+
+def _redondear(valor: float, decimales: int = 2) -> float:
+    return round(float(valor), decimales)
+
+
+def calcular(productos: list[tuple[str, str]], columnas: dict[str, "np.ndarray"],
+             umbral_a: float, umbral_b: float) -> dict[str, Any]:
+    """Líneas de factura en columnas → resumen + clasificación ABC por producto."""
+    producto = columnas["producto"]
+    cantidad = columnas["cantidad"]
+    centavos = columnas["centavos"]
+    n_productos = len(productos)
+
+    # ── Por producto ─────────────────────────────────────────────────
+    ingresos = np.bincount(producto, weights=centavos, minlength=n_productos) / 100
+    unidades = np.bincount(producto, weights=cantidad, minlength=n_productos)
+    lineas = np.bincount(producto, minlength=n_productos)
+    total = float(ingresos.sum())
+
+    orden = np.argsort(-ingresos, kind="stable")       # Mayor ingreso primero (empates: por código)
+    ordenados = ingresos[orden]
+    acumulado = np.cumsum(ordenados)
+    if total > 0:
+        participacion = ordenados / total
+        previo = (acumulado - ordenados) / total       # Participación acumulada ANTES del producto
+        clase = np.where(previo < umbral_a, 0, np.where(previo < umbral_b, 1, 2))
+        clase[ordenados <= 0] = 2                      # Sin ventas: siempre C
+        acumulado = acumulado / total
+    else:
+        participacion = np.zeros(n_productos)
+        clase = np.full(n_productos, 2)
+    # Regla de Pareto: un producto es A si cuando empieza, los anteriores aún no
+    # suman umbral_a (así el que cruza el 80% también es A).
+
+    # ── Por factura ──────────────────────────────────────────────────
+    if len(producto):
+        indice, n_facturas = _por_factura(columnas["factura"])
+        ticket = np.bincount(indice, weights=centavos, minlength=n_facturas) / 100
+        lineas_factura = np.bincount(indice, minlength=n_facturas)
+        ticket_p50, ticket_p90 = np.percentile(ticket, [50, 90])
+        canasta_p50, canasta_p90 = np.percentile(lineas_factura, [50, 90])
+    else:
+        n_facturas = 0
+        ticket_p50 = ticket_p90 = canasta_p50 = canasta_p90 = 0.0
+
+    total_unidades = int(unidades.sum())
+    resumen = {
+        "lineas": int(len(producto)),
+        "facturas": n_facturas,
+        "unidades": total_unidades,
+        "ingresos": _redondear(total),
+        "ticket_promedio": _redondear(total / n_facturas if n_facturas else 0),
+        "ticket_mediana": _redondear(ticket_p50),
+        "ticket_p90": _redondear(ticket_p90),
+        "canasta_lineas_promedio": _redondear(len(producto) / n_facturas if n_facturas else 0, 3),
+        "canasta_lineas_mediana": _redondear(canasta_p50, 3),
+        "canasta_lineas_p90": _redondear(canasta_p90, 3),
+        "canasta_unidades_promedio": _redondear(total_unidades / n_facturas if n_facturas else 0, 3),
+        "productos_catalogo": n_productos,
+        "productos_vendidos": int(np.count_nonzero(lineas)),
+    }
+
+    clases = {}
+    for numero, nombre in enumerate(CLASES):
+        de_clase = clase == numero
+        ingresos_clase = float(ordenados[de_clase].sum())
+        clases[nombre] = {
+            "productos": int(np.count_nonzero(de_clase)),
+            "ingresos": _redondear(ingresos_clase),
+            "participacion": _redondear(ingresos_clase / total if total else 0, 6),
+        }
+
+    detalle = [
+        {
+            "posicion": posicion,
+            "codigo": productos[i][0],
+            "nombre": productos[i][1],
+            "clase": CLASES[c],
+            "ingresos": round(ing, 2),
+            "participacion": round(par, 6),
+            "acumulado": round(acu, 6),
+            "unidades": int(uni),
+            "lineas": int(lin),
+        }
+        for posicion, (i, c, ing, par, acu, uni, lin) in enumerate(zip(
+            orden.tolist(), clase.tolist(), ordenados.tolist(), participacion.tolist(),
+            acumulado.tolist(), unidades[orden].tolist(), lineas[orden].tolist()
+        ), start=1)
+    ]
+    # .tolist() convierte cada columna de una vez (no un escalar NumPy por celda).
+    return {"resumen": resumen, "clases": clases, "productos": detalle}
+
+
+# =====================================================================
+# SERVICIO
+# =====================================================================
+
+class ServicioAnalitica:
+    """Lógica de negocio de la analítica de ventas."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def analizar(self, esquema: str | None = None, desde: date | None = None,
+                       hasta: date | None = None) -> dict[str, Any]:
+        """Resumen + ABC del rango [desde, hasta] (días incluidos). Usa el caché si está vigente."""
+        if desde is not None and hasta is not None and desde > hasta:
+            raise ValueError("'desde' no puede ser posterior a 'hasta'.")
+        config = get_settings().analitica
+        if not 0 < config.umbral_a < config.umbral_b <= 1:
+            raise ValueError("Umbrales ABC inválidos: se requiere 0 < ANALITICA_UMBRAL_A < ANALITICA_UMBRAL_B <= 1.")
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        clave = (esquema_norm or inquilino_actual() or "public", desde, hasta)
+        # El inquilino forma parte de la clave: nunca se sirve el resultado de otro esquema.
+
+        while True:
+            guardado = _CACHE.get(clave)
+            if guardado is not None and guardado[0] > time.monotonic():
+                _CACHE.move_to_end(clave)
+                metricas.incrementar("analitica_cache_total", resultado="acierto")
+                return guardado[1]
+
+            en_curso = _EN_CURSO.get(clave)
+            if en_curso is None:
+                break
+            metricas.incrementar("analitica_cache_total", resultado="espera")
+            try:                                       # Otra petición ya está calculando
+                return await asyncio.shield(en_curso)
+            except asyncio.CancelledError:
+                if not en_curso.cancelled():           # Cancelaron ESTA petición
+                    raise
+                # Cancelaron a la que calculaba (ej: su cliente se fue): se reintenta.
+
+        metricas.incrementar("analitica_cache_total", resultado="fallo")
+        futuro = asyncio.get_running_loop().create_future()
+        _EN_CURSO[clave] = futuro
+        try:
+            resultado = await self._calcular(esquema_norm, desde, hasta, config)
+            futuro.set_result(resultado)
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as ex:
+            futuro.set_exception(ex)
+            futuro.exception()                         # Marcado como leído: sin aviso si nadie esperaba
+            raise
+        finally:
+            _EN_CURSO.pop(clave, None)
+
+        if config.ttl > 0:
+            _CACHE[clave] = (time.monotonic() + config.ttl, resultado)
+            _CACHE.move_to_end(clave)
+            while len(_CACHE) > config.max_entradas:
+                _CACHE.popitem(last=False)
+        return resultado
+
+    async def _calcular(self, esquema, desde, hasta, config) -> dict[str, Any]:
+        inicio = time.perf_counter()
+        productos, columnas = await self._repo.obtener_lineas(
+            esquema,
+            datetime.combine(desde, datetime.min.time()) if desde else None,
+            datetime.combine(hasta + timedelta(days=1), datetime.min.time()) if hasta else None,
+        )
+        # hasta es inclusivo para el usuario: en SQL se usa fecha < (hasta + 1 día).
+        resultado = await asyncio.to_thread(calcular, productos, columnas, config.umbral_a, config.umbral_b)
+        # NumPy libera el GIL en la mayoría de las operaciones: el event loop sigue atendiendo.
+        resultado.update({
+            "desde": desde.isoformat() if desde else None,
+            "hasta": hasta.isoformat() if hasta else None,
+            "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "vigencia_s": config.ttl,
+        })
+        return resultado
@@ -0,0 +1,150 @@
+"""Servicio de autenticación: inicio de sesión con BCrypt y tokens de acceso firmados."""
+# Capa de negocio:
+# - iniciar_sesion(): lee el hash de usuario.contrasena, lo verifica en el
+#   pool de procesos (servicios/contrasenas.py) y emite un token. Una contraseña
+#   heredada en texto plano (AUTENTICACION_TEXTO_PLANO=True) se reemplaza por su hash.
+# - verificar_token(): lo llama el middleware de autorización en CADA petición.
+#
+# Token: "v1.<datos>.<firma>" (base64url). datos = {"sub": email, "exp": epoch};
+# firma = HMAC-SHA256(AUTENTICACION_SECRETO, datos). No necesita BD para validarse.
+#
+# Caché de tokens validados (LRU): el primer uso de un token verifica firma,
+# decodifica y revisa la expiración; los siguientes son UNA búsqueda en dict.
+# La expiración se revisa siempre (también en la caché).
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any
+
+from config import get_settings
+from servicios.contrasenas import es_hash_bcrypt, verificador_contrasenas
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+_VERSION = "v1"
+
+_VALIDADOS: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+# token → (usuario, expira). Orden LRU: el menos usado sale primero.
+
+_secreto: bytes | None = None
+
+
+class CredencialesInvalidas(Exception):
+    """Email o contraseña incorrectos (el mensaje no dice cuál de los dos)."""
+
+
+def _clave_firma() -> bytes:
+    global _secreto
+    if _secreto is None:
+        configurado = get_settings().autenticacion.secreto
+        if configurado:
+            _secreto = configurado.encode("utf-8")
+        else:
+            _secreto = secrets.token_bytes(32)
+            _log.warning("AUTENTICACION_SECRETO vacío: clave aleatoria de este proceso "
+                         "(los tokens no sirven en otros workers ni tras reiniciar)")
+    return _secreto
+
+
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode("ascii")
+
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _firma(datos: str) -> str:
+    return _b64(hmac.new(_clave_firma(), datos.encode("ascii"), hashlib.sha256).digest())
+
+
+def emitir_token(usuario: str) -> tuple[str, int]:
+    """(token, expira en epoch segundos)."""
+    expira = int(time.time()) + get_settings().autenticacion.vigencia
+    datos = _b64(json.dumps({"sub": usuario, "exp": expira}, separators=(",", ":")).encode())
+    return f"{_VERSION}.{datos}.{_firma(datos)}", expira
+
+
+def verificar_token(token: str) -> str | None:
+    """Usuario del token, o None si es inválido o expiró. Caché LRU de tokens ya validados."""
+    ahora = time.time()
+    guardado = _VALIDADOS.get(token)
+    if guardado is not None:
+        if guardado[1] > ahora:
+            _VALIDADOS.move_to_end(token)
+            return guardado[0]
+        del _VALIDADOS[token]                          # Expiró: fuera de la caché
+        return None
+
+    if not token.isascii():                            # Un token emitido aquí es base64url: solo ASCII
+        return None
+    # Sin este chequeo, un header con "é" hacía fallar encode("ascii") o compare_digest
+    # (que no acepta str no ASCII) y CUALQUIER ruta, incluso pública, respondía 500.
+    version, _, resto = token.partition(".")
+    datos, _, firma = resto.partition(".")
+    if version != _VERSION or not datos or not hmac.compare_digest(
+        firma.encode("ascii"), _firma(datos).encode("ascii")
+    ):
+        return None                                    # Los inválidos NO se guardan (no llenan la caché)
+    try:
+        contenido = json.loads(_desde_b64(datos))
+        usuario, expira = str(contenido["sub"]), float(contenido["exp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if expira <= ahora:
+        return None
+
+    _VALIDADOS[token] = (usuario, expira)
+    while len(_VALIDADOS) > get_settings().autenticacion.cache_tokens:
+        _VALIDADOS.popitem(last=False)
+    return usuario
+
+
+class ServicioAutenticacion:
+    """Lógica de negocio del inicio de sesión."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def iniciar_sesion(self, email: str, contrasena: str) -> dict[str, Any]:
+        """Verifica las credenciales y emite un token. CredencialesInvalidas si no coinciden."""
+        email_norm = email.strip()
+        if not email_norm or not contrasena:
+            raise ValueError("email y contrasena son obligatorios.")
+
+        credenciales = await self._repo.obtener_credenciales(email_norm)
+        hash_guardado, roles = credenciales if credenciales else (None, [])
+        if not await verificador_contrasenas.verificar(contrasena, hash_guardado):
+            metricas.incrementar("autenticacion_total", resultado="fallo")
+            raise CredencialesInvalidas("Email o contraseña incorrectos.")
+
+        metricas.incrementar("autenticacion_total", resultado="exito")
+        if not es_hash_bcrypt(hash_guardado):          # Texto plano aceptado: se migra a bcrypt
+            await self._migrar_a_bcrypt(email_norm, contrasena, hash_guardado)
+        token, expira = emitir_token(email_norm)
+        return {
+            "access_token": token,
+            "token_type": "bearer",
+            "expira_en": get_settings().autenticacion.vigencia,
+            "usuario": email_norm,
+            "roles": roles,
+        }
+
+    async def _migrar_a_bcrypt(self, email: str, contrasena: str, anterior: str) -> None:
+        """Reemplaza la contraseña en texto plano por su hash (el login sigue aunque falle)."""
+        try:
+            nuevo = await verificador_contrasenas.hashear(contrasena)
+            if await self._repo.reemplazar_contrasena(email, anterior, nuevo):
+                metricas.incrementar("autenticacion_migradas_total")
+        except Exception as ex:                        # Se reintenta en el próximo inicio de sesión
+            _log.warning("No se pudo migrar a bcrypt la contraseña de '%s' (%s)", email, ex)
@@ -0,0 +1,296 @@
+"""Servicio de autorización por ruta: matriz rol → ruta compilada en memoria."""
+# Capa de negocio: convierte las tablas rol, rol_usuario, ruta y rutarol en
+# estructuras que responden "¿este usuario puede llamar a esta ruta?" sin SQL:
+#
+# - Cada rol es un bit (el rol con menor id es el bit 0).
+# - Cada usuario es un entero: el OR de los bits de sus roles.
+# - Cada ruta de la API (método + plantilla) tiene un entero: el OR de los
+#   bits de los roles que pueden llamarla. Filas = rutas, columnas = roles:
+#   una matriz de bits guardada como una lista de enteros de Python.
+# - Qué fila de 'ruta' protege a qué ruta de la API se decide AL COMPILAR,
+#   no por petición: por petición solo queda buscar la plantilla en un árbol
+#   por segmentos y un AND de dos enteros.
+#
+# Formato de ruta.ruta: "/api/producto" (todos los métodos) o
+# "POST /api/producto" (solo ese método). Cubre la ruta igual y las que
+# cuelgan de ella ("/api/producto/{codigo}"). Si varias filas cubren una ruta
+# de la API manda la más específica: el prefijo más largo y, a igual prefijo,
+# la que nombra el método.
+
+import asyncio
+import logging
+import time
+from typing import Any, Iterable
+
+from config import get_settings
+from repositorios.escucha_cambios import escucha_cambios
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+LIBRE = "libre"                          # Sin ruta de la API o ruta no protegida
+PERMITIDA = "permitida"
+DENEGADA = "denegada"                    # Usuario identificado sin un rol que la permita → 403
+SIN_IDENTIDAD = "sin_identidad"          # Ruta protegida y petición sin usuario → 401
+
+
+# =====================================================================
+# ÁRBOL DE RUTAS DE LA API
+# =====================================================================
+
+class _Nodo:
+    __slots__ = ("fijos", "parametro", "resto", "metodos")
+
+    def __init__(self):
+        self.fijos: dict[str, _Nodo] = {}              # Segmento literal → hijo
+        self.parametro: _Nodo | None = None            # Hijo para "{codigo}"
+        self.resto: dict[str, int] = {}                # "{x:path}": método → índice (toma lo que falte)
+        self.metodos: dict[str, int] = {}              # La ruta termina aquí: método → índice
+
+
+class ArbolRutas:
+    """Plantillas de la API en un árbol por segmentos: (método, ruta concreta) → índice."""
+
+    def __init__(self, rutas: Iterable[tuple[Iterable[str], str]]):
+        self.plantillas: list[tuple[str, str]] = []    # Índice → (método, plantilla)
+        self._raiz = _Nodo()
+        for metodos, plantilla in rutas:
+            for metodo in sorted(metodos):
+                self._agregar(metodo, plantilla)
+
+    def _agregar(self, metodo: str, plantilla: str) -> None:
+        nodo = self._raiz
+        for segmento in plantilla.split("/")[1:]:
+            if segmento.startswith("{") and segmento.endswith(":path}"):
+                nodo.resto.setdefault(metodo, len(self.plantillas))
+                self.plantillas.append((metodo, plantilla))
+                return
+            if segmento.startswith("{") and segmento.endswith("}"):
+                nodo.parametro = nodo.parametro or _Nodo()
+                nodo = nodo.parametro
+            else:
+                nodo = nodo.fijos.setdefault(segmento, _Nodo())
+        if metodo not in nodo.metodos:                 # Dos rutas iguales: gana la primera, como en FastAPI
+            nodo.metodos[metodo] = len(self.plantillas)
+            self.plantillas.append((metodo, plantilla))
+
+    def buscar(self, metodo: str, ruta: str) -> int:
+        """Índice de la plantilla que atiende la petición, o -1 (sin ruta: 404 o /docs)."""
+        if metodo == "HEAD":
+            metodo = "GET"                             # HEAD lo atiende la ruta GET
+        return self._buscar(self._raiz, ruta.split("/"), 1, metodo)
+
+    def _buscar(self, nodo: _Nodo, segmentos: list[str], i: int, metodo: str) -> int:
+        if i == len(segmentos):
+            return nodo.metodos.get(metodo, -1)
+        hijo = nodo.fijos.get(segmentos[i])
+        if hijo is not None:                           # Literal primero: /buscar antes que /{codigo}
+            indice = self._buscar(hijo, segmentos, i + 1, metodo)
+            if indice >= 0:
+                return indice
+        if nodo.parametro is not None and segmentos[i]:
+            indice = self._buscar(nodo.parametro, segmentos, i + 1, metodo)
+            if indice >= 0:
+                return indice
+        return nodo.resto.get(metodo, -1)
+    # Profundidad = segmentos de la URL (4 o 5 en esta API): el costo no depende
+    # de cuántas rutas haya registradas.
+
+
+def _parsear_ruta(texto: str) -> tuple[str | None, str]:
+    """ "POST /api/producto" → ("POST", "/api/producto"); "/api/producto/" → (None, "/api/producto")."""
+    metodo, _, prefijo = texto.strip().rpartition(" ")
+    return (metodo.strip().upper() or None), (prefijo.rstrip("/") or "/")
+
+
+def _cubre(prefijo: str, plantilla: str) -> bool:
+    return prefijo == "/" or plantilla == prefijo or plantilla.startswith(prefijo + "/")
+
+
+# =====================================================================
+# MATRIZ DE PERMISOS
+# =====================================================================
+
+class MatrizPermisos:
+    """Resultado inmutable de compilar los permisos: se reemplaza entera en cada recarga."""
+
+    __slots__ = ("arbol", "permitidos", "usuarios", "roles", "protegidas", "cargada_en")
+
+    def __init__(self, arbol: ArbolRutas, datos: dict[str, list], por_defecto: str,
+                 publicas: Iterable[str] = ()):
+        if por_defecto not in ("permitir", "denegar"):
+            raise ValueError("AUTORIZACION_POR_DEFECTO debe ser 'permitir' o 'denegar'.")
+        self.arbol = arbol
+        self.roles: list[str] = list(datos["roles"])
+        bit = {nombre: 1 << i for i, nombre in enumerate(self.roles)}
+
+        self.usuarios: dict[str, int] = {}             # email → OR de los bits de sus roles
+        for email, rol in datos["usuarios"]:
+            self.usuarios[email] = self.usuarios.get(email, 0) | bit.get(rol, 0)
+
+        por_ruta: dict[tuple[str | None, str], int] = {_parsear_ruta(r): 0 for r in datos["rutas"]}
+        for ruta, rol in datos["permisos"]:
+            clave = _parsear_ruta(ruta)
+            por_ruta[clave] = por_ruta.get(clave, 0) | bit.get(rol, 0)
+        # Más específica primero: prefijo más largo y, a igual largo, con método.
+        candidatas = sorted(por_ruta.items(), key=lambda par: (-len(par[0][1]), par[0][0] is None))
+
+        sin_fila = None if por_defecto == "permitir" else 0
+        self.permitidos: list[int | None] = []         # Índice de plantilla → máscara (None = libre)
+        for metodo, plantilla in arbol.plantillas:
+            mascara = sin_fila
+            for (metodo_fila, prefijo), roles in candidatas:
+                if (metodo_fila is None or metodo_fila == metodo) and _cubre(prefijo, plantilla):
+                    mascara = roles
+                    break
+            self.permitidos.append(mascara)
+        # Cuadrático en (plantillas × filas de ruta), pero solo al compilar: unos milisegundos.
+
+        for metodo_publica, prefijo in map(_parsear_ruta, publicas):   # Ej: el login
+            for indice, (metodo, plantilla) in enumerate(arbol.plantillas):
+                if (metodo_publica is None or metodo_publica == metodo) and _cubre(prefijo, plantilla):
+                    self.permitidos[indice] = None
+        self.protegidas = sum(1 for m in self.permitidos if m is not None)
+        self.cargada_en = time.monotonic()
+
+    def decidir(self, metodo: str, ruta: str, usuario: str | None) -> str:
+        """LIBRE, PERMITIDA, DENEGADA o SIN_IDENTIDAD. Búsqueda en el árbol + un AND."""
+        indice = self.arbol.buscar(metodo, ruta)
+        if indice < 0:
+            return LIBRE
+        mascara = self.permitidos[indice]
+        if mascara is None:
+            return LIBRE
+        if not usuario:
+            return SIN_IDENTIDAD
+        return PERMITIDA if self.usuarios.get(usuario, 0) & mascara else DENEGADA
+
+    def plantilla(self, metodo: str, ruta: str) -> str | None:
+        indice = self.arbol.buscar(metodo, ruta)
+        return None if indice < 0 else self.arbol.plantillas[indice][1]
+
+
+# =====================================================================
+# SERVICIO
+# =====================================================================
+
+class ServicioAutorizacion:
+    """Lógica de negocio de la autorización: lee los permisos y compila la matriz."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def compilar(self, arbol: ArbolRutas) -> MatrizPermisos:
+        datos = await self._repo.obtener_permisos()
+        config = get_settings().autorizacion
+        return MatrizPermisos(arbol, datos, config.por_defecto.strip().lower(), config.rutas_publicas)
+
+
+# =====================================================================
+# MATRIZ VIGENTE DEL WORKER (consumidor de escucha_cambios)
+# =====================================================================
+
+class PermisosRutas:
+    """Guarda la matriz vigente y la recompila cuando llega el NOTIFY de la migración 004."""
+
+    def __init__(self):
+        self._arbol: ArbolRutas | None = None
+        self._matriz: MatrizPermisos | None = None
+        self._candado: asyncio.Lock | None = None
+        self._tarea: asyncio.Task | None = None
+        self._repetir = False                          # Llegó otro NOTIFY durante una recarga
+        self.recargas = 0
+
+    @property
+    def canal(self) -> str:
+        return get_settings().autorizacion.canal
+
+    def tiene_rutas(self) -> bool:
+        return self._arbol is not None
+
+    def fijar_rutas(self, rutas: Iterable[tuple[Iterable[str], str]]) -> None:
+        """Compila el árbol de rutas de la API (una vez: las rutas no cambian en ejecución)."""
+        self._arbol = ArbolRutas(rutas)
+
+    def instalar(self, matriz: MatrizPermisos) -> None:
+        self._matriz = matriz                          # Un solo reemplazo de referencia: sin bloqueos al leer
+
+    async def matriz(self) -> MatrizPermisos:
+        """Matriz vigente. La primera vez la carga; si está vieja y sin LISTEN, la refresca de fondo."""
+        matriz = self._matriz
+        if matriz is None:
+            await self.recargar()
+            return self._matriz
+        if (not escucha_cambios.vigente()
+                and time.monotonic() - matriz.cargada_en > get_settings().autorizacion.recarga):
+            self._programar_recarga()                  # Se responde con la actual mientras tanto
+        return matriz
+
+    async def recargar(self) -> None:
+        """Relee los permisos y reemplaza la matriz (una recarga a la vez)."""
+        if self._arbol is None:
+            raise RuntimeError("Rutas de la API sin registrar (fijar_rutas).")
+        self._candado = self._candado or asyncio.Lock()
+        async with self._candado:
+            from servicios.fabrica_repositorios import crear_servicio_autorizacion
+            # Import tardío: la fábrica importa este módulo.
+            inicio = time.perf_counter()
+            self.instalar(await crear_servicio_autorizacion().compilar(self._arbol))
+            self.recargas += 1
+            metricas.incrementar("autorizacion_recargas_total")
+            _log.info("Permisos compilados en %.1f ms", (time.perf_counter() - inicio) * 1000)
+
+    def _programar_recarga(self) -> None:
+        if self._tarea is not None and not self._tarea.done():
+            self._repetir = True                       # La recarga en curso pudo leer antes del cambio
+            return
+        self._tarea = asyncio.get_running_loop().create_task(self._recargar_de_fondo())
+
+    async def _recargar_de_fondo(self) -> None:
+        while True:
+            self._repetir = False
+            try:
+                await self.recargar()
+            except Exception:                          # La matriz anterior sigue vigente
+                _log.exception("No se pudieron recargar los permisos")
+                metricas.incrementar("autorizacion_recargas_fallidas_total")
+            if not self._repetir:
+                return
+
+    # ── Consumidor de escucha_cambios ────────────────────────────────
+
+    def al_conectar(self) -> None:
+        pass
+
+    async def sincronizar(self, conexion) -> None:
+        """Al (re)conectar el LISTEN: recarga completa (pudo haber cambios sin escuchar)."""
+        if self._arbol is not None:
+            await self.recargar()
+
+    def al_notificar(self, evento: dict[str, Any]) -> None:
+        if self._arbol is not None:
+            self._programar_recarga()                  # El payload no importa: se relee todo
+
+    def al_desconectar(self) -> None:
+        pass                                           # La matriz sigue sirviendo; matriz() la refresca
+
+    def estado(self) -> dict[str, Any]:
+        """Estado para /api/metricas/."""
+        matriz = self._matriz
+        return {"autorizacion": {
+            "cargada": matriz is not None,
+            "roles": len(matriz.roles) if matriz else 0,
+            "usuarios": len(matriz.usuarios) if matriz else 0,
+            "rutas_api": len(matriz.permitidos) if matriz else 0,
+            "rutas_protegidas": matriz.protegidas if matriz else 0,
+            "recargas": self.recargas,
+            "segundos_desde_carga": round(time.monotonic() - matriz.cargada_en, 3) if matriz else None,
+        }}
+
+
+permisos_rutas = PermisosRutas()
+# Instancia única por worker (proceso).
+metricas.registrar_recolector(permisos_rutas.estado)
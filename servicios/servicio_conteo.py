@@ -0,0 +1,121 @@
+"""Servicio de conteo de filas: el total de una tabla (o de un filtro) según el modo pedido."""
+# Capa de negocio:
+# - Valida tabla (lista blanca) y modo: exacto, estimado o mantenido.
+# - Guarda cada total CONTEO_TTL segundos por (inquilino, tabla, modo, filtro):
+#   una UI que pagina pide el mismo total en cada página y solo la primera
+#   petición llega a la BD. Varias peticiones simultáneas con el caché vacío
+#   comparten UNA consulta (importante para el modo exacto).
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any
+
+from config import get_settings
+from servicios.inquilinos import inquilino_actual
+from servicios.metricas import metricas
+from servicios.servicio_exportacion import TABLAS_EXPORTABLES
+
+
+MODOS = ("exacto", "estimado", "mantenido")
+
+TABLAS_CONTABLES = TABLAS_EXPORTABLES
+# Las mismas que se pueden exportar: el nombre se interpola en el SQL.
+
+_CACHE: "OrderedDict[tuple, tuple[float, dict[str, Any]]]" = OrderedDict()
+# (esquema, tabla, modo, filtro, parámetros) → (expira, resultado). Orden LRU.
+_EN_CURSO: dict[tuple, asyncio.Future] = {}
+
+
+def _patron_prefijo(prefijo: str) -> str:
+    """Patrón LIKE del prefijo con los comodines escapados (igual que buscar_por_nombre)."""
+    return (prefijo.lower().replace("\\", "\\\\")
+            .replace("%", "\\%").replace("_", "\\_")) + "%"
+
+
+class ServicioConteo:
+    """Lógica de negocio del conteo de filas."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def contar(self, tabla: str, modo: str | None = None, esquema: str | None = None,
+                     filtro: str | None = None, parametros: dict[str, Any] | None = None) -> dict[str, Any]:
+        """{"tabla", "modo", "filas", "exacto", "vigencia_s"}. Usa el caché si está vigente."""
+        config = get_settings().conteo
+        tabla_norm = (tabla or "").strip().lower()
+        if tabla_norm not in TABLAS_CONTABLES:
+            raise ValueError(f"La tabla '{tabla}' no se puede contar. Opciones: {sorted(TABLAS_CONTABLES)}")
+        modo_norm = (modo or config.modo_por_defecto).strip().lower()
+        if modo_norm not in MODOS:
+            raise ValueError(f"Modo de conteo '{modo}' inválido. Opciones: {', '.join(MODOS)}.")
+        if modo_norm == "mantenido" and filtro is not None:
+            raise ValueError("El modo mantenido solo cuenta tablas completas: use exacto o estimado.")
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        clave = (esquema_norm or inquilino_actual() or "public", tabla_norm, modo_norm,
+                 filtro, tuple(sorted((parametros or {}).items())))
+        # El inquilino forma parte de la clave: nunca se sirve el total de otro esquema.
+
+        while True:
+            guardado = _CACHE.get(clave)
+            if guardado is not None and guardado[0] > time.monotonic():
+                _CACHE.move_to_end(clave)
+                metricas.incrementar("conteo_cache_total", modo=modo_norm, resultado="acierto")
+                return guardado[1]
+            en_curso = _EN_CURSO.get(clave)
+            if en_curso is None:
+                break
+            metricas.incrementar("conteo_cache_total", modo=modo_norm, resultado="espera")
+            try:                                       # Otra petición ya está contando
+                return await asyncio.shield(en_curso)
+            except asyncio.CancelledError:
+                if not en_curso.cancelled():           # Cancelaron ESTA petición
+                    raise
+
+        metricas.incrementar("conteo_cache_total", modo=modo_norm, resultado="fallo")
+        futuro = asyncio.get_running_loop().create_future()
+        _EN_CURSO[clave] = futuro
+        try:
+            filas = await self._consultar(tabla_norm, modo_norm, esquema_norm, filtro, parametros)
+            resultado = {"tabla": tabla_norm, "modo": modo_norm, "filas": filas,
+                         "exacto": modo_norm != "estimado", "vigencia_s": config.ttl}
+            futuro.set_result(resultado)
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as ex:
+            futuro.set_exception(ex)
+            futuro.exception()                         # Marcado como leído: sin aviso si nadie esperaba
+            raise
+        finally:
+            _EN_CURSO.pop(clave, None)
+
+        if config.ttl > 0:
+            _CACHE[clave] = (time.monotonic() + config.ttl, resultado)
+            _CACHE.move_to_end(clave)
+            while len(_CACHE) > config.max_entradas:
+                _CACHE.popitem(last=False)
+        return resultado
+
+    async def contar_productos_por_prefijo(self, prefijo: str, modo: str | None = None,
+                                           esquema: str | None = None) -> dict[str, Any]:
+        """Total de productos cuyo nombre empieza por el prefijo (el de GET /api/producto/buscar)."""
+        if not prefijo or not prefijo.strip():
+            raise ValueError("El prefijo no puede estar vacío.")
+        return await self.contar("producto", modo, esquema, "nombre_prefijo",
+                                 {"patron": _patron_prefijo(prefijo.strip())})
+
+    async def _consultar(self, tabla, modo, esquema, filtro, parametros) -> int:
+        if modo == "exacto":
+            return await self._repo.contar_exacto(tabla, esquema, filtro, parametros)
+        if modo == "estimado":
+            return await self._repo.estimar(tabla, esquema, filtro, parametros)
+        filas = await self._repo.contar_mantenido(tabla, esquema)
+        if filas is None:
+            raise ValueError(
+                f"La tabla '{tabla}' no tiene contador mantenido en este esquema "
+                f"(migración 005 o conteo_filas_instalar()). Use exacto o estimado."
+            )
+        return filas
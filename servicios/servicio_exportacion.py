@@ -0,0 +1,60 @@
+"""Servicio de exportación de tablas para clientes de analítica."""
+# Capa de negocio: decide QUÉ tablas se pueden exportar y normaliza parámetros.
+
+from typing import AsyncIterator
+
+from config import get_settings
+
+
+TABLAS_EXPORTABLES = frozenset({"producto", "productosporfactura", "factura"})
+# Lista blanca: el nombre de la tabla se interpola en el SQL, así que NUNCA
+# se acepta un nombre que no esté aquí (previene SQL injection y fugas de
+# tablas sensibles como usuario).
+
+
+class ServicioExportacion:
+    """Lógica de negocio para exportar tablas completas."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def exportar(self, tabla: str, esquema: str | None = None,
+                       limite: int | None = None) -> tuple[list[str], list[tuple]]:
+        tabla_norm = (tabla or "").strip().lower()
+        if tabla_norm not in TABLAS_EXPORTABLES:
+            raise ValueError(
+                f"La tabla '{tabla}' no se puede exportar. "
+                f"Opciones: {sorted(TABLAS_EXPORTABLES)}"
+            )
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        limite_norm = limite if limite and limite > 0 else None   # None → tabla completa
+        tope = get_settings().exportacion.max_filas
+        if not tope:
+            return await self._repo.obtener_columnas(tabla_norm, esquema_norm, limite_norm)
+
+        aviso = (f"La exportación síncrona admite hasta {tope} filas; para más use "
+                 f'POST /api/trabajos con {{"tipo": "exportacion", "parametros": {{"tabla": "{tabla_norm}"}}}}.')
+        if limite_norm and limite_norm > tope:
+            raise ValueError(aviso)                    # Sin leer nada
+        columnas, filas = await self._repo.obtener_columnas(
+            tabla_norm, esquema_norm, limite_norm or tope + 1
+        )
+        if len(filas) > tope:                          # La fila tope + 1 solo dice "hay más"
+            raise ValueError(aviso)
+        return columnas, filas
+        # Peor caso: tope + 1 filas en memoria, nunca la tabla entera.
+
+    def exportar_por_lotes(self, tabla: str, esquema: str | None = None, limite: int | None = None,
+                           filas_por_lote: int = 5000) -> AsyncIterator[tuple[list[str], list[tuple]]]:
+        """Como exportar(), pero de a un lote: para archivos de tablas grandes (trabajos)."""
+        tabla_norm = (tabla or "").strip().lower()
+        if tabla_norm not in TABLAS_EXPORTABLES:
+            raise ValueError(
+                f"La tabla '{tabla}' no se puede exportar. "
+                f"Opciones: {sorted(TABLAS_EXPORTABLES)}"
+            )
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        limite_norm = limite if limite and limite > 0 else None
+        return self._repo.obtener_por_lotes(tabla_norm, esquema_norm, limite_norm, filas_por_lote)
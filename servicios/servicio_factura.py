@@ -0,0 +1,42 @@
+"""Servicio de facturas completas (documento desnormalizado para mostrar o imprimir)."""
+# Capa de negocio: valida y acota los parámetros; el documento ya viene
+# serializado desde el repositorio (bytes JSON) y se devuelve sin tocarlo.
+
+from typing import Any
+
+
+LIMITE_POR_DEFECTO = 50
+MAX_LIMITE = 500
+# Tope de facturas por página: cada una trae todas sus líneas.
+
+
+class ServicioFactura:
+    """Lógica de negocio de la lectura de facturas completas."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def obtener_completa(self, numero: int, esquema: str | None = None) -> bytes | None:
+        if numero <= 0:
+            raise ValueError("El número de factura debe ser positivo.")
+        return await self._repo.obtener_completa(numero, _esquema(esquema))
+
+    async def listar_completas(self, despues: int | None = None, limite: int | None = None,
+                               esquema: str | None = None) -> dict[str, Any]:
+        """{"datos": bytes del arreglo JSON, "total": n, "siguiente": cursor o None}."""
+        despues_norm = despues if despues and despues > 0 else 0
+        limite_norm = min(limite, MAX_LIMITE) if limite and limite > 0 else LIMITE_POR_DEFECTO
+        datos, total, ultimo = await self._repo.listar_completas(despues_norm, limite_norm, _esquema(esquema))
+        return {
+            "datos": datos,
+            "total": total,
+            "limite": limite_norm,
+            "siguiente": ultimo if total == limite_norm else None,
+            # Página llena: puede haber más (la siguiente empieza después del último número).
+        }
+
+
+def _esquema(esquema: str | None) -> str | None:
+    return esquema.strip() if esquema and esquema.strip() else None
@@ -0,0 +1,313 @@
+"""Servicio de importación masiva de productos (CSV / NDJSON en streaming)."""
+# Capa de negocio: lee el archivo por trozos, separa registros, valida cada fila
+# y entrega lotes al repositorio. Nunca tiene el archivo completo en memoria:
+# solo el trozo actual y UN lote de filas validadas (IMPORTACION_FILAS_POR_LOTE).
+
+import codecs
+import csv
+import json
+import os
+import re
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+
+from config import get_settings
+from models.producto import FilaProducto  # Mismas restricciones que POST /api/producto/masivo
+from servicios.validacion_masiva import adaptador  # TypeAdapter cacheado por tipo
+
+
+FORMATO_CSV = "csv"
+FORMATO_NDJSON = "ndjson"
+
+PATRON_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# El id forma parte del nombre de archivo: nada de "/" ni "..".
+
+MAX_REGISTRO = 1_000_000
+# Caracteres máximos de un registro: un archivo sin saltos de línea no debe llenar la memoria.
+
+_MAX_VALOR = Decimal("1e12")
+# NUMERIC(14,2): 12 dígitos enteros como máximo.
+
+_EN_CURSO: dict[str, "EstadoImportacion"] = {}
+# Importaciones de ESTE worker (las terminadas se leen del archivo de estado).
+
+
+class EstadoImportacion:
+    """Progreso de una importación; se guarda en <directorio>/<id>.json."""
+
+    def __init__(self, id_importacion: str, formato: str, esquema: str | None):
+        self.id = id_importacion
+        self.formato = formato
+        self.esquema = esquema
+        self.fase = "recibiendo"               # recibiendo → fusionando → completada | fallida
+        self.iniciada = time.time()
+        self.finalizada: float | None = None
+        self.bytes_leidos = 0
+        self.filas_leidas = 0
+        self.filas_validas = 0
+        self.filas_cargadas = 0                # Ya en staging (COPY confirmado)
+        self.filas_rechazadas = 0
+        self.resultado: dict[str, Any] | None = None
+        self.error: str | None = None
+        self._guardado_en = 0.0
+
+    def a_diccionario(self) -> dict[str, Any]:
+        return {
+            "id": self.id, "formato": self.formato, "esquema": self.esquema,
+            "fase": self.fase,
+            "iniciada": self.iniciada, "finalizada": self.finalizada,
+            "bytesLeidos": self.bytes_leidos, "filasLeidas": self.filas_leidas,
+            "filasValidas": self.filas_validas, "filasCargadas": self.filas_cargadas,
+            "filasRechazadas": self.filas_rechazadas,
+            "resultado": self.resultado, "error": self.error,
+        }
+
+    def guardar(self, forzar: bool = False) -> None:
+        """Escribe el estado en disco (como mucho 1 vez por segundo salvo 'forzar')."""
+        # En disco para que cualquier worker pueda responder GET /api/importar/{id}.
+        ahora = time.monotonic()
+        if not forzar and ahora - self._guardado_en < 1.0:
+            return
+        self._guardado_en = ahora
+        ruta = _ruta(self.id, ".json")
+        temporal = ruta.with_suffix(".tmp")
+        temporal.write_text(json.dumps(self.a_diccionario()), encoding="utf-8")
+        os.replace(temporal, ruta)             # Reemplazo atómico: nadie lee un JSON a medias
+
+
+def _ruta(id_importacion: str, sufijo: str) -> Path:
+    directorio = Path(get_settings().importacion.directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio / f"{id_importacion}{sufijo}"
+
+
+class ArchivoRechazos:
+    """Rechazos en NDJSON: {"linea", "error", "registro"}; el archivo se crea con el primero."""
+
+    def __init__(self, id_importacion: str):
+        self.ruta = _ruta(id_importacion, ".rechazos.ndjson")
+        self._archivo = None
+
+    def escribir(self, linea: int, error: str, registro: str) -> None:
+        if self._archivo is None:
+            self._archivo = open(self.ruta, "w", encoding="utf-8")
+        self._archivo.write(json.dumps(
+            {"linea": linea, "error": error, "registro": registro[:2000]}, ensure_ascii=False
+        ) + "\n")
+
+    def cerrar(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+
+
+# =====================================================================
+# LECTURA INCREMENTAL: trozos de bytes → registros (línea, texto)
+# =====================================================================
+
+async def _registros(flujo: AsyncIterator[bytes], formato: str,
+                     estado: EstadoImportacion, limite_bytes: int) -> AsyncIterator[tuple[int, str]]:
+    """Separa registros completos a medida que llegan los trozos."""
+    # CSV: un registro puede ocupar varias líneas si un campo entre comillas
+    # contiene saltos de línea. Está completo cuando sus comillas están balanceadas.
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    resto = ""                                 # Línea incompleta al final del trozo
+    registro = ""                              # Registro CSV con comillas abiertas
+    linea_inicio = 0
+    numero_linea = 0
+
+    def completas(texto: str):
+        nonlocal registro, linea_inicio, numero_linea
+        for linea in texto.split("\n"):
+            numero_linea += 1
+            if formato == FORMATO_CSV:
+                if not registro:
+                    linea_inicio = numero_linea
+                registro = f"{registro}\n{linea}" if registro else linea
+                if registro.count('"') % 2:    # Comillas abiertas: sigue en la próxima línea
+                    if len(registro) > MAX_REGISTRO:
+                        raise ValueError(f"Registro demasiado largo en la línea {linea_inicio}.")
+                    continue
+                completo, registro = registro.rstrip("\r"), ""
+                yield linea_inicio, completo
+            else:
+                yield numero_linea, linea.rstrip("\r")
+
+    async for trozo in flujo:
+        estado.bytes_leidos += len(trozo)
+        if estado.bytes_leidos > limite_bytes:
+            raise ValueError(f"El archivo supera el máximo de {limite_bytes // 2**20} MB.")
+        texto = resto + decodificador.decode(trozo)
+        corte = texto.rfind("\n")
+        if corte < 0:                          # Ningún salto de línea en este trozo
+            resto = texto
+            if len(resto) > MAX_REGISTRO:
+                raise ValueError("Registro demasiado largo (¿el archivo tiene saltos de línea?).")
+            continue
+        resto = texto[corte + 1:]
+        for item in completas(texto[:corte]):
+            yield item
+
+    final = resto + decodificador.decode(b"", final=True)
+    if final or registro:
+        for item in completas(final):
+            yield item
+    if registro:
+        raise ValueError(f"Comillas sin cerrar en el registro de la línea {linea_inicio}.")
+
+
+# =====================================================================
+# VALIDACIÓN: registro → tupla lista para COPY (o error)
+# =====================================================================
+
+def _validar(datos: dict[str, Any]) -> tuple[str, str, int, Decimal]:
+    """Valida una fila con FilaProducto: las mismas restricciones de la tabla que POST /masivo."""
+    fila = adaptador(FilaProducto).validate_python(datos)
+    # Largo y NUL de los textos, stock dentro de INTEGER, valor finito y en rango:
+    # una sola lista de reglas para las dos cargas masivas.
+    try:                                       # Decimal desde el texto original: sin error de float
+        valor = Decimal(str(datos["valorunitario"]).strip())
+    except (InvalidOperation, KeyError):
+        valor = Decimal(str(fila["valorunitario"]))
+    if not valor.is_finite() or valor < 0 or valor >= _MAX_VALOR:
+        raise ValueError("valorunitario fuera de rango (0 a 999999999999.99)")
+    valor = valor.quantize(Decimal("0.01"))    # Después del rango: 1e30 no cabe en 28 dígitos
+    if valor >= _MAX_VALOR:                    # 999999999999.995 redondea fuera de NUMERIC(14,2)
+        raise ValueError("valorunitario fuera de rango (0 a 999999999999.99)")
+    return fila["codigo"], fila["nombre"], fila["stock"], valor
+    # Todo lo que rompería el COPY o el merge se rechaza AQUÍ: un error dentro
+    # del COPY abortaría la transacción completa.
+
+
+def _primer_error(ex: ValidationError) -> str:
+    error = ex.errors()[0]
+    campo = ".".join(str(p) for p in error["loc"]) or "fila"
+    return f"{campo}: {error['msg']}"
+
+
+class ServicioImportacion:
+    """Lógica de negocio para importar catálogos de productos."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def importar(self, flujo: AsyncIterator[bytes], formato: str,
+                       esquema: str | None = None, id_importacion: str | None = None) -> dict[str, Any]:
+        """Importa el archivo completo. Retorna el estado final."""
+        if formato not in (FORMATO_CSV, FORMATO_NDJSON):
+            raise ValueError("Formato no soportado: use text/csv o application/x-ndjson.")
+        id_importacion = id_importacion or uuid.uuid4().hex
+        if not PATRON_ID.match(id_importacion):
+            raise ValueError("El id de importación solo admite letras, dígitos, '-' y '_'.")
+        if id_importacion in _EN_CURSO or _ruta(id_importacion, ".json").exists():
+            raise ValueError(f"Ya existe una importación con id '{id_importacion}'.")
+
+        config = get_settings().importacion
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        estado = EstadoImportacion(id_importacion, formato, esquema_norm)
+        rechazos = ArchivoRechazos(id_importacion)
+        _EN_CURSO[id_importacion] = estado
+        estado.guardar(forzar=True)
+
+        async def al_cargar(filas: int) -> None:
+            estado.filas_cargadas += filas
+            estado.guardar()
+
+        try:
+            lotes = self._lotes(flujo, formato, estado, rechazos, config)
+            resultado = await self._repo.importar_productos(lotes, esquema_norm, al_cargar)
+            estado.resultado = resultado
+            estado.fase = "completada"
+        except BaseException as ex:            # También CancelledError (el cliente cortó la subida)
+            estado.fase = "fallida"
+            estado.error = str(ex) or type(ex).__name__
+            raise
+        finally:
+            rechazos.cerrar()
+            estado.finalizada = time.time()
+            estado.guardar(forzar=True)
+            _EN_CURSO.pop(id_importacion, None)
+        return estado.a_diccionario()
+
+    async def _lotes(self, flujo, formato, estado, rechazos, config) -> AsyncIterator[list[tuple]]:
+        """Registros → filas validadas, agrupadas en lotes de IMPORTACION_FILAS_POR_LOTE."""
+        lote: list[tuple] = []
+        columnas: list[str] | None = None      # Encabezado del CSV
+
+        def rechazar(linea: int, error: str, texto: str) -> None:
+            estado.filas_rechazadas += 1
+            rechazos.escribir(linea, error, texto)
+            if estado.filas_rechazadas > config.max_rechazos:
+                raise ValueError(f"Se superaron {config.max_rechazos} filas rechazadas: importación abortada.")
+
+        async for linea, texto in _registros(flujo, formato, estado, config.tamano_maximo_mb * 2**20):
+            if not texto.strip():
+                continue                       # Líneas en blanco: se ignoran
+            if formato == FORMATO_CSV:
+                valores = next(csv.reader([texto]))
+                if columnas is None:           # Primera línea: encabezado
+                    columnas = [c.strip().lower() for c in valores]
+                    faltan = {"codigo", "nombre", "stock", "valorunitario"} - set(columnas)
+                    if faltan:
+                        raise ValueError(f"Faltan columnas en el encabezado CSV: {sorted(faltan)}")
+                    continue
+                estado.filas_leidas += 1
+                if len(valores) != len(columnas):
+                    rechazar(linea, f"se esperaban {len(columnas)} columnas y hay {len(valores)}", texto)
+                    continue
+                datos = dict(zip(columnas, valores))
+            else:
+                estado.filas_leidas += 1
+                try:
+                    datos = json.loads(texto)
+                except ValueError as ex:
+                    rechazar(linea, f"JSON inválido: {ex}", texto)
+                    continue
+                if not isinstance(datos, dict):
+                    rechazar(linea, "cada línea debe ser un objeto JSON", texto)
+                    continue
+
+            try:
+                lote.append((linea, *_validar(datos)))
+                estado.filas_validas += 1
+            except ValidationError as ex:
+                rechazar(linea, _primer_error(ex), texto)
+            except ValueError as ex:
+                rechazar(linea, str(ex), texto)
+
+            if len(lote) >= config.filas_por_lote:
+                yield lote                     # El repositorio lo envía con COPY
+                lote = []
+                estado.guardar()
+
+        if lote:
+            yield lote
+        estado.fase = "fusionando"           # Ya se leyó todo: falta el merge
+        estado.guardar(forzar=True)
+
+
+def obtener_estado(id_importacion: str) -> dict[str, Any] | None:
+    """Estado de una importación (en curso en este worker o guardado en disco)."""
+    if not PATRON_ID.match(id_importacion or ""):
+        return None
+    en_curso = _EN_CURSO.get(id_importacion)
+    if en_curso is not None:
+        return en_curso.a_diccionario()
+    ruta = _ruta(id_importacion, ".json")
+    if not ruta.exists():
+        return None
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def ruta_rechazos(id_importacion: str) -> Path | None:
+    """Ruta del archivo de rechazos, o None si no hubo rechazos (o el id no existe)."""
+    if not PATRON_ID.match(id_importacion or ""):
+        return None
+    ruta = _ruta(id_importacion, ".rechazos.ndjson")
+    return ruta if ruta.exists() else None
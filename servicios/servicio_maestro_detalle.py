@@ -0,0 +1,126 @@
+"""Servicio de operaciones maestro-detalle sobre los procedimientos almacenados del esquema."""
+# Capa de negocio:
+# - Traduce el nombre público de la relación (URL) al sufijo del procedimiento
+#   y convierte la clave al tipo del parámetro (factura.numero es INTEGER).
+# - Interpreta p_resultado: exito=false → ErrorProcedimiento con el código HTTP
+#   que corresponde (404 no encontrado, 409 duplicado, 400 el resto).
+# - usuario: la contraseña se guarda como hash bcrypt (pool de procesos) y
+#   nunca se devuelve.
+
+from typing import Any
+
+from servicios.contrasenas import bcrypt_disponible, es_hash_bcrypt, verificador_contrasenas
+from servicios.excepciones import ErrorProcedimiento
+
+
+RELACIONES: dict[str, tuple[str, type]] = {
+    "persona-cliente": ("persona_con_cliente", str),            # clave: persona.codigo
+    "persona-vendedor": ("persona_con_vendedor", str),          # clave: persona.codigo
+    "empresa-cliente": ("empresa_con_cliente", str),            # clave: empresa.codigo
+    "factura-productos": ("factura_con_productosporfactura", int),  # clave: factura.numero
+    "usuario-roles": ("usuario_con_rol_usuario", str),          # clave: usuario.email
+}
+# Nombre en la URL → (sufijo de los sp_*, tipo de la clave del maestro).
+
+MAX_DETALLES = 1000
+# Tope de detalles por operación: el procedimiento los inserta en un bucle dentro de UNA transacción.
+
+_NO_ENCONTRADO = ("no encontrado",)
+_DUPLICADO = ("duplicate key", "llave duplicada", "already exists", "ya existe")
+# p_resultado.error es SQLERRM (sin SQLSTATE): se clasifica por el texto (inglés o español).
+
+
+def _estado_http(error: str) -> int:
+    texto = error.lower()
+    if any(marca in texto for marca in _NO_ENCONTRADO):
+        return 404
+    if any(marca in texto for marca in _DUPLICADO):
+        return 409
+    return 400                         # FK, CHECK, NOT NULL, tipos: datos inválidos
+
+
+class ServicioMaestroDetalle:
+    """Lógica de negocio de las operaciones maestro-detalle."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    # ── Normalización ────────────────────────────────────────────────
+    def _relacion(self, nombre: str) -> tuple[str, type]:
+        relacion = RELACIONES.get(nombre)
+        if relacion is None:
+            raise ErrorProcedimiento(
+                f"Relación '{nombre}' desconocida. Válidas: {', '.join(RELACIONES)}.", 404
+            )
+        return relacion
+
+    def _clave(self, valor: str, tipo: type) -> str | int:
+        if not valor or not valor.strip():
+            raise ValueError("La clave del maestro no puede estar vacía.")
+        try:
+            return tipo(valor.strip())
+        except ValueError:
+            raise ValueError(f"La clave del maestro debe ser {tipo.__name__}: '{valor}'.") from None
+
+    def _validar_detalles(self, detalles: list[dict[str, Any]]) -> None:
+        if len(detalles) > MAX_DETALLES:
+            raise ValueError(f"Máximo {MAX_DETALLES} detalles por operación (llegaron {len(detalles)}).")
+
+    async def _preparar_maestro(self, sufijo: str, maestro: dict[str, Any]) -> dict[str, Any]:
+        if sufijo != "usuario_con_rol_usuario" or "contrasena" not in maestro:
+            return maestro
+        contrasena = str(maestro["contrasena"])
+        if es_hash_bcrypt(contrasena):                     # Ya viene hasheada: se guarda tal cual
+            return maestro
+        if not bcrypt_disponible():
+            raise ErrorProcedimiento("No se pueden guardar contraseñas: instale bcrypt en el servidor.", 501)
+        return {**maestro, "contrasena": await verificador_contrasenas.hashear(contrasena)}
+
+    def _verificar(self, resultado: dict[str, Any]) -> dict[str, Any]:
+        if not resultado.get("exito"):
+            error = str(resultado.get("error") or "El procedimiento no se completó.")
+            raise ErrorProcedimiento(error, _estado_http(error))
+        return resultado
+
+    # ── Operaciones (una llamada al procedimiento cada una) ──────────
+    async def crear(self, nombre: str, maestro: dict[str, Any], detalles: list[dict[str, Any]],
+                    esquema: str | None = None) -> dict[str, Any]:
+        sufijo, _ = self._relacion(nombre)
+        if not maestro:
+            raise ValueError("El maestro no puede estar vacío.")
+        self._validar_detalles(detalles)
+        maestro = await self._preparar_maestro(sufijo, maestro)
+        return self._verificar(await self._repo.crear(sufijo, maestro, detalles, _esquema(esquema)))
+
+    async def obtener(self, nombre: str, clave: str, esquema: str | None = None) -> dict[str, Any]:
+        sufijo, tipo = self._relacion(nombre)
+        resultado = self._verificar(
+            await self._repo.obtener(sufijo, self._clave(clave, tipo), _esquema(esquema))
+        )
+        if isinstance(resultado.get("maestro"), dict):
+            resultado["maestro"].pop("contrasena", None)   # El hash nunca sale de la API
+        return resultado
+
+    async def actualizar(self, nombre: str, clave: str, maestro: dict[str, Any],
+                         detalles: list[dict[str, Any]], esquema: str | None = None) -> dict[str, Any]:
+        sufijo, tipo = self._relacion(nombre)
+        if not maestro:
+            raise ValueError("El maestro no puede estar vacío.")
+        self._validar_detalles(detalles)
+        clave_norm = self._clave(clave, tipo)
+        maestro = await self._preparar_maestro(sufijo, maestro)
+        return self._verificar(
+            await self._repo.actualizar(sufijo, clave_norm, maestro, detalles, _esquema(esquema))
+        )
+
+    async def eliminar(self, nombre: str, clave: str, esquema: str | None = None) -> dict[str, Any]:
+        sufijo, tipo = self._relacion(nombre)
+        return self._verificar(
+            await self._repo.eliminar(sufijo, self._clave(clave, tipo), _esquema(esquema))
+        )
+
+
+def _esquema(esquema: str | None) -> str | None:
+    return esquema.strip() if esquema and esquema.strip() else None
@@ -0,0 +1,77 @@
+"""Servicio de particiones mensuales: crear los meses que vienen y archivar los viejos."""
+# Capa de negocio del trabajo "particiones" (migración 006):
+# - Crea el mes actual y los PARTICIONES_MESES_ADELANTE siguientes: sin partición
+#   DEFAULT, una factura cuyo mes no existe falla al insertarse.
+# - Archiva los meses anteriores a PARTICIONES_MESES_RETENCION: DETACH (instantáneo,
+#   sin DELETE ni VACUUM) y traslado a PARTICIONES_ESQUEMA_ARCHIVO. Los datos siguen
+#   ahí para consultarlos o respaldarlos (pg_dump -t 'archivo.*') y borrarlos aparte.
+# Se puede ejecutar las veces que sea: lo que ya está hecho no se repite.
+# La API lo encola sola cada PARTICIONES_PROGRAMAR_CADA horas (ejecutor_trabajos).
+
+from datetime import date
+from typing import Any
+
+from config import get_settings
+from servicios.inquilinos import es_nombre_valido
+
+
+def _sumar_meses(mes: date, meses: int) -> date:
+    """Primer día del mes que está `meses` después (o antes, si es negativo)."""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class ServicioParticiones:
+    """Lógica de negocio del mantenimiento de particiones."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def mantener(self, esquema: str | None = None, meses_adelante: int | None = None,
+                       meses_retencion: int | None = None, hoy: date | None = None,
+                       solo_si_particionada: bool = False) -> dict[str, Any]:
+        """{"creadas": ["2026-11", ...], "archivadas": [{"mes", "facturas"}], "errores": [...]}."""
+        config = get_settings().particiones
+        adelante = config.meses_adelante if meses_adelante is None else meses_adelante
+        retencion = config.meses_retencion if meses_retencion is None else meses_retencion
+        if adelante < 0 or retencion < 0:
+            raise ValueError("meses_adelante y meses_retencion no pueden ser negativos.")
+        if not es_nombre_valido(config.esquema_archivo):
+            raise ValueError(f"PARTICIONES_ESQUEMA_ARCHIVO inválido: '{config.esquema_archivo}'.")
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+
+        meses = await self._repo.listar_meses(esquema_norm)
+        if meses is None and solo_si_particionada:        # Ejecución programada: nada que mantener
+            return {"creadas": [], "archivadas": [], "errores": [], "omitida": "factura no está particionada"}
+        if meses is None:
+            raise ValueError("La tabla factura no está particionada: aplique la migración 006 "
+                             "(o SELECT particionar_facturas('<esquema>') para un inquilino).")
+
+        actual = (hoy or date.today()).replace(day=1)
+        creadas = []
+        for desplazamiento in range(adelante + 1):
+            mes = _sumar_meses(actual, desplazamiento)
+            if await self._repo.crear_mes(mes, esquema_norm):
+                creadas.append(f"{mes:%Y-%m}")
+
+        archivadas, errores = [], []
+        if retencion > 0:
+            primero_conservado = _sumar_meses(actual, -retencion)
+            for mes in meses:
+                if mes >= primero_conservado:
+                    break                                  # Ordenados: el resto se conserva
+                try:
+                    facturas = await self._repo.archivar_mes(
+                        mes, config.esquema_archivo, config.espera_bloqueo, esquema_norm
+                    )
+                except RuntimeError as ex:                 # Ej: sin bloqueo a tiempo; queda para la próxima
+                    errores.append({"mes": f"{mes:%Y-%m}", "error": str(ex)})
+                    continue
+                if facturas is not None:
+                    archivadas.append({"mes": f"{mes:%Y-%m}", "facturas": facturas})
+
+        return {"creadas": creadas, "archivadas": archivadas, "errores": errores,
+                "esquema_archivo": config.esquema_archivo,
+                "hasta": f"{_sumar_meses(actual, adelante):%Y-%m}"}
@@ -3,6 +3,18 @@
 
 from typing import Any                # Any: tipo comodín para dict[str, Any].
 
+from servicios.validacion_masiva import validar_productos
+
+
+MAX_OPERACIONES_LOTE = 1000
+# Tope de operaciones por lote: un lote gigante retiene una conexión y sus bloqueos
+# durante toda la transacción.
+_OPERACIONES_LOTE = ("crear", "actualizar", "eliminar")
+
+MAX_FILAS_MASIVO = 100_000
+# Tope de productos por POST /api/producto/masivo. Se cuenta mientras se valida:
+# la fila 100.001 corta la validación (413) sin procesar el resto del cuerpo.
+
 
 class ServicioProducto:
     """Lógica de negocio para producto."""
@@ -24,6 +36,13 @@ class ServicioProducto:
         return await self._repo.obtener_todos(esquema_norm, limite_norm)
         # Delega al repositorio. El servicio NO ejecuta SQL.
 
+    # ── OPERACIÓN 1b: LISTAR EN COLUMNAS ─────────────────────────────
+    async def listar_columnas(self, esquema: str | None = None, limite: int | None = None) -> tuple[list[str], list[tuple]]:
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        limite_norm = limite if limite and limite > 0 else None
+        return await self._repo.obtener_columnas(esquema_norm, limite_norm)
+        # Misma normalización que listar(); el controller decide el formato (Arrow/MessagePack).
+
     # ── OPERACIÓN 2: BUSCAR POR CÓDIGO ───────────────────────────────
     async def obtener_por_codigo(self, codigo: str, esquema: str | None = None) -> list[dict[str, Any]]:
         if not codigo or not codigo.strip():               # Validación de negocio
@@ -31,6 +50,15 @@ class ServicioProducto:
         esquema_norm = esquema.strip() if esquema and esquema.strip() else None
         return await self._repo.obtener_por_codigo(codigo, esquema_norm)
 
+    # ── OPERACIÓN 2b: BUSCAR POR NOMBRE ──────────────────────────────
+    async def buscar_por_nombre(self, prefijo: str, esquema: str | None = None,
+                                limite: int | None = None) -> list[dict[str, Any]]:
+        if not prefijo or not prefijo.strip():
+            raise ValueError("El prefijo del nombre no puede estar vacío.")
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        limite_norm = limite if limite and limite > 0 else None
+        return await self._repo.buscar_por_nombre(prefijo.strip(), esquema_norm, limite_norm)
+
     # ── OPERACIÓN 3: CREAR ───────────────────────────────────────────
     async def crear(self, datos: dict[str, Any], esquema: str | None = None) -> bool:
         if not datos:                                      # None, {} o vacío
@@ -49,9 +77,70 @@ class ServicioProducto:
         esquema_norm = esquema.strip() if esquema and esquema.strip() else None
         return await self._repo.actualizar(codigo, datos, esquema_norm)
 
+    # ── OPERACIÓN 4b: ACTUALIZAR PARCIAL ─────────────────────────────
+    async def actualizar_parcial(self, codigo: str, datos: dict[str, Any], esquema: str | None = None,
+                                 retornar: bool = False) -> dict[str, Any] | None:
+        if not codigo or not codigo.strip():
+            raise ValueError("El código no puede estar vacío.")
+        if not datos:                                      # PATCH con {}: nada que cambiar
+            raise ValueError("Envíe al menos un campo para actualizar.")
+        nulos = [campo for campo, valor in datos.items() if valor is None]
+        if nulos:                                          # Todas las columnas de producto son NOT NULL
+            raise ValueError(f"Los campos no admiten null: {', '.join(nulos)}.")
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        return await self._repo.actualizar_parcial(codigo, datos, esquema_norm, retornar)
+
     # ── OPERACIÓN 5: ELIMINAR ────────────────────────────────────────
     async def eliminar(self, codigo: str, esquema: str | None = None) -> int:
         if not codigo or not codigo.strip():
             raise ValueError("El código no puede estar vacío.")
         esquema_norm = esquema.strip() if esquema and esquema.strip() else None
         return await self._repo.eliminar(codigo, esquema_norm)
+
+    # ── OPERACIÓN 6: LOTE ────────────────────────────────────────────
+    async def ejecutar_lote(self, operaciones: list[dict[str, Any]], esquema: str | None = None,
+                            todo_o_nada: bool = True) -> dict[str, Any]:
+        if not operaciones:
+            raise ValueError("El lote debe contener al menos una operación.")
+        if len(operaciones) > MAX_OPERACIONES_LOTE:
+            raise ValueError(f"El lote no puede superar {MAX_OPERACIONES_LOTE} operaciones.")
+        for indice, operacion in enumerate(operaciones):
+            tipo = operacion.get("operacion")
+            if tipo not in _OPERACIONES_LOTE:
+                raise ValueError(f"Operación {indice}: tipo '{tipo}' no válido. Opciones: {list(_OPERACIONES_LOTE)}")
+            if tipo != "crear" and not (operacion.get("codigo") or "").strip():
+                raise ValueError(f"Operación {indice}: el código no puede estar vacío.")
+            if tipo != "eliminar" and not operacion.get("datos"):
+                raise ValueError(f"Operación {indice}: los datos no pueden estar vacíos.")
+        # Se valida TODO el lote antes de abrir la transacción: un lote mal formado
+        # no debe ocupar una conexión.
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        return await self._repo.ejecutar_lote(operaciones, esquema_norm, todo_o_nada)
+
+    # ── OPERACIÓN 7: CREAR MASIVO ────────────────────────────────────
+    async def crear_masivo(self, cuerpo: bytes, esquema: str | None = None) -> dict[str, Any]:
+        if not cuerpo or not cuerpo.strip():
+            raise ValueError("El cuerpo no puede estar vacío.")
+        filas, errores = validar_productos(cuerpo, MAX_FILAS_MASIVO)  # Bytes → tuplas + errores por fila
+        recibidas = len(filas) + len(errores)
+
+        unicas: list[tuple] = []
+        primera: dict[str, int] = {}                       # codigo → índice donde apareció primero
+        for indice, fila in filas:
+            if fila[0] in primera:                         # Repetido en el mismo cuerpo
+                errores.append({"indice": indice, "error": f"codigo repetido (fila {primera[fila[0]]})"})
+                continue
+            primera[fila[0]] = indice
+            unicas.append(fila)
+        errores.sort(key=lambda e: e["indice"])
+
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        insertados = set(await self._repo.crear_masivo(unicas, esquema_norm)) if unicas else set()
+        return {
+            "recibidas": recibidas,
+            "insertadas": len(insertados),
+            "existentes": [fila[0] for fila in unicas if fila[0] not in insertados],
+            "rechazadas": len(errores),
+            "errores": errores,
+        }
+    # Las filas inválidas no detienen el lote: se reportan por índice y el resto se inserta.
@@ -0,0 +1,282 @@
+"""Servicio de reposición de stock: pronóstico de demanda y punto de reorden por producto."""
+# Capa de negocio: mantiene en memoria la demanda diaria de TODO el catálogo
+# (una matriz NumPy productos × días) y calcula el pronóstico de una sola pasada.
+#
+# Actualización incremental (no se relee la historia completa en cada petición):
+# - Marca de agua: el último factura.numero visto (SERIAL). Las facturas nuevas
+#   son las de número mayor; solo se recalculan los DÍAS en que cayeron.
+# - Hoy (y los días transcurridos desde la última actualización) se recalculan
+#   siempre: cubre líneas agregadas a una factura que ya se había visto.
+# - Al cambiar de día la ventana se corre (np.roll) y el día nuevo entra en cero.
+# - Cada REPOSICION_RECONSTRUCCION segundos se reconstruye todo: cubre borrados
+#   y cambios en facturas viejas, que la marca de agua no detecta.
+#
+# Pronóstico (sobre los días COMPLETOS; hoy va por la mitad y bajaría la media):
+# - media móvil y desviación de los últimos REPOSICION_VENTANA_MEDIA días
+# - suavizado exponencial simple como producto matriz × vector de pesos
+# - punto de reorden = demanda × plazo + z × desviación × √plazo
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from statistics import NormalDist
+from typing import Any
+
+try:                                   # Dependencia opcional
+    import numpy as np
+except ImportError:                    # Sin numpy: /api/producto/reposicion responde 501
+    np = None
+
+from config import get_settings
+from servicios.inquilinos import inquilino_actual
+from servicios.metricas import metricas
+
+
+_SIN_NOVEDADES = date.max
+# desde_dia para obtener_novedades cuando solo interesan hoy y la marca de agua.
+
+_DEMANDA_MINIMA = 1e-3
+# Unidades/día bajo las que el pronóstico se toma como cero: el suavizado nunca
+# llega a 0 exacto (una venta de hace meses deja 1e-50) y daría coberturas absurdas.
+
+
+@dataclass
+class EstadoPronostico:
+    """Demanda diaria de un inquilino: filas = productos, columnas = días (la última es hoy)."""
+    inicio: date                                   # Día de la columna 0
+    hoy: date                                      # Día de la última columna
+    demanda: "np.ndarray"                          # float64 [productos, dias_historia + 1]
+    codigos: list[str] = field(default_factory=list)
+    posicion: dict[str, int] = field(default_factory=dict)  # codigo → fila de la matriz
+    ultimo_numero: int = 0                         # Marca de agua (factura.numero)
+    construido_en: float = 0.0                     # time.monotonic() de la última reconstrucción
+    resultado: dict[str, Any] | None = None        # Último pronóstico calculado
+    calculado_en: float = 0.0
+
+    def agregar_productos(self, codigos: list[str]) -> None:
+        """Productos nuevos del catálogo → filas nuevas en cero (al final de la matriz)."""
+        nuevos = [c for c in codigos if c not in self.posicion]
+        if not nuevos:
+            return
+        for codigo in nuevos:
+            self.posicion[codigo] = len(self.codigos)
+            self.codigos.append(codigo)
+        ceros = np.zeros((len(nuevos), self.demanda.shape[1]))
+        self.demanda = np.vstack([self.demanda, ceros])
+
+    def desplazar(self, hoy: date) -> None:
+        """Corre la ventana hasta hoy: salen los días más viejos, entran días en cero."""
+        corrimiento = (hoy - self.hoy).days
+        if corrimiento <= 0:
+            return
+        self.demanda = np.roll(self.demanda, -corrimiento, axis=1)
+        self.demanda[:, -corrimiento:] = 0
+        self.inicio += timedelta(days=corrimiento)
+        self.hoy = hoy
+
+
+_ESTADOS: dict[str, EstadoPronostico] = {}
+# Inquilino → estado. Vive mientras viva el proceso (cada worker tiene el suyo).
+_CANDADOS: dict[str, asyncio.Lock] = {}
+# Una actualización a la vez por inquilino: las demás esperan y reutilizan el resultado.
+
+
+def numpy_disponible() -> bool:
+    return np is not None
+
+
+def _validar(config) -> None:
+    if config.dias_historia < 2:
+        raise ValueError("REPOSICION_DIAS_HISTORIA debe ser al menos 2.")
+    if not 2 <= config.ventana_media <= config.dias_historia:
+        raise ValueError("REPOSICION_VENTANA_MEDIA debe estar entre 2 y REPOSICION_DIAS_HISTORIA.")
+    if not 0 < config.alfa <= 1:
+        raise ValueError("REPOSICION_ALFA debe estar en (0, 1].")
+    if not 0.5 <= config.nivel_servicio < 1:
+        raise ValueError("REPOSICION_NIVEL_SERVICIO debe estar en [0.5, 1).")
+    if config.plazo_entrega_dias < 0 or config.ciclo_revision_dias < 0:
+        raise ValueError("Plazo de entrega y ciclo de revisión no pueden ser negativos.")
+
+
+# =====================================================================
+# CÁLCULO VECTORIZADO
+# =====================================================================
+
+def pesos_suavizado(dias: int, alfa: float) -> "np.ndarray":
+    """Pesos del suavizado exponencial simple: s = historia @ pesos (una sola multiplicación)."""
+    exponentes = np.arange(dias - 1, -1, -1)                 # dias-1, ..., 1, 0 (hoy-1 pesa más)
+    pesos = alfa * (1 - alfa) ** exponentes
+    pesos[0] = (1 - alfa) ** (dias - 1)                      # s0 = x0: el primer día arrastra el resto
+    return pesos
+    # Desenrollar s_t = a·x_t + (1-a)·s_(t-1) con s_0 = x_0 da esos pesos (suman 1).
+    # Así el suavizado de TODOS los productos es un matvec, no un bucle por día.
+
+
+def pronosticar(demanda: "np.ndarray", stock: "np.ndarray", config) -> dict[str, "np.ndarray"]:
+    """Matriz de demanda [productos, días] + stock → columnas del pronóstico por producto."""
+    historia = demanda[:, :-1]                               # Sin hoy: el día aún no termina
+    reciente = historia[:, -config.ventana_media:]
+    media = reciente.mean(axis=1)
+    desviacion = reciente.std(axis=1, ddof=1)                # Desviación muestral (n - 1)
+    suavizada = historia @ pesos_suavizado(historia.shape[1], config.alfa)
+    suavizada[suavizada < _DEMANDA_MINIMA] = 0
+
+    plazo = config.plazo_entrega_dias
+    z = NormalDist().inv_cdf(config.nivel_servicio)          # 0.95 → 1.645
+    seguridad = z * desviacion * math.sqrt(plazo)
+    punto_reorden = suavizada * plazo + seguridad
+    objetivo = suavizada * (plazo + config.ciclo_revision_dias) + seguridad
+    # Política de revisión periódica: al reponer se pide hasta cubrir plazo + ciclo.
+
+    reponer = (stock <= punto_reorden) & (suavizada > 0)
+    sugerida = np.where(reponer, np.ceil(np.maximum(objetivo - stock, 0)), 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cobertura = np.where(suavizada > 0, stock / suavizada, np.inf)
+    return {
+        "media_movil": media, "desviacion": desviacion, "demanda_diaria": suavizada,
+        "stock_seguridad": seguridad, "punto_reorden": punto_reorden,
+        "cantidad_sugerida": sugerida, "dias_cobertura": cobertura, "reponer": reponer,
+    }
+
+
+def _detalle(catalogo: list[tuple], filas: "np.ndarray", demanda: "np.ndarray",
+             config) -> list[dict[str, Any]]:
+    """Pronóstico del catálogo actual, ordenado: primero lo que hay que reponer, por cobertura."""
+    stock = np.array([fila[2] for fila in catalogo], dtype=np.float64)
+    columnas = pronosticar(demanda[filas], stock, config)
+    orden = np.lexsort((columnas["dias_cobertura"], ~columnas["reponer"]))
+    listas = {nombre: columna[orden].tolist() for nombre, columna in columnas.items()}
+    return [
+        {
+            "codigo": catalogo[i][0],
+            "nombre": catalogo[i][1],
+            "stock": catalogo[i][2],
+            "demanda_diaria": round(listas["demanda_diaria"][n], 3),
+            "media_movil": round(listas["media_movil"][n], 3),
+            "desviacion": round(listas["desviacion"][n], 3),
+            "stock_seguridad": round(listas["stock_seguridad"][n], 2),
+            "punto_reorden": round(listas["punto_reorden"][n], 2),
+            "dias_cobertura": None if math.isinf(listas["dias_cobertura"][n])
+                              else round(listas["dias_cobertura"][n], 1),
+            "reponer": listas["reponer"][n],
+            "cantidad_sugerida": int(listas["cantidad_sugerida"][n]),
+        }
+        for n, i in enumerate(orden.tolist())
+    ]
+    # dias_cobertura = None: sin demanda el stock no se agota (inf no es JSON válido).
+
+
+# =====================================================================
+# SERVICIO
+# =====================================================================
+
+class ServicioReposicion:
+    """Lógica de negocio de la reposición de stock."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    async def pronosticar(self, esquema: str | None = None) -> dict[str, Any]:
+        """Pronóstico de todo el catálogo. Reutiliza el último si tiene menos de REPOSICION_INTERVALO s."""
+        config = get_settings().reposicion
+        _validar(config)
+        esquema_norm = esquema.strip() if esquema and esquema.strip() else None
+        clave = esquema_norm or inquilino_actual() or "public"
+
+        estado = _ESTADOS.get(clave)
+        if self._vigente(estado, config):
+            metricas.incrementar("reposicion_total", modo="cache")
+            return estado.resultado
+
+        candado = _CANDADOS.setdefault(clave, asyncio.Lock())
+        async with candado:
+            estado = _ESTADOS.get(clave)
+            if self._vigente(estado, config):          # Otra petición actualizó mientras se esperaba
+                metricas.incrementar("reposicion_total", modo="cache")
+                return estado.resultado
+            try:
+                estado = await self._actualizar(clave, esquema_norm, estado, config)
+            except BaseException:
+                _ESTADOS.pop(clave, None)              # Matriz a medio actualizar: la próxima es completa
+                raise
+        return estado.resultado
+
+    @staticmethod
+    def _vigente(estado: EstadoPronostico | None, config) -> bool:
+        return (estado is not None and estado.resultado is not None
+                and time.monotonic() - estado.calculado_en < config.intervalo)
+
+    async def _actualizar(self, clave, esquema, estado, config) -> EstadoPronostico:
+        inicio_calculo = time.perf_counter()
+        columnas = config.dias_historia + 1                    # Historia completa + hoy
+
+        completo = (
+            estado is None
+            or estado.demanda.shape[1] != columnas             # Cambió REPOSICION_DIAS_HISTORIA
+            or time.monotonic() - estado.construido_en >= config.reconstruccion
+        )
+        if not completo:
+            hoy, ultimo, nuevos = await self._repo.obtener_novedades(
+                esquema, estado.ultimo_numero, estado.inicio
+            )
+            completo = not 0 <= (hoy - estado.hoy).days < columnas   # Sin actividad por semanas
+        if completo:
+            hoy, ultimo, _ = await self._repo.obtener_novedades(esquema, 0, _SIN_NOVEDADES)
+            estado = EstadoPronostico(
+                inicio=hoy - timedelta(days=columnas - 1), hoy=hoy,
+                demanda=np.zeros((0, columnas)), construido_en=time.monotonic()
+            )
+            dias = [estado.inicio + timedelta(days=d) for d in range(columnas)]
+        else:
+            dia_anterior = estado.hoy
+            estado.desplazar(hoy)
+            dias = sorted({d for d in nuevos if estado.inicio <= d <= hoy}
+                          | {dia_anterior + timedelta(days=d) for d in range((hoy - dia_anterior).days + 1)})
+            # Días con facturas nuevas + desde el último "hoy" hasta hoy (siempre se recalculan).
+
+        catalogo, filas_demanda = await self._repo.obtener_demanda_diaria(esquema, dias)
+        estado.agregar_productos([fila[0] for fila in catalogo])
+        indices = [(d - estado.inicio).days for d in dias]
+        estado.demanda[:, indices] = 0                         # Los días tocados se reemplazan completos
+        if filas_demanda:
+            pares = [(estado.posicion[c], (dia - estado.inicio).days, u)
+                     for c, dia, u in filas_demanda if c in estado.posicion]
+            if pares:
+                fila, columna, unidades = zip(*pares)
+                estado.demanda[list(fila), list(columna)] = np.array(unidades, dtype=np.float64)
+        # GROUP BY (producto, día) en SQL: cada celda llega una sola vez, basta asignar.
+        estado.ultimo_numero = max(estado.ultimo_numero, ultimo)
+
+        filas = np.array([estado.posicion[fila[0]] for fila in catalogo], dtype=np.int64)
+        detalle = await asyncio.to_thread(_detalle, catalogo, filas, estado.demanda, config)
+        # Productos borrados conservan su fila en la matriz, pero solo se informa el catálogo actual.
+
+        modo = "completo" if completo else "incremental"
+        metricas.incrementar("reposicion_total", modo=modo)
+        estado.resultado = {
+            "calculo": {
+                "modo": modo,
+                "dias_recalculados": len(dias),
+                "desde": estado.inicio.isoformat(),
+                "hasta": estado.hoy.isoformat(),
+                "ultima_factura": estado.ultimo_numero,
+                "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "duracion_ms": round((time.perf_counter() - inicio_calculo) * 1000, 1),
+                "vigencia_s": config.intervalo,
+            },
+            "parametros": {
+                "ventana_media": config.ventana_media, "alfa": config.alfa,
+                "plazo_entrega_dias": config.plazo_entrega_dias,
+                "ciclo_revision_dias": config.ciclo_revision_dias,
+                "nivel_servicio": config.nivel_servicio,
+            },
+            "productos": detalle,
+            "por_reponer": sum(1 for p in detalle if p["reponer"]),
+        }
+        estado.calculado_en = time.monotonic()
+        _ESTADOS[clave] = estado
+        return estado
@@ -0,0 +1,104 @@
+"""Servicio de la cola de trabajos en segundo plano."""
+# Capa de negocio: valida tipo y parámetros al encolar, aísla a los inquilinos
+# (cada uno solo ve sus trabajos) y delega la persistencia al repositorio.
+
+import uuid
+from typing import Any, AsyncIterator
+
+from config import get_settings
+from servicios.ejecutor_trabajos import TIPOS, ejecutor_trabajos, ruta_trabajo
+from servicios.inquilinos import inquilino_actual
+
+
+ESTADOS_FINALES = frozenset({"completado", "fallido", "cancelado"})
+
+
+class ServicioTrabajos:
+    """Lógica de negocio de la cola de trabajos."""
+
+    def __init__(self, repositorio):
+        if repositorio is None:
+            raise ValueError("repositorio no puede ser None.")
+        self._repo = repositorio
+
+    # ── API (peticiones HTTP) ────────────────────────────────────────
+
+    async def enviar(self, tipo: str, parametros: dict[str, Any] | None = None,
+                     id_trabajo: str | None = None) -> dict[str, Any]:
+        """Encola un trabajo y despierta al ejecutor. Retorna la fila creada."""
+        tipo_norm = (tipo or "").strip().lower()
+        definicion = TIPOS.get(tipo_norm)
+        if definicion is None:
+            raise ValueError(f"Tipo de trabajo '{tipo}' no existe. Opciones: {sorted(TIPOS)}")
+        parametros = dict(parametros or {})
+        if definicion.validar is not None:             # Error de parámetros → 400 ahora, no al ejecutar
+            parametros = definicion.validar(parametros)
+        trabajo = await self._repo.crear(
+            id_trabajo or uuid.uuid4().hex, tipo_norm, parametros, inquilino_actual()
+        )
+        ejecutor_trabajos.despertar()                  # Si este worker tiene cupo, arranca ya
+        return trabajo
+
+    async def programar(self, tipo: str, parametros: dict[str, Any],
+                        id_trabajo: str) -> dict[str, Any] | None:
+        """Encola un trabajo periódico con id fijo por período. None si otro worker ya lo encoló."""
+        definicion = TIPOS[tipo]
+        if definicion.validar is not None:
+            parametros = definicion.validar(dict(parametros))
+        trabajo = await self._repo.crear_si_no_existe(id_trabajo, tipo, parametros, None)
+        if trabajo is not None:
+            ejecutor_trabajos.despertar()
+        return trabajo
+
+    async def enviar_con_archivo(self, tipo: str, flujo: AsyncIterator[bytes],
+                                 parametros: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Guarda el cuerpo de la petición en disco y encola un trabajo que lo procesa."""
+        # El archivo queda COMPLETO antes del INSERT: ningún worker puede reclamar
+        # el trabajo mientras todavía se está subiendo.
+        id_trabajo = uuid.uuid4().hex
+        ruta = ruta_trabajo(id_trabajo, ".entrada")
+        limite = get_settings().importacion.tamano_maximo_mb * 2**20
+        recibidos = 0
+        try:
+            with open(ruta, "wb") as archivo:
+                async for trozo in flujo:
+                    recibidos += len(trozo)
+                    if recibidos > limite:
+                        raise ValueError(f"El archivo supera el máximo de {limite // 2**20} MB.")
+                    archivo.write(trozo)
+            return await self.enviar(tipo, {**(parametros or {}), "archivo": ruta.name}, id_trabajo)
+        except BaseException:
+            ruta.unlink(missing_ok=True)
+            raise
+
+    async def obtener(self, id_trabajo: str) -> dict[str, Any] | None:
+        """Estado del trabajo; None si no existe o es de otro inquilino."""
+        trabajo = await self._repo.obtener(id_trabajo)
+        if trabajo is None or trabajo["inquilino"] != inquilino_actual():
+            return None
+        return trabajo
+
+    async def cancelar(self, id_trabajo: str) -> dict[str, Any] | None:
+        """Cancela un trabajo pendiente o en curso. None si no existe o ya terminó."""
+        if await self.obtener(id_trabajo) is None:     # Solo los del inquilino actual
+            return None
+        return await self._repo.cancelar(id_trabajo)
+
+    # ── Ejecutor (cola) ──────────────────────────────────────────────
+
+    async def reclamar(self, tipos: list[str], propietario: str) -> dict[str, Any] | None:
+        return await self._repo.reclamar(tipos, propietario)
+
+    async def latido(self, id_trabajo: str, propietario: str,
+                     progreso: dict[str, Any] | None) -> bool | None:
+        return await self._repo.latido(id_trabajo, propietario, progreso)
+
+    async def finalizar(self, id_trabajo: str, propietario: str, estado: str,
+                        resultado: dict[str, Any] | None = None, error: str | None = None) -> None:
+        await self._repo.finalizar(id_trabajo, propietario, estado, resultado, error)
+
+    async def liberar(self, id_trabajo: str, propietario: str) -> None:
+        await self._repo.liberar(id_trabajo, propietario)
+
+    async def recuperar_huerfanos(self, segundos_sin_latido: float, max_intentos: int) -> int:
+        return await self._repo.recuperar_huerfanos(segundos_sin_latido, max_intentos)
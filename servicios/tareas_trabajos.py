@@ -0,0 +1,161 @@
+"""
+tareas_trabajos.py — Tipos de trabajo disponibles en la cola.
+
+- exportacion: tabla completa a un archivo NDJSON (descarga en /resultado).
+    parametros: {"tabla": "factura", "esquema": null, "limite": null}
+- importacion: catálogo CSV/NDJSON subido con POST /api/trabajos/importacion.
+    parametros: {"formato": "csv", "esquema": null}  (+ "archivo", lo pone el servicio)
+- particiones: crea los meses siguientes de factura y archiva los viejos (migración 006).
+    parametros: {"esquema": null, "meses_adelante": null, "meses_retencion": null}
+
+Para agregar un tipo (ej: reconstruir un reporte) basta con otra función
+decorada con @registrar_tipo en este módulo.
+"""
+
+import asyncio
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, AsyncIterator
+from uuid import UUID
+
+from servicios.ejecutor_trabajos import ContextoTrabajo, registrar_tipo, ruta_trabajo
+from servicios.fabrica_repositorios import crear_servicio_exportacion, crear_servicio_importacion
+from servicios.fabrica_repositorios import crear_servicio_particiones
+from servicios.servicio_exportacion import TABLAS_EXPORTABLES
+from servicios.servicio_importacion import FORMATO_CSV, FORMATO_NDJSON, obtener_estado
+
+
+_TROZO_LECTURA = 1024 * 1024
+# Bytes por lectura del archivo subido: mismo orden que los trozos de una petición.
+
+_FILAS_POR_LOTE = 5000
+# Filas por lote exportado: lo único de la tabla que está en memoria a la vez.
+
+
+def _valor_json(valor: Any) -> Any:
+    """Tipos de la BD → JSON, igual que los endpoints de lectura."""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, UUID):
+        return str(valor)
+    return valor
+
+
+def _esquema(parametros: dict[str, Any]) -> str | None:
+    esquema = parametros.get("esquema")
+    if esquema is not None and not isinstance(esquema, str):
+        raise ValueError("'esquema' debe ser texto.")
+    return esquema.strip() if esquema and esquema.strip() else None
+
+
+# =====================================================================
+# EXPORTACIÓN
+# =====================================================================
+
+def _validar_exportacion(parametros: dict[str, Any]) -> dict[str, Any]:
+    tabla = str(parametros.get("tabla") or "").strip().lower()
+    if tabla not in TABLAS_EXPORTABLES:
+        raise ValueError(f"'tabla' debe ser una de {sorted(TABLAS_EXPORTABLES)}.")
+    limite = parametros.get("limite")
+    if limite is not None and (not isinstance(limite, int) or limite <= 0):
+        raise ValueError("'limite' debe ser un entero positivo.")
+    return {"tabla": tabla, "esquema": _esquema(parametros), "limite": limite}
+
+
+def _escribir_ndjson(archivo, columnas: list[str], filas: list[tuple]) -> None:
+    archivo.write("".join(
+        json.dumps({columna: _valor_json(valor) for columna, valor in zip(columnas, fila)},
+                   ensure_ascii=False) + "\n"
+        for fila in filas
+    ))
+
+
+@registrar_tipo("exportacion", validar=_validar_exportacion)
+async def exportar_tabla(contexto: ContextoTrabajo) -> dict[str, Any]:
+    """Exporta la tabla a <directorio>/<id>.ndjson, lote a lote."""
+    parametros = contexto.parametros
+    progreso = {"fase": "exportando", "filas": 0}
+    contexto.fijar_progreso(progreso)                  # Mismo dict: el latido ve las filas al día
+    ruta = ruta_trabajo(contexto.id, ".ndjson")
+    lotes = crear_servicio_exportacion().exportar_por_lotes(
+        parametros["tabla"], parametros.get("esquema"), parametros.get("limite"), _FILAS_POR_LOTE
+    )
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        async for columnas, filas in lotes:            # Cursor del servidor: un lote en memoria a la vez
+            await asyncio.to_thread(_escribir_ndjson, archivo, columnas, filas)  # Fuera del event loop
+            progreso["filas"] += len(filas)
+    return {"archivo": ruta.name, "tipoContenido": "application/x-ndjson",
+            "tabla": parametros["tabla"], "filas": progreso["filas"], "bytes": ruta.stat().st_size}
+
+
+# =====================================================================
+# IMPORTACIÓN
+# =====================================================================
+
+def _validar_importacion(parametros: dict[str, Any]) -> dict[str, Any]:
+    formato = str(parametros.get("formato") or "").strip().lower()
+    if formato not in (FORMATO_CSV, FORMATO_NDJSON):
+        raise ValueError("'formato' debe ser csv o ndjson.")
+    if not parametros.get("archivo"):
+        raise ValueError("La importación se envía con POST /api/trabajos/importacion (cuerpo = archivo).")
+    return {"formato": formato, "esquema": _esquema(parametros), "archivo": parametros["archivo"]}
+
+
+async def _leer_archivo(ruta) -> AsyncIterator[bytes]:
+    """Archivo subido → trozos, como si fuera el cuerpo de la petición."""
+    with open(ruta, "rb") as archivo:
+        while True:
+            trozo = await asyncio.to_thread(archivo.read, _TROZO_LECTURA)
+            if not trozo:
+                return
+            yield trozo
+
+
+@registrar_tipo("importacion", validar=_validar_importacion)
+async def importar_catalogo(contexto: ContextoTrabajo) -> dict[str, Any]:
+    """Importa el archivo subido con el mismo servicio que POST /api/importar/producto."""
+    parametros = contexto.parametros
+    ruta = ruta_trabajo(contexto.id, ".entrada")
+    if ruta.name != parametros["archivo"] or not ruta.exists():
+        raise ValueError("El archivo subido ya no existe (¿se borró TRABAJOS_DIRECTORIO?).")
+    id_importacion = f"{contexto.id}-{contexto.intentos}"   # Un reintento no choca con el anterior
+    contexto.fijar_progreso(lambda: obtener_estado(id_importacion))
+    try:
+        resultado = await crear_servicio_importacion().importar(
+            _leer_archivo(ruta), parametros["formato"], parametros.get("esquema"), id_importacion
+        )
+    finally:
+        if not contexto.interrumpido:                  # Si se retoma, el archivo hace falta
+            ruta.unlink(missing_ok=True)
+    return resultado
+
+
+# =====================================================================
+# PARTICIONES MENSUALES DE FACTURAS
+# =====================================================================
+
+def _validar_particiones(parametros: dict[str, Any]) -> dict[str, Any]:
+    validados = {"esquema": _esquema(parametros), "programado": bool(parametros.get("programado"))}
+    for nombre in ("meses_adelante", "meses_retencion"):
+        valor = parametros.get(nombre)
+        if valor is not None and (not isinstance(valor, int) or valor < 0):
+            raise ValueError(f"'{nombre}' debe ser un entero >= 0.")
+        validados[nombre] = valor                      # None: el valor de PARTICIONES_*
+    return validados
+
+
+@registrar_tipo("particiones", validar=_validar_particiones)
+async def mantener_particiones(contexto: ContextoTrabajo) -> dict[str, Any]:
+    """Crea los meses que vienen y archiva los que pasaron la retención."""
+    # Lo encola el ejecutor cada PARTICIONES_PROGRAMAR_CADA horas (o POST /api/trabajos):
+    # repetirlo no hace nada nuevo.
+    parametros = contexto.parametros
+    contexto.fijar_progreso({"fase": "particionando"})
+    return await crear_servicio_particiones().mantener(
+        parametros.get("esquema"), parametros.get("meses_adelante"), parametros.get("meses_retencion"),
+        solo_si_particionada=parametros.get("programado", False)
+    )
+    # programado=True: un esquema sin la migración 006 se omite en vez de fallar cada día.
@@ -0,0 +1,315 @@
+"""
+trazas.py — Trazas distribuidas (spans) compatibles con OpenTelemetry.
+
+Una petición lenta puede estar lenta en la validación, en la lógica de
+negocio, en la detección de tipos de columna o en el SQL. Cada capa abre
+un span (controller → servicio → repositorio → SQL) y al final se ve
+dónde se fue el tiempo, también en producción.
+
+- Contexto W3C: el header 'traceparent' de la petición (si viene) hace
+  que estos spans cuelguen de la traza del cliente / API gateway.
+- Muestreo: se respeta la decisión del padre (flag 'sampled'); sin padre,
+  se muestrea TRAZAS_MUESTREO de las trazas (0.0 a 1.0), decidido por el
+  trace_id (todas las piezas de una traza toman la misma decisión).
+- Costo sin muestreo: una ContextVar en None → cada span es un no-op.
+- Exportación: formato OTLP/JSON (ExportTraceServiceRequest). Un hilo
+  aparte agrupa los spans y los escribe en TRAZAS_ARCHIVO (una línea por
+  lote, como el "file exporter" del OpenTelemetry Collector) y/o los
+  envía por HTTP a TRAZAS_COLECTOR (ej: http://localhost:4318/v1/traces).
+
+No depende del SDK de OpenTelemetry: el formato de salida es el estándar,
+así que cualquier colector o backend (Jaeger, Tempo...) lo puede leer.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+from config import get_settings
+from servicios.metricas import metricas
+
+
+_log = logging.getLogger(__name__)
+
+KIND_INTERNO, KIND_SERVIDOR, KIND_CLIENTE = 1, 2, 3
+# SpanKind de OTLP: INTERNAL=1, SERVER=2, CLIENT=3 (la BD se modela como CLIENT).
+
+_PATRON_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_MAX_SQL = 2000
+# Caracteres del texto SQL guardados en db.statement.
+
+
+class Span:
+    """Un tramo de la traza. Se exporta al cerrarse."""
+
+    __slots__ = ("trace_id", "span_id", "padre_id", "nombre", "kind",
+                 "inicio_ns", "fin_ns", "atributos", "error")
+
+    def __init__(self, trace_id: str, padre_id: str | None, nombre: str, kind: int = KIND_INTERNO):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.padre_id = padre_id
+        self.nombre = nombre
+        self.kind = kind
+        self.inicio_ns = time.time_ns()
+        self.fin_ns = 0
+        self.atributos: dict[str, Any] = {}
+        self.error: str | None = None
+
+    def atributo(self, clave: str, valor: Any) -> None:
+        self.atributos[clave] = valor
+
+    def hijo(self, nombre: str, kind: int = KIND_INTERNO) -> "Span":
+        return Span(self.trace_id, self.span_id, nombre, kind)
+
+    def cerrar(self) -> None:
+        self.fin_ns = time.time_ns()
+        exportador.encolar(self)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def a_otlp(self) -> dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.nombre,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.inicio_ns),    # OTLP/JSON: enteros de 64 bits como texto
+            "endTimeUnixNano": str(self.fin_ns),
+            "attributes": [_atributo_otlp(k, v) for k, v in self.atributos.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.padre_id:
+            span["parentSpanId"] = self.padre_id
+        return span
+
+
+def _atributo_otlp(clave: str, valor: Any) -> dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"key": clave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": clave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": clave, "value": {"doubleValue": valor}}
+    return {"key": clave, "value": {"stringValue": str(valor)}}
+
+
+# =====================================================================
+# CONTEXTO DE LA TRAZA (por petición)
+# =====================================================================
+
+_span_actual: ContextVar[Span | None] = ContextVar("span_actual", default=None)
+
+
+def span_actual() -> Span | None:
+    """Span activo (None si la petición no se muestrea: todo es no-op)."""
+    return _span_actual.get()
+
+
+def iniciar_traza(nombre: str, traceparent: str | None, kind: int = KIND_SERVIDOR) -> Span | None:
+    """Span raíz de la petición, o None si la traza no se muestrea."""
+    config = get_settings().trazas
+    coincidencia = _PATRON_TRACEPARENT.match((traceparent or "").strip().lower())
+    if coincidencia and coincidencia.group(1) != "0" * 32:
+        trace_id, padre_id, flags = coincidencia.groups()
+        if config.respetar_padre:
+            muestrear = bool(int(flags, 16) & 1)       # Flag 'sampled' del llamador
+        else:
+            muestrear = _por_ratio(trace_id, config.muestreo)
+    else:
+        trace_id, padre_id = os.urandom(16).hex(), None
+        muestrear = _por_ratio(trace_id, config.muestreo)
+    if not muestrear:
+        return None
+    return Span(trace_id, padre_id, nombre, kind)
+
+
+def _por_ratio(trace_id: str, ratio: float) -> bool:
+    """Decisión determinista por trace_id (como TraceIdRatioBased de OpenTelemetry)."""
+    if ratio >= 1.0:
+        return True
+    if ratio <= 0.0:
+        return False
+    return int(trace_id[16:], 16) < ratio * 2**64
+
+
+def fijar_span(span: Span | None) -> None:
+    _span_actual.set(span)
+
+
+@contextmanager
+def span(nombre: str, kind: int = KIND_INTERNO, **atributos) -> Iterator[Span | None]:
+    """Abre un span hijo del actual. Sin traza activa no hace nada."""
+    padre = _span_actual.get()
+    if padre is None:
+        yield None
+        return
+    hijo = padre.hijo(nombre, kind)
+    hijo.atributos.update(atributos)
+    token = _span_actual.set(hijo)
+    try:
+        yield hijo
+    except BaseException as ex:
+        hijo.error = f"{type(ex).__name__}: {ex}"[:500]
+        raise
+    finally:
+        _span_actual.reset(token)
+        hijo.cerrar()
+
+
+# =====================================================================
+# INSTRUMENTACIÓN AUTOMÁTICA DE LAS CAPAS
+# =====================================================================
+
+def trazar(capa: str, nombre: str):
+    """Decorador para una función async: un span por llamada."""
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        async def envoltura(*args, **kwargs):
+            if _span_actual.get() is None:             # Ruta rápida: petición no muestreada
+                return await funcion(*args, **kwargs)
+            with span(nombre, **{"capa": capa, "code.function": funcion.__qualname__}):
+                return await funcion(*args, **kwargs)
+        envoltura.__trazado__ = True
+        return envoltura
+    return decorar
+
+
+def instrumentar_clase(clase: type, capa: str, metodos: list[str] | None = None) -> None:
+    """Envuelve los métodos async públicos de la clase (o los indicados) con un span."""
+    nombres = metodos if metodos is not None else [
+        n for n, f in vars(clase).items() if not n.startswith("_") and inspect.iscoroutinefunction(f)
+    ]
+    for nombre in nombres:
+        funcion = vars(clase).get(nombre)
+        if funcion is None or getattr(funcion, "__trazado__", False):
+            continue                                   # Heredado o ya instrumentado
+        setattr(clase, nombre, trazar(capa, f"{capa} {clase.__name__}.{nombre}")(funcion))
+
+
+# =====================================================================
+# SQL (lo llaman los eventos del engine en el repositorio base)
+# =====================================================================
+
+def abrir_span_sql(sql: str) -> Span | None:
+    padre = _span_actual.get()
+    if padre is None:
+        return None
+    hijo = padre.hijo(_nombre_sql(sql), KIND_CLIENTE)
+    hijo.atributos.update({
+        "capa": "sql",
+        "db.system": "postgresql",
+        "db.statement": " ".join(sql.split())[:_MAX_SQL],   # Plantilla con $1, $2...: sin valores
+    })
+    return hijo
+
+
+def cerrar_span_sql(hijo: Span | None, filas: int | None = None, error: str | None = None) -> None:
+    if hijo is None:
+        return
+    if filas is not None and filas >= 0:
+        hijo.atributo("db.rows", filas)
+    hijo.error = error
+    hijo.cerrar()
+
+
+def _nombre_sql(sql: str) -> str:
+    """'SELECT * FROM "public"."producto" ...' → 'SQL SELECT'."""
+    palabras = sql.split(None, 1)
+    return f"SQL {palabras[0].upper()}" if palabras else "SQL"
+
+
+# =====================================================================
+# EXPORTADOR (hilo aparte, por lotes)
+# =====================================================================
+
+class ExportadorOTLP:
+    """Agrupa spans cerrados y los escribe/envía en formato OTLP/JSON."""
+
+    def __init__(self):
+        self._cola: queue.Queue[Span | None] = queue.Queue()
+        self._hilo: threading.Thread | None = None
+
+    def iniciar(self) -> None:
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="exportador-trazas", daemon=True)
+            self._hilo.start()
+
+    def detener(self) -> None:
+        """Vacía la cola y termina (lo llama el apagado de la app)."""
+        if self._hilo is not None:
+            self._cola.put(None)
+            self._hilo.join(timeout=10)
+            self._hilo = None
+
+    def encolar(self, span: Span) -> None:
+        if self._hilo is None:
+            return
+        if self._cola.qsize() >= get_settings().trazas.max_cola:
+            metricas.incrementar("trazas_spans_descartados_total")   # Exportador atrasado: no crecer sin límite
+            return
+        self._cola.put(span)
+
+    def _bucle(self) -> None:
+        config = get_settings().trazas
+        lote: list[Span] = []
+        limite = time.monotonic() + config.intervalo
+        while True:
+            try:
+                span = self._cola.get(timeout=max(limite - time.monotonic(), 0.01))
+            except queue.Empty:
+                span = ...
+            if span is None:                           # detener()
+                self._exportar(lote)
+                return
+            if span is not ...:
+                lote.append(span)
+            if len(lote) >= config.lote or time.monotonic() >= limite:
+                self._exportar(lote)
+                lote = []
+                limite = time.monotonic() + config.intervalo
+
+    def _exportar(self, lote: list[Span]) -> None:
+        if not lote:
+            return
+        config = get_settings().trazas
+        cuerpo = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [
+                _atributo_otlp("service.name", config.servicio),
+                _atributo_otlp("process.pid", os.getpid()),
+            ]},
+            "scopeSpans": [{"scope": {"name": "apifacturas.trazas"},
+                            "spans": [s.a_otlp() for s in lote]}],
+        }]}, separators=(",", ":"))
+        try:
+            if config.archivo:
+                ruta = Path(config.archivo)
+                ruta.parent.mkdir(parents=True, exist_ok=True)
+                with open(ruta, "a", encoding="utf-8") as archivo:
+                    archivo.write(cuerpo + "\n")
+            if config.colector:
+                peticion = urllib.request.Request(
+                    config.colector, data=cuerpo.encode(), method="POST",
+                    headers={"Content-Type": "application/json"},
+                )
+                urllib.request.urlopen(peticion, timeout=5).close()
+            metricas.incrementar("trazas_spans_exportados_total", len(lote))
+        except Exception as ex:                        # Exportar nunca tumba la API
+            metricas.incrementar("trazas_errores_exportacion_total")
+            _log.warning("No se pudieron exportar %d spans (%s)", len(lote), ex)
+
+
+exportador = ExportadorOTLP()
+# Instancia única por worker (proceso).
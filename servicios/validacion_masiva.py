@@ -0,0 +1,114 @@
+"""
+validacion_masiva.py — Validación rápida de listas grandes de productos.
+
+El camino de POST /api/producto/ (json.loads + un modelo por fila +
+model_dump() → dict → detección del tipo de cada columna en el repositorio)
+está bien para una fila, pero con miles se vuelve CPU pura. Aquí:
+
+- TypeAdapter cacheado: el validador de la lista se compila UNA vez por
+  proceso, no en cada petición.
+- validate_json sobre los BYTES del cuerpo: parseo y validación en una
+  sola pasada dentro de pydantic-core, sin json.loads() intermedio.
+- Cada fila se valida como FilaProducto (TypedDict con las restricciones
+  de la tabla): ni instancias de modelo ni chequeos en Python por fila.
+- Errores por fila sin abortar: una fila inválida no hace fallar la lista,
+  queda marcada (_Rechazada) y solo ESA se vuelve a validar para obtener
+  el mensaje. Con 1% de filas malas no hay una segunda pasada completa.
+- Salida en tuplas (codigo, nombre, stock, valorunitario), en el orden de
+  las columnas: el repositorio las envía tal cual, sin dicts.
+- Tope de filas contado DURANTE la validación: la fila max_filas + 1 corta
+  la pasada con ErrorCargaExcesiva (413), sin validar el resto del cuerpo.
+"""
+
+from functools import lru_cache
+from typing import Annotated, Any, Union
+
+from pydantic import AfterValidator, Field, TypeAdapter, ValidationError, ValidationInfo
+
+from models.producto import FilaProducto
+from servicios.excepciones import ErrorCargaExcesiva
+
+
+COLUMNAS_PRODUCTO = ("codigo", "nombre", "stock", "valorunitario")
+# Orden de los valores en cada tupla (el mismo de la tabla).
+
+
+class _Rechazada:
+    """Fila que no pasó FilaProducto: se guarda cruda para explicar el error después."""
+    __slots__ = ("dato",)
+
+    def __init__(self, dato: Any):
+        self.dato = dato
+
+
+_FilaORechazo = Annotated[
+    Union[FilaProducto, Annotated[Any, AfterValidator(_Rechazada)]],
+    Field(union_mode="left_to_right"),
+]
+# Primero intenta FilaProducto; si falla, acepta el valor crudo envuelto en _Rechazada.
+# Así la lista completa nunca falla por una fila.
+
+
+def _contar_fila(fila: Any, info: ValidationInfo) -> Any:
+    """Cuenta la fila ya validada; la que pasa del tope corta la validación de la lista."""
+    contador = info.context                    # {"filas": n, "maximo": m}: uno por llamada
+    contador["filas"] += 1
+    if contador["filas"] > contador["maximo"]:
+        raise ErrorCargaExcesiva(f"No se pueden crear más de {contador['maximo']} productos por petición.")
+    return fila
+
+
+_FilaContada = Annotated[_FilaORechazo, AfterValidator(_contar_fila)]
+# After y no Before: un validador "before" convierte cada fila JSON a dict de Python
+# antes de validarla (el doble de tiempo); "after" solo suma una llamada por fila.
+# ErrorCargaExcesiva no es ValueError: pydantic no la captura, sale de validate_json.
+
+
+@lru_cache(maxsize=None)
+def adaptador(tipo: Any) -> TypeAdapter:
+    """TypeAdapter por tipo, construido una sola vez (construirlo es lo caro)."""
+    return TypeAdapter(tipo)
+
+
+def _error_fila(dato: Any) -> str:
+    """Primer error de una fila rechazada (solo se llama para las inválidas)."""
+    try:
+        adaptador(FilaProducto).validate_python(dato)
+    except ValidationError as ex:
+        error = ex.errors(include_url=False, include_input=False)[0]
+        campo = ".".join(str(p) for p in error["loc"]) or "fila"
+        return f"{campo}: {error['msg']}"
+    return "fila inválida"
+
+
+def validar_productos(
+    cuerpo: bytes, max_filas: int | None = None
+) -> tuple[list[tuple[int, tuple]], list[dict[str, Any]]]:
+    """
+    Cuerpo JSON (lista de productos) → (filas válidas, errores por fila).
+
+    filas:   [(indice, (codigo, nombre, stock, valorunitario)), ...]
+    errores: [{"indice": 3, "error": "stock: Input should be a valid integer"}, ...]
+
+    Lanza ValueError solo si el cuerpo completo es inválido (no es JSON o no es una lista),
+    y ErrorCargaExcesiva en cuanto la lista pasa de max_filas elementos.
+    """
+    try:
+        if max_filas is None:
+            validadas = adaptador(list[_FilaORechazo]).validate_json(cuerpo)
+        else:
+            validadas = adaptador(list[_FilaContada]).validate_json(
+                cuerpo, context={"filas": 0, "maximo": max_filas}
+            )
+    except ValidationError as ex:              # JSON mal formado o no es una lista
+        error = ex.errors(include_url=False, include_input=False)[0]
+        raise ValueError(f"El cuerpo debe ser una lista JSON de productos ({error['msg']}).")
+
+    filas: list[tuple[int, tuple]] = []
+    errores: list[dict[str, Any]] = []
+    for indice, fila in enumerate(validadas):
+        if type(fila) is _Rechazada:
+            errores.append({"indice": indice, "error": _error_fila(fila.dato)})
+        else:
+            filas.append((indice, (fila["codigo"], fila["nombre"], fila["stock"], fila["valorunitario"])))
+    return filas, errores